@@ -1,32 +1,27 @@
-import json
-import os
 import uuid
 from typing import List, Dict, Any, Optional
 
 from utils.resource_handler import get_writable_path
+from core.managers.record_store import SQLiteStore, open_collection
 
 DATA_FILE = "assistants.json"
 
 class AssistantRepository:
-    def __init__(self):
+    def __init__(self, store: Optional[SQLiteStore] = None):
+        """
+        Args:
+            store: SQLite database holding the assistants (None keeps them in assistants.json)
+        """
         self.filepath = get_writable_path(DATA_FILE)
-        self._ensure_file_exists()
-
-    def _ensure_file_exists(self):
-        if not os.path.exists(self.filepath):
-            with open(self.filepath, 'w') as f:
-                json.dump([], f)
+        self.collection = open_collection("assistants", self.filepath, store)
 
     def get_all(self) -> List[Dict[str, Any]]:
-        with open(self.filepath, 'r') as f:
-            return json.load(f)
+        return self.collection.all()
 
     def save(self, data: List[Dict[str, Any]]):
-        with open(self.filepath, 'w') as f:
-            json.dump(data, f, indent=4)
+        self.collection.replace_all(data)
 
     def create(self, **kwargs) -> Dict[str, Any]:
-        assistants = self.get_all()
         new_assistant = {
             "id": str(uuid.uuid4()),
             "status": "stopped",
@@ -35,28 +30,21 @@ class AssistantRepository:
         # Ensure critical fields exist if not passed
         if "name" not in new_assistant: new_assistant["name"] = "New Assistant"
         
-        assistants.append(new_assistant)
-        self.save(assistants)
+        self.collection.insert(new_assistant)
         return new_assistant
 
     def update(self, assistant_id: str, **kwargs):
-        assistants = self.get_all()
-        for assistant in assistants:
-            if assistant["id"] == assistant_id:
-                for k, v in kwargs.items():
-                    if v is not None:
-                        assistant[k] = v
-                break
-        self.save(assistants)
+        def apply(assistant):
+            for k, v in kwargs.items():
+                if v is not None:
+                    assistant[k] = v
+        self.collection.update(assistant_id, apply)
 
     def get_by_id(self, assistant_id: str) -> Optional[Dict[str, Any]]:
-        assistants = self.get_all()
-        for assistant in assistants:
-            if assistant["id"] == assistant_id:
-                return assistant
-        return None
+        return self.collection.get(assistant_id)
+
+    def get_by_profile(self, profile_id: str) -> List[Dict[str, Any]]:
+        return self.collection.find("profile_id", profile_id)
 
     def delete(self, assistant_id: str):
-        assistants = self.get_all()
-        assistants = [a for a in assistants if a["id"] != assistant_id]
-        self.save(assistants)
+        self.collection.delete(assistant_id)
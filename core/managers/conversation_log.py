@@ -0,0 +1,380 @@
+"""
+Append-only conversation storage.
+
+Each conversation is a JSONL file in the directory of its scope (an assistant's history, the
+doc analyst conversations). Saving a conversation appends only what changed since the last save:
+- {"op": "meta", "data": {...}}: changed top-level fields (title, updated_at, documents...)
+- {"op": "append", "messages": [...]}: messages added at the end
+- {"op": "reset", "messages": [...]}: the full message list, when earlier messages were edited
+The first line also records the creation time, used to list conversations in creation order.
+An index (index.json) keeps the id, title, updated_at and message count of every conversation,
+so sidebars list conversations without reading their messages; entries whose log size changed
+behind the index's back (e.g. a crash between the two writes) are rebuilt from the log.
+Saved messages are expected to stay unchanged, except the last one (edited messages are detected
+when the caller passes new message objects, and trigger a reset line).
+A log is compacted (rewritten as one meta line and one append line) once it holds more lines
+than messages, which keeps the amortized cost of a save proportional to the saved message.
+A log whose last line was torn by an interrupted write is compacted before its next change, so
+new lines are not appended to the partial one.
+An optional listener is told what each save changed (e.g. to keep the search index up to date).
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+import datetime
+
+logger = logging.getLogger(__name__)
+
+LOG_EXTENSION = ".jsonl"
+INDEX_FILE = "index.json"
+
+# Conversation fields copied to the index
+SUMMARY_FIELDS = ("title", "updated_at")
+
+# Logs shorter than this are never compacted
+COMPACT_MIN_LINES = 64
+
+
+def _dump(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+class ConversationLog:
+    """Conversations of one scope, one append-only JSONL file each (thread-safe)."""
+
+    def __init__(
+        self,
+        directory: str,
+        legacy_json_path: Optional[str] = None,
+        compact_min_lines: int = COMPACT_MIN_LINES,
+        on_change: Optional[Callable[[str, Optional[Dict[str, Any]]], None]] = None
+    ):
+        """
+        Open the conversations of a scope.
+
+        Args:
+            directory: Directory holding the conversation logs
+            legacy_json_path: JSON list of conversations imported when the directory does not exist yet
+                              (the file itself is left untouched)
+            compact_min_lines: Logs shorter than this are never compacted
+            on_change: Called with (conversation_id, change) after each change, where change is
+                       {'fields': changed top-level fields, 'start': first changed position,
+                       'messages': messages from that position} ('start' and 'messages' only when
+                       messages changed), or None when the conversation was deleted
+        """
+        self.directory = directory
+        self.compact_min_lines = compact_min_lines
+        self.on_change = on_change
+        self._lock = threading.RLock()
+        # conversation id -> {"created", "fields" (field -> serialized value), "messages" (saved message
+        # objects), "last" (serialized last message), "lines", "torn" (a line of the log is unreadable)}
+        self._states: Dict[str, Dict[str, Any]] = {}
+        # conversation id -> {"id", "title", "updated_at", "message_count", "created", "size"}
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        if not os.path.isdir(directory):
+            self._import_legacy(legacy_json_path)
+
+    def _path(self, conversation_id: str) -> str:
+        return os.path.join(self.directory, f"{conversation_id}{LOG_EXTENSION}")
+
+    def _import_legacy(self, legacy_json_path: Optional[str]) -> None:
+        """Create the directory, filled with the conversations of the legacy JSON file if any."""
+        conversations = []
+        if legacy_json_path and os.path.exists(legacy_json_path):
+            try:
+                with open(legacy_json_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, list) and data and "role" in data[0]:
+                    # Oldest format: a bare message list
+                    data = [{
+                        "id": str(uuid.uuid4()),
+                        "title": "Ancienne conversation",
+                        "updated_at": str(datetime.datetime.now()),
+                        "messages": data
+                    }]
+                conversations = data if isinstance(data, list) else []
+            except Exception as e:
+                logger.error(f"Could not import conversations from {legacy_json_path}: {e}")
+
+        # Built aside then moved, so an interrupted import is retried on next start
+        tmp_dir = f"{self.directory}.importing"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        now = time.time()
+        for position, conversation in enumerate(conversations):
+            if conversation.get("id"):
+                self._write_compacted(
+                    os.path.join(tmp_dir, f"{conversation['id']}{LOG_EXTENSION}"), conversation, now + position * 1e-6
+                )
+        os.replace(tmp_dir, self.directory)
+        if conversations:
+            logger.info(f"Imported {len(conversations)} conversations into {self.directory}")
+
+    @staticmethod
+    def _write_compacted(path: str, conversation: Dict[str, Any], created: float) -> None:
+        meta = {k: v for k, v in conversation.items() if k != "messages"}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"op": "meta", "created": created, "data": meta}, ensure_ascii=False) + "\n")
+            f.write(json.dumps({"op": "append", "messages": conversation.get("messages", [])}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Load the index once, rebuilding the entries that do not match their log (caller holds the lock)."""
+        if self._index is not None:
+            return self._index
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+
+        sizes = {
+            name[:-len(LOG_EXTENSION)]: os.path.getsize(os.path.join(self.directory, name))
+            for name in os.listdir(self.directory) if name.endswith(LOG_EXTENSION)
+        }
+        self._index = {
+            conversation_id: entry for conversation_id, entry in saved.items()
+            if sizes.get(conversation_id) == entry.get("size")
+        }
+        stale = [conversation_id for conversation_id in sizes if conversation_id not in self._index]
+        for conversation_id in stale:
+            # Replaying a log refreshes its index entry
+            self._replay(conversation_id)
+        if stale or len(self._index) != len(saved):
+            self._save_index()
+        return self._index
+
+    def _save_index(self) -> None:
+        """Write the index atomically (caller holds the lock)."""
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_path, index_path)
+
+    def _index_set(self, conversation_id: str, fields: Dict[str, Any], message_count: Optional[int] = None) -> None:
+        """Update the index entry of a conversation after its log changed (caller holds the lock)."""
+        if self._index is None:
+            return
+        entry = self._index.setdefault(conversation_id, {"id": conversation_id})
+        entry.update({k: fields[k] for k in SUMMARY_FIELDS if k in fields})
+        if message_count is not None:
+            entry["message_count"] = message_count
+        entry["created"] = self._states[conversation_id]["created"]
+        entry["size"] = os.path.getsize(self._path(conversation_id))
+
+    def _replay(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Rebuild a conversation from its log and refresh its cached state (caller holds the lock)."""
+        path = self._path(conversation_id)
+        if not os.path.exists(path):
+            self._states.pop(conversation_id, None)
+            return None
+
+        conversation: Dict[str, Any] = {}
+        messages: List[Dict[str, Any]] = []
+        created, lines, torn = None, 0, False
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn last line of an interrupted write
+                    logger.warning(f"Skipping unreadable line in {path}")
+                    torn = True
+                    continue
+                lines += 1
+                if created is None:
+                    created = entry.get("created", 0.0)
+                op = entry.get("op")
+                if op == "meta":
+                    conversation.update(entry["data"])
+                elif op == "append":
+                    messages.extend(entry["messages"])
+                elif op == "reset":
+                    messages = list(entry["messages"])
+        conversation["messages"] = messages
+
+        self._states[conversation_id] = {
+            "created": created or 0.0,
+            "fields": {k: _dump(v) for k, v in conversation.items() if k != "messages"},
+            "messages": list(messages),
+            "last": _dump(messages[-1]) if messages else None,
+            "lines": lines,
+            "torn": torn
+        }
+        self._index_set(conversation_id, conversation, len(messages))
+        return conversation
+
+    def _state(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Cached state of a conversation about to be changed (caller holds the lock)."""
+        if conversation_id not in self._states:
+            self._replay(conversation_id)
+        state = self._states.get(conversation_id)
+        if state is not None and state.get("torn"):
+            # A line appended after a torn one would be merged with it and lost on replay
+            self.compact(conversation_id)
+            state = self._states.get(conversation_id)
+        return state
+
+    @staticmethod
+    def _extends_saved(state: Dict[str, Any], messages: List[Dict[str, Any]]) -> bool:
+        """True if messages only adds messages at the end of the saved ones."""
+        saved = state["messages"]
+        if len(messages) < len(saved):
+            return False
+        # Usually the caller holds the saved message objects; otherwise (e.g. a conversation
+        # loaded by another list() call) compare contents
+        if any(a is not b for a, b in zip(messages, saved)) and _dump(messages[:len(saved)]) != _dump(saved):
+            return False
+        # The last saved message may have been modified in place (e.g. while streaming)
+        return not saved or _dump(messages[len(saved) - 1]) == state["last"]
+
+    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get a conversation (None if unknown)."""
+        with self._lock:
+            return self._replay(conversation_id)
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """
+        List conversations without loading their messages.
+
+        Returns:
+            Dicts with 'id', 'title', 'updated_at' and 'message_count', in creation order
+        """
+        with self._lock:
+            entries = sorted(self._load_index().values(), key=lambda entry: entry.get("created", 0.0))
+            return [
+                {k: entry[k] for k in ("id",) + SUMMARY_FIELDS + ("message_count",) if k in entry}
+                for entry in entries
+            ]
+
+    def list(self) -> List[Dict[str, Any]]:
+        """All conversations with their messages, in creation order."""
+        with self._lock:
+            conversations = []
+            for name in os.listdir(self.directory):
+                if name.endswith(LOG_EXTENSION):
+                    conversation_id = name[:-len(LOG_EXTENSION)]
+                    conversation = self._replay(conversation_id)
+                    if conversation is not None:
+                        conversations.append((self._states[conversation_id]["created"], conversation))
+            conversations.sort(key=lambda item: item[0])
+            return [conversation for _, conversation in conversations]
+
+    def save(self, conversation: Dict[str, Any]) -> None:
+        """
+        Save a conversation: only the changed fields and the new messages are appended to its log.
+
+        Args:
+            conversation: Conversation dict with an 'id' and a 'messages' list
+        """
+        conversation_id = conversation["id"]
+        messages = conversation.get("messages", [])
+        with self._lock:
+            self._load_index()
+            state = self._state(conversation_id)
+            entries = []
+            fields = {k: _dump(v) for k, v in conversation.items() if k != "messages"}
+            if state is None:
+                state = {"created": time.time(), "fields": {}, "messages": [], "last": None, "lines": 0}
+                entries.append({"op": "meta", "created": state["created"], "data": {k: conversation[k] for k in fields}})
+            else:
+                changed = {k: conversation[k] for k, v in fields.items() if state["fields"].get(k) != v}
+                if changed:
+                    entries.append({"op": "meta", "data": changed})
+
+            change = {"fields": entries[0]["data"] if entries else {}}
+            count = len(state["messages"])
+            if self._extends_saved(state, messages):
+                if len(messages) > count:
+                    entries.append({"op": "append", "messages": messages[count:]})
+                    change.update(start=count, messages=messages[count:])
+            else:
+                # Earlier messages were edited or removed
+                entries.append({"op": "reset", "messages": messages})
+                change.update(start=0, messages=messages)
+
+            if not entries:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(conversation_id), 'a', encoding='utf-8') as f:
+                f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+            state.update(
+                fields={**state["fields"], **fields},
+                messages=list(messages),
+                last=_dump(messages[-1]) if messages else None,
+                lines=state["lines"] + len(entries)
+            )
+            self._states[conversation_id] = state
+
+            if state["lines"] > max(self.compact_min_lines, len(messages)):
+                self.compact(conversation_id)
+                # Keep the caller's message objects so its next save is checked by identity
+                self._states[conversation_id]["messages"] = list(messages)
+            self._index_set(conversation_id, conversation, len(messages))
+            self._save_index()
+            self._notify(conversation_id, change)
+
+    def _notify(self, conversation_id: str, change: Optional[Dict[str, Any]]) -> None:
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(conversation_id, change)
+        except Exception as e:
+            # The log stays the source of truth; listeners can be rebuilt from it
+            logger.error(f"Conversation change listener failed for {conversation_id}: {e}")
+
+    def update_fields(self, conversation_id: str, **fields) -> None:
+        """Change top-level fields of a conversation (e.g. its title) without touching its messages."""
+        with self._lock:
+            self._load_index()
+            state = self._state(conversation_id)
+            if state is None:
+                return
+            with open(self._path(conversation_id), 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"op": "meta", "data": fields}, ensure_ascii=False) + "\n")
+            state["fields"].update({k: _dump(v) for k, v in fields.items()})
+            state["lines"] += 1
+            self._index_set(conversation_id, fields)
+            self._save_index()
+            self._notify(conversation_id, {"fields": fields})
+
+    def compact(self, conversation_id: str) -> None:
+        """Rewrite a log as one meta line and one append line."""
+        with self._lock:
+            conversation = self._replay(conversation_id)
+            if conversation is None:
+                return
+            self._write_compacted(self._path(conversation_id), conversation, self._states[conversation_id]["created"])
+            self._states[conversation_id].update(lines=2, torn=False)
+            self._index_set(conversation_id, conversation)
+
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            self._load_index()
+            self._states.pop(conversation_id, None)
+            try:
+                os.remove(self._path(conversation_id))
+            except FileNotFoundError:
+                pass
+            if self._index.pop(conversation_id, None) is not None:
+                self._save_index()
+            self._notify(conversation_id, None)
+
+    def replace_all(self, conversations: List[Dict[str, Any]]) -> None:
+        """Make the scope hold exactly these conversations."""
+        with self._lock:
+            keep = {c["id"] for c in conversations}
+            for existing in os.listdir(self.directory):
+                if existing.endswith(LOG_EXTENSION) and existing[:-len(LOG_EXTENSION)] not in keep:
+                    self.delete(existing[:-len(LOG_EXTENSION)])
+            for conversation in conversations:
+                self.save(conversation)
@@ -0,0 +1,395 @@
+"""
+Full-text search across the conversation histories of every module and assistant.
+
+Messages are indexed in a SQLite FTS5 table (conversation_search.db), kept up to date by the
+conversation logs: each save only (re)indexes the messages from the first changed position.
+Besides its text, every message gets scope tokens (module, assistant, year, month, day) in a second FTS
+column, so selective filters are resolved by the full-text index itself instead of joining every match.
+The index is derived data: it can be deleted and rebuilt from the logs at any time
+(DataManager.rebuild_search_index, scripts/rebuild_search_index.py).
+"""
+
+from typing import Any, Dict, List, Optional
+import datetime
+import re
+
+from core.managers.record_store import SQLiteStore
+
+SEARCH_INDEX_FILE = "conversation_search.db"
+
+# Highlight markers and length (in tokens) of the snippets returned by search()
+SNIPPET_START = "["
+SNIPPET_END = "]"
+SNIPPET_TOKENS = 12
+
+# Only the most recent matches of a query are ranked, which bounds the latency of very common
+# terms on large histories (a word found in 900k messages would otherwise be scored 900k times)
+MAX_RANKED_MATCHES = 20000
+
+# Words found in more than this share of the messages ("de", "le"...) weigh little in bm25 but
+# make it read their whole posting list; they are left out of queries that have other words
+COMMON_WORD_SHARE = 0.2
+# Module or assistant filters covering more than this share of the messages are checked on the
+# ranked rows instead of narrowing the full-text query (whose bm25 would read their posting list)
+BROAD_SCOPE_SHARE = 0.5
+# Shares are estimated from the rowid span of the most recent occurrences of a token
+SHARE_SAMPLE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY,
+    module TEXT NOT NULL,
+    assistant_id TEXT NOT NULL,
+    conversation_id TEXT NOT NULL,
+    title TEXT,
+    updated_at TEXT,
+    UNIQUE (module, assistant_id, conversation_id)
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    conversation INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    role TEXT,
+    created_at TEXT,
+    UNIQUE (conversation, position)
+);
+CREATE INDEX IF NOT EXISTS messages_created_at ON messages (created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, scope, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def _quoted(tokens: List[str], operator: str = " ") -> str:
+    """FTS5 expression of literal tokens (FTS5 operators typed by the user are not interpreted)."""
+    return operator.join(f'"{token}"' for token in tokens)
+
+
+def _normalize_date(value: Any) -> Optional[str]:
+    """Comparable text form of a date ('YYYY-MM-DD HH:MM:SS...'), None if missing or unreadable."""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        value = value.isoformat()
+    if not isinstance(value, str) or not _DATE.match(value):
+        return None
+    return value.replace("T", " ")
+
+
+def _to_day(value: Any) -> datetime.date:
+    """Day of a date filter (datetime, date or ISO string)."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def _module_token(module: str) -> str:
+    # Hex keeps any name a single token
+    return f"m{module.encode().hex()}"
+
+
+def _assistant_token(assistant_id: str) -> str:
+    return f"a{assistant_id.encode().hex()}"
+
+
+def _date_tokens(created_at: str) -> str:
+    # Year (dYYYY), month (dYYYYMM) and day (dYYYYMMDD) of a message
+    year, month, day = created_at[:4], created_at[5:7], created_at[8:10]
+    return f"d{year} d{year}{month} d{year}{month}{day}"
+
+
+def _days_tokens(first: datetime.date, last: datetime.date) -> List[str]:
+    """Fewest date tokens covering first..last: whole years and months, plus the remaining days."""
+    tokens = []
+    day = first
+    while day <= last:
+        next_month = (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        if day.month == 1 and day.day == 1 and day.replace(month=12, day=31) <= last:
+            tokens.append(f"d{day:%Y}")
+            day = day.replace(year=day.year + 1)
+        elif day.day == 1 and next_month - datetime.timedelta(days=1) <= last:
+            tokens.append(f"d{day:%Y%m}")
+            day = next_month
+        else:
+            tokens.append(f"d{day:%Y%m%d}")
+            day += datetime.timedelta(days=1)
+    return tokens
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content", "")
+    if isinstance(content, list):
+        # Multi-part messages: keep the text parts
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content if isinstance(content, str) else str(content)
+
+
+class ConversationSearchIndex:
+    """FTS5 index of conversation messages, scoped by module and assistant (thread-safe)."""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the index.
+
+        Args:
+            path: Database file
+        """
+        self.store = SQLiteStore(path, schema=SCHEMA)
+
+    def apply_change(
+        self,
+        module: str,
+        assistant_id: Optional[str],
+        conversation_id: str,
+        change: Optional[Dict[str, Any]]
+    ) -> None:
+        """
+        Index a change reported by a conversation log.
+
+        Args:
+            module: Module of the conversation ('assistants', 'doc_analyst'...)
+            assistant_id: Assistant owning the conversation (None for module-wide conversations)
+            conversation_id: Conversation id
+            change: {'fields': changed top-level fields, 'start': first changed position,
+                     'messages': messages from that position}; 'messages' is omitted when only
+                     fields changed; None when the conversation was deleted
+        """
+        key = (module, assistant_id or "", conversation_id)
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                "SELECT id, updated_at FROM conversations WHERE module = ? AND assistant_id = ? AND conversation_id = ?",
+                key
+            ).fetchone()
+            if change is None:
+                if row is not None:
+                    self._delete_messages(conn, row[0], 0)
+                    conn.execute("DELETE FROM conversations WHERE id = ?", (row[0],))
+                return
+
+            fields = change.get("fields", {})
+            updated_at = _normalize_date(fields.get("updated_at"))
+            if row is None:
+                cursor = conn.execute(
+                    "INSERT INTO conversations (module, assistant_id, conversation_id, title, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    key + (fields.get("title"), updated_at)
+                )
+                conversation = cursor.lastrowid
+            else:
+                conversation = row[0]
+                if "title" in fields:
+                    conn.execute("UPDATE conversations SET title = ? WHERE id = ?", (fields["title"], conversation))
+                if updated_at:
+                    conn.execute("UPDATE conversations SET updated_at = ? WHERE id = ?", (updated_at, conversation))
+                else:
+                    updated_at = row[1]
+
+            if "messages" not in change:
+                return
+            start = change.get("start", 0)
+            self._delete_messages(conn, conversation, start)
+            scope = _module_token(module) + (f" {_assistant_token(assistant_id)}" if assistant_id else "")
+            for position, message in enumerate(change["messages"], start):
+                created_at = _normalize_date(message.get("timestamp")) or updated_at
+                cursor = conn.execute(
+                    "INSERT INTO messages (conversation, position, role, created_at) VALUES (?, ?, ?, ?)",
+                    (conversation, position, message.get("role"), created_at)
+                )
+                conn.execute(
+                    "INSERT INTO messages_fts (rowid, content, scope) VALUES (?, ?, ?)",
+                    (cursor.lastrowid, _message_text(message),
+                     f"{scope} {_date_tokens(created_at)}" if created_at else scope)
+                )
+
+    @staticmethod
+    def _delete_messages(conn, conversation: int, start: int) -> None:
+        """Remove the messages of a conversation from a position onwards (inside a transaction)."""
+        ids = conn.execute(
+            "SELECT id FROM messages WHERE conversation = ? AND position >= ?", (conversation, start)
+        ).fetchall()
+        if ids:
+            conn.executemany("DELETE FROM messages_fts WHERE rowid = ?", ids)
+            conn.executemany("DELETE FROM messages WHERE id = ?", ids)
+
+    def index_conversation(self, module: str, assistant_id: Optional[str], conversation: Dict[str, Any]) -> None:
+        """(Re)index a whole conversation."""
+        self.apply_change(module, assistant_id, conversation["id"], {
+            "fields": {k: v for k, v in conversation.items() if k != "messages"},
+            "start": 0,
+            "messages": conversation.get("messages", [])
+        })
+
+    def clear(self) -> None:
+        with self.store.transaction() as conn:
+            conn.execute("DELETE FROM messages_fts")
+            conn.execute("DELETE FROM messages")
+            conn.execute("DELETE FROM conversations")
+
+    def optimize(self) -> None:
+        """Merge the FTS5 index segments (after a rebuild or many changes)."""
+        with self.store.transaction() as conn:
+            conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('optimize')")
+
+    def count(self) -> int:
+        """Number of indexed messages."""
+        return self.store.query("SELECT COUNT(*) FROM messages")[0][0]
+
+    def search(
+        self,
+        query: str,
+        module: Optional[str] = None,
+        assistant_id: Optional[str] = None,
+        since: Any = None,
+        until: Any = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Search messages, best matches first.
+        When more than MAX_RANKED_MATCHES messages match, only the most recent ones are ranked.
+        Common words (found in more than COMMON_WORD_SHARE of the messages) are dropped from
+        queries that have other words, so results may not contain them.
+
+        Args:
+            query: Words to find (all of them except common ones, accents and case ignored)
+            module: Only conversations of this module
+            assistant_id: Only conversations of this assistant
+            since: Only messages from this day on (datetime, date or ISO string; the time is ignored)
+            until: Only messages up to this day, included
+            limit: Maximum number of results
+
+        Returns:
+            Dicts with 'module', 'assistant_id', 'conversation_id', 'title', 'position' (index of the
+            message in the conversation), 'role', 'date', 'snippet' (matches between SNIPPET_START
+            and SNIPPET_END) and 'score' (higher is better)
+        """
+        words = list(dict.fromkeys(word.lower() for word in _WORD.findall(query)))
+        if not words:
+            return []
+
+        # Selective module and assistant filters narrow the full-text query; broad ones (e.g. the
+        # module holding most conversations) and dates are checked on the ranked rows
+        scope, broad, checks, params = [], [], [], []
+        for column, value, token in (
+            ("c.module", module, module is not None and _module_token(module)),
+            ("c.assistant_id", assistant_id, assistant_id is not None and _assistant_token(assistant_id))
+        ):
+            if value is None:
+                continue
+            if self._is_common(token, "scope", BROAD_SCOPE_SHARE):
+                broad.append(token)
+                checks.append(f" AND {column} = ?")
+                params.append(value)
+            else:
+                scope.append(token)
+        days = None
+        if since is not None or until is not None:
+            first, last = self._indexed_days()
+            if first is None:
+                return []
+            since = max(_to_day(since), first) if since is not None else first
+            until = min(_to_day(until), last) if until is not None else last
+            if since > until:
+                return []
+            if since > first or until < last:
+                checks.append(" AND m.created_at >= ? AND m.created_at < ?")
+                params += [since.isoformat(), (until + datetime.timedelta(days=1)).isoformat()]
+                days = _days_tokens(since, until)
+
+        selective = [word for word in words if not self._is_common(word, "content", COMMON_WORD_SHARE)]
+        match = f"content : ({_quoted(selective or words)})"
+        if scope:
+            match += f" AND scope : ({_quoted(scope)})"
+        # Every filter as tokens: finds the matching rowids without reading the messages
+        candidates = match
+        if broad:
+            candidates += f" AND scope : ({_quoted(broad)})"
+        if days:
+            candidates += f" AND scope : ({_quoted(days, ' OR ')})"
+
+        join = ""
+        if checks:
+            # CROSS JOIN keeps the full-text matches as the outer loop
+            join = (" CROSS JOIN messages m ON m.id = messages_fts.rowid"
+                    " CROSS JOIN conversations c ON c.id = m.conversation")
+        if not selective:
+            # Only common words: bm25 could not tell the matches apart, the most recent come first
+            ranked = self.store.query(
+                f"SELECT messages_fts.rowid, 0.0 FROM messages_fts{join} WHERE messages_fts MATCH ?{''.join(checks)} "
+                "ORDER BY messages_fts.rowid DESC LIMIT ?",
+                (candidates, *params, limit)
+            )
+        else:
+            # Rowids grow with insertion, so the most recent matches have the highest ones; only the
+            # rowid range of the MAX_RANKED_MATCHES most recent candidates is ranked
+            newest = self.store.query(
+                "SELECT rowid FROM messages_fts WHERE messages_fts MATCH ? ORDER BY rowid DESC LIMIT 1", (candidates,)
+            )
+            if not newest:
+                return []
+            oldest = self.store.query(
+                "SELECT rowid FROM messages_fts WHERE messages_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                (candidates, MAX_RANKED_MATCHES - 1)
+            ) or self.store.query(
+                "SELECT rowid FROM messages_fts WHERE messages_fts MATCH ? ORDER BY rowid LIMIT 1", (candidates,)
+            )
+            ranked = self.store.query(
+                f"SELECT messages_fts.rowid, bm25(messages_fts, 1.0, 0.0) FROM messages_fts{join} "
+                f"WHERE messages_fts MATCH ? AND messages_fts.rowid BETWEEN ? AND ?{''.join(checks)} "
+                "ORDER BY 2 LIMIT ?",
+                (match, oldest[0][0], newest[0][0], *params, limit)
+            )
+        if not ranked:
+            return []
+
+        # Snippets are only built for the returned messages
+        rowids = [rowid for rowid, _ in ranked]
+        rows = self.store.query(
+            "SELECT messages_fts.rowid, snippet(messages_fts, 0, ?, ?, '…', ?), c.module, c.assistant_id, "
+            "c.conversation_id, c.title, m.position, m.role, m.created_at FROM messages_fts "
+            "JOIN messages m ON m.id = messages_fts.rowid JOIN conversations c ON c.id = m.conversation "
+            f"WHERE messages_fts MATCH ? AND messages_fts.rowid IN ({', '.join('?' * len(rowids))})",
+            (SNIPPET_START, SNIPPET_END, SNIPPET_TOKENS, match, *rowids)
+        )
+        details = {row[0]: row[1:] for row in rows}
+        results = []
+        for rowid, rank in ranked:
+            snippet, row_module, row_assistant, conversation_id, title, position, role, date = details[rowid]
+            results.append({
+                "module": row_module,
+                "assistant_id": row_assistant or None,
+                "conversation_id": conversation_id,
+                "title": title,
+                "position": position,
+                "role": role,
+                "date": date,
+                "snippet": snippet,
+                "score": -rank
+            })
+        return results
+
+    def _is_common(self, token: str, column: str, share: float) -> bool:
+        """True if the token appears in more than this share of the recent messages."""
+        sample = self.store.query(
+            "SELECT rowid FROM messages_fts WHERE messages_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+            (f'{column} : "{token}"', SHARE_SAMPLE - 1)
+        )
+        if not sample:
+            return False
+        last = self.store.query("SELECT MAX(rowid) FROM messages_fts")[0][0]
+        return SHARE_SAMPLE / (last - sample[0][0] + 1) > share
+
+    def _indexed_days(self):
+        """First and last days of the indexed messages (None, None if there are none)."""
+        # Two subqueries: each is a single lookup in the created_at index
+        first, last = self.store.query(
+            "SELECT (SELECT MIN(created_at) FROM messages), (SELECT MAX(created_at) FROM messages)"
+        )[0]
+        if first is None:
+            return None, None
+        return _to_day(first), _to_day(last)
+
+    def close(self) -> None:
+        self.store.close()
@@ -0,0 +1,148 @@
+import json
+import os
+import uuid
+import datetime
+from typing import List, Dict, Any, Optional
+
+from core.managers.record_store import SQLiteStore, JsonCollection, SQLiteCollection, load_json_list
+
+KNOWLEDGE_BASES_FILE = "knowledge_bases.json"
+
+class KnowledgeBaseRepository:
+    """
+    Knowledge base metadata and their document entries.
+    With SQLite, document entries live in their own table (one row per document), so adding
+    a document to a large knowledge base does not rewrite its whole document list.
+    """
+    def __init__(self, filepath: str, store: Optional[SQLiteStore] = None):
+        """
+        Args:
+            filepath: knowledge_bases.json (storage without SQLite, migration source with it)
+            store: SQLite database holding the knowledge bases (None keeps them in the JSON file)
+        """
+        self.filepath = filepath
+        self.store = store
+        if store is None:
+            self.collection = JsonCollection(filepath)
+        else:
+            self.collection = SQLiteCollection(store, "knowledge_bases")
+            store.migrate_once("knowledge_bases:json", self._import_json)
+
+    def _import_json(self, conn) -> int:
+        knowledge_bases = load_json_list(self.filepath) if os.path.exists(self.filepath) else []
+        for kb in knowledge_bases:
+            documents = kb.pop("documents", [])
+            self.collection.insert(kb)
+            for doc in documents:
+                self._insert_document(conn, kb["id"], doc)
+        return len(knowledge_bases)
+
+    @staticmethod
+    def _insert_document(conn, kb_id: str, doc: Dict[str, Any]) -> None:
+        # A replaced entry moves to the end, like the JSON list
+        conn.execute(
+            "INSERT OR REPLACE INTO kb_documents (kb_id, doc_id, position, data) VALUES (?, ?, "
+            "(SELECT COALESCE(MAX(position), 0) + 1 FROM kb_documents WHERE kb_id = ?), ?)",
+            (kb_id, doc.get("id"), kb_id, json.dumps(doc, ensure_ascii=False))
+        )
+
+    def _documents(self, kb_id: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Document entries per knowledge base (all of them, or those of kb_id)."""
+        if kb_id is None:
+            rows = self.store.query("SELECT kb_id, data FROM kb_documents ORDER BY kb_id, position")
+        else:
+            rows = self.store.query(
+                "SELECT kb_id, data FROM kb_documents WHERE kb_id = ? ORDER BY position", (kb_id,)
+            )
+        documents: Dict[str, List[Dict[str, Any]]] = {}
+        for row_kb_id, data in rows:
+            documents.setdefault(row_kb_id, []).append(json.loads(data))
+        return documents
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        knowledge_bases = self.collection.all()
+        if self.store is not None:
+            documents = self._documents()
+            for kb in knowledge_bases:
+                if kb["id"] in documents:
+                    kb["documents"] = documents[kb["id"]]
+        return knowledge_bases
+
+    def get_by_id(self, kb_id: str) -> Optional[Dict[str, Any]]:
+        kb = self.collection.get(kb_id)
+        if kb is not None and self.store is not None:
+            documents = self._documents(kb_id)
+            if documents:
+                kb["documents"] = documents[kb_id]
+        return kb
+
+    def create(self, name: str, description: str, **kwargs) -> Dict[str, Any]:
+        now = datetime.datetime.now().isoformat()
+        new_kb = {
+            "id": str(uuid.uuid4()), "name": name, "description": description,
+            "created_at": now, "updated_at": now, "document_count": 0, "chunk_count": 0,
+            **kwargs
+        }
+        self.collection.insert(new_kb)
+        return new_kb
+
+    def update(self, kb_id: str, **kwargs) -> None:
+        documents = kwargs.pop("documents", None) if self.store is not None else None
+
+        def apply(kb):
+            for k, v in kwargs.items():
+                if v is not None: kb[k] = v
+            kb["updated_at"] = datetime.datetime.now().isoformat()
+
+        if documents is None:
+            self.collection.update(kb_id, apply)
+            return
+        with self.store.transaction() as conn:
+            if self.collection.update(kb_id, apply) is None:
+                return
+            conn.execute("DELETE FROM kb_documents WHERE kb_id = ?", (kb_id,))
+            for doc in documents:
+                self._insert_document(conn, kb_id, doc)
+
+    def delete(self, kb_id: str) -> None:
+        if self.store is None:
+            self.collection.delete(kb_id)
+            return
+        with self.store.transaction() as conn:
+            self.collection.delete(kb_id)
+            conn.execute("DELETE FROM kb_documents WHERE kb_id = ?", (kb_id,))
+
+    def add_document(self, kb_id: str, doc_metadata: Dict[str, Any]) -> None:
+        """Add a document entry; an existing entry with the same id is replaced."""
+        def touch(kb):
+            kb["updated_at"] = datetime.datetime.now().isoformat()
+
+        if self.store is None:
+            def apply(kb):
+                kb["documents"] = [d for d in kb.get("documents", []) if d.get("id") != doc_metadata.get("id")]
+                kb["documents"].append(doc_metadata)
+                touch(kb)
+            self.collection.update(kb_id, apply)
+            return
+        with self.store.transaction() as conn:
+            if self.collection.update(kb_id, touch) is not None:
+                self._insert_document(conn, kb_id, doc_metadata)
+
+    def remove_documents(self, kb_id: str, doc_ids: List[str]) -> None:
+        """Remove document entries."""
+        def touch(kb):
+            kb["updated_at"] = datetime.datetime.now().isoformat()
+
+        if self.store is None:
+            def apply(kb):
+                kb["documents"] = [d for d in kb.get("documents", []) if d.get("id") not in doc_ids]
+                touch(kb)
+            self.collection.update(kb_id, apply)
+            return
+        with self.store.transaction() as conn:
+            if self.collection.update(kb_id, touch) is None:
+                return
+            conn.executemany(
+                "DELETE FROM kb_documents WHERE kb_id = ? AND doc_id = ?",
+                [(kb_id, doc_id) for doc_id in doc_ids]
+            )
@@ -0,0 +1,288 @@
+"""
+Record storage backends for the repositories (assistants, profiles, knowledge bases).
+
+Records are plain dicts with an "id" key, kept in insertion order.
+- JsonCollection: one JSON list per collection, parsed and rewritten on every change (legacy format).
+- SQLiteCollection: one row per record in a shared SQLite database in WAL mode, with a primary key
+  on (collection, id), secondary indexes on frequently filtered fields, and transactional updates,
+  so a change touches one row instead of rewriting the whole file.
+Existing JSON files are imported into SQLite the first time a collection is opened.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import datetime
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+STORE_FILE = "app_data.db"
+
+BACKEND_SQLITE = "sqlite"
+BACKEND_JSON = "json"
+DEFAULT_BACKEND = BACKEND_SQLITE
+
+# JSON fields indexed per collection (expression indexes, used by find())
+INDEXED_FIELDS = {
+    "assistants": ["profile_id"],
+}
+
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (collection, id)
+);
+CREATE INDEX IF NOT EXISTS records_position ON records (collection, position);
+CREATE TABLE IF NOT EXISTS kb_documents (
+    kb_id TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kb_id, doc_id)
+);
+CREATE INDEX IF NOT EXISTS kb_documents_position ON kb_documents (kb_id, position);
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    migrated_at TEXT NOT NULL
+);
+"""
+
+
+def _json_field(field: str) -> str:
+    """SQL expression reading a top-level JSON field (field names are inlined so indexes match)."""
+    if not _FIELD_NAME.match(field):
+        raise ValueError(f"Invalid field name: {field}")
+    return f"json_extract(data, '$.{field}')"
+
+
+def load_json_list(path: str) -> List[Dict[str, Any]]:
+    """Read a JSON list file ([] if missing, unreadable or not a list)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else []
+    except Exception:
+        return []
+
+
+class SQLiteStore:
+    """
+    Shared SQLite database (WAL mode).
+    One connection per store, serialized by a lock; other processes and stores on the same file
+    read concurrently thanks to WAL.
+    """
+
+    def __init__(self, path: str, schema: Optional[str] = None):
+        """
+        Open (or create) the database.
+
+        Args:
+            path: Database file
+            schema: Tables created on open (default: the record tables and their indexes)
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        # Transactions are managed explicitly (BEGIN IMMEDIATE / COMMIT)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if schema is not None:
+            self._conn.executescript(schema)
+            return
+        self._conn.executescript(SCHEMA)
+        for collection, fields in INDEXED_FIELDS.items():
+            for field in fields:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS records_{collection}_{field} "
+                    f"ON records (collection, {_json_field(field)})"
+                )
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements atomically (nested calls join the outer transaction)."""
+        with self._lock:
+            if self._conn.in_transaction:
+                yield self._conn
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def migrate_once(self, name: str, migrate: Callable[[sqlite3.Connection], int]) -> None:
+        """
+        Run a migration the first time only.
+
+        Args:
+            name: Migration identifier
+            migrate: Called inside the transaction, returns the number of imported records
+        """
+        with self.transaction() as conn:
+            if conn.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone():
+                return
+            count = migrate(conn)
+            conn.execute(
+                "INSERT INTO migrations (name, migrated_at) VALUES (?, ?)",
+                (name, datetime.datetime.now().isoformat())
+            )
+        if count:
+            logger.info(f"Imported {count} records into {self.path} ({name})")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JsonCollection:
+    """Records in a JSON list file (the whole file is read and rewritten on every change)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if not os.path.exists(path):
+            self.replace_all([])
+
+    def all(self) -> List[Dict[str, Any]]:
+        return load_json_list(self.path)
+
+    def replace_all(self, records: List[Dict[str, Any]]) -> None:
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, indent=4)
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        for record in self.all():
+            if record.get("id") == record_id:
+                return record
+        return None
+
+    def find(self, field: str, value: Any) -> List[Dict[str, Any]]:
+        return [record for record in self.all() if record.get(field) == value]
+
+    def insert(self, record: Dict[str, Any]) -> None:
+        records = self.all()
+        records.append(record)
+        self.replace_all(records)
+
+    def update(self, record_id: str, apply: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        """Apply an in-place change to a record; returns it (None if not found)."""
+        records = self.all()
+        for record in records:
+            if record.get("id") == record_id:
+                apply(record)
+                self.replace_all(records)
+                return record
+        return None
+
+    def delete(self, record_id: str) -> None:
+        self.replace_all([record for record in self.all() if record.get("id") != record_id])
+
+
+class SQLiteCollection:
+    """Records of one collection in a SQLiteStore (same API as JsonCollection)."""
+
+    def __init__(self, store: SQLiteStore, name: str, legacy_json_path: Optional[str] = None):
+        """
+        Open a collection.
+
+        Args:
+            store: Shared database
+            name: Collection name
+            legacy_json_path: JSON list imported on first use (the file itself is left untouched)
+        """
+        self.store = store
+        self.name = name
+        if legacy_json_path:
+            self.store.migrate_once(f"{name}:json", lambda conn: self._import(conn, legacy_json_path))
+
+    def _import(self, conn: sqlite3.Connection, path: str) -> int:
+        records = load_json_list(path) if os.path.exists(path) else []
+        for record in records:
+            self._insert(conn, record)
+        return len(records)
+
+    def all(self) -> List[Dict[str, Any]]:
+        rows = self.store.query(
+            "SELECT data FROM records WHERE collection = ? ORDER BY position", (self.name,)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def replace_all(self, records: List[Dict[str, Any]]) -> None:
+        with self.store.transaction() as conn:
+            conn.execute("DELETE FROM records WHERE collection = ?", (self.name,))
+            for record in records:
+                self._insert(conn, record)
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        rows = self.store.query(
+            "SELECT data FROM records WHERE collection = ? AND id = ?", (self.name, record_id)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def find(self, field: str, value: Any) -> List[Dict[str, Any]]:
+        """Records whose top-level field equals value (indexed for INDEXED_FIELDS)."""
+        rows = self.store.query(
+            f"SELECT data FROM records WHERE collection = ? AND {_json_field(field)} = ? ORDER BY position",
+            (self.name, value)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def insert(self, record: Dict[str, Any]) -> None:
+        with self.store.transaction() as conn:
+            self._insert(conn, record)
+
+    def _insert(self, conn: sqlite3.Connection, record: Dict[str, Any]) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO records (collection, id, position, data) VALUES (?, ?, "
+            "(SELECT COALESCE(MAX(position), 0) + 1 FROM records WHERE collection = ?), ?)",
+            (self.name, record["id"], self.name, json.dumps(record, ensure_ascii=False))
+        )
+
+    def update(self, record_id: str, apply: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        """Apply an in-place change to a record in one transaction; returns it (None if not found)."""
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM records WHERE collection = ? AND id = ?", (self.name, record_id)
+            ).fetchone()
+            if row is None:
+                return None
+            record = json.loads(row[0])
+            apply(record)
+            conn.execute(
+                "UPDATE records SET data = ? WHERE collection = ? AND id = ?",
+                (json.dumps(record, ensure_ascii=False), self.name, record_id)
+            )
+        return record
+
+    def delete(self, record_id: str) -> None:
+        with self.store.transaction() as conn:
+            conn.execute("DELETE FROM records WHERE collection = ? AND id = ?", (self.name, record_id))
+
+
+def open_collection(name: str, json_path: str, store: Optional[SQLiteStore] = None):
+    """
+    Open a collection with the configured backend.
+
+    Args:
+        name: Collection name
+        json_path: JSON file of the collection (storage of the JSON backend, migration source for SQLite)
+        store: SQLite database (None selects the JSON backend)
+    """
+    if store is None:
+        return JsonCollection(json_path)
+    return SQLiteCollection(store, name, legacy_json_path=json_path)
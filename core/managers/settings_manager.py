@@ -1,20 +1,37 @@
+import copy
 import json
+import logging
 import os
+import threading
 from cryptography.fernet import Fernet
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 
 from utils.resource_handler import get_writable_path
 
 SETTINGS_FILE = "settings.json"
 KEY_FILE = ".secret.key"
 
+logger = logging.getLogger(__name__)
+
 class SettingsManager:
+    """
+    Settings stored in settings.json with encrypted API keys.
+    The decrypted settings are kept in memory as a versioned snapshot, refreshed when
+    save_configuration writes the file or when the file changes on disk (mtime/size check),
+    so API keys are decrypted once per change rather than on every get_settings call.
+    """
     def __init__(self):
         self.settings_path = get_writable_path(SETTINGS_FILE)
         self.key_path = get_writable_path(KEY_FILE)
         self.key = None
         self.cipher = None
         
+        self._lock = threading.RLock()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_stamp = None
+        self._version = 0
+        self._subscribers: List[Callable[[Dict[str, Any], int], None]] = []
+        
         self._load_or_create_key()
         self._ensure_settings_exist()
 
@@ -52,7 +69,78 @@ class SettingsManager:
                     "models": {}
                 }, f)
 
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.settings_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
     def get_settings(self) -> Dict[str, Any]:
+        """Get the decrypted settings (a copy of the in-memory snapshot, reloaded if the file changed)."""
+        notify = None
+        with self._lock:
+            stamp = self._file_stamp()
+            if self._snapshot is None or stamp is None or stamp != self._snapshot_stamp:
+                settings = self._load_settings()
+                # _load_settings may have saved (defaults, migration): take the stamp afterwards
+                notify = self._set_snapshot(settings, self._file_stamp())
+            settings = copy.deepcopy(self._snapshot)
+        if notify:
+            self._notify(*notify)
+        return settings
+
+    def get_version(self) -> int:
+        """Version of the settings snapshot (incremented on every change)."""
+        with self._lock:
+            return self._version
+
+    def subscribe(self, callback: Callable[[Dict[str, Any], int], None]) -> Callable[[], None]:
+        """
+        Register a callback notified when the settings change.
+
+        Args:
+            callback: Called with (settings copy, version), from the thread that saved or detected
+                      the change (UI callbacks must marshal to the Tk thread)
+
+        Returns:
+            Function removing the subscription
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def _set_snapshot(self, settings: Dict[str, Any], stamp):
+        """
+        Replace the snapshot.
+
+        Returns:
+            (subscribers, settings, version) to pass to _notify once the lock is released,
+            or None if the content did not change
+        """
+        with self._lock:
+            changed = self._snapshot is not None and settings != self._snapshot
+            self._snapshot = settings
+            self._snapshot_stamp = stamp
+            self._version += 1
+            if not changed or not self._subscribers:
+                return None
+            return list(self._subscribers), settings, self._version
+
+    @staticmethod
+    def _notify(subscribers, settings: Dict[str, Any], version: int) -> None:
+        for callback in subscribers:
+            try:
+                callback(copy.deepcopy(settings), version)
+            except Exception as e:
+                logger.error(f"Settings subscriber failed: {e}")
+
+    def _load_settings(self) -> Dict[str, Any]:
         """Load settings and decrypt keys."""
         try:
             with open(self.settings_path, 'r') as f:
@@ -87,7 +175,18 @@ class SettingsManager:
         return data
 
     def save_configuration(self, chat_provider, scrapegraph_provider, api_keys, endpoints=None, models=None, scraping_solution=None, visible_mode=None, scraping_browser=None, image_gen_provider=None, doc_analyst_provider=None, **kwargs):
-        """Save settings with encryption."""
+        """Save settings with encryption and refresh the in-memory snapshot."""
+        with self._lock:
+            settings = self._write_configuration(
+                chat_provider, scrapegraph_provider, api_keys, endpoints, models, scraping_solution,
+                visible_mode, scraping_browser, image_gen_provider, doc_analyst_provider, **kwargs
+            )
+            notify = self._set_snapshot(settings, self._file_stamp())
+        if notify:
+            self._notify(*notify)
+
+    def _write_configuration(self, chat_provider, scrapegraph_provider, api_keys, endpoints, models, scraping_solution, visible_mode, scraping_browser, image_gen_provider, doc_analyst_provider, **kwargs) -> Dict[str, Any]:
+        """Write settings.json; returns the saved settings with decrypted keys."""
         try:
             with open(self.settings_path, 'r') as f:
                 current = json.load(f)
@@ -107,9 +206,11 @@ class SettingsManager:
         if "endpoints" not in current: current["endpoints"] = {}
         if "models" not in current: current["models"] = {}
 
-        # Decrypt existing keys to merge
+        # Decrypt existing keys to merge (already decrypted in the snapshot if the file did not change)
         decrypted_keys = {}
-        if "api_keys" in current:
+        if self._snapshot is not None and self._snapshot_stamp == self._file_stamp():
+            decrypted_keys = dict(self._snapshot.get("api_keys", {}))
+        elif "api_keys" in current:
             for provider, encrypted_key in current["api_keys"].items():
                 decrypted_keys[provider] = self._decrypt(encrypted_key)
         
@@ -136,6 +237,10 @@ class SettingsManager:
             "image_gen_provider": current.get("image_gen_provider", "OpenAI DALL-E 3"),
             "doc_analyst_provider": current.get("doc_analyst_provider", "OpenAI GPT-4o mini")
         }
+        # Keep the keys saved by other screens (module profiles, fallback chains...) unless replaced
+        current.pop("current_provider", None)
+        for key, value in current.items():
+            to_save.setdefault(key, value)
         to_save.update(kwargs) # Add other kwargs
         
         # Encrypt keys
@@ -144,3 +249,7 @@ class SettingsManager:
             
         with open(self.settings_path, 'w') as f:
             json.dump(to_save, f, indent=4)
+        
+        saved = dict(to_save)
+        saved["api_keys"] = decrypted_keys
+        return saved
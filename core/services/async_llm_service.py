@@ -0,0 +1,314 @@
+"""
+Asyncio variant of LLMService with per-provider concurrency and rate limits.
+Each provider gets a bounded semaphore plus token buckets for requests/min and tokens/min;
+rate-limit (429) and server (5xx) errors are retried with jittered exponential backoff.
+Blocking callers use the sync facade, which runs the calls on a shared background event loop.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar, Union
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+
+from core.services.llm_service import LLMService
+from core.services.embedding_service import EmbeddingService, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# (requests/min, tokens/min, concurrent calls), matched on the provider name like LLMService routing
+DEFAULT_LIMITS: List[Tuple[Tuple[str, ...], Dict[str, int]]] = [
+    (("OpenAI",), {"rpm": 500, "tpm": 200000, "concurrency": 8}),
+    (("Gemini", "Google"), {"rpm": 15, "tpm": 1000000, "concurrency": 4}),
+    (("Claude", "Anthropic"), {"rpm": 50, "tpm": 40000, "concurrency": 4}),
+    (("Groq", "Llama"), {"rpm": 30, "tpm": 6000, "concurrency": 4}),
+    (("Hugging Face",), {"rpm": 60, "tpm": 100000, "concurrency": 2}),
+    (("Mistral",), {"rpm": 60, "tpm": 500000, "concurrency": 4}),
+    (("DeepSeek",), {"rpm": 60, "tpm": 1000000, "concurrency": 8}),
+    (("IAKA",), {"rpm": 120, "tpm": 1000000, "concurrency": 4}),
+]
+FALLBACK_LIMITS = {"rpm": 60, "tpm": 100000, "concurrency": 4}
+
+# Completion tokens reserved when the caller does not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+# Tokens reserved per retrieved passage in RAG calls
+RAG_PASSAGE_TOKENS = 300
+
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+
+# Rate limits, overload and transient server errors, as reported in LLMService error messages.
+# Status codes only count after a status word ("Error code: 429", "HTTP 503"...), not any number
+RETRYABLE_ERROR = re.compile(
+    r"\b(?:status(?:[ _]code)?|code|error|http(?:/\d(?:\.\d)?)?)\W{0,3}(?:429|500|502|503|504|529)\b"
+    r"|rate.?limit|too many requests|overloaded|temporarily unavailable|service unavailable"
+    r"|bad gateway|gateway time-?out|internal server error|timed? ?out",
+    re.IGNORECASE
+)
+
+
+def is_retryable_error(message: str) -> bool:
+    """True if an LLMService error message denotes a rate limit or transient server error."""
+    return bool(RETRYABLE_ERROR.search(message or ""))
+
+
+def limits_for(provider_name: str) -> Dict[str, int]:
+    """Default limits of a provider."""
+    for names, limits in DEFAULT_LIMITS:
+        if any(name in provider_name for name in names):
+            return dict(limits)
+    return dict(FALLBACK_LIMITS)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity per minute; over-reservations are queued as debt."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute: Capacity, refilled over one minute
+            clock: Monotonic clock in seconds
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take tokens from the bucket.
+
+        Args:
+            amount: Tokens needed (capped at the capacity)
+
+        Returns:
+            Seconds to wait before the reservation is covered (0 if available now)
+        """
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+        self.tokens -= min(amount, self.capacity)
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self, amount: float = 1) -> float:
+        """Wait until the tokens are available; returns the time waited in seconds."""
+        wait = self.reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class ProviderLimiter:
+    """Concurrency and rate limits of one provider (bound to the event loop that uses it)."""
+
+    def __init__(self, rpm: int, tpm: int, concurrency: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.semaphore = asyncio.BoundedSemaphore(concurrency)
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "throttled_seconds": 0.0}
+
+
+class AsyncLLMService:
+    """Async generate_response / generate_response_with_rag with per-provider limits and retries."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, int]]] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY
+    ):
+        """
+        Initialize the service.
+
+        Args:
+            limits: Per-provider overrides {provider_name: {'rpm', 'tpm', 'concurrency'}}
+            max_retries: Retries of rate-limited or transient failures
+            base_delay: First backoff delay in seconds (doubled on each retry, with full jitter)
+            max_delay: Maximum backoff delay in seconds
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._overrides = dict(limits or {})
+        self._limiters: Dict[str, ProviderLimiter] = {}
+
+    def configure_limits(self, provider_name: str, **limits: int) -> None:
+        """
+        Override the limits of a provider (rpm, tpm, concurrency); applies to the next calls.
+
+        Args:
+            provider_name: Provider name as passed to generate_response
+            **limits: New values for 'rpm', 'tpm' and/or 'concurrency'
+        """
+        self._overrides[provider_name] = dict(self._overrides.get(provider_name, {}), **limits)
+        self._limiters.pop(provider_name, None)
+
+    def _limiter(self, provider_name: str) -> ProviderLimiter:
+        limiter = self._limiters.get(provider_name)
+        if limiter is None:
+            limits = limits_for(provider_name)
+            limits.update(self._overrides.get(provider_name, {}))
+            limiter = ProviderLimiter(limits["rpm"], limits["tpm"], limits["concurrency"])
+            self._limiters[provider_name] = limiter
+        return limiter
+
+    async def generate_response(
+        self, provider_name: str, api_key: str, messages: List[Dict[str, str]], **kwargs: Any
+    ) -> Tuple[bool, str]:
+        """
+        Async LLMService.generate_response (same arguments and result).
+
+        Returns:
+            Tuple (success: bool, content: str)
+        """
+        cost = self._estimate_cost(messages, kwargs)
+        return await self._call(
+            provider_name, cost, lambda: LLMService.generate_response(provider_name, api_key, messages, **kwargs)
+        )
+
+    async def generate_response_with_rag(
+        self,
+        provider_name: str,
+        api_key: str,
+        messages: List[Dict[str, str]],
+        kb_id: Union[str, List[str]],
+        top_k: int = 5,
+        global_context: Union[str, List[str]] = "",
+        fusion: str = "rrf",
+        **kwargs: Any
+    ) -> Tuple[bool, str]:
+        """
+        Async LLMService.generate_response_with_rag (same arguments and result).
+
+        Returns:
+            Tuple (success: bool, content: str)
+        """
+        # Wait for a background model pre-load here rather than while holding a provider slot
+        preload = EmbeddingService.preload_future()
+        if preload is not None and not preload.done():
+            try:
+                await asyncio.wrap_future(preload)
+            except Exception:
+                pass  # Retrieval reports the loading error itself
+
+        summaries = global_context if isinstance(global_context, str) else "\n\n".join(global_context)
+        cost = self._estimate_cost(messages, kwargs) + estimate_tokens(summaries) + top_k * RAG_PASSAGE_TOKENS
+        return await self._call(
+            provider_name, cost,
+            lambda: LLMService.generate_response_with_rag(
+                provider_name, api_key, messages, kb_id, top_k, global_context, fusion, **kwargs
+            )
+        )
+
+    @staticmethod
+    def _estimate_cost(messages: List[Dict[str, str]], kwargs: Dict[str, Any]) -> int:
+        prompt_tokens = sum(estimate_tokens(msg.get("content") or "") for msg in messages)
+        return prompt_tokens + int(kwargs.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+
+    async def _call(self, provider_name: str, cost: int, call: Callable[[], Tuple[bool, str]]) -> Tuple[bool, str]:
+        """Run a blocking LLMService call in a worker thread, within the provider limits, with retries."""
+        limiter = self._limiter(provider_name)
+        for attempt in range(self.max_retries + 1):
+            async with limiter.semaphore:
+                limiter.stats["throttled_seconds"] += await limiter.requests.acquire(1)
+                limiter.stats["throttled_seconds"] += await limiter.tokens.acquire(cost)
+                limiter.stats["calls"] += 1
+                try:
+                    success, content = await asyncio.to_thread(call)
+                except Exception as e:
+                    success, content = False, f"Erreur {provider_name}: {str(e)}"
+
+            if success or attempt == self.max_retries or not is_retryable_error(content):
+                if not success:
+                    limiter.stats["failures"] += 1
+                return success, content
+
+            # Full jitter: spreads the retries of concurrent calls instead of synchronizing them
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            limiter.stats["retries"] += 1
+            logger.warning(
+                f"[{provider_name}] Retryable error (attempt {attempt + 1}/{self.max_retries + 1}), "
+                f"retrying in {delay:.1f}s: {content[:200]}"
+            )
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get call statistics per provider.
+
+        Returns:
+            Dict provider -> {'calls', 'retries', 'failures', 'throttled_seconds'}
+        """
+        return {provider: dict(limiter.stats) for provider, limiter in self._limiters.items()}
+
+
+# --- Sync facade ---
+
+_shared_service: Optional[AsyncLLMService] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_shared_lock = threading.Lock()
+
+
+def get_async_llm_service() -> AsyncLLMService:
+    """Process-wide service; its limiters live on the background loop used by the sync facade."""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = AsyncLLMService()
+        return _shared_service
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_thread
+    with _shared_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="llm-async-loop", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Run a coroutine on the shared background loop and wait for its result (any thread but that loop's).
+
+    Raises:
+        RuntimeError: Called from the background loop itself (would deadlock)
+    """
+    loop = _background_loop()
+    if threading.current_thread() is _loop_thread:
+        raise RuntimeError("run_sync ne peut pas être appelé depuis la boucle asyncio partagée")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def generate_response(provider_name: str, api_key: str, messages: List[Dict[str, str]], **kwargs: Any) -> Tuple[bool, str]:
+    """Blocking, rate-limited drop-in for LLMService.generate_response."""
+    return run_sync(get_async_llm_service().generate_response(provider_name, api_key, messages, **kwargs))
+
+
+def generate_response_with_rag(
+    provider_name: str,
+    api_key: str,
+    messages: List[Dict[str, str]],
+    kb_id: Union[str, List[str]],
+    top_k: int = 5,
+    global_context: str = "",
+    fusion: str = "rrf",
+    **kwargs: Any
+) -> Tuple[bool, str]:
+    """Blocking, rate-limited drop-in for LLMService.generate_response_with_rag."""
+    return run_sync(get_async_llm_service().generate_response_with_rag(
+        provider_name, api_key, messages, kb_id, top_k, global_context, fusion, **kwargs
+    ))
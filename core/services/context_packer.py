@@ -0,0 +1,358 @@
+"""
+Token-budgeted context assembly for RAG and document chat.
+Candidate context items (document summaries, retrieved chunks, document sections) are ranked by
+relevance to the question, de-duplicated, and packed into a token budget sized for the provider/model.
+Every keep / trim / drop decision is logged (DEBUG per item, INFO summary) for tuning.
+"""
+
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union
+import logging
+import math
+import re
+
+from core.services.lexical_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+KIND_SUMMARY = "summary"
+KIND_CHUNK = "chunk"
+KIND_SECTION = "section"
+
+# Characters per token when no exact tokenizer is available (French text, per provider family)
+CHARS_PER_TOKEN = [
+    (("OpenAI", "DeepSeek", "IAKA"), 3.6),
+    (("Claude", "Anthropic"), 3.3),
+    (("Gemini", "Google"), 4.0),
+    (("Groq", "Llama"), 3.8),
+    (("Mistral", "Hugging Face"), 3.3),
+]
+DEFAULT_CHARS_PER_TOKEN = 3.5
+
+# Context windows (tokens), matched on the model name, then on the provider name
+MODEL_CONTEXT_WINDOWS = [
+    ("gpt-4o", 128000), ("gpt-4-turbo", 128000), ("gpt-4", 8192), ("gpt-3.5", 16385),
+    ("claude", 200000), ("gemini-1.5", 1000000), ("gemini", 32768),
+    ("llama-3.1", 131072), ("llama", 8192), ("mixtral", 32768), ("mistral", 32000),
+    ("deepseek", 64000), ("qwen2.5", 32768),
+]
+PROVIDER_CONTEXT_WINDOWS = [
+    (("OpenAI",), 128000), (("Claude", "Anthropic"), 200000), (("Gemini", "Google"), 1000000),
+    (("Groq", "Llama"), 131072), (("Mistral",), 32000), (("DeepSeek",), 64000), (("Hugging Face",), 32768),
+]
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Tokens kept free for the answer and the instructions around the context
+ANSWER_RESERVE_TOKENS = 4000
+# The context never takes more than this share of the window, nor more than DEFAULT_MAX_CONTEXT_TOKENS
+CONTEXT_WINDOW_SHARE = 0.6
+DEFAULT_MAX_CONTEXT_TOKENS = 16000
+
+# An item that does not fit is cut to the remaining budget if at least this many tokens remain
+MIN_PARTIAL_TOKENS = 120
+# Items sharing this share of their terms with a kept item are duplicates
+DUPLICATE_OVERLAP = 0.85
+# Adjacent chunks sharing at least this many characters have the repeated part removed
+MIN_TEXT_OVERLAP = 40
+
+# Document chat: sections of about this many tokens
+SECTION_TOKENS = 500
+
+DOCUMENT_START = re.compile(r"^--- DEBUT DOCUMENT: (.*) ---$", re.MULTILINE)
+ELISION = "[...]"
+
+
+def _matches(name: str, keys) -> bool:
+    return any(key.lower() in name.lower() for key in keys)
+
+
+@lru_cache(maxsize=8)
+def _tiktoken_encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, provider: str = "", model: str = "") -> int:
+    """
+    Token count of a text for a provider/model.
+    Exact for OpenAI-compatible models when tiktoken is installed, estimated from characters otherwise.
+    """
+    if not text:
+        return 0
+    if _matches(provider, ("OpenAI", "DeepSeek", "IAKA")):
+        encoding = _tiktoken_encoding(model or "gpt-4o-mini")
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+    ratio = next((r for keys, r in CHARS_PER_TOKEN if _matches(provider, keys)), DEFAULT_CHARS_PER_TOKEN)
+    return math.ceil(len(text) / ratio)
+
+
+def context_window(provider: str = "", model: str = "") -> int:
+    """Context window in tokens of a provider/model (conservative default when unknown)."""
+    if model:
+        for key, window in MODEL_CONTEXT_WINDOWS:
+            if key in model.lower():
+                return window
+    for keys, window in PROVIDER_CONTEXT_WINDOWS:
+        if _matches(provider, keys):
+            return window
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def default_budget(provider: str = "", model: str = "") -> int:
+    """Default context budget in tokens for a provider/model."""
+    window = context_window(provider, model)
+    return max(MIN_PARTIAL_TOKENS, min(int(window * CONTEXT_WINDOW_SHARE), window - ANSWER_RESERVE_TOKENS,
+                                       DEFAULT_MAX_CONTEXT_TOKENS))
+
+
+class ContextPacker:
+    """Ranks, de-duplicates and packs context items into a token budget."""
+
+    def __init__(self, provider: str = "", model: str = "", budget_tokens: Optional[int] = None):
+        """
+        Initialize the packer.
+
+        Args:
+            provider: Provider name (token counting and default budget)
+            model: Model name (token counting and default budget)
+            budget_tokens: Context budget in tokens (default: derived from the model context window)
+        """
+        self.provider = provider or ""
+        self.model = model or ""
+        self.budget_tokens = budget_tokens or default_budget(self.provider, self.model)
+        self.last_decisions: List[Dict[str, Any]] = []
+
+    def count(self, text: str) -> int:
+        """Token count of a text for this packer's provider/model."""
+        return count_tokens(text, self.provider, self.model)
+
+    # --- Packing ---
+
+    def pack(self, question: str, items: List[Dict], budget_tokens: Optional[int] = None) -> List[Dict]:
+        """
+        Select the most relevant items that fit in the budget.
+
+        Args:
+            question: User question (relevance is measured against it)
+            items: Dicts with 'text', 'kind' ('summary', 'chunk' or 'section') and optionally
+                'source' (document name) and 'prior' (0-1 relevance from retrieval, e.g. rank-based)
+            budget_tokens: Budget for this call (default: the packer budget)
+
+        Returns:
+            Kept items, most relevant first, each with 'tokens', 'relevance' and 'truncated' added
+            (the text of truncated or de-overlapped items is shortened)
+        """
+        budget = self.budget_tokens if budget_tokens is None else budget_tokens
+        candidates = [dict(item, order=i) for i, item in enumerate(items) if (item.get("text") or "").strip()]
+        self._score(question, candidates)
+        candidates.sort(key=lambda item: (-item["relevance"], item["order"]))
+
+        kept: List[Dict] = []
+        kept_terms: List[Counter] = []
+        decisions = []
+        used = 0
+        for item in candidates:
+            label = f"{item['kind']} #{item['order']} ({item.get('source') or '?'}, relevance {item['relevance']:.2f})"
+            terms = Counter(tokenize(item["text"]))
+            duplicate_of = self._duplicate_of(terms, kept_terms)
+            if duplicate_of is not None:
+                decisions.append({"item": label, "action": "duplicate", "of": kept[duplicate_of]["order"]})
+                continue
+
+            text = self._strip_overlap(item, kept)
+            tokens = self.count(text)
+            action = "kept" if text == item["text"] else "overlap_removed"
+            if used + tokens > budget:
+                remaining = budget - used
+                if remaining < MIN_PARTIAL_TOKENS:
+                    decisions.append({"item": label, "action": "dropped", "tokens": tokens})
+                    continue
+                text = self._truncate(text, remaining)
+                tokens = self.count(text)
+                action = "truncated"
+
+            kept.append(dict(item, text=text, tokens=tokens, truncated=action == "truncated"))
+            kept_terms.append(terms)
+            used += tokens
+            decisions.append({"item": label, "action": action, "tokens": tokens})
+
+        self.last_decisions = decisions
+        for decision in decisions:
+            logger.debug(f"Context packing: {decision}")
+        counts = Counter(d["action"] for d in decisions)
+        logger.info(
+            f"Context packing ({self.provider or 'default'} {self.model}): {used}/{budget} tokens, "
+            f"{len(kept)}/{len(candidates)} items kept, {counts['truncated']} truncated, "
+            f"{counts['duplicate']} duplicates, {counts['dropped']} dropped"
+        )
+        return kept
+
+    @staticmethod
+    def _score(question: str, items: List[Dict]) -> None:
+        """relevance = BM25 score of the item against the question (normalized to 0-1) + prior."""
+        query_terms = set(tokenize(question))
+        item_terms = [Counter(tokenize(item["text"])) for item in items]
+        n_items = len(items)
+        avg_length = sum(sum(t.values()) for t in item_terms) / n_items if n_items else 1.0
+        df = Counter(term for terms in item_terms for term in set(terms) if term in query_terms)
+
+        raw = []
+        for terms in item_terms:
+            length = sum(terms.values())
+            score = 0.0
+            for term in query_terms:
+                tf = terms.get(term, 0)
+                if tf:
+                    idf = math.log(1 + (n_items - df[term] + 0.5) / (df[term] + 0.5))
+                    score += idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * length / (avg_length or 1.0)))
+            raw.append(score)
+
+        top = max(raw, default=0.0) or 1.0
+        for item, score in zip(items, raw):
+            item["relevance"] = score / top + float(item.get("prior", 0.0))
+
+    @staticmethod
+    def _duplicate_of(terms: Counter, kept_terms: List[Counter]) -> Optional[int]:
+        size = sum(terms.values())
+        if not size:
+            return None
+        for index, other in enumerate(kept_terms):
+            shared = sum((terms & other).values())
+            if shared / min(size, sum(other.values()) or 1) >= DUPLICATE_OVERLAP:
+                return index
+        return None
+
+    @staticmethod
+    def _strip_overlap(item: Dict, kept: List[Dict]) -> str:
+        """Remove the beginning of a chunk already present at the end of a kept chunk of the same source."""
+        text = item["text"]
+        head = text[:MIN_TEXT_OVERLAP]
+        if item["kind"] != KIND_CHUNK or len(head) < MIN_TEXT_OVERLAP:
+            return text
+        for other in kept:
+            if other["kind"] != KIND_CHUNK or other.get("source") != item.get("source"):
+                continue
+            position = other["text"].find(head)
+            if position < 0:
+                continue
+            tail = other["text"][position:]
+            if text.startswith(tail):
+                return text[len(tail):].lstrip()
+        return text
+
+    def _truncate(self, text: str, tokens: int) -> str:
+        """Cut text to about `tokens` tokens, on a paragraph or sentence boundary when possible."""
+        limit = max(1, int(len(text) * tokens / max(1, self.count(text))) - len(ELISION) - 1)
+        cut = text[:limit]
+        boundary = max(cut.rfind("\n\n"), cut.rfind(". "))
+        if boundary > limit // 2:
+            cut = cut[:boundary + 1]
+        return f"{cut.rstrip()} {ELISION}"
+
+    # --- Document chat ---
+
+    def split_document_context(self, document_context: str) -> List[Dict]:
+        """
+        Split a document chat context ('--- DEBUT DOCUMENT: name ---' blocks) into section items.
+        The first section of each document gets a small prior (title, abstract).
+        """
+        starts = list(DOCUMENT_START.finditer(document_context))
+        blocks = []
+        if not starts:
+            blocks.append(("Document", document_context))
+        for i, match in enumerate(starts):
+            end = starts[i + 1].start() if i + 1 < len(starts) else len(document_context)
+            body = document_context[match.end():end]
+            body = body.replace(f"--- FIN DOCUMENT: {match.group(1)} ---", "")
+            blocks.append((match.group(1), body))
+
+        sections = []
+        for name, body in blocks:
+            current: List[str] = []
+            current_tokens = 0
+            for paragraph in re.split(r"\n\s*\n", body.strip()):
+                paragraph_tokens = self.count(paragraph)
+                if current and current_tokens + paragraph_tokens > SECTION_TOKENS:
+                    sections.append(self._section(name, current, sections))
+                    current, current_tokens = [], 0
+                current.append(paragraph)
+                current_tokens += paragraph_tokens
+            if current:
+                sections.append(self._section(name, current, sections))
+        return sections
+
+    @staticmethod
+    def _section(name: str, paragraphs: List[str], previous: List[Dict]) -> Dict:
+        first = not any(section["source"] == name for section in previous)
+        return {"kind": KIND_SECTION, "source": name, "text": "\n\n".join(paragraphs), "prior": 0.1 if first else 0.0}
+
+    def pack_document_context(self, document_context: str, question: str, budget_tokens: Optional[int] = None) -> str:
+        """
+        Fit a document chat context into the budget, keeping the sections most relevant to the question.
+        Returns the context unchanged when it fits.
+
+        Args:
+            document_context: Text with '--- DEBUT DOCUMENT: name ---' / '--- FIN DOCUMENT: name ---' blocks
+            question: User question
+            budget_tokens: Budget for the documents (default: the packer budget)
+
+        Returns:
+            Context with the kept sections in document order, '[...]' marking removed parts
+        """
+        budget = self.budget_tokens if budget_tokens is None else budget_tokens
+        if self.count(document_context) <= budget:
+            return document_context
+
+        sections = self.split_document_context(document_context)
+        kept = sorted(self.pack(question, sections, budget), key=lambda section: section["order"])
+        kept_orders = {section["order"] for section in kept}
+
+        parts = []
+        current_source = None
+        for section in kept:
+            if section["source"] != current_source:
+                if current_source is not None:
+                    parts.append(f"--- FIN DOCUMENT: {current_source} ---\n")
+                current_source = section["source"]
+                parts.append(f"--- DEBUT DOCUMENT: {current_source} ---")
+            # Sections skipped since the previous one kept are marked
+            previous_order = section["order"] - 1
+            if previous_order >= 0 and previous_order not in kept_orders \
+                    and sections[previous_order]["source"] == current_source:
+                parts.append(ELISION)
+            parts.append(section["text"])
+        if current_source is not None:
+            parts.append(f"--- FIN DOCUMENT: {current_source} ---")
+        return "\n\n".join(parts)
+
+
+def summary_items(global_context: Union[str, List[str], None]) -> List[Dict]:
+    """Context items for KB document summaries (a list of summaries, or one text)."""
+    if not global_context:
+        return []
+    summaries = [global_context] if isinstance(global_context, str) else list(global_context)
+    return [{"kind": KIND_SUMMARY, "text": summary, "source": "résumé"} for summary in summaries if summary]
+
+
+def chunk_items(results: List[Dict]) -> List[Dict]:
+    """Context items for retrieved chunks; the retrieval rank gives a prior from 1 (first) down to 0."""
+    count = len(results)
+    items = []
+    for rank, result in enumerate(results):
+        metadata = result.get("metadata") or {}
+        items.append({
+            "kind": KIND_CHUNK,
+            "text": result["text"],
+            "source": metadata.get("source_file") or metadata.get("file_path"),
+            "prior": 1.0 - rank / count,
+            "result": result
+        })
+    return items
@@ -3,10 +3,12 @@ Document Ingestion Service for RAG Knowledge Base.
 Handles extraction, chunking, embedding, and storage of documents.
 """
 
-from typing import List, Dict, Callable, Optional
+from typing import List, Dict, Callable, Iterable, Iterator, Optional, Tuple
 import os
-import uuid
 import logging
+from bisect import bisect_right
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 
 # Document extraction
@@ -14,11 +16,50 @@ from pypdf import PdfReader
 from docx import Document as DocxDocument
 
 # Our services
-from core.services.embedding_service import EmbeddingService
+from core.services.embedding_service import EmbeddingService, EmbeddingBatcher, DEFAULT_TOKEN_BUDGET
 from core.services.vector_store_service import VectorStoreService
+from core.services.ingestion_manifest import (
+    IngestionManifest, STATUS_NEW, STATUS_UNCHANGED, chunk_id, document_id, file_key
+)
+from core.services.summary_jobs import get_summary_journal, SummaryPool, DEFAULT_SUMMARY_WORKERS
 
 logger = logging.getLogger(__name__)
 
+SUPPORTED_EXTENSIONS = {'.pdf', '.docx', '.txt'}
+
+# Maximum number of chunks embedded and stored together in pipelined folder ingestion
+DEFAULT_EMBEDDING_BATCH_SIZE = 256
+
+# Characters of the beginning of a document sent for summary generation
+SUMMARY_CONTEXT_CHARS = 20000
+
+# TXT files are read in blocks of this many characters
+TXT_BLOCK_CHARS = 256 * 1024
+
+# Files larger than this are streamed in the main process instead of going through the pool
+STREAMING_FILE_BYTES = 32 * 1024 * 1024
+
+# A unit of extracted text: (1-based page number, or None for formats without pages, text)
+Page = Tuple[Optional[int], str]
+
+
+def default_worker_count() -> int:
+    """Default number of extraction processes (keeps one core for the UI/embedding)."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def extract_pages_from_file(file_path: str) -> List[Page]:
+    """
+    Extract the pages of a file (module-level so it can run in a worker process).
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        List of (page_number, text)
+    """
+    return list(DocumentIngestionService._iter_pages(file_path))
+
 
 class DocumentIngestionService:
     """Service for ingesting documents into knowledge bases."""
@@ -58,16 +99,41 @@ class DocumentIngestionService:
             api_key: API Key for summary generation (Optional)
             
         Returns:
-            Dict with 'success', 'chunks_created', 'errors', 'summary'
+            Dict with 'success', 'chunks_created', 'errors', 'summary', 'document_id'
+            and 'skipped' (True when the file is unchanged since its last indexing)
         """
+        summary_pool = None
         try:
+            manifest = IngestionManifest(kb_id)
+            status, fingerprint = manifest.check(file_path)
+            if status == STATUS_UNCHANGED:
+                manifest.save()
+                if progress_callback:
+                    progress_callback(f"{os.path.basename(file_path)} unchanged, skipped", 1.0)
+                logger.info(f"Skipping unchanged file {file_path}")
+                return {
+                    "success": True,
+                    "chunks_created": 0,
+                    "errors": [],
+                    "summary": "",
+                    "document_id": document_id(kb_id, file_path),
+                    "skipped": True
+                }
+            
             if progress_callback:
                 progress_callback(f"Reading {os.path.basename(file_path)}...", 0.1)
             
-            # Extract text based on file type
-            text = self._extract_text(file_path)
+            # Pages are streamed: only the beginning of the document is held for the summary
+            read_fraction = 0.0
+            
+            def page_read(fraction: float) -> None:
+                nonlocal read_fraction
+                read_fraction = fraction
             
-            if not text or not text.strip():
+            pages = self._iter_pages(file_path, page_read)
+            head_pages, summary_context = self._peek_text(pages, SUMMARY_CONTEXT_CHARS)
+            
+            if not summary_context.strip():
                 logger.warning(f"No text extracted from {file_path}")
                 return {
                     "success": False,
@@ -75,84 +141,69 @@ class DocumentIngestionService:
                     "errors": [f"No text content in {file_path}"]
                 }
 
-            # Generate Summary (if provider provided)
+            # Generate Summary (if provider provided), while the file is chunked and embedded
             summary = ""
-            if provider and api_key and text:
+            if provider and api_key:
                 if progress_callback:
                     progress_callback(f"Generating summary for {os.path.basename(file_path)}...", 0.2)
-                
-                try:
-                    from core.services.llm_service import LLMService
-                    # Truncate text for summary generation to avoid token limits (e.g., first 15k chars ~ 3-4k tokens)
-                    # We want a detailed summary, so we give enough context.
-                    summary_context = text[:20000] 
-                    
-                    prompt = [
-                        {"role": "system", "content": "Tu es un analyste expert francophone. Ta tâche est de réaliser une EXTRACTION EXHAUSTIVE ET STRUCTURÉE des informations du document suivant, EN FRANÇAIS. \n\nOBJECTIF : Capturer un MAXIMUM de détails (Noms, Dates Chiffrés, Concepts techniques, Décisions, Actions). Ne fais pas de synthèse excessive, privilégie la densité d'information.\n\nSTRUCTURE ATTENDUE :\n1. 📋 MÉTADONNÉES : Titre exact, Auteur/Source, Date, Type de document.\n2. 🔍 ANALYSE APPROFONDIE : Résumé exécutif complet, préservant la chronologie et la logique.\n3. 🗝️ POINTS CLÉS : Liste des arguments, décisions ou faits majeurs.\n4. 💡 CONCEPTS & ENTITÉS : Tous les noms propres, termes techniques, et chiffres importants cités.\n\nATTENTION: TA RÉPONSE DOIT ÊTRE EXCLUSIVEMENT EN FRANÇAIS."},
-                        {"role": "user", "content": f"Voici le début du document :\n\n{summary_context}\n\n---\nGénère l'analyse exhaustive maintenant (en Français)."}
-                    ]
-                    
-                    # We assume standard generation
-                    success, resp = LLMService.generate_response(provider, api_key, prompt)
-                    if success:
-                        summary = resp
-                        logger.info(f"Summary generated for {file_path}")
-                    else:
-                        logger.warning(f"Failed to generate summary: {resp}")
-                        summary = "Résumé non disponible (Erreur génération)"
-                        
-                except Exception as e:
-                    logger.error(f"Error generating summary: {e}")
-                    summary = f"Erreur de génération: {e}"
+                summary_pool = SummaryPool(self._summarize, get_summary_journal(kb_id), max_workers=1)
+                summary_pool.submit(
+                    file_path, document_id(kb_id, file_path), fingerprint["hash"], summary_context, provider, api_key
+                )
             
             if progress_callback:
-                progress_callback(f"Chunking {os.path.basename(file_path)}...", 0.3)
+                progress_callback(f"Chunking and embedding {os.path.basename(file_path)}...", 0.3)
             
-            # Split into chunks
-            chunks = self.text_splitter.split_text(text)
+            # Replace the previous version of the file in the vector database
+            self._delete_previous_chunks(kb_id, manifest, file_path)
             
-            if progress_callback:
-                progress_callback(f"Generating embeddings for {len(chunks)} chunks...", 0.5)
+            # pages -> chunks -> embedding batches -> Chroma writes, memory bounded by the batch
+            stored = 0
             
-            # Generate embeddings
-            embeddings = self.embedding_service.embed_texts(chunks)
+            def store_batch(batch: List[Dict], embeddings) -> None:
+                nonlocal stored
+                self.vector_store.add_documents(kb_id, batch, embeddings)
+                stored += len(batch)
+                if progress_callback:
+                    # The chunk total is unknown while streaming: progress follows the pages read
+                    progress_callback(f"Stored {stored} chunks...", 0.3 + 0.6 * read_fraction)
             
-            if progress_callback:
-                progress_callback(f"Storing {len(chunks)} chunks...", 0.8)
+            chunk_count = 0
+            with EmbeddingBatcher(self.embedding_service, store_batch) as batcher:
+                for doc in self._iter_documents(kb_id, file_path, chain(head_pages, pages), fingerprint["hash"]):
+                    batcher.add(doc["text"], doc)
+                    chunk_count += 1
             
-            # Prepare documents for storage
-            documents = []
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                doc_id = str(uuid.uuid4())
-                documents.append({
-                    "id": doc_id,
-                    "text": chunk,
-                    "metadata": {
-                        "source_file": os.path.basename(file_path),
-                        "file_path": file_path,
-                        "chunk_index": i,
-                        "total_chunks": len(chunks)
-                    }
-                })
+            self.vector_store.persist(kb_id)
+            manifest.record(file_path, fingerprint, chunk_count)
+            manifest.save()
             
-            # Store in vector database
-            self.vector_store.add_documents(kb_id, documents, embeddings)
+            if summary_pool is not None:
+                if summary_pool.pending_count() and progress_callback:
+                    progress_callback(f"Waiting for the summary of {os.path.basename(file_path)}...", 0.9)
+                summary = summary_pool.wait().get(file_path, "")
+                summary_pool.journal.forget_completed([document_id(kb_id, file_path)])
             
             if progress_callback:
                 progress_callback(f"Completed {os.path.basename(file_path)}", 1.0)
             
-            logger.info(f"Successfully ingested {file_path}: {len(chunks)} chunks")
+            logger.info(f"Successfully ingested {file_path}: {chunk_count} chunks")
             
             return {
                 "success": True,
-                "chunks_created": len(chunks),
+                "chunks_created": chunk_count,
                 "errors": [],
-                "summary": summary
+                "summary": summary,
+                "document_id": document_id(kb_id, file_path),
+                "skipped": False
             }
             
         except Exception as e:
             error_msg = f"Error ingesting {file_path}: {str(e)}"
             logger.error(error_msg)
+            if summary_pool is not None:
+                # Let the summary finish (it stays journaled) and free the journal for resumes
+                summary_pool.wait()
             return {
                 "success": False,
                 "chunks_created": 0,
@@ -165,111 +216,562 @@ class DocumentIngestionService:
         folder_path: str,
         progress_callback: Optional[Callable[[str, float], None]] = None,
         provider: str = None,
-        api_key: str = None
+        api_key: str = None,
+        workers: Optional[int] = None,
+        batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        on_summary: Optional[Callable[[str, str, str], None]] = None,
+        summary_workers: int = DEFAULT_SUMMARY_WORKERS
     ) -> Dict:
         """
         Ingest all supported files in a folder recursively.
         
+        Incremental: a per-KB manifest of (path, size, mtime, content hash) is used to
+        skip unchanged files, re-index modified ones and drop chunks of removed ones.
+        
+        Pipelined in three stages:
+        1. Text extraction in a process pool (PDF/DOCX/TXT parsing is CPU-bound pure Python)
+        2. Chunking of each file as soon as its text arrives
+        3. Embedding + storage in token-budget batches spanning several files
+           (EmbeddingBatcher), so throughput does not depend on file sizes
+        
+        LLM summaries run concurrently in a bounded thread pool (SummaryPool) while the
+        pipeline goes on; their journal lets an interrupted run resume (resume_summaries).
+        
         Args:
             kb_id: Knowledge base identifier
             folder_path: Path to the folder
             progress_callback: Optional callback
             provider: LLM Provider for summary (Optional)
             api_key: API Key (Optional)
+            workers: Number of extraction processes (default: CPU count - 1, 1 = no pool)
+            batch_size: Maximum number of chunks embedded and stored together
+            token_budget: Initial token budget of an embedding batch (adapted during the run)
+            on_summary: Called with (file_path, document_id, summary) as soon as a file's summary is
+                        ready (one call at a time, from a worker thread; summary is "" without provider);
+                        files whose chunks then fail to be stored are listed in 'failed_document_ids'
+            summary_workers: Maximum concurrent summary calls
             
         Returns:
-            Dict with 'success', 'files_processed', 'chunks_created', 'errors', 'summaries'
+            Dict with 'success', 'files_processed', 'files_new', 'files_updated',
+            'files_skipped', 'files_removed', 'chunks_created', 'errors', 'summaries',
+            'document_ids' (file_path -> KB document id), 'removed_document_ids',
+            'failed_document_ids' (reported to on_summary but not indexed, their entries must be removed),
+            'embedding_cache' (hit/miss counters for this run), 'embedding_batches'
         """
-        supported_extensions = {'.pdf', '.docx', '.txt'}
-        
         # Find all supported files
-        files_to_process = []
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                if Path(file).suffix.lower() in supported_extensions:
-                    files_to_process.append(os.path.join(root, file))
+        found_files = self._find_supported_files(folder_path)
+        manifest = IngestionManifest(kb_id)
+        errors = []
+        
+        # Files indexed from this folder that no longer exist
+        present = {file_key(f) for f in found_files}
+        removed_files = []
+        for old_path in manifest.files_under(folder_path):
+            if file_key(old_path) in present:
+                continue
+            try:
+                self.vector_store.delete_file_documents(kb_id, old_path)
+                manifest.remove(old_path)
+                removed_files.append(old_path)
+            except Exception as e:
+                errors.append(f"Error removing chunks of {old_path}: {str(e)}")
         
-        if not files_to_process:
+        if not found_files and not removed_files:
+            manifest.save()
             return {
                 "success": False,
                 "files_processed": 0,
                 "chunks_created": 0,
-                "errors": ["No supported files found in folder"]
+                "errors": errors or ["No supported files found in folder"]
             }
         
-        logger.info(f"Found {len(files_to_process)} files to process in {folder_path}")
+        # Only new or modified files go through the pipeline
+        files_to_process = []
+        fingerprints = {}
+        new_files = set()
+        skipped_count = 0
+        for file_path in found_files:
+            try:
+                status, fingerprint = manifest.check(file_path)
+            except OSError as e:
+                errors.append(f"Error reading {file_path}: {str(e)}")
+                continue
+            if status == STATUS_UNCHANGED:
+                skipped_count += 1
+                continue
+            if status == STATUS_NEW:
+                new_files.add(file_path)
+            fingerprints[file_path] = fingerprint
+            files_to_process.append(file_path)
+        
+        if workers is None:
+            workers = default_worker_count()
+        total_files = len(files_to_process)
+        logger.info(
+            f"{folder_path}: {total_files} new/modified, {skipped_count} unchanged, "
+            f"{len(removed_files)} removed files ({workers} extraction workers)"
+        )
+        self.embedding_service.reset_cache_stats()
         
         total_chunks = 0
-        errors = []
         file_summaries = {} # Map file_path -> summary
+        file_chunk_counts = {} # Map file_path -> number of chunks
+        failed_files = set()
+        reported_files = set() # Files whose summary went to on_summary
+        
+        def report_summary(file_path: str, doc_id: str, summary: str) -> None:
+            # A file whose chunks already failed is not indexed, it must not get a KB entry
+            if on_summary is None or file_path in failed_files:
+                return
+            reported_files.add(file_path)
+            on_summary(file_path, doc_id, summary)
+        
+        summary_pool = None
+        if provider and api_key and files_to_process:
+            summary_pool = SummaryPool(
+                self._summarize, get_summary_journal(kb_id), report_summary, max_workers=summary_workers
+            )
         
-        for i, file_path in enumerate(files_to_process):
-            # Update progress
-            file_progress = i / len(files_to_process)
+        extracted_count = 0
+        embedded_count = 0
+        chunked_count = 0
+        
+        def report(message: str) -> None:
             if progress_callback:
-                progress_callback(
-                    f"Processing file {i+1}/{len(files_to_process)}: {os.path.basename(file_path)}",
-                    file_progress
-                )
+                # Extraction drives the overall progress, embedding closes the gap
+                progress = 0.9 * extracted_count / total_files
+                if chunked_count:
+                    progress = max(progress, 0.9 * embedded_count / chunked_count)
+                progress_callback(message, min(progress, 0.99))
+        
+        def store_batch(documents: List[Dict], embeddings) -> None:
+            nonlocal total_chunks, embedded_count
+            # Chunks carry their source file in metadata, a batch may span several files
+            self.vector_store.add_documents(kb_id, documents, embeddings)
+            total_chunks += len(documents)
+            embedded_count += len(documents)
+            report(f"[Embeddings] {embedded_count}/{chunked_count} chunks...")
+        
+        def batch_failed(documents: List[Dict], error: Exception) -> None:
+            nonlocal embedded_count
+            batch_files = {doc["metadata"]["file_path"] for doc in documents}
+            failed_files.update(batch_files)
+            error_msg = f"Error storing chunks for {', '.join(os.path.basename(f) for f in sorted(batch_files))}: {str(error)}"
+            logger.error(error_msg)
+            errors.append(error_msg)
+            embedded_count += len(documents)
+        
+        batcher = EmbeddingBatcher(
+            self.embedding_service,
+            store_batch,
+            on_error=batch_failed,
+            token_budget=token_budget,
+            max_items=batch_size
+        )
+        
+        extracted_pages = self._iter_extracted_pages(files_to_process, workers) if files_to_process else iter(())
+        for file_path, pages, error in extracted_pages:
+            extracted_count += 1
+            file_name = os.path.basename(file_path)
+            report(f"[Extraction {extracted_count}/{total_files}] {file_name}")
+            
+            if error:
+                error_msg = f"Error ingesting {file_path}: {error}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+                failed_files.add(file_path)
+                continue
             
-            # Ingest file
-            result = self.ingest_file(kb_id, file_path, provider=provider, api_key=api_key)
+            try:
+                pages = iter(pages)
+                head_pages, summary_context = self._peek_text(pages, SUMMARY_CONTEXT_CHARS)
+                if not summary_context.strip():
+                    logger.warning(f"No text extracted from {file_path}")
+                    errors.append(f"No text content in {file_path}")
+                    failed_files.add(file_path)
+                    continue
+                
+                # Drop the previous version of the file before its new chunks are queued
+                self._delete_previous_chunks(kb_id, manifest, file_path)
+                
+                if summary_pool is not None:
+                    report(f"[Résumé] {file_name}")
+                    summary_pool.submit(
+                        file_path, document_id(kb_id, file_path), fingerprints[file_path]["hash"],
+                        summary_context, provider, api_key
+                    )
+                else:
+                    file_summaries[file_path] = ""
+                    report_summary(file_path, document_id(kb_id, file_path), "")
+                
+                report(f"[Découpage] {file_name}")
+                chunk_count = 0
+                documents = self._iter_documents(kb_id, file_path, chain(head_pages, pages), fingerprints[file_path]["hash"])
+                for doc in documents:
+                    # Embedded in cross-file batches as the token budget fills up
+                    batcher.add(doc["text"], doc)
+                    chunk_count += 1
+                    chunked_count += 1
+                file_chunk_counts[file_path] = chunk_count
+            except Exception as e:
+                error_msg = f"Error ingesting {file_path}: {str(e)}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+                failed_files.add(file_path)
+        
+        batcher.flush()
+        if file_chunk_counts:
+            self.vector_store.persist(kb_id)
+        
+        if summary_pool is not None:
+            def summary_progress(done: int, total: int) -> None:
+                if progress_callback:
+                    progress_callback(f"[Résumés] {done}/{total}", 0.99)
             
-            if result["success"]:
-                total_chunks += result["chunks_created"]
-                file_summaries[file_path] = result.get("summary", "")
-            else:
-                errors.extend(result["errors"])
+            file_summaries.update(summary_pool.wait(summary_progress))
+        
+        batch_stats = batcher.get_stats()
+        logger.info(
+            f"Embedded {batch_stats['texts']} chunks in {batch_stats['batches']} batches "
+            f"({batch_stats['tokens_per_second']:.0f} tokens/s, final budget {batch_stats['token_budget']} tokens)"
+        )
+        
+        for file_path in failed_files:
+            file_summaries.pop(file_path, None)
+        
+        # Only fully stored files are recorded, failed ones are retried on the next run
+        indexed_files = [f for f in file_chunk_counts if f not in failed_files]
+        for file_path in indexed_files:
+            manifest.record(file_path, fingerprints[file_path], file_chunk_counts[file_path])
+        manifest.save()
+        if summary_pool is not None:
+            summary_pool.journal.forget_completed([document_id(kb_id, f) for f in indexed_files])
+        
+        cache_stats = self.embedding_service.get_cache_stats()
+        if cache_stats:
+            logger.info(
+                f"Embedding cache for {folder_path}: {cache_stats['hits']} hits, "
+                f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%})"
+            )
         
         if progress_callback:
             progress_callback("Folder ingestion complete", 1.0)
         
         return {
             "success": len(errors) == 0,
-            "files_processed": len(files_to_process),
+            "files_processed": total_files,
+            "files_new": len([f for f in indexed_files if f in new_files]),
+            "files_updated": len([f for f in indexed_files if f not in new_files]),
+            "files_skipped": skipped_count,
+            "files_removed": len(removed_files),
             "chunks_created": total_chunks,
             "errors": errors,
-            "summaries": file_summaries
+            "summaries": file_summaries,
+            "document_ids": {f: document_id(kb_id, f) for f in indexed_files},
+            "removed_document_ids": [document_id(kb_id, f) for f in removed_files],
+            "failed_document_ids": [document_id(kb_id, f) for f in reported_files if f in failed_files],
+            "embedding_cache": cache_stats,
+            "embedding_batches": batch_stats
         }
     
-    def _extract_text(self, file_path: str) -> str:
+    @staticmethod
+    def _find_supported_files(folder_path: str) -> List[str]:
+        """List supported files under a folder (recursive)."""
+        files = []
+        for root, dirs, names in os.walk(folder_path):
+            for name in names:
+                if Path(name).suffix.lower() in SUPPORTED_EXTENSIONS:
+                    files.append(os.path.join(root, name))
+        return files
+    
+    def _iter_extracted_pages(
+        self,
+        file_paths: List[str],
+        workers: int
+    ) -> Iterator[Tuple[str, Optional[Iterable[Page]], Optional[str]]]:
         """
-        Extract text from a file based on its extension.
+        Extract pages, yielding results as soon as each file is done.
+        
+        Files extracted in this process (sequential mode, or files above STREAMING_FILE_BYTES)
+        are yielded as lazy page generators; extraction errors then surface while iterating.
         
         Args:
-            file_path: Path to the file
+            file_paths: Files to extract
+            workers: Number of worker processes (1 = extract in this process)
             
-        Returns:
-            Extracted text
+        Yields:
+            Tuples (file_path, pages, error_message)
         """
-        ext = Path(file_path).suffix.lower()
+        if workers <= 1 or len(file_paths) == 1:
+            for file_path in file_paths:
+                yield file_path, self._iter_pages(file_path), None
+            return
+        
+        # Very large files would be fully materialized by a worker, stream them here instead
+        pooled_paths = []
+        streamed_paths = []
+        for file_path in file_paths:
+            try:
+                is_large = os.path.getsize(file_path) > STREAMING_FILE_BYTES
+            except OSError:
+                is_large = False
+            (streamed_paths if is_large else pooled_paths).append(file_path)
         
         try:
-            if ext == '.pdf':
-                return self._extract_from_pdf(file_path)
-            elif ext == '.docx':
-                return self._extract_from_docx(file_path)
-            elif ext == '.txt':
-                return self._extract_from_txt(file_path)
-            else:
-                raise ValueError(f"Unsupported file type: {ext}")
+            executor = ProcessPoolExecutor(max_workers=workers)
         except Exception as e:
-            logger.error(f"Error extracting text from {file_path}: {e}")
-            raise
+            logger.warning(f"Process pool unavailable ({e}), extracting sequentially")
+            yield from self._iter_extracted_pages(file_paths, 1)
+            return
+        
+        # Keep a bounded window of in-flight files so extracted texts don't pile up in memory
+        max_in_flight = workers * 2
+        remaining = iter(pooled_paths)
+        in_flight = {}
+        try:
+            for file_path in remaining:
+                in_flight[executor.submit(extract_pages_from_file, file_path)] = file_path
+                if len(in_flight) >= max_in_flight:
+                    break
+            
+            # Large files are streamed while the pool works on the small ones
+            for file_path in streamed_paths:
+                yield file_path, self._iter_pages(file_path), None
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = in_flight.pop(future)
+                    next_path = next(remaining, None)
+                    if next_path is not None:
+                        in_flight[executor.submit(extract_pages_from_file, next_path)] = next_path
+                    try:
+                        yield file_path, future.result(), None
+                    except Exception as e:
+                        yield file_path, None, str(e)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
     
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file."""
-        reader = PdfReader(file_path)
-        text_parts = []
+    def _delete_previous_chunks(self, kb_id: str, manifest: IngestionManifest, file_path: str) -> None:
+        """
+        Delete the chunks of a file's previous version.
+        Also runs for files new to the manifest, cleaning up chunks indexed before manifests existed.
+        """
+        paths = {file_path}
+        entry = manifest.get(file_path)
+        if entry:
+            paths.add(entry["path"])
+        for path in paths:
+            self.vector_store.delete_file_documents(kb_id, path)
+    
+    def _iter_documents(
+        self,
+        kb_id: str,
+        file_path: str,
+        pages: Iterable[Page],
+        content_hash: str
+    ) -> Iterator[Dict]:
+        """Wrap the chunks of a file into documents ready for the vector store (deterministic ids)."""
+        for i, (chunk, page_start, page_end) in enumerate(self._iter_chunks(pages)):
+            metadata = {
+                "source_file": os.path.basename(file_path),
+                "file_path": file_path,
+                "chunk_index": i
+            }
+            if page_start is not None:
+                metadata["page"] = page_start
+                metadata["page_end"] = page_end
+            yield {
+                "id": chunk_id(kb_id, file_path, content_hash, i),
+                "text": chunk,
+                "metadata": metadata
+            }
+    
+    def _iter_chunks(self, pages: Iterable[Page]) -> Iterator[Tuple[str, Optional[int], Optional[int]]]:
+        """
+        Split a stream of pages into chunks, carrying overlap across page boundaries.
         
-        for page_num, page in enumerate(reader.pages):
-            text = page.extract_text()
-            if text:
-                text_parts.append(text)
+        Only the current page plus the last (possibly incomplete) chunk are buffered:
+        that chunk is re-split together with the next page.
         
-        return "\n\n".join(text_parts)
+        Yields:
+            Tuples (chunk, first_page, last_page)
+        """
+        buffer = ""
+        page_starts: List[int] = []  # Offset in buffer where each page begins
+        page_numbers: List[Optional[int]] = []
+        
+        def locate(offset: int, length: int) -> Tuple[Optional[int], Optional[int]]:
+            first = page_numbers[bisect_right(page_starts, offset) - 1]
+            last = page_numbers[bisect_right(page_starts, offset + max(length, 1) - 1) - 1]
+            return first, last
+        
+        for page_number, text in pages:
+            if not text:
+                continue
+            # Real pages are separated like paragraphs, TXT blocks are contiguous
+            if buffer and page_number is not None:
+                buffer += "\n\n"
+            page_starts.append(len(buffer))
+            page_numbers.append(page_number)
+            buffer += text
+            
+            chunks, offsets = self._split_with_offsets(buffer)
+            if len(chunks) <= 1:
+                continue
+            for chunk, offset in zip(chunks[:-1], offsets[:-1]):
+                yield (chunk, *locate(offset, len(chunk)))
+            
+            # Carry the last chunk into the next page
+            carry = offsets[-1]
+            first_kept = bisect_right(page_starts, carry) - 1
+            buffer = buffer[carry:]
+            page_starts = [max(0, start - carry) for start in page_starts[first_kept:]]
+            page_numbers = page_numbers[first_kept:]
+        
+        if buffer.strip():
+            chunks, offsets = self._split_with_offsets(buffer)
+            for chunk, offset in zip(chunks, offsets):
+                yield (chunk, *locate(offset, len(chunk)))
+    
+    def _split_with_offsets(self, text: str) -> Tuple[List[str], List[int]]:
+        """Split text and find where each chunk starts in it."""
+        chunks = self.text_splitter.split_text(text)
+        offsets = []
+        position = 0
+        for chunk in chunks:
+            offset = text.find(chunk, position)
+            if offset < 0:
+                offset = position
+            offsets.append(offset)
+            position = offset + 1
+        return chunks, offsets
+    
+    @staticmethod
+    def _peek_text(pages: Iterator[Page], limit: int) -> Tuple[List[Page], str]:
+        """
+        Read pages until at least `limit` characters are available.
+        
+        Returns:
+            Tuple (pages read, their text truncated to limit) - the pages must be
+            chained back in front of the iterator
+        """
+        head = []
+        size = 0
+        for page in pages:
+            head.append(page)
+            size += len(page[1])
+            if size >= limit:
+                break
+        return head, "\n\n".join(text for _, text in head)[:limit]
+    
+    def resume_summaries(
+        self,
+        kb_id: str,
+        api_key_for: Callable[[str], Optional[str]],
+        on_summary: Optional[Callable[[str, str, str], None]] = None,
+        summary_workers: int = DEFAULT_SUMMARY_WORKERS
+    ) -> Dict[str, str]:
+        """
+        Generate the summaries left pending by an interrupted or failed run (blocking).
+        
+        Args:
+            kb_id: Knowledge base identifier
+            api_key_for: Returns the API key of a provider (None skips its jobs)
+            on_summary: Called with (file_path, document_id, summary) as each summary completes
+            summary_workers: Maximum concurrent summary calls
+            
+        Returns:
+            Dict file_path -> summary (empty if summaries of this KB are already being generated)
+        """
+        journal = get_summary_journal(kb_id)
+        # Skipped while an import or another resume generates summaries for this KB
+        pool = SummaryPool(self._summarize, journal, on_summary, max_workers=summary_workers, exclusive=True)
+        if not pool.active:
+            logger.info(f"Summaries of KB {kb_id} are already being generated, resume skipped")
+            pool.wait()
+            return {}
+        count = pool.resume(api_key_for)
+        if count:
+            logger.info(f"Resuming {count} pending summaries for KB {kb_id}")
+        summaries = pool.wait()
+        # Summaries of files not indexed yet stay in the journal for their next import
+        manifest = IngestionManifest(kb_id)
+        journal.forget_completed([document_id(kb_id, f) for f in summaries if manifest.get(f)])
+        return summaries
     
-    def _extract_from_docx(self, file_path: str) -> str:
+    def _summarize(self, file_path: str, text: str, provider: str, api_key: str) -> str:
+        """
+        Generate an LLM summary of the beginning of a document.
+        
+        Returns:
+            Summary text
+            
+        Raises:
+            Exception: The LLM call failed
+        """
+        # Rate-limited per provider: folder ingestion fires many summaries in a burst
+        from core.services import async_llm_service
+        # Truncate text for summary generation to avoid token limits (e.g., first 15k chars ~ 3-4k tokens)
+        # We want a detailed summary, so we give enough context.
+        summary_context = text[:20000] 
+        
+        prompt = [
+            {"role": "system", "content": "Tu es un analyste expert francophone. Ta tâche est de réaliser une EXTRACTION EXHAUSTIVE ET STRUCTURÉE des informations du document suivant, EN FRANÇAIS. \n\nOBJECTIF : Capturer un MAXIMUM de détails (Noms, Dates Chiffrés, Concepts techniques, Décisions, Actions). Ne fais pas de synthèse excessive, privilégie la densité d'information.\n\nSTRUCTURE ATTENDUE :\n1. 📋 MÉTADONNÉES : Titre exact, Auteur/Source, Date, Type de document.\n2. 🔍 ANALYSE APPROFONDIE : Résumé exécutif complet, préservant la chronologie et la logique.\n3. 🗝️ POINTS CLÉS : Liste des arguments, décisions ou faits majeurs.\n4. 💡 CONCEPTS & ENTITÉS : Tous les noms propres, termes techniques, et chiffres importants cités.\n\nATTENTION: TA RÉPONSE DOIT ÊTRE EXCLUSIVEMENT EN FRANÇAIS."},
+            {"role": "user", "content": f"Voici le début du document :\n\n{summary_context}\n\n---\nGénère l'analyse exhaustive maintenant (en Français)."}
+        ]
+        
+        # We assume standard generation
+        success, resp = async_llm_service.generate_response(provider, api_key, prompt)
+        if success:
+            logger.info(f"Summary generated for {file_path}")
+            return resp
+        raise RuntimeError(f"Failed to generate summary: {resp}")
+    
+    @staticmethod
+    def _iter_pages(
+        file_path: str,
+        on_progress: Optional[Callable[[float], None]] = None
+    ) -> Iterator[Page]:
+        """
+        Stream the text of a file page by page.
+        PDF pages keep their page number, TXT files are read in blocks and DOCX in one piece.
+        
+        Args:
+            file_path: Path to the file
+            on_progress: Called with the fraction of the file read (0-1) after each page
+            
+        Yields:
+            Tuples (page_number, text)
+        """
+        ext = Path(file_path).suffix.lower()
+        report = on_progress or (lambda fraction: None)
+        
+        if ext == '.pdf':
+            reader = PdfReader(file_path)
+            page_count = len(reader.pages)
+            for page_num, page in enumerate(reader.pages, start=1):
+                text = page.extract_text()
+                report(page_num / page_count)
+                if text:
+                    yield page_num, text
+        elif ext == '.docx':
+            text = DocumentIngestionService._extract_from_docx(file_path)
+            report(1.0)
+            yield None, text
+        elif ext == '.txt':
+            size = os.path.getsize(file_path) or 1
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                for block in iter(lambda: f.read(TXT_BLOCK_CHARS), ""):
+                    # Byte position of the underlying buffer (read-ahead included)
+                    report(min(f.buffer.tell() / size, 1.0))
+                    yield None, block
+        else:
+            raise ValueError(f"Unsupported file type: {ext}")
+    
+    @staticmethod
+    def _extract_from_docx(file_path: str) -> str:
         """Extract text from DOCX file."""
         doc = DocxDocument(file_path)
         text_parts = []
@@ -279,8 +781,3 @@ class DocumentIngestionService:
                 text_parts.append(paragraph.text)
         
         return "\n\n".join(text_parts)
-    
-    def _extract_from_txt(self, file_path: str) -> str:
-        """Extract text from TXT file."""
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            return f.read()
@@ -0,0 +1,273 @@
+"""
+Embedding Cache for RAG Knowledge Base.
+Content-addressed, two-tier cache (LRU in memory + memory-mapped float32 store on disk)
+so identical texts are never sent twice to the embedding model.
+"""
+
+from typing import Dict, List, Optional, Sequence
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+
+from utils.resource_handler import get_writable_path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "embedding_cache"
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing (Unicode NFC + collapsed whitespace)."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by a hash of (model name, normalized text).
+
+    - Memory tier: LRU of the most recently used vectors.
+    - Disk tier: append-only float32 matrix read through numpy.memmap,
+      with a SQLite index mapping each key to its row.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        dimension: int,
+        cache_dir: Optional[str] = None,
+        memory_size: int = 10000
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            model_name: Name of the embedding model (part of the cache key)
+            dimension: Embedding dimension
+            cache_dir: Directory for the disk tier (default: ./embedding_cache)
+            memory_size: Maximum number of vectors kept in the memory tier
+        """
+        self.model_name = model_name
+        self.dimension = dimension
+        self.memory_size = memory_size
+
+        safe_model = model_name.replace("/", "_")
+        self.cache_dir = os.path.join(cache_dir or get_writable_path(CACHE_DIR), safe_model)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.vectors_path = os.path.join(self.cache_dir, "vectors.f32")
+        self.index_path = os.path.join(self.cache_dir, "index.sqlite3")
+
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._mmap: Optional[np.memmap] = None
+
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self._conn.commit()
+        self._row_count = self._load_row_count()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _load_row_count(self) -> int:
+        """Number of complete rows in the vector file (a torn trailing write is truncated)."""
+        if not os.path.exists(self.vectors_path):
+            return 0
+        row_bytes = self.dimension * 4
+        size = os.path.getsize(self.vectors_path)
+        rows = size // row_bytes
+        if size != rows * row_bytes:
+            # Later appends must start on a row boundary, or their rows would be read shifted
+            os.truncate(self.vectors_path, rows * row_bytes)
+        # Drop index entries pointing past the end of the file
+        self._conn.execute("DELETE FROM entries WHERE row >= ?", (rows,))
+        self._conn.commit()
+        return rows
+
+    def make_key(self, text: str) -> str:
+        """Build the content-addressed cache key for a text."""
+        payload = f"{self.model_name}\x00{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    # --- Lookup ---
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached vector for a text, or None on miss."""
+        return self.get_many([text])[0]
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up several texts at once.
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            List aligned with texts; each item is a float32 vector or None on miss
+        """
+        keys = [self.make_key(t) for t in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+
+        with self._lock:
+            pending: Dict[str, List[int]] = {}
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                    self.memory_hits += 1
+                else:
+                    pending.setdefault(key, []).append(i)
+
+            if pending:
+                rows = self._lookup_rows(list(pending.keys()))
+                matrix = self._get_mmap() if rows else None
+                for key, positions in pending.items():
+                    row = rows.get(key)
+                    if row is None or matrix is None or row >= matrix.shape[0]:
+                        self.misses += len(positions)
+                        continue
+                    vector = np.array(matrix[row], dtype=np.float32)
+                    self._remember(key, vector)
+                    for i in positions:
+                        results[i] = vector
+                    self.disk_hits += len(positions)
+
+        return results
+
+    def _lookup_rows(self, keys: List[str]) -> Dict[str, int]:
+        rows: Dict[str, int] = {}
+        # Stay below SQLite's default host parameter limit
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            cursor = self._conn.execute(
+                f"SELECT key, row FROM entries WHERE key IN ({placeholders})", batch
+            )
+            rows.update({key: row for key, row in cursor.fetchall()})
+        return rows
+
+    def _get_mmap(self) -> Optional[np.memmap]:
+        if self._row_count == 0:
+            return None
+        if self._mmap is None or self._mmap.shape[0] != self._row_count:
+            self._mmap = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(self._row_count, self.dimension)
+            )
+        return self._mmap
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        # Cached vectors are shared with callers, keep them immutable
+        vector.setflags(write=False)
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    # --- Store ---
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        Store vectors for texts (already cached keys are ignored).
+
+        Args:
+            texts: Texts that were embedded
+            vectors: Matrix of shape (len(texts), dimension)
+        """
+        if len(texts) == 0:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(len(texts), self.dimension)
+
+        with self._lock:
+            keys = [self.make_key(t) for t in texts]
+            known = self._lookup_rows(list(set(keys)))
+
+            new_rows = []
+            new_entries = []
+            seen = set()
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector.copy())
+                if key in known or key in seen:
+                    continue
+                seen.add(key)
+                new_entries.append((key, self._row_count + len(new_rows)))
+                new_rows.append(vector)
+
+            if not new_rows:
+                return
+
+            try:
+                # Release the current mapping before growing the file (required on Windows)
+                self._mmap = None
+                with open(self.vectors_path, "ab") as f:
+                    f.write(np.stack(new_rows).astype(np.float32).tobytes())
+                self._conn.executemany("INSERT OR IGNORE INTO entries (key, row) VALUES (?, ?)", new_entries)
+                self._conn.commit()
+                self._row_count += len(new_rows)
+            except Exception as e:
+                # A disk failure must never break embedding, only caching
+                logger.warning(f"Failed to persist embeddings to cache: {e}")
+                try:
+                    self._row_count = self._load_row_count()
+                except Exception as recover_error:
+                    logger.warning(f"Failed to recover the embedding cache file: {recover_error}")
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        """Store a single vector."""
+        self.put_many([text], np.asarray(vector).reshape(1, -1))
+
+    # --- Stats / maintenance ---
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dict with 'hits', 'memory_hits', 'disk_hits', 'misses', 'hit_rate',
+            'memory_entries' and 'disk_entries'
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (hits / total) if total else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._row_count
+            }
+
+    def reset_stats(self) -> None:
+        """Reset hit/miss counters (e.g. at the start of an ingestion run)."""
+        with self._lock:
+            self.memory_hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+    def clear(self) -> None:
+        """Remove every cached vector (memory and disk)."""
+        with self._lock:
+            self._memory.clear()
+            self._mmap = None
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            if os.path.exists(self.vectors_path):
+                os.remove(self.vectors_path)
+            self._row_count = 0
+
+    def close(self) -> None:
+        """Release the SQLite connection and memory map."""
+        with self._lock:
+            self._mmap = None
+            self._conn.close()
@@ -1,93 +1,530 @@
 """
 Embedding Service for RAG Knowledge Base.
 Generates vector embeddings using local Sentence-Transformers model.
+The model can be pre-loaded in a background thread (readiness is exposed as a Future),
+is loaded from a local serialized copy when available, and can be unloaded after an idle period.
 """
 
-from typing import List
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
+import gc
 import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from utils.resource_handler import get_writable_path
 
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = 'all-MiniLM-L6-v2'
+EMBEDDING_DIMENSION = 384
+
+# Serialized copy of the model, written after the first download and loaded instead of the hub
+LOCAL_MODELS_DIR = "models"
+
+# Embedding batcher token budgets (tokens estimated as characters / 4)
+DEFAULT_TOKEN_BUDGET = 8192
+MIN_TOKEN_BUDGET = 1024
+MAX_TOKEN_BUDGET = 65536
+# Shrink batches when less than this much RAM is available (requires psutil)
+LOW_MEMORY_BYTES = 512 * 1024 * 1024
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text (about 4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def local_model_path() -> str:
+    """Directory of the local serialized copy of the embedding model."""
+    return get_writable_path(os.path.join(LOCAL_MODELS_DIR, MODEL_NAME))
+
 
 class EmbeddingService:
     """Service for generating text embeddings using local models."""
-    
+
     _instance = None
     _model = None
-    
+    _cache = None
+
+    # Model lifecycle, shared by all users of the singleton. _model_lock is held while loading;
+    # _state_lock only guards the pre-load future and idle timer so UI threads never wait on a load.
+    _model_lock = threading.RLock()
+    _state_lock = threading.RLock()
+    _preload_future: Optional[Future] = None
+    _idle_unload_seconds = 0.0
+    _idle_timer: Optional[threading.Timer] = None
+    _last_used = 0.0
+
     def __new__(cls):
         """Singleton pattern to avoid reloading the model."""
         if cls._instance is None:
             cls._instance = super(EmbeddingService, cls).__new__(cls)
         return cls._instance
-    
+
     def __init__(self):
-        """Initialize the embedding service."""
-        if self._model is None:
-            self._load_model()
-    
-    def _load_model(self):
-        """Load the Sentence-Transformers model."""
+        """Initialize the embedding service (waits for a background pre-load in progress)."""
+        self._ensure_model()
+        if self._cache is None:
+            self._init_cache()
+
+    @classmethod
+    def _ensure_model(cls):
+        """Return the loaded model, loading it first if needed (e.g. after an idle unload)."""
+        with cls._model_lock:
+            if EmbeddingService._model is None:
+                cls._load_model()
+            cls._touch()
+            return EmbeddingService._model
+
+    @staticmethod
+    def _load_model():
+        """Load the Sentence-Transformers model, from the local copy when there is one."""
         try:
-            logger.info("Loading embedding model 'all-MiniLM-L6-v2'...")
+            logger.info(f"Loading embedding model '{MODEL_NAME}'...")
+            start = time.perf_counter()
             # This model is lightweight (~90MB) and multilingual
             # Produces 384-dimensional embeddings
             from sentence_transformers import SentenceTransformer
-            self._model = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info("Embedding model loaded successfully")
+
+            local_path = local_model_path()
+            if os.path.isfile(os.path.join(local_path, "modules.json")):
+                model = SentenceTransformer(local_path)
+            else:
+                model = SentenceTransformer(MODEL_NAME)
+                try:
+                    model.save(local_path)
+                    logger.info(f"Embedding model saved to {local_path}")
+                except Exception as e:
+                    logger.warning(f"Could not save a local copy of the embedding model: {e}")
+
+            EmbeddingService._model = model
+            logger.info(f"Embedding model loaded successfully in {time.perf_counter() - start:.1f}s")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
             raise
-    
+
+    @classmethod
+    def preload_in_background(cls, idle_unload_seconds: Optional[float] = None) -> Future:
+        """
+        Start loading the model in a daemon thread, without blocking the caller (e.g. the Tk loop).
+        Repeated calls share the pending load; a failed load is retried by the next call.
+
+        Args:
+            idle_unload_seconds: If given, set the idle period before the model is unloaded (0 = never)
+
+        Returns:
+            Future resolved with True once the model is ready (or with the loading exception)
+        """
+        if idle_unload_seconds is not None:
+            cls.configure_idle_unload(idle_unload_seconds)
+
+        with cls._state_lock:
+            future = cls._preload_future
+            if future is not None:
+                if not future.done():
+                    return future
+                if future.exception() is None and EmbeddingService._model is not None:
+                    return future
+
+            future = Future()
+            future.set_running_or_notify_cancel()
+            cls._preload_future = future
+            if EmbeddingService._model is not None:
+                future.set_result(True)
+                return future
+
+        def load():
+            try:
+                cls._ensure_model()
+                future.set_result(True)
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=load, name="embedding-preload", daemon=True).start()
+        return future
+
+    @classmethod
+    def preload_future(cls) -> Optional[Future]:
+        """Future of the last background pre-load (None if none was started)."""
+        return cls._preload_future
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        """True if the model is loaded."""
+        return EmbeddingService._model is not None
+
+    @classmethod
+    def wait_until_ready(cls, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a background pre-load in progress.
+
+        Args:
+            timeout: Maximum wait in seconds (None = no limit)
+
+        Returns:
+            True if the model is loaded, False on timeout, failure or when no pre-load was started
+        """
+        future = cls._preload_future
+        if future is not None and EmbeddingService._model is None:
+            try:
+                future.result(timeout)
+            except Exception as e:
+                logger.warning(f"Embedding model not ready: {e}")
+        return cls.is_ready()
+
+    @classmethod
+    def configure_idle_unload(cls, seconds: float) -> None:
+        """
+        Unload the model after this many seconds without use (0 = keep it loaded).
+        The next embedding call reloads it.
+        """
+        with cls._state_lock:
+            cls._idle_unload_seconds = max(0.0, float(seconds or 0))
+            cls._schedule_idle_check(cls._idle_unload_seconds)
+
+    @classmethod
+    def unload_model(cls) -> None:
+        """Release the model (the embedding cache stays open)."""
+        with cls._model_lock:
+            if EmbeddingService._model is None:
+                return
+            EmbeddingService._model = None
+            with cls._state_lock:
+                if cls._preload_future is not None and cls._preload_future.done():
+                    cls._preload_future = None
+                if cls._idle_timer is not None:
+                    cls._idle_timer.cancel()
+                    cls._idle_timer = None
+        gc.collect()
+        logger.info("Embedding model unloaded")
+
+    @classmethod
+    def _touch(cls) -> None:
+        cls._last_used = time.monotonic()
+        if cls._idle_unload_seconds > 0 and cls._idle_timer is None:
+            cls._schedule_idle_check(cls._idle_unload_seconds)
+
+    @classmethod
+    def _schedule_idle_check(cls, delay: float) -> None:
+        with cls._state_lock:
+            if cls._idle_timer is not None:
+                cls._idle_timer.cancel()
+                cls._idle_timer = None
+            if cls._idle_unload_seconds <= 0 or EmbeddingService._model is None:
+                return
+            timer = threading.Timer(delay, cls._check_idle)
+            timer.daemon = True
+            cls._idle_timer = timer
+            timer.start()
+
+    @classmethod
+    def _check_idle(cls) -> None:
+        """Timer callback: unload the model if unused for the idle period, otherwise check again later."""
+        with cls._model_lock:
+            with cls._state_lock:
+                cls._idle_timer = None
+            idle = time.monotonic() - cls._last_used
+            if idle < cls._idle_unload_seconds:
+                cls._schedule_idle_check(cls._idle_unload_seconds - idle)
+                return
+            logger.info(f"Embedding model idle for {idle:.0f}s")
+            cls.unload_model()
+
+    def _init_cache(self):
+        """Open the persistent embedding cache (caching is skipped if it cannot be opened)."""
+        try:
+            from core.services.embedding_cache import EmbeddingCache
+            EmbeddingService._cache = EmbeddingCache(MODEL_NAME, EMBEDDING_DIMENSION)
+        except Exception as e:
+            logger.warning(f"Embedding cache disabled: {e}")
+
     def embed_text(self, text: str) -> List[float]:
         """
         Generate embedding vector for a single text.
-        
+
         Args:
             text: Text to embed
-            
+
         Returns:
             List of 384 floats representing the embedding vector
         """
+        return self.embed_text_array(text).tolist()
+
+    def embed_text_array(self, text: str) -> np.ndarray:
+        """
+        Generate embedding vector for a single text as a NumPy array.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            float32 array of shape (384,)
+        """
         if not text or not text.strip():
             logger.warning("Empty text provided for embedding")
-            return [0.0] * 384  # Return zero vector for empty text
-        
+            return np.zeros(EMBEDDING_DIMENSION, dtype=np.float32)  # Return zero vector for empty text
+
         try:
-            # Encode returns numpy array, convert to list
-            embedding = self._model.encode(text, convert_to_tensor=False)
-            return embedding.tolist()
+            if self._cache is not None:
+                cached = self._cache.get(text)
+                if cached is not None:
+                    return cached
+
+            embedding = self._ensure_model().encode(text, convert_to_tensor=False, convert_to_numpy=True)
+            embedding = np.asarray(embedding, dtype=np.float32)
+            if self._cache is not None:
+                self._cache.put(text, embedding)
+            return embedding
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             raise
-    
+
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embedding vectors for multiple texts (batch processing).
-        
+        Legacy list-based API, prefer embed_texts_array for large batches.
+
         Args:
             texts: List of texts to embed
-            
+
         Returns:
             List of embedding vectors
         """
         if not texts:
             return []
-        
+        return self.embed_texts_array(texts).tolist()
+
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embedding vectors for multiple texts as one contiguous matrix.
+        Only texts missing from the cache are sent to the model.
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            C-contiguous float32 array of shape (len(texts), 384)
+        """
+        output = np.empty((len(texts), EMBEDDING_DIMENSION), dtype=np.float32)
+        if not texts:
+            return output
+
         try:
-            # Batch encoding is more efficient
-            embeddings = self._model.encode(texts, convert_to_tensor=False, show_progress_bar=True)
-            return [emb.tolist() for emb in embeddings]
+            if self._cache is None:
+                # Batch encoding is more efficient
+                output[:] = self._ensure_model().encode(texts, convert_to_tensor=False, convert_to_numpy=True, show_progress_bar=True)
+                return output
+
+            results = self._cache.get_many(texts)
+
+            # Deduplicate misses so identical chunks are encoded once
+            missing = {}
+            for i, vector in enumerate(results):
+                if vector is None:
+                    missing.setdefault(texts[i], []).append(i)
+                else:
+                    output[i] = vector
+
+            if missing:
+                to_encode = list(missing.keys())
+                logger.info(f"Embedding cache: {len(texts) - sum(len(v) for v in missing.values())}/{len(texts)} hits, encoding {len(to_encode)} texts")
+                embeddings = self._ensure_model().encode(to_encode, convert_to_tensor=False, convert_to_numpy=True, show_progress_bar=True)
+                embeddings = np.asarray(embeddings, dtype=np.float32)
+                self._cache.put_many(to_encode, embeddings)
+                for text, emb in zip(to_encode, embeddings):
+                    output[missing[text]] = emb
+
+            return output
         except Exception as e:
             logger.error(f"Error generating batch embeddings: {e}")
             raise
-    
+
+    def get_cache_stats(self) -> Dict[str, float]:
+        """
+        Get embedding cache hit/miss counters.
+
+        Returns:
+            Dict of counters (empty if the cache is disabled)
+        """
+        if self._cache is None:
+            return {}
+        return self._cache.get_stats()
+
+    def reset_cache_stats(self) -> None:
+        """Reset embedding cache counters."""
+        if self._cache is not None:
+            self._cache.reset_stats()
+
     def get_embedding_dimension(self) -> int:
         """
         Get the dimension of the embedding vectors.
-        
+
         Returns:
             Embedding dimension (384 for all-MiniLM-L6-v2)
         """
-        return 384
+        return EMBEDDING_DIMENSION
+
+
+class EmbeddingBatcher:
+    """
+    Gathers texts from many sources (e.g. files) into token-budget batches.
+
+    Each batch is embedded in one model call and handed to on_batch together with
+    the items that were queued with the texts, so callers can route results back
+    to their source. The token budget adapts to the observed throughput
+    (tokens/second) and shrinks when available memory runs low.
+    """
+
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        on_batch: Callable[[List[Any], np.ndarray], None],
+        on_error: Optional[Callable[[List[Any], Exception], None]] = None,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        min_tokens: int = MIN_TOKEN_BUDGET,
+        max_tokens: int = MAX_TOKEN_BUDGET,
+        max_items: Optional[int] = None,
+        adaptive: bool = True
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            embedding_service: Service used to embed each batch
+            on_batch: Called with (items, embeddings) for every embedded batch
+            on_error: Called with (items, exception) when a batch fails (default: re-raise)
+            token_budget: Initial number of tokens per batch
+            min_tokens: Lower bound of the adaptive budget
+            max_tokens: Upper bound of the adaptive budget
+            max_items: Optional cap on the number of texts per batch
+            adaptive: Adjust the budget from throughput and memory
+        """
+        self.embedding_service = embedding_service
+        self.on_batch = on_batch
+        self.on_error = on_error
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self.token_budget = min(max(token_budget, min_tokens), max_tokens)
+        self.max_items = max_items
+        self.adaptive = adaptive
+
+        self._texts: List[str] = []
+        self._items: List[Any] = []
+        self._tokens = 0
+
+        self._last_throughput: Optional[float] = None
+        self._direction = 1  # +1 grow, -1 shrink
+
+        self.batches = 0
+        self.texts_embedded = 0
+        self.tokens_embedded = 0
+        self.seconds = 0.0
+
+    def add(self, text: str, item: Any = None) -> None:
+        """
+        Queue a text; a batch is embedded as soon as the budget is reached.
+
+        Args:
+            text: Text to embed
+            item: Payload returned with the embedding (defaults to the text)
+        """
+        tokens = estimate_tokens(text)
+        if self._texts and self._tokens + tokens > self.token_budget:
+            self.flush()
+        self._texts.append(text)
+        self._items.append(text if item is None else item)
+        self._tokens += tokens
+        if self._tokens >= self.token_budget or (self.max_items and len(self._texts) >= self.max_items):
+            self.flush()
+
+    def add_many(self, texts: Sequence[str], items: Optional[Sequence[Any]] = None) -> None:
+        """Queue several texts (items aligned with texts)."""
+        for i, text in enumerate(texts):
+            self.add(text, items[i] if items is not None else None)
+
+    def flush(self) -> None:
+        """Embed whatever is queued."""
+        if not self._texts:
+            return
+        texts, items, tokens = self._texts, self._items, self._tokens
+        self._texts, self._items, self._tokens = [], [], 0
+
+        try:
+            start = time.perf_counter()
+            embeddings = self.embedding_service.embed_texts_array(texts)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            if self.on_error is None:
+                raise
+            logger.error(f"Embedding batch of {len(texts)} texts failed: {e}")
+            self.on_error(items, e)
+            return
+
+        self.batches += 1
+        self.texts_embedded += len(texts)
+        self.tokens_embedded += tokens
+        self.seconds += elapsed
+        if self.adaptive:
+            self._adapt(tokens, elapsed)
+
+        try:
+            self.on_batch(items, embeddings)
+        except Exception as e:
+            if self.on_error is None:
+                raise
+            self.on_error(items, e)
+
+    def _adapt(self, tokens: int, elapsed: float) -> None:
+        """Hill-climb the token budget on throughput, back off under memory pressure."""
+        if self._memory_is_low():
+            self.token_budget = max(self.min_tokens, self.token_budget // 2)
+            self._direction = -1
+            logger.info(f"Low memory, embedding batch budget reduced to {self.token_budget} tokens")
+            return
+
+        # Batches cut short by flush() say nothing about the budget
+        if elapsed <= 0 or tokens < self.token_budget // 2:
+            return
+        throughput = tokens / elapsed
+        if self._last_throughput is not None and throughput < self._last_throughput * 0.95:
+            # The last move made things worse, go the other way
+            self._direction = -self._direction
+        self._last_throughput = throughput
+
+        factor = 1.25 if self._direction > 0 else 0.8
+        self.token_budget = int(min(self.max_tokens, max(self.min_tokens, self.token_budget * factor)))
+
+    @staticmethod
+    def _memory_is_low() -> bool:
+        try:
+            import psutil
+        except ImportError:
+            return False
+        return psutil.virtual_memory().available < LOW_MEMORY_BYTES
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get batching counters.
+
+        Returns:
+            Dict with 'batches', 'texts', 'tokens', 'tokens_per_second' and 'token_budget'
+        """
+        return {
+            "batches": self.batches,
+            "texts": self.texts_embedded,
+            "tokens": self.tokens_embedded,
+            "tokens_per_second": (self.tokens_embedded / self.seconds) if self.seconds else 0.0,
+            "token_budget": self.token_budget
+        }
+
+    def __enter__(self) -> "EmbeddingBatcher":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
@@ -0,0 +1,162 @@
+"""
+Ingestion Manifest for RAG Knowledge Base.
+Keeps a per-KB record of indexed files (path, size, mtime, content hash) so that
+re-importing a folder only processes new or modified files.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+
+from utils.resource_handler import get_writable_path
+
+logger = logging.getLogger(__name__)
+
+MANIFESTS_DIR = "manifests"
+
+# Namespace for deterministic chunk/document ids
+ID_NAMESPACE = uuid.UUID("5d0c6f6e-8a53-4d2e-9a55-0c3c4a1f6b21")
+
+STATUS_NEW = "new"
+STATUS_MODIFIED = "modified"
+STATUS_UNCHANGED = "unchanged"
+
+
+def file_key(file_path: str) -> str:
+    """Normalized key identifying a file in a manifest."""
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def compute_content_hash(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(kb_id: str, file_path: str, content_hash: str, chunk_index: int) -> str:
+    """Deterministic chunk id: re-adding the same content is an idempotent upsert."""
+    return str(uuid.uuid5(ID_NAMESPACE, f"{kb_id}|{file_key(file_path)}|{content_hash}|{chunk_index}"))
+
+
+def document_id(kb_id: str, file_path: str) -> str:
+    """Deterministic id of a file's entry in the knowledge base documents list."""
+    return str(uuid.uuid5(ID_NAMESPACE, f"{kb_id}|{file_key(file_path)}"))
+
+
+class IngestionManifest:
+    """Manifest of the files indexed in one knowledge base."""
+
+    def __init__(self, kb_id: str, root: Optional[str] = None):
+        """
+        Load (or create) the manifest of a knowledge base.
+
+        Args:
+            kb_id: Knowledge base identifier
+            root: Directory holding the manifests (default: vector_databases/manifests)
+        """
+        self.kb_id = kb_id
+        self.root = root or os.path.join(get_writable_path("vector_databases"), MANIFESTS_DIR)
+        os.makedirs(self.root, exist_ok=True)
+        self.path = os.path.join(self.root, f"kb_{kb_id}.json")
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("files", {})
+        except Exception as e:
+            logger.warning(f"Manifest for KB {self.kb_id} unreadable, starting fresh: {e}")
+            return {}
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"kb_id": self.kb_id, "files": self.entries}, f)
+            os.replace(tmp_path, self.path)
+
+    def delete(self) -> None:
+        """Remove the manifest file."""
+        with self._lock:
+            self.entries = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    # --- Change detection ---
+
+    def check(self, file_path: str) -> Tuple[str, Dict]:
+        """
+        Compare a file with its manifest entry.
+        The content is only hashed when size or mtime changed.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Tuple (status, fingerprint) where status is 'new', 'modified' or 'unchanged'
+            and fingerprint holds 'size', 'mtime' and 'hash'
+        """
+        stat = os.stat(file_path)
+        entry = self.entries.get(file_key(file_path))
+
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return STATUS_UNCHANGED, {"size": entry["size"], "mtime": entry["mtime"], "hash": entry["hash"]}
+
+        fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": compute_content_hash(file_path)}
+        if entry is None:
+            return STATUS_NEW, fingerprint
+        if entry["hash"] == fingerprint["hash"]:
+            # Touched but identical: remember the new mtime to skip hashing next time
+            with self._lock:
+                entry["mtime"] = fingerprint["mtime"]
+            return STATUS_UNCHANGED, fingerprint
+        return STATUS_MODIFIED, fingerprint
+
+    def record(self, file_path: str, fingerprint: Dict, chunk_count: int) -> None:
+        """Record a successfully indexed file."""
+        with self._lock:
+            self.entries[file_key(file_path)] = {
+                "path": file_path,
+                "size": fingerprint["size"],
+                "mtime": fingerprint["mtime"],
+                "hash": fingerprint["hash"],
+                "chunk_count": chunk_count,
+                "indexed_at": datetime.datetime.now().isoformat()
+            }
+
+    def get(self, file_path: str) -> Optional[Dict]:
+        """Return the manifest entry of a file, if any."""
+        return self.entries.get(file_key(file_path))
+
+    def remove(self, file_path: str) -> Optional[Dict]:
+        """Forget a file; returns its former entry."""
+        with self._lock:
+            return self.entries.pop(file_key(file_path), None)
+
+    def files_under(self, folder_path: str) -> List[str]:
+        """Original paths of the indexed files located under a folder."""
+        prefix = file_key(folder_path).rstrip(os.sep) + os.sep
+        return [entry["path"] for key, entry in self.entries.items() if key.startswith(prefix)]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def delete_manifest(kb_id: str) -> None:
+    """Remove the manifest of a deleted knowledge base."""
+    try:
+        IngestionManifest(kb_id).delete()
+    except Exception as e:
+        logger.warning(f"Could not delete manifest of KB {kb_id}: {e}")
@@ -0,0 +1,223 @@
+"""
+Lexical (BM25) index of knowledge base chunks, stored in SQLite next to the vector databases.
+Complements embedding search on exact terms (product codes, names, figures) that small
+sentence-embedding models blur; both rankings are fused by VectorStoreService.
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List
+import json
+import logging
+import math
+import re
+import sqlite3
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+LEXICAL_INDEX_FILE = "lexical_index.sqlite3"
+
+# BM25 parameters (standard values)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words, numbers and codes; joined forms like "AB-1234", "12,5" or "v2.1" are kept as one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./,][a-z0-9]+)*")
+
+# Frequent French and English words carrying no retrieval signal
+STOPWORDS = frozenset("""
+a au aux avec ce ces cet cette d dans de des du elle en est et eu il ils je l la le les leur lui m ma mais me
+mes moi mon n ne nos notre nous on ou par pas pour qu que qui s sa se ses son sont sur t ta te tes toi ton tu un
+une vos votre vous y c est ete etre avoir fait plus comme tout tous
+the of and to in is it that for on with as are be this by an or at from
+""".split())
+
+
+def _fold(text: str) -> str:
+    """Lowercase and strip accents ("Énergie" and "energie" match)."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index terms.
+    Compound tokens are also indexed by their parts, so "AB-1234" matches "AB-1234", "ab" and "1234".
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(_fold(text)):
+        parts = re.split(r"[-_./,]", token)
+        if len(parts) > 1:
+            terms.append(token)
+        terms.extend(part for part in parts if part and part not in STOPWORDS)
+    return terms
+
+
+class LexicalIndex:
+    """Incremental BM25 inverted index of chunks, partitioned by knowledge base."""
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the index.
+
+        Args:
+            db_path: SQLite file path
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " kb_id TEXT NOT NULL, chunk_id TEXT NOT NULL, file_path TEXT, length INTEGER NOT NULL,"
+            " text TEXT NOT NULL, metadata TEXT NOT NULL, PRIMARY KEY (kb_id, chunk_id));"
+            "CREATE INDEX IF NOT EXISTS idx_chunks_file ON chunks (kb_id, file_path);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " kb_id TEXT NOT NULL, term TEXT NOT NULL, chunk_id TEXT NOT NULL, tf INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_postings_term ON postings (kb_id, term);"
+            "CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings (kb_id, chunk_id);"
+            "CREATE TABLE IF NOT EXISTS kb_stats ("
+            " kb_id TEXT PRIMARY KEY, chunk_count INTEGER NOT NULL, total_length INTEGER NOT NULL);"
+        )
+        self._conn.commit()
+
+    # --- Updates ---
+
+    def add_documents(self, kb_id: str, documents: List[Dict]) -> None:
+        """
+        Index chunks (upsert: a chunk id already indexed is replaced).
+
+        Args:
+            kb_id: Knowledge base identifier
+            documents: Dicts with 'id', 'text' and 'metadata' (as passed to the vector store)
+        """
+        with self._lock:
+            self._delete_chunks(kb_id, [doc["id"] for doc in documents])
+            chunk_rows = []
+            posting_rows = []
+            total_length = 0
+            for doc in documents:
+                terms = tokenize(doc["text"])
+                metadata = doc.get("metadata") or {}
+                chunk_rows.append((
+                    kb_id, doc["id"], metadata.get("file_path"), len(terms), doc["text"],
+                    json.dumps(metadata, ensure_ascii=False)
+                ))
+                posting_rows.extend((kb_id, term, doc["id"], tf) for term, tf in Counter(terms).items())
+                total_length += len(terms)
+
+            self._conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?)", chunk_rows)
+            self._conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", posting_rows)
+            self._update_stats(kb_id, len(chunk_rows), total_length)
+            self._conn.commit()
+
+    def delete_file_documents(self, kb_id: str, file_path: str) -> None:
+        """Remove every chunk of a source file from a knowledge base."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM chunks WHERE kb_id = ? AND file_path = ?", (kb_id, file_path)
+            ).fetchall()
+            self._delete_chunks(kb_id, [row[0] for row in rows])
+            self._conn.commit()
+
+    def delete_knowledge_base(self, kb_id: str) -> None:
+        """Drop the index of a knowledge base."""
+        with self._lock:
+            for table in ("chunks", "postings", "kb_stats"):
+                self._conn.execute(f"DELETE FROM {table} WHERE kb_id = ?", (kb_id,))
+            self._conn.commit()
+
+    def _delete_chunks(self, kb_id: str, chunk_ids: Iterable[str]) -> None:
+        removed = 0
+        removed_length = 0
+        for chunk_id in chunk_ids:
+            row = self._conn.execute(
+                "SELECT length FROM chunks WHERE kb_id = ? AND chunk_id = ?", (kb_id, chunk_id)
+            ).fetchone()
+            if row is None:
+                continue
+            self._conn.execute("DELETE FROM chunks WHERE kb_id = ? AND chunk_id = ?", (kb_id, chunk_id))
+            self._conn.execute("DELETE FROM postings WHERE kb_id = ? AND chunk_id = ?", (kb_id, chunk_id))
+            removed += 1
+            removed_length += row[0]
+        if removed:
+            self._update_stats(kb_id, -removed, -removed_length)
+
+    def _update_stats(self, kb_id: str, chunk_delta: int, length_delta: int) -> None:
+        self._conn.execute(
+            "INSERT INTO kb_stats VALUES (?, ?, ?) ON CONFLICT (kb_id) DO UPDATE SET "
+            "chunk_count = chunk_count + excluded.chunk_count, total_length = total_length + excluded.total_length",
+            (kb_id, chunk_delta, length_delta)
+        )
+
+    # --- Search ---
+
+    def search(self, kb_id: str, query: str, top_k: int = 5) -> List[Dict]:
+        """
+        Rank the chunks of a knowledge base by BM25 score.
+
+        Args:
+            kb_id: Knowledge base identifier
+            query: Query text
+            top_k: Number of results to return
+
+        Returns:
+            List of dicts with 'id', 'text', 'metadata' and 'bm25' (best first); empty if nothing matches
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            stats = self._conn.execute(
+                "SELECT chunk_count, total_length FROM kb_stats WHERE kb_id = ?", (kb_id,)
+            ).fetchone()
+            if not stats or stats[0] <= 0:
+                return []
+            chunk_count, total_length = stats
+            avg_length = total_length / chunk_count or 1.0
+
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._conn.execute(
+                    "SELECT p.chunk_id, p.tf, c.length FROM postings p "
+                    "JOIN chunks c ON c.kb_id = p.kb_id AND c.chunk_id = p.chunk_id "
+                    "WHERE p.kb_id = ? AND p.term = ?",
+                    (kb_id, term)
+                ).fetchall()
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (chunk_count - df + 0.5) / (df + 0.5))
+                for chunk_id, tf, length in postings:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            best = sorted(scores.items(), key=lambda item: -item[1])[:top_k]
+            results = []
+            for chunk_id, score in best:
+                text, metadata = self._conn.execute(
+                    "SELECT text, metadata FROM chunks WHERE kb_id = ? AND chunk_id = ?", (kb_id, chunk_id)
+                ).fetchone()
+                results.append({"id": chunk_id, "text": text, "metadata": json.loads(metadata), "bm25": score})
+            return results
+
+    def get_stats(self, kb_id: str) -> Dict[str, float]:
+        """
+        Get index statistics of a knowledge base.
+
+        Returns:
+            Dict with 'chunk_count' and 'avg_length' (terms per chunk)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT chunk_count, total_length FROM kb_stats WHERE kb_id = ?", (kb_id,)
+            ).fetchone()
+        if not row or not row[0]:
+            return {"chunk_count": 0, "avg_length": 0.0}
+        return {"chunk_count": row[0], "avg_length": row[1] / row[0]}
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,199 @@
+"""
+Pool of reusable LLM SDK clients.
+SDK clients own an HTTP connection pool: reusing them keeps connections (and TLS sessions)
+alive between messages instead of paying a new handshake on every call.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of live clients (least recently used ones are dropped first)
+DEFAULT_MAX_CLIENTS = 16
+
+# Clients unused for this many seconds are closed
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+PoolKey = Tuple[str, str, str]
+
+
+def _key_fingerprint(api_key: Optional[str]) -> str:
+    """Hash of the API key, so keys are never kept in the pool index."""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+class LLMClientPool:
+    """Thread-safe registry of SDK clients keyed by (provider, API key hash, base URL)."""
+
+    def __init__(self, max_clients: int = DEFAULT_MAX_CLIENTS, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        """
+        Initialize the pool.
+
+        Args:
+            max_clients: Maximum number of live clients (0 disables pooling)
+            idle_timeout: Seconds after which an unused client is closed
+        """
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self._clients: "OrderedDict[PoolKey, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def configure(self, max_clients: Optional[int] = None, idle_timeout: Optional[float] = None) -> None:
+        """
+        Change the pool limits (applied immediately).
+
+        Args:
+            max_clients: Maximum number of live clients (0 disables pooling)
+            idle_timeout: Seconds after which an unused client is closed
+        """
+        with self._lock:
+            if max_clients is not None:
+                self.max_clients = max_clients
+            if idle_timeout is not None:
+                self.idle_timeout = idle_timeout
+        self.evict_idle()
+        self._trim()
+
+    def get(
+        self,
+        provider: str,
+        api_key: Optional[str],
+        factory: Callable[[], Any],
+        base_url: Optional[str] = None
+    ) -> Any:
+        """
+        Get the client for a provider/key/endpoint, creating it on first use.
+
+        Args:
+            provider: Provider family (e.g. 'openai', 'groq')
+            api_key: API key the client authenticates with
+            factory: Builds a new client when none is pooled
+            base_url: Custom endpoint, if any
+
+        Returns:
+            SDK client
+        """
+        key = (provider, _key_fingerprint(api_key), base_url or "")
+        self.evict_idle()
+
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                self._clients[key] = (entry[0], time.monotonic())
+                self._clients.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+            self._stats["misses"] += 1
+
+        client = factory()
+        if self.max_clients <= 0:
+            return client
+
+        with self._lock:
+            # Another thread may have created the same client meanwhile: keep the first one
+            entry = self._clients.get(key)
+            if entry is not None:
+                return entry[0]
+            self._clients[key] = (client, time.monotonic())
+        self._trim()
+        return client
+
+    def _trim(self) -> None:
+        """Drop least recently used clients above max_clients."""
+        with self._lock:
+            while self._clients and len(self._clients) > max(self.max_clients, 0):
+                # Not closed: a thread may still be using it, the SDK closes it when collected
+                self._clients.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def evict_idle(self) -> None:
+        """Close clients unused for longer than idle_timeout."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for key, (client, last_used) in list(self._clients.items()):
+                if now - last_used > self.idle_timeout:
+                    expired.append(client)
+                    del self._clients[key]
+            self._stats["evictions"] += len(expired)
+        for client in expired:
+            _close_client(client)
+
+    def clear(self) -> None:
+        """Close every pooled client."""
+        with self._lock:
+            clients = [client for client, _ in self._clients.values()]
+            self._clients.clear()
+        for client in clients:
+            _close_client(client)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get pool statistics.
+
+        Returns:
+            Dict with 'size', 'hits', 'misses' and 'evictions'
+        """
+        with self._lock:
+            return dict(self._stats, size=len(self._clients))
+
+
+def _close_client(client: Any) -> None:
+    close = getattr(client, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception as e:
+            logger.debug(f"Error closing LLM client: {e}")
+
+
+# Pool shared by LLMService and the assistants' chat service
+client_pool = LLMClientPool()
+
+
+# --- Per-provider accessors (SDKs are imported on first use) ---
+
+def get_openai_client(api_key: str, base_url: Optional[str] = None) -> Any:
+    """OpenAI (or OpenAI-compatible endpoint) client."""
+    def factory():
+        from openai import OpenAI
+        return OpenAI(api_key=api_key, base_url=base_url or None)
+    return client_pool.get("openai", api_key, factory, base_url)
+
+
+def get_anthropic_client(api_key: str) -> Any:
+    """Anthropic client."""
+    def factory():
+        from anthropic import Anthropic
+        return Anthropic(api_key=api_key)
+    return client_pool.get("anthropic", api_key, factory)
+
+
+def get_groq_client(api_key: str) -> Any:
+    """Groq client."""
+    def factory():
+        from groq import Groq
+        return Groq(api_key=api_key)
+    return client_pool.get("groq", api_key, factory)
+
+
+def get_mistral_client(api_key: str) -> Any:
+    """Mistral client."""
+    def factory():
+        from mistralai import Mistral
+        return Mistral(api_key=api_key)
+    return client_pool.get("mistral", api_key, factory)
+
+
+def get_huggingface_client(api_key: str) -> Any:
+    """Hugging Face inference client."""
+    def factory():
+        from huggingface_hub import InferenceClient
+        return InferenceClient(token=api_key)
+    return client_pool.get("huggingface", api_key, factory)
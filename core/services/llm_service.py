@@ -3,27 +3,39 @@ Core Client Service for LLM connections.
 Handles connection testing and provider management.
 """
 
-from typing import Tuple, Optional, Any, Dict, List
+from typing import Tuple, Optional, Any, Callable, Dict, Iterator, List, Union
 import logging
+import threading
+import time
+
+from core.services.llm_client_pool import (
+    get_openai_client, get_anthropic_client, get_groq_client, get_mistral_client, get_huggingface_client
+)
 
 logger = logging.getLogger(__name__)
 
+# Retrieval defaults of the RAG methods (part of their response cache key)
+DEFAULT_RAG_TOP_K = 5
+DEFAULT_RAG_FUSION = "rrf"
+
 class LLMService:
     """Service for checking connections and generating responses from various LLM providers."""
+
+    # Time-to-first-token statistics of streamed responses, per provider
+    _stream_stats: Dict[str, Dict[str, float]] = {}
+    _stream_stats_lock = threading.Lock()
     
     # --- Generation Methods ---
 
     @staticmethod
     def generate_openai(api_key: str, messages: List[Dict[str, str]], model: str = "gpt-4o-mini", **kwargs) -> Tuple[bool, str]:
         try:
-            from openai import OpenAI
-            
             # Extract base_url if present
             base_url = kwargs.pop('base_url', None)
             if base_url == "":
                 base_url = None
                 
-            client = OpenAI(api_key=api_key, base_url=base_url)
+            client = get_openai_client(api_key, base_url)
             if not model:
                 model = "gpt-4o-mini"
             response = client.chat.completions.create(
@@ -57,8 +69,7 @@ class LLMService:
     @staticmethod
     def generate_anthropic(api_key: str, messages: List[Dict[str, str]], model: str = "claude-3-opus-20240229", **kwargs) -> Tuple[bool, str]:
         try:
-            from anthropic import Anthropic
-            client = Anthropic(api_key=api_key)
+            client = get_anthropic_client(api_key)
             
             # Extract system message if present
             system_prompt = None
@@ -90,7 +101,6 @@ class LLMService:
     @staticmethod
     def generate_groq(api_key: str, messages: List[Dict[str, str]], model: str = "llama-3.1-8b-instant", **kwargs) -> Tuple[bool, str]:
         try:
-            from groq import Groq
             # Client doesn't need base_url usually, but if needed it typically goes in constructor
             # For now just remove it from kwargs to avoid the error
             kwargs.pop('base_url', None)
@@ -98,7 +108,7 @@ class LLMService:
             if not model or model == "llama3-8b-8192":
                 model = "llama-3.1-8b-instant"
 
-            client = Groq(api_key=api_key)
+            client = get_groq_client(api_key)
             response = client.chat.completions.create(
                 model=model,
                 messages=messages,
@@ -111,14 +121,13 @@ class LLMService:
     @staticmethod
     def generate_mistral(api_key: str, messages: List[Dict[str, str]], model: str = "mistral-small-latest", **kwargs) -> Tuple[bool, str]:
         try:
-            from mistralai import Mistral
             # Remove base_url if present
             kwargs.pop('base_url', None)
             
             if not model:
                 model = "mistral-small-latest"
 
-            client = Mistral(api_key=api_key)
+            client = get_mistral_client(api_key)
             response = client.chat.complete(
                 model=model,
                 messages=messages,
@@ -131,8 +140,7 @@ class LLMService:
     @staticmethod
     def generate_huggingface(api_key: str, messages: List[Dict[str, str]], model: str = "mistralai/Mistral-7B-Instruct-v0.2", **kwargs) -> Tuple[bool, str]:
         try:
-            from huggingface_hub import InferenceClient
-            client = InferenceClient(token=api_key)
+            client = get_huggingface_client(api_key)
             
             # Default model if none provided or it's generic
             if not model or model == "default":
@@ -151,8 +159,7 @@ class LLMService:
     @staticmethod
     def generate_openai_compatible(api_key: str, messages: List[Dict[str, str]], base_url: str, model: str = "default", **kwargs) -> Tuple[bool, str]:
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=api_key, base_url=base_url)
+            client = get_openai_client(api_key, base_url)
             response = client.chat.completions.create(
                 model=model,
                 messages=messages,
@@ -600,10 +607,20 @@ class LLMService:
             api_key: API Key
             messages: List of message dictionaries containing 'role' and 'content'
             **kwargs: Additional arguments like model, base_url, etc.
+                cache_scope: Enables the response cache; invalidation scope (e.g. assistant id)
+                semantic_cache: Also reuse answers to similar questions (needs cache_scope)
             
         Returns:
             Tuple (success: bool, content: str)
         """
+        cache_scope = kwargs.pop('cache_scope', None)
+        semantic_cache = kwargs.pop('semantic_cache', False)
+        if cache_scope is not None:
+            return cls.cached_generation(
+                provider_name, messages, lambda: cls.generate_response(provider_name, api_key, messages, **kwargs),
+                cache_scope, semantic_cache, **kwargs
+            )
+
         if "OpenAI" in provider_name:
             return cls.generate_openai(api_key, messages, **kwargs)
         elif "Gemini" in provider_name or "Google" in provider_name:
@@ -617,7 +634,123 @@ class LLMService:
             return cls.generate_huggingface(api_key, messages, **kwargs)
         elif "Mistral" in provider_name:
             return cls.generate_mistral(api_key, messages, **kwargs)
-        elif "DeepSeek" in provider_name:
+        elif "DeepSeek" in provider_name or "IAKA" in provider_name:
+            try:
+                base_url, model = cls._openai_compatible_target(provider_name, kwargs)
+            except ValueError as e:
+                return False, str(e)
+            return cls.generate_openai_compatible(api_key, messages, base_url=base_url, model=model, **kwargs)
+        
+        return False, f"Provider {provider_name} non supporté pour la génération."
+
+    # --- Response Cache ---
+
+    @classmethod
+    def cached_generation(
+        cls,
+        provider_name: str,
+        messages: List[Dict[str, str]],
+        generate: Callable[[], Tuple[bool, str]],
+        cache_scope: str,
+        semantic_cache: bool = False,
+        kb_ids: Optional[List[str]] = None,
+        **options: Any
+    ) -> Tuple[bool, str]:
+        """
+        Return the cached answer of a request, or call generate() and cache its successful answer.
+        
+        Args:
+            provider_name: Name of the provider
+            messages: Request messages (before any RAG augmentation)
+            generate: Produces (success, content) on cache miss
+            cache_scope: Invalidation scope (assistant id, module name...)
+            semantic_cache: Also reuse answers to similar questions
+            kb_ids: Knowledge bases the answer depends on
+            **options: Generation arguments that change the answer (model, temperature, top_k...)
+            
+        Returns:
+            Tuple (success: bool, content: str)
+        """
+        cache_request = cls._cache_request(provider_name, messages, options, cache_scope, semantic_cache, kb_ids)
+        cached = cls._cache_get(cache_request)
+        if cached is not None:
+            return True, cached
+        result = generate()
+        cls._cache_put(cache_request, result)
+        return result
+
+    @staticmethod
+    def _cache_request(
+        provider_name: str,
+        messages: List[Dict[str, str]],
+        kwargs: Dict[str, Any],
+        scope: str,
+        semantic: bool,
+        kb_ids: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Arguments of ResponseCache.get/put for a request (kwargs are the answer-changing arguments)."""
+        options = {key: value for key, value in kwargs.items() if key != 'model'}
+        return {
+            "provider": provider_name,
+            "model": kwargs.get('model') or "",
+            "messages": messages,
+            "options": options,
+            "scope": str(scope),
+            "kb_ids": kb_ids or [],
+            "semantic": bool(semantic)
+        }
+
+    @classmethod
+    def _rag_cache_request(
+        cls,
+        provider_name: str,
+        messages: List[Dict[str, str]],
+        kb_id: Union[str, List[str]],
+        kwargs: Dict[str, Any],
+        scope: str,
+        semantic: bool
+    ) -> Dict[str, Any]:
+        """
+        Cache request of a RAG answer, shared by the streamed and non-streamed paths.
+        Retrieval options are always part of the key, with their defaults when not given.
+        """
+        options = {"top_k": DEFAULT_RAG_TOP_K, "global_context": "", "fusion": DEFAULT_RAG_FUSION, **kwargs}
+        kb_ids = [kb_id] if isinstance(kb_id, str) else list(kb_id or [])
+        return cls._cache_request(provider_name, messages, options, scope, semantic, kb_ids)
+
+    @staticmethod
+    def _cache_get(cache_request: Dict[str, Any]) -> Optional[str]:
+        try:
+            from core.services.response_cache import get_response_cache
+            return get_response_cache().get(**cache_request)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None
+
+    @staticmethod
+    def _cache_put(cache_request: Dict[str, Any], result: Tuple[bool, str]) -> None:
+        success, content = result
+        if not success or not content:
+            return
+        try:
+            from core.services.response_cache import get_response_cache
+            get_response_cache().put(response=content, **cache_request)
+        except Exception as e:
+            logger.warning(f"Response cache store failed: {e}")
+
+    @staticmethod
+    def _openai_compatible_target(provider_name: str, kwargs: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Resolve endpoint and model of OpenAI-compatible providers (DeepSeek, IAKA).
+        'base_url' and 'model' are popped from kwargs.
+        
+        Returns:
+            Tuple (base_url, model)
+            
+        Raises:
+            ValueError: IAKA endpoint missing
+        """
+        if "DeepSeek" in provider_name:
             # DeepSeek is OpenAI compatible
             # Allow overriding model and base_url from kwargs
             base_url = kwargs.pop('base_url', None)
@@ -627,28 +760,237 @@ class LLMService:
             model = kwargs.pop('model', None)
             if not model:
                 model = "deepseek-chat"
+            return base_url, model
+
+        # Handle IAKA specifically
+        base_url = kwargs.pop('base_url', None)
+        code_model = kwargs.pop('model', None) or 'mistral-small'
+        
+        if not base_url:
+            raise ValueError("Endpoint manquant pour IAKA")
             
-            return cls.generate_openai_compatible(api_key, messages, base_url=base_url, model=model, **kwargs)
-        elif "IAKA" in provider_name:
-            # Handle IAKA specifically
-            base_url = kwargs.pop('base_url', None)
-            code_model = kwargs.pop('model', 'mistral-small')
+        clean_base_url = base_url.rstrip('/')
+        
+        # Smart URL logic
+        if "/v1" in clean_base_url:
+            full_url = clean_base_url
+        else:
+            full_url = f"{clean_base_url}/{code_model}/v1"
+        
+        logger.info(f"[IAKA] Generating response - URL: {full_url}, Model: {code_model}")
+        return full_url, code_model
+
+    # --- Streaming Methods ---
+
+    @classmethod
+    def stream_response(cls, provider_name: str, api_key: str, messages: List[Dict[str, str]], **kwargs: Any) -> Iterator[str]:
+        """
+        Stream a response from the specified provider, yielding text deltas as they arrive.
+        Providers without a streaming path yield the complete answer at once.
+        Time-to-first-token is recorded per provider (see get_stream_stats).
+        
+        Args:
+            provider_name: Name of the provider
+            api_key: API Key
+            messages: List of message dictionaries containing 'role' and 'content'
+            **kwargs: Additional arguments like model, base_url, etc.
             
-            if not base_url:
-                return False, "Endpoint manquant pour IAKA"
-                
-            clean_base_url = base_url.rstrip('/')
+        Yields:
+            Text deltas
             
-            # Smart URL logic
-            if "/v1" in clean_base_url:
-                full_url = clean_base_url
-            else:
-                full_url = f"{clean_base_url}/{code_model}/v1"
+        Raises:
+            Exception: Provider or SDK error (nothing is yielded after it)
+        """
+        start = time.perf_counter()
+        first_token_at = None
+        try:
+            for delta in cls._stream_provider(provider_name, api_key, messages, **kwargs):
+                if not delta:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield delta
+        finally:
+            if first_token_at is not None:
+                cls._record_stream(provider_name, first_token_at - start, time.perf_counter() - start)
+
+    @classmethod
+    def _stream_provider(cls, provider_name: str, api_key: str, messages: List[Dict[str, str]], **kwargs: Any) -> Iterator[str]:
+        """Dispatch streaming to the provider SDK (same routing as generate_response)."""
+        if "OpenAI" in provider_name:
+            base_url = kwargs.pop('base_url', None) or None
+            model = kwargs.pop('model', None) or "gpt-4o-mini"
+            yield from cls._stream_chat_completions(get_openai_client(api_key, base_url), model, messages, **kwargs)
+        elif "Gemini" in provider_name or "Google" in provider_name:
+            yield from cls._stream_gemini(api_key, messages, kwargs.get('model'))
+        elif "Claude" in provider_name or "Anthropic" in provider_name:
+            yield from cls._stream_anthropic(api_key, messages, kwargs.get('model'), kwargs.get('max_tokens', 4000))
+        elif "Groq" in provider_name or "Llama" in provider_name:
+            kwargs.pop('base_url', None)
+            model = kwargs.pop('model', None)
+            if not model or model == "llama3-8b-8192":
+                model = "llama-3.1-8b-instant"
+            yield from cls._stream_chat_completions(get_groq_client(api_key), model, messages, **kwargs)
+        elif "Hugging Face" in provider_name:
+            yield from cls._stream_huggingface(api_key, messages, **kwargs)
+        elif "Mistral" in provider_name:
+            kwargs.pop('base_url', None)
+            model = kwargs.pop('model', None) or "mistral-small-latest"
+            yield from cls._stream_mistral(api_key, model, messages, **kwargs)
+        elif "DeepSeek" in provider_name or "IAKA" in provider_name:
+            base_url, model = cls._openai_compatible_target(provider_name, kwargs)
+            yield from cls._stream_chat_completions(get_openai_client(api_key, base_url), model, messages, **kwargs)
+        else:
+            raise ValueError(f"Provider {provider_name} non supporté pour la génération.")
+
+    @staticmethod
+    def _stream_chat_completions(client: Any, model: str, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """OpenAI-style chat completions stream (OpenAI, OpenAI-compatible, Groq)."""
+        stream = client.chat.completions.create(model=model, messages=messages, stream=True, **kwargs)
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    @staticmethod
+    def _stream_anthropic(api_key: str, messages: List[Dict[str, str]], model: Optional[str], max_tokens: int) -> Iterator[str]:
+        system_prompt = "\n\n".join(msg['content'] for msg in messages if msg['role'] == 'system')
+        create_args = {
+            "model": model or "claude-3-opus-20240229",
+            "messages": [msg for msg in messages if msg['role'] != 'system'],
+            "max_tokens": max_tokens
+        }
+        if system_prompt:
+            create_args["system"] = system_prompt
+        with get_anthropic_client(api_key).messages.stream(**create_args) as stream:
+            for text in stream.text_stream:
+                yield text
+
+    @staticmethod
+    def _stream_mistral(api_key: str, model: str, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        for event in get_mistral_client(api_key).chat.stream(model=model, messages=messages, **kwargs):
+            choices = event.data.choices
+            if choices and choices[0].delta.content:
+                yield choices[0].delta.content
+
+    @staticmethod
+    def _stream_gemini(api_key: str, messages: List[Dict[str, str]], model: Optional[str]) -> Iterator[str]:
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        model_instance = genai.GenerativeModel(model or "gemini-1.5-flash")
+        
+        # Same single-turn prompt as generate_gemini, with the system instructions kept in front
+        system_prompt = "\n\n".join(msg['content'] for msg in messages if msg['role'] == 'system')
+        prompt = messages[-1]['content']
+        if system_prompt:
+            prompt = f"{system_prompt}\n\nUtilisateur : {prompt}"
+        for chunk in model_instance.generate_content(prompt, stream=True):
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunk without text (e.g. safety metadata only)
+                continue
+            if text:
+                yield text
+
+    @staticmethod
+    def _stream_huggingface(api_key: str, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        model = kwargs.get('model')
+        if not model or model == "default":
+            model = "mistralai/Mistral-7B-Instruct-v0.2"
+        stream = get_huggingface_client(api_key).chat_completion(
+            messages=messages,
+            model=model,
+            max_tokens=kwargs.get('max_tokens', 4000),
+            temperature=kwargs.get('temperature', 0.7),
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    @classmethod
+    def generate_response_streamed(
+        cls,
+        provider_name: str,
+        api_key: str,
+        messages: List[Dict[str, str]],
+        on_delta: Callable[[str], None],
+        kb_id: Union[str, List[str], None] = None,
+        **kwargs: Any
+    ) -> Tuple[bool, str]:
+        """
+        Stream a response to on_delta and return the complete text, like generate_response.
+        
+        Args:
+            provider_name: Name of the provider
+            api_key: API Key
+            messages: List of message dictionaries containing 'role' and 'content'
+            on_delta: Called with each text delta (from the calling thread)
+            kb_id: Knowledge base identifier(s) for RAG, if any
+            **kwargs: Additional arguments (model, base_url, top_k, global_context, cache_scope...)
             
-            logger.info(f"[IAKA] Generating response - URL: {full_url}, Model: {code_model}")
-            return cls.generate_openai_compatible(api_key, messages, base_url=full_url, model=code_model, **kwargs)
+        Returns:
+            Tuple (success: bool, content: str); on failure content is the error message
+        """
+        cache_scope = kwargs.pop('cache_scope', None)
+        semantic_cache = kwargs.pop('semantic_cache', False)
+        if cache_scope is not None:
+            if kb_id:
+                cache_request = cls._rag_cache_request(provider_name, messages, kb_id, kwargs, cache_scope, semantic_cache)
+            else:
+                cache_request = cls._cache_request(provider_name, messages, kwargs, cache_scope, semantic_cache)
+            cached = cls._cache_get(cache_request)
+            if cached is not None:
+                on_delta(cached)
+                return True, cached
+            result = cls.generate_response_streamed(provider_name, api_key, messages, on_delta, kb_id, **kwargs)
+            cls._cache_put(cache_request, result)
+            return result
+
+        if kb_id:
+            stream = cls.stream_response_with_rag(provider_name, api_key, messages, kb_id, **kwargs)
+        else:
+            stream = cls.stream_response(provider_name, api_key, messages, **kwargs)
+        parts = []
+        try:
+            for delta in stream:
+                parts.append(delta)
+                on_delta(delta)
+        except Exception as e:
+            logger.error(f"Streaming error ({provider_name}): {e}")
+            return False, f"Erreur {provider_name}: {str(e)}"
+        return True, "".join(parts)
+
+    @classmethod
+    def _record_stream(cls, provider_name: str, ttft: float, total: float) -> None:
+        with cls._stream_stats_lock:
+            stats = cls._stream_stats.setdefault(
+                provider_name, {"streams": 0, "ttft_total": 0.0, "duration_total": 0.0, "ttft_last": 0.0}
+            )
+            stats["streams"] += 1
+            stats["ttft_total"] += ttft
+            stats["duration_total"] += total
+            stats["ttft_last"] = ttft
+        logger.info(f"[{provider_name}] Time to first token: {ttft * 1000:.0f} ms (stream {total * 1000:.0f} ms)")
+
+    @classmethod
+    def get_stream_stats(cls) -> Dict[str, Dict[str, float]]:
+        """
+        Get time-to-first-token statistics of streamed responses, per provider.
         
-        return False, f"Provider {provider_name} non supporté pour la génération."
+        Returns:
+            Dict provider -> {'streams', 'ttft_last_ms', 'ttft_avg_ms', 'duration_avg_ms'}
+        """
+        with cls._stream_stats_lock:
+            return {
+                provider: {
+                    "streams": stats["streams"],
+                    "ttft_last_ms": stats["ttft_last"] * 1000,
+                    "ttft_avg_ms": stats["ttft_total"] * 1000 / stats["streams"],
+                    "duration_avg_ms": stats["duration_total"] * 1000 / stats["streams"]
+                }
+                for provider, stats in cls._stream_stats.items()
+            }
 
     # --- RAG (Retrieval-Augmented Generation) Methods ---
 
@@ -658,9 +1000,10 @@ class LLMService:
         provider_name: str,
         api_key: str,
         messages: List[Dict[str, str]],
-        kb_id: str,
-        top_k: int = 5,
-        global_context: str = "",
+        kb_id: Union[str, List[str]],
+        top_k: int = DEFAULT_RAG_TOP_K,
+        global_context: Union[str, List[str]] = "",
+        fusion: str = DEFAULT_RAG_FUSION,
         **kwargs
     ) -> Tuple[bool, str]:
         """
@@ -668,7 +1011,7 @@ class LLMService:
         
         Workflow:
         1. Extract the user's question from messages
-        2. Search for relevant passages in the knowledge base
+        2. Search for relevant passages in the knowledge base(s)
         3. Inject passages into the system prompt as context
         4. Call generate_response() normally
         
@@ -676,16 +1019,87 @@ class LLMService:
             provider_name: Name of the LLM provider
             api_key: API key
             messages: List of message dicts with 'role' and 'content'
-            kb_id: Knowledge base identifier
+            kb_id: Knowledge base identifier, or list of identifiers searched together
             top_k: Number of relevant chunks to retrieve (default: 5)
-            **kwargs: Additional arguments for the LLM
+            global_context: Document summaries, one text or a list of summaries
+            fusion: Result fusion across several KBs, 'rrf' or 'distance'
+            **kwargs: Additional arguments for the LLM (cache_scope/semantic_cache: see generate_response;
+                context_budget: token budget of summaries + passages, default derived from the model)
             
         Returns:
             Tuple (success: bool, content: str)
         """
+        cache_scope = kwargs.pop('cache_scope', None)
+        semantic_cache = kwargs.pop('semantic_cache', False)
+        if cache_scope is not None:
+            # Keyed on the question before retrieval: a hit also skips the vector search
+            cache_request = cls._rag_cache_request(
+                provider_name, messages, kb_id,
+                dict(kwargs, top_k=top_k, global_context=global_context, fusion=fusion),
+                cache_scope, semantic_cache
+            )
+            cached = cls._cache_get(cache_request)
+            if cached is not None:
+                return True, cached
+            result = cls.generate_response_with_rag(
+                provider_name, api_key, messages, kb_id, top_k, global_context, fusion, **kwargs
+            )
+            cls._cache_put(cache_request, result)
+            return result
+
+        augmented_messages = cls._build_rag_messages(
+            messages, kb_id, top_k, global_context, fusion,
+            provider_name, kwargs.get('model'), kwargs.pop('context_budget', None)
+        )
+        return cls.generate_response(provider_name, api_key, augmented_messages, **kwargs)
+
+    @classmethod
+    def stream_response_with_rag(
+        cls,
+        provider_name: str,
+        api_key: str,
+        messages: List[Dict[str, str]],
+        kb_id: Union[str, List[str]],
+        top_k: int = DEFAULT_RAG_TOP_K,
+        global_context: Union[str, List[str]] = "",
+        fusion: str = DEFAULT_RAG_FUSION,
+        **kwargs
+    ) -> Iterator[str]:
+        """
+        Streaming variant of generate_response_with_rag (same arguments).
+        
+        Yields:
+            Text deltas
+        """
+        augmented_messages = cls._build_rag_messages(
+            messages, kb_id, top_k, global_context, fusion,
+            provider_name, kwargs.get('model'), kwargs.pop('context_budget', None)
+        )
+        yield from cls.stream_response(provider_name, api_key, augmented_messages, **kwargs)
+
+    @staticmethod
+    def _build_rag_messages(
+        messages: List[Dict[str, str]],
+        kb_id: Union[str, List[str]],
+        top_k: int,
+        global_context: Union[str, List[str]],
+        fusion: str,
+        provider_name: str = "",
+        model: Optional[str] = None,
+        context_budget: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Replace the system prompt with one holding the passages retrieved for the last user message.
+        Summaries and passages are packed into the context budget of the provider/model
+        (context_budget tokens if given), minus the conversation itself.
+        On retrieval errors the messages are returned unchanged (normal generation).
+        """
         try:
             from core.services.embedding_service import EmbeddingService
             from core.services.vector_store_service import VectorStoreService
+            from core.services.context_packer import (
+                ContextPacker, summary_items, chunk_items, KIND_SUMMARY, MIN_PARTIAL_TOKENS
+            )
             
             # Extract the user's question (last user message)
             user_question = None
@@ -696,17 +1110,37 @@ class LLMService:
             
             if not user_question:
                 # No user question found, fall back to normal generation
-                return cls.generate_response(provider_name, api_key, messages, **kwargs)
+                return messages
             
             # Generate embedding for the question
             embedding_service = EmbeddingService()
-            query_embedding = embedding_service.embed_text(user_question)
+            query_embedding = embedding_service.embed_text_array(user_question)
             
-            # Search in the knowledge base
+            # Search in the knowledge base (shared instance: client and collection handles stay open)
             vector_store = VectorStoreService()
-            results = vector_store.search(kb_id, query_embedding, top_k=top_k)
+            kb_ids = [kb_id] if isinstance(kb_id, str) else list(kb_id)
+            # Hybrid: the question text also ranks chunks by BM25 (exact codes, names, figures)
+            if len(kb_ids) == 1:
+                results = vector_store.search(kb_ids[0], query_embedding, top_k=top_k, query_text=user_question)
+            else:
+                results = vector_store.search_many(
+                    kb_ids, query_embedding, top_k=top_k, fusion=fusion, query_text=user_question
+                )
             
-            if not results and not global_context:
+            # Rank summaries and passages together and keep what fits the budget
+            packer = ContextPacker(provider_name, model, context_budget)
+            conversation_tokens = sum(
+                packer.count(msg.get('content') or '') for msg in messages if msg.get('role') != 'system'
+            )
+            packed = packer.pack(
+                user_question,
+                summary_items(global_context) + chunk_items(results),
+                max(MIN_PARTIAL_TOKENS, packer.budget_tokens - conversation_tokens)
+            )
+            summaries = sorted((item for item in packed if item['kind'] == KIND_SUMMARY), key=lambda item: item['order'])
+            passages = [item for item in packed if item['kind'] != KIND_SUMMARY]
+            
+            if not passages and not summaries:
                 # No relevant context found, add a note to the system prompt
                 augmented_system = """Tu es un assistant expert. 
                 
@@ -717,16 +1151,21 @@ Réponds en te basant sur tes connaissances générales, mais précise que tu n'
                 context_parts = []
                 
                 # Add Global Summary Context (Priority 1)
-                if global_context:
-                    context_parts.append(f"[RÉSUMÉ GLOBAL DES DOCUMENTS]\n{global_context}")
+                if summaries:
+                    summary_text = "\n\n".join(item['text'] for item in summaries)
+                    context_parts.append(f"[RÉSUMÉ GLOBAL DES DOCUMENTS]\n{summary_text}")
                 
-                # Add Retrieved Chunks (Priority 2)
-                if results:
-                    context_parts.append(f"[EXTRAITS PERTINENTS ({len(results)})]")
-                    for i, result in enumerate(results, 1):
+                # Add Retrieved Chunks (Priority 2), most relevant first
+                if passages:
+                    context_parts.append(f"[EXTRAITS PERTINENTS ({len(passages)})]")
+                    for i, passage in enumerate(passages, 1):
+                        result = passage['result']
                         source_file = result['metadata'].get('source_file', 'Unknown')
                         page = result['metadata'].get('page', 'N/A')
-                        text = result['text']
+                        page_end = result['metadata'].get('page_end')
+                        if page_end and page_end != page:
+                            page = f"{page}-{page_end}"
+                        text = passage['text']
                         
                         context_parts.append(
                             f"[Extrait {i}: {source_file} (page {page})]\n{text}"
@@ -750,15 +1189,12 @@ Instructions importantes:
             # Prepare augmented messages
             # Remove existing system messages and add our augmented one
             filtered_messages = [msg for msg in messages if msg.get('role') != 'system']
-            augmented_messages = [{"role": "system", "content": augmented_system}] + filtered_messages
-            
-            # Call normal generation with augmented context
-            return cls.generate_response(provider_name, api_key, augmented_messages, **kwargs)
+            return [{"role": "system", "content": augmented_system}] + filtered_messages
             
         except Exception as e:
             logger.error(f"Error in RAG generation: {e}")
             # Fall back to normal generation on error
-            return cls.generate_response(provider_name, api_key, messages, **kwargs)
+            return messages
 
     # --- Model Fetching Methods ---
 
@@ -807,17 +1243,9 @@ Instructions importantes:
                  
                  clean_base_url = base_url.rstrip('/')
                  discovery_urls = [clean_base_url, f"{clean_base_url}/v1"]
-                 
-                 for d_url in discovery_urls:
-                    try:
-                        logger.info(f"[IAKA] Attempting model discovery at: {d_url}")
-                        models = LLMService._fetch_openai_models(api_key, base_url=d_url)
-                        if models:
-                            logger.info(f"[IAKA] Discovery success at {d_url}: {models}")
-                            return models
-                    except Exception as e:
-                        logger.warning(f"[IAKA] Discovery failed at {d_url}: {str(e)}")
-                        continue
+                 models = LLMService._discover_models(api_key, discovery_urls)
+                 if models:
+                     return models
                 
                  # Fallback matching exactly the user's documentation table
                  return ["mistral-small", "mistral-medium", "mistral-large", "qwen-3-next-80b"]
@@ -829,14 +1257,74 @@ Instructions importantes:
             traceback.print_exc()
             return [f"Erreur: {str(e)}"]
 
+    @staticmethod
+    def fetch_models_cached(
+        provider_name: str,
+        api_key: str,
+        on_update: Optional[Callable[[List[str]], None]] = None,
+        force_refresh: bool = False,
+        **kwargs
+    ) -> Optional[List[str]]:
+        """
+        Non-blocking fetch_models: serves the persisted list of (provider, base_url) immediately
+        and refreshes it in the background when it is missing, older than its TTL or force_refresh is set.
+        
+        Args:
+            provider_name: Name of the provider
+            api_key: API Key for authentication
+            on_update: Called from the refresh thread with the new list (or the error list) when it changed,
+                       or always with force_refresh
+            force_refresh: Refresh even if the cached list is fresh
+            **kwargs: Additional args (base_url)
+            
+        Returns:
+            Cached model names, or None if none are cached yet (on_update receives them)
+        """
+        from core.services.model_list_cache import get_model_list_cache
+        return get_model_list_cache().get_models(
+            provider_name, api_key, kwargs.get('base_url'), on_update=on_update, force_refresh=force_refresh
+        )
+
+    @staticmethod
+    def _discover_models(api_key: str, discovery_urls: List[str]) -> List[str]:
+        """
+        Probe OpenAI-compatible model listing URLs concurrently.
+
+        Returns:
+            Models of the first URL, in discovery_urls order, that answers with a non-empty list
+            (empty list if none does)
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        def probe(d_url):
+            logger.info(f"[IAKA] Attempting model discovery at: {d_url}")
+            return LLMService._fetch_openai_models(api_key, base_url=d_url)
+
+        executor = ThreadPoolExecutor(max_workers=len(discovery_urls))
+        try:
+            futures = [executor.submit(probe, d_url) for d_url in discovery_urls]
+            # Results are taken by priority, not by arrival, so the list does not depend on timing
+            for d_url, future in zip(discovery_urls, futures):
+                try:
+                    models = future.result()
+                except Exception as e:
+                    logger.warning(f"[IAKA] Discovery failed at {d_url}: {str(e)}")
+                    continue
+                if models:
+                    logger.info(f"[IAKA] Discovery success at {d_url}: {models}")
+                    return models
+            return []
+        finally:
+            # Do not wait for lower-priority probes once a list was found
+            executor.shutdown(wait=False, cancel_futures=True)
+
     @staticmethod
     def _fetch_openai_models(api_key: str, base_url: str = None) -> List[str]:
-        from openai import OpenAI
         # Handle empty string as None to avoid connection errors
         if base_url == "":
             base_url = None
             
-        client = OpenAI(api_key=api_key, base_url=base_url)
+        client = get_openai_client(api_key, base_url)
         models = client.models.list()
         # Sort and filter interesting models
         model_names = [m.id for m in models.data]
@@ -853,15 +1341,13 @@ Instructions importantes:
 
     @staticmethod
     def _fetch_groq_models(api_key: str) -> List[str]:
-        from groq import Groq
-        client = Groq(api_key=api_key)
+        client = get_groq_client(api_key)
         models = client.models.list()
         return [m.id for m in models.data]
 
     @staticmethod
     def _fetch_mistral_models(api_key: str) -> List[str]:
-        from mistralai import Mistral
-        client = Mistral(api_key=api_key)
+        client = get_mistral_client(api_key)
         models_response = client.models.list()
         # Mistral API response structure might vary slightly, usually .data
         if hasattr(models_response, 'data'):
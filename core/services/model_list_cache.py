@@ -0,0 +1,200 @@
+"""
+Model List Cache for LLMService.fetch_models.
+Model lists are persisted per (provider, base_url) in a JSON file and served immediately;
+lists older than the TTL are refreshed in a background thread and the caller is notified of changes.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+from utils.resource_handler import get_writable_path
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = "model_list_cache.json"
+
+# Cached lists are refreshed once older than this many seconds
+DEFAULT_TTL_SECONDS = 6 * 3600
+
+
+def is_error_list(models: List[str]) -> bool:
+    """True for the error marker returned by LLMService.fetch_models (never cached)."""
+    return not models or models[0].startswith("Erreur")
+
+
+class ModelListCache:
+    """Persistent model lists keyed by (provider, base_url), with a TTL and background refresh."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        fetch: Optional[Callable[..., List[str]]] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: JSON file (defaults to model_list_cache.json in the data directory)
+            ttl_seconds: Age after which a list is refreshed
+            fetch: Fetch function with the LLMService.fetch_models signature (defaults to it)
+        """
+        self.path = path or get_writable_path(CACHE_FILE)
+        self.ttl_seconds = ttl_seconds
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        # Running refreshes: key -> [(on_update, notify even if unchanged)]
+        self._refreshing: Dict[str, List[Tuple[Callable[[List[str]], None], bool]]] = {}
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    @staticmethod
+    def _key(provider_name: str, base_url: Optional[str]) -> str:
+        return f"{provider_name}|{(base_url or '').strip().rstrip('/')}"
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self) -> None:
+        """Write the cache atomically (caller holds the lock)."""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save the model list cache: {e}")
+
+    def get(self, provider_name: str, base_url: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached model list.
+
+        Returns:
+            Dict with 'models', 'fetched_at' and 'stale', or None if nothing is cached
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(provider_name, base_url))
+        if not entry:
+            return None
+        return {
+            "models": list(entry["models"]),
+            "fetched_at": entry["fetched_at"],
+            "stale": time.time() - entry["fetched_at"] > self.ttl_seconds
+        }
+
+    def put(self, provider_name: str, base_url: Optional[str], models: List[str]) -> None:
+        """Store a model list (error lists are ignored)."""
+        if is_error_list(models):
+            return
+        with self._lock:
+            self._entries[self._key(provider_name, base_url)] = {"models": list(models), "fetched_at": time.time()}
+            self._save()
+
+    def get_models(
+        self,
+        provider_name: str,
+        api_key: str,
+        base_url: Optional[str] = None,
+        on_update: Optional[Callable[[List[str]], None]] = None,
+        force_refresh: bool = False
+    ) -> Optional[List[str]]:
+        """
+        Serve the cached list and refresh it in the background when missing, stale or forced.
+
+        Args:
+            provider_name: Provider name as passed to LLMService.fetch_models
+            api_key: API key used for the refresh
+            base_url: Endpoint of OpenAI-compatible providers
+            on_update: Called from the refresh thread with the fetched list (or the error list)
+                       when it differs from the cached one, or always with force_refresh
+            force_refresh: Refresh even if the cached list is fresh
+
+        Returns:
+            Cached model names, or None when nothing is cached yet (wait for on_update)
+        """
+        cached = self.get(provider_name, base_url)
+        if cached is None or cached["stale"] or force_refresh:
+            self.refresh_in_background(provider_name, api_key, base_url, on_update, notify_unchanged=force_refresh)
+        return cached["models"] if cached else None
+
+    def refresh(self, provider_name: str, api_key: str, base_url: Optional[str] = None) -> List[str]:
+        """Fetch a model list now and cache it; returns the list (or the error list)."""
+        fetch = self._fetch
+        if fetch is None:
+            from core.services.llm_service import LLMService
+            fetch = LLMService.fetch_models
+        kwargs = {"base_url": base_url} if base_url else {}
+        models = fetch(provider_name, api_key, **kwargs)
+        self.put(provider_name, base_url, models)
+        return models
+
+    def refresh_in_background(
+        self,
+        provider_name: str,
+        api_key: str,
+        base_url: Optional[str] = None,
+        on_update: Optional[Callable[[List[str]], None]] = None,
+        notify_unchanged: bool = False
+    ) -> bool:
+        """
+        Start a refresh in a daemon thread (one at a time per provider and base_url).
+
+        Args:
+            on_update: Called from the refresh thread with the fetched list (or the error list)
+                       when it differs from the cached one
+            notify_unchanged: Also call on_update when the list did not change
+
+        Returns:
+            False if a refresh of this list was already running (on_update is called when it ends)
+        """
+        key = self._key(provider_name, base_url)
+        listener = [(on_update, notify_unchanged)] if on_update is not None else []
+        with self._lock:
+            if key in self._refreshing:
+                self._refreshing[key].extend(listener)
+                return False
+            self._refreshing[key] = listener
+
+        def run():
+            models = None
+            try:
+                previous = self.get(provider_name, base_url)
+                models = self.refresh(provider_name, api_key, base_url)
+                changed = previous is None or previous["models"] != models
+            except Exception as e:
+                logger.error(f"Model list refresh failed for {provider_name}: {e}")
+            finally:
+                with self._lock:
+                    listeners = self._refreshing.pop(key, [])
+            if models is None:
+                return
+            for callback, notify_unchanged in listeners:
+                if changed or notify_unchanged:
+                    try:
+                        callback(models)
+                    except Exception as e:
+                        logger.error(f"Model list listener failed for {provider_name}: {e}")
+
+        threading.Thread(target=run, name="model-list-refresh", daemon=True).start()
+        return True
+
+
+_shared_cache: Optional[ModelListCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_model_list_cache() -> ModelListCache:
+    """Process-wide model list cache."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ModelListCache()
+        return _shared_cache
@@ -0,0 +1,285 @@
+"""
+Provider failover and hedged requests.
+A call goes through a chain of providers: rate limits (429), quota, server errors (5xx) and timeouts
+move on to the next provider. With hedging, a duplicate request is sent to the next provider when
+the current one has not answered within its p90 latency; the first success wins.
+Latencies are tracked per provider and used to order the chain.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import collections
+import logging
+import re
+import threading
+import time
+
+from core.services.async_llm_service import is_retryable_error
+
+logger = logging.getLogger(__name__)
+
+# Successful call durations kept per provider
+LATENCY_WINDOW = 50
+# Samples needed before a provider's latency is used for hedging and ordering
+MIN_LATENCY_SAMPLES = 5
+HEDGE_QUANTILE = 0.9
+# Providers that just failed over are moved to the end of chains for this long
+FAILOVER_COOLDOWN_SECONDS = 60.0
+
+QUOTA_ERROR = re.compile(r"\b402\b|quota|insufficient.?(balance|credit)", re.IGNORECASE)
+
+
+def is_failover_error(message: str) -> bool:
+    """True if an error message should move the call to the next provider (429, quota, 5xx, timeouts)."""
+    return is_retryable_error(message) or bool(QUOTA_ERROR.search(message or ""))
+
+
+def provider_chain(settings: Dict[str, Any], primary: str, fallbacks: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Build a provider chain: the primary provider, then the fallbacks, without duplicates.
+    Providers without an API key in the settings are skipped.
+
+    Args:
+        settings: Application settings (decrypted 'api_keys')
+        primary: Preferred provider
+        fallbacks: Providers to try next, in order
+
+    Returns:
+        Provider names (empty if none has an API key)
+    """
+    api_keys = settings.get("api_keys", {})
+    chain = []
+    for name in [primary] + list(fallbacks or []):
+        if name and name not in chain and api_keys.get(name):
+            chain.append(name)
+    return chain
+
+
+class LatencyTracker:
+    """Recent latencies and failover failures per provider (thread-safe)."""
+
+    def __init__(self, window: int = LATENCY_WINDOW, clock: Callable[[], float] = time.monotonic):
+        self._latencies: Dict[str, collections.deque] = {}
+        self._failures: Dict[str, int] = {}
+        self._cooldown_until: Dict[str, float] = {}
+        self._window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, seconds: float) -> None:
+        """Record the duration of a successful call."""
+        with self._lock:
+            self._latencies.setdefault(provider, collections.deque(maxlen=self._window)).append(seconds)
+            self._cooldown_until.pop(provider, None)
+
+    def record_failure(self, provider: str) -> None:
+        """Record a failover error; the provider is deprioritized for the cooldown period."""
+        with self._lock:
+            self._failures[provider] = self._failures.get(provider, 0) + 1
+            self._cooldown_until[provider] = self._clock() + FAILOVER_COOLDOWN_SECONDS
+
+    def in_cooldown(self, provider: str) -> bool:
+        with self._lock:
+            return self._cooldown_until.get(provider, 0.0) > self._clock()
+
+    def quantile(self, provider: str, q: float = HEDGE_QUANTILE) -> Optional[float]:
+        """
+        Latency quantile of a provider.
+
+        Returns:
+            Seconds, or None with fewer than MIN_LATENCY_SAMPLES samples
+        """
+        with self._lock:
+            samples = sorted(self._latencies.get(provider, ()))
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get latency statistics.
+
+        Returns:
+            Dict provider -> {'samples', 'p50', 'p90', 'failures', 'cooling_down'}
+        """
+        with self._lock:
+            providers = set(self._latencies) | set(self._failures)
+        return {
+            provider: {
+                "samples": len(self._latencies.get(provider, ())),
+                "p50": self.quantile(provider, 0.5),
+                "p90": self.quantile(provider, 0.9),
+                "failures": self._failures.get(provider, 0),
+                "cooling_down": self.in_cooldown(provider)
+            }
+            for provider in providers
+        }
+
+
+def _run_in_thread(fn: Callable[[], Any]) -> Future:
+    """Run fn in a daemon thread (an abandoned hedged call must not delay the application exit)."""
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def run():
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="llm-provider-call", daemon=True).start()
+    return future
+
+
+def _run_inline(fn: Callable[[], Any]) -> Future:
+    """Run fn now and return its completed future."""
+    future = Future()
+    future.set_running_or_notify_cancel()
+    try:
+        future.set_result(fn())
+    except BaseException as e:
+        future.set_exception(e)
+    return future
+
+
+class ProviderRouter:
+    """Runs a call over a provider chain with failover and optional hedging."""
+
+    def __init__(
+        self,
+        tracker: Optional[LatencyTracker] = None,
+        hedge_quantile: float = HEDGE_QUANTILE,
+        order_by_latency: bool = True
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            tracker: Latency tracker (a private one by default)
+            hedge_quantile: Latency quantile after which a hedged request is sent
+            order_by_latency: Order chains by tail latency (providers without samples keep their place at the end)
+        """
+        self.tracker = tracker or LatencyTracker()
+        self.hedge_quantile = hedge_quantile
+        self.order_by_latency = order_by_latency
+
+    def order_chain(self, chain: Sequence[str], by_latency: Optional[bool] = None) -> List[str]:
+        """
+        Order a chain: providers in failover cooldown go last; when ordering by latency, providers
+        are sorted by p90 latency, those without enough samples keeping their configured order after them.
+
+        Args:
+            chain: Provider names in configured order
+            by_latency: Override of order_by_latency
+        """
+        by_latency = self.order_by_latency if by_latency is None else by_latency
+
+        def key(item):
+            position, provider = item
+            p90 = self.tracker.quantile(provider, 0.9) if by_latency else None
+            return (
+                self.tracker.in_cooldown(provider),
+                p90 is None,
+                p90 if p90 is not None else 0.0,
+                position
+            )
+
+        return [provider for _, provider in sorted(enumerate(chain), key=key)]
+
+    def call(
+        self,
+        chain: Sequence[str],
+        call: Callable[[str], Tuple[bool, str]],
+        hedge: bool = False,
+        order_by_latency: Optional[bool] = None,
+        should_fail_over: Optional[Callable[[str, str], bool]] = None,
+        on_failover: Optional[Callable[[str, str], None]] = None
+    ) -> Tuple[bool, str, str]:
+        """
+        Call providers of the chain until one succeeds.
+
+        Args:
+            chain: Provider names (see provider_chain)
+            call: Called with a provider name, returns (success, content); exceptions count as failures
+            hedge: Send a duplicate request to the next provider when the current one exceeds its p90 latency
+            order_by_latency: Override of the router's chain ordering
+            should_fail_over: Predicate (provider, error) deciding whether to try the next provider
+                              (default: is_failover_error)
+            on_failover: Called with (failed provider, error) when the call moves on
+
+        Returns:
+            Tuple (success, content, provider that produced the content)
+        """
+        should_fail_over = should_fail_over or (lambda provider, message: is_failover_error(message))
+        queue = self.order_chain(chain, order_by_latency)
+        if not queue:
+            return False, "Aucun fournisseur configuré.", ""
+
+        pending: Dict[Future, str] = {}
+        last_error, last_provider = "", queue[0]
+
+        def launch():
+            provider = queue.pop(0)
+            task = lambda: self._timed_call(provider, call)
+            # Without hedging, calls run in the caller's thread (streaming callbacks keep their thread)
+            pending[_run_in_thread(task) if hedge else _run_inline(task)] = provider
+
+        launch()
+        while pending:
+            timeout = None
+            if hedge and queue and len(pending) == 1:
+                timeout = self.tracker.quantile(next(iter(pending.values())), self.hedge_quantile)
+
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                logger.info(
+                    f"[{next(iter(pending.values()))}] No answer after p{int(self.hedge_quantile * 100)} "
+                    f"({timeout:.1f}s), hedging with {queue[0]}"
+                )
+                launch()
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                success, content = future.result()
+                if success:
+                    return True, content, provider
+
+                last_error, last_provider = content, provider
+                if should_fail_over(provider, content):
+                    self.tracker.record_failure(provider)
+                    logger.warning(f"[{provider}] Failing over: {content[:200]}")
+                    if on_failover is not None and (queue or pending):
+                        on_failover(provider, content)
+                else:
+                    # Not a provider availability problem: trying elsewhere would not help
+                    queue.clear()
+
+            if not pending and queue:
+                launch()
+
+        return False, last_error, last_provider
+
+    def _timed_call(self, provider: str, call: Callable[[str], Tuple[bool, str]]) -> Tuple[bool, str]:
+        start = time.monotonic()
+        try:
+            success, content = call(provider)
+        except Exception as e:
+            success, content = False, f"Erreur {provider}: {str(e)}"
+        if success:
+            self.tracker.record(provider, time.monotonic() - start)
+        return success, content
+
+
+# Shared router, so latencies accumulate across the application
+_shared_router: Optional[ProviderRouter] = None
+_shared_lock = threading.Lock()
+
+
+def get_provider_router() -> ProviderRouter:
+    """Process-wide router."""
+    global _shared_router
+    with _shared_lock:
+        if _shared_router is None:
+            _shared_router = ProviderRouter()
+        return _shared_router
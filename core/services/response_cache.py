@@ -0,0 +1,320 @@
+"""
+Response Cache for LLMService.
+Two tiers stored in SQLite:
+- exact: keyed by (provider, model, generation options, normalized messages)
+- semantic (opt-in): reuses the answer of a previous question whose embedding is close
+  enough, when everything but the last user message is identical
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from utils.resource_handler import get_writable_path
+from core.services.embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = "response_cache.sqlite3"
+
+# Cached answers expire after this many seconds
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+# Minimum cosine similarity between two questions for a semantic hit
+DEFAULT_SEMANTIC_THRESHOLD = 0.95
+
+# Semantic candidates compared per lookup (most recent first)
+MAX_SEMANTIC_CANDIDATES = 2000
+
+
+def _hash(payload: Any) -> str:
+    data = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _normalize_messages(messages: Sequence[Dict[str, str]]) -> List[Tuple[str, str]]:
+    return [(msg.get("role", ""), normalize_text(msg.get("content") or "")) for msg in messages]
+
+
+def _last_user_index(messages: Sequence[Dict[str, str]]) -> int:
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i].get("role") == "user":
+            return i
+    return -1
+
+
+class ResponseCache:
+    """Persistent cache of LLM answers with TTL, scoped invalidation and hit statistics."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        semantic_threshold: float = DEFAULT_SEMANTIC_THRESHOLD,
+        embed: Optional[Callable[[str], np.ndarray]] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: SQLite file (default: ./response_cache.sqlite3)
+            ttl_seconds: Lifetime of a cached answer
+            semantic_threshold: Minimum cosine similarity for a semantic hit
+            embed: Text -> embedding function for the semantic tier (default: EmbeddingService)
+        """
+        self.db_path = db_path or get_writable_path(CACHE_FILE)
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self._embed = embed
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, scope TEXT NOT NULL, kb_ids TEXT NOT NULL, partition_key TEXT NOT NULL, "
+            "response TEXT NOT NULL, embedding BLOB, created_at REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_partition ON responses (partition_key, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_scope ON responses (scope)")
+        self._conn.commit()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    # --- Keys ---
+
+    @staticmethod
+    def _keys(
+        provider: str,
+        model: str,
+        messages: Sequence[Dict[str, str]],
+        options: Optional[Dict[str, Any]],
+        scope: str,
+        kb_ids: Sequence[str]
+    ) -> Tuple[str, str, str]:
+        """
+        Build (exact key, semantic partition key, question) for a request.
+        The partition holds everything but the last user message.
+        """
+        normalized = _normalize_messages(messages)
+        base = {"provider": provider, "model": model or "", "options": options or {}, "scope": scope, "kb_ids": sorted(kb_ids)}
+        exact_key = _hash(dict(base, messages=normalized))
+
+        last_user = _last_user_index(messages)
+        question = normalized[last_user][1] if last_user >= 0 else ""
+        context = normalized[:last_user] + normalized[last_user + 1:] if last_user >= 0 else normalized
+        partition_key = _hash(dict(base, context=context))
+        return exact_key, partition_key, question
+
+    def _embedding(self, text: str) -> Optional[np.ndarray]:
+        try:
+            if self._embed is None:
+                from core.services.embedding_service import EmbeddingService
+                self._embed = EmbeddingService().embed_text_array
+            vector = np.asarray(self._embed(text), dtype=np.float32).reshape(-1)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm > 0 else None
+        except Exception as e:
+            logger.warning(f"Semantic response cache unavailable: {e}")
+            return None
+
+    # --- Lookup / store ---
+
+    def get(
+        self,
+        provider: str,
+        model: str,
+        messages: Sequence[Dict[str, str]],
+        options: Optional[Dict[str, Any]] = None,
+        scope: str = "",
+        kb_ids: Sequence[str] = (),
+        semantic: bool = False
+    ) -> Optional[str]:
+        """
+        Look up a cached answer.
+
+        Args:
+            provider: Provider name
+            model: Model name (empty for the provider default)
+            messages: Request messages
+            options: Other generation options that change the answer (temperature, top_k...)
+            scope: Invalidation scope (assistant or module id)
+            kb_ids: Knowledge bases the answer depends on
+            semantic: Also accept an answer to a similar question
+
+        Returns:
+            Cached answer, or None on miss
+        """
+        exact_key, partition_key, question = self._keys(provider, model, messages, options, scope, kb_ids)
+        min_created = time.time() - self.ttl_seconds
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at >= ?", (exact_key, min_created)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE responses SET hits = hits + 1 WHERE key = ?", (exact_key,))
+                self._conn.commit()
+                self.exact_hits += 1
+                return row[0]
+
+        if semantic and question:
+            query = self._embedding(question)
+            if query is not None:
+                with self._lock:
+                    rows = self._conn.execute(
+                        "SELECT key, response, embedding FROM responses "
+                        "WHERE partition_key = ? AND created_at >= ? AND embedding IS NOT NULL "
+                        "ORDER BY created_at DESC LIMIT ?",
+                        (partition_key, min_created, MAX_SEMANTIC_CANDIDATES)
+                    ).fetchall()
+                    candidates = [r for r in rows if len(r[2]) == query.nbytes]
+                    if candidates:
+                        matrix = np.frombuffer(b"".join(r[2] for r in candidates), dtype=np.float32)
+                        similarities = matrix.reshape(len(candidates), -1) @ query
+                        best = int(np.argmax(similarities))
+                        if similarities[best] >= self.semantic_threshold:
+                            self._conn.execute("UPDATE responses SET hits = hits + 1 WHERE key = ?", (candidates[best][0],))
+                            self._conn.commit()
+                            self.semantic_hits += 1
+                            return candidates[best][1]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(
+        self,
+        provider: str,
+        model: str,
+        messages: Sequence[Dict[str, str]],
+        response: str,
+        options: Optional[Dict[str, Any]] = None,
+        scope: str = "",
+        kb_ids: Sequence[str] = (),
+        semantic: bool = False
+    ) -> None:
+        """
+        Store an answer (same arguments as get, plus the answer).
+        With semantic=True the question embedding is stored for later similar questions.
+        """
+        exact_key, partition_key, question = self._keys(provider, model, messages, options, scope, kb_ids)
+        embedding = self._embedding(question) if semantic and question else None
+        kb_field = "".join(f",{kb_id}" for kb_id in sorted(kb_ids)) + ","
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, scope, kb_ids, partition_key, response, embedding, created_at, hits) VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (
+                    exact_key, scope, kb_field, partition_key, response,
+                    embedding.tobytes() if embedding is not None else None, time.time()
+                )
+            )
+            self._conn.commit()
+
+    # --- Invalidation ---
+
+    def invalidate_scope(self, scope: str) -> int:
+        """Delete the answers of a scope (e.g. an assistant whose configuration changed)."""
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM responses WHERE scope = ?", (scope,)).rowcount
+            self._conn.commit()
+        if deleted:
+            logger.info(f"Response cache: {deleted} answers invalidated for scope {scope}")
+        return deleted
+
+    def invalidate_knowledge_base(self, kb_id: str) -> int:
+        """Delete the answers built from a knowledge base whose content changed."""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM responses WHERE instr(kb_ids, ?) > 0", (f",{kb_id},",)
+            ).rowcount
+            self._conn.commit()
+        if deleted:
+            logger.info(f"Response cache: {deleted} answers invalidated for KB {kb_id}")
+        return deleted
+
+    def purge_expired(self) -> int:
+        """Delete expired answers; returns the number of deleted rows."""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def clear(self) -> None:
+        """Delete every cached answer and reset the statistics."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.exact_hits = self.semantic_hits = self.misses = 0
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get cache statistics since startup.
+
+        Returns:
+            Dict with 'entries', 'exact_hits', 'semantic_hits', 'misses' and 'hit_rate'
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "entries": entries,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0
+            }
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_shared_cache: Optional[ResponseCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache (opened on first use)."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache()
+            _shared_cache.purge_expired()
+        return _shared_cache
+
+
+def _cache_in_use() -> bool:
+    # Nothing to invalidate before the cache was ever written: avoid creating the file
+    return _shared_cache is not None or os.path.exists(get_writable_path(CACHE_FILE))
+
+
+def invalidate_scope(scope: str) -> None:
+    """Invalidate a scope in the shared cache (errors are logged, never raised)."""
+    try:
+        if _cache_in_use():
+            get_response_cache().invalidate_scope(scope)
+    except Exception as e:
+        logger.warning(f"Response cache invalidation failed for scope {scope}: {e}")
+
+
+def invalidate_knowledge_base(kb_id: str) -> None:
+    """Invalidate a knowledge base in the shared cache (errors are logged, never raised)."""
+    try:
+        if _cache_in_use():
+            get_response_cache().invalidate_knowledge_base(kb_id)
+    except Exception as e:
+        logger.warning(f"Response cache invalidation failed for KB {kb_id}: {e}")
@@ -0,0 +1,332 @@
+"""
+Concurrent document summaries for RAG ingestion.
+Summary generation runs in a bounded thread pool while extraction and embedding go on.
+Every job is written to a per-KB journal before it starts, with the text it summarizes,
+so jobs interrupted by an application exit can be resumed, and summaries already generated
+for an unchanged file content are reused instead of calling the LLM again.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, List, Optional
+import datetime
+import json
+import logging
+import os
+import shutil
+import threading
+
+from utils.resource_handler import get_writable_path
+from core.services.ingestion_manifest import MANIFESTS_DIR
+
+logger = logging.getLogger(__name__)
+
+# Concurrent summary calls (each call is also rate-limited per provider by async_llm_service)
+DEFAULT_SUMMARY_WORKERS = 4
+
+# Summary saved while a failed job waits for a retry
+SUMMARY_UNAVAILABLE = "Résumé non disponible (Erreur génération)"
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+
+
+class SummaryJournal:
+    """Journal of the summary jobs of one knowledge base (thread-safe, saved after every change)."""
+
+    def __init__(self, kb_id: str, root: Optional[str] = None):
+        """
+        Load (or create) the journal of a knowledge base.
+
+        Args:
+            kb_id: Knowledge base identifier
+            root: Directory holding the journals (default: next to the ingestion manifests)
+        """
+        self.kb_id = kb_id
+        self.root = root or _default_root()
+        os.makedirs(self.root, exist_ok=True)
+        self.path = os.path.join(self.root, f"kb_{kb_id}.summaries.json")
+        # Texts of pending jobs are kept in separate files so the journal stays small
+        self.texts_dir = os.path.join(self.root, f"kb_{kb_id}.summaries")
+        self._lock = threading.Lock()
+        self.jobs: Dict[str, Dict] = self._load()
+        # Summary pools currently running on this journal (imports and resumes)
+        self._active_pools = 0
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("jobs", {})
+        except Exception as e:
+            logger.warning(f"Summary journal for KB {self.kb_id} unreadable, starting fresh: {e}")
+            return {}
+
+    def _save(self) -> None:
+        """Write the journal atomically (caller holds the lock)."""
+        if not self.jobs:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"kb_id": self.kb_id, "jobs": self.jobs}, f)
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, doc_id: str, content_hash: str) -> Optional[str]:
+        """Summary already generated for this document content, if any."""
+        with self._lock:
+            job = self.jobs.get(doc_id)
+        if job and job["status"] == STATUS_DONE and job["hash"] == content_hash:
+            return job["summary"]
+        return None
+
+    def _text_path(self, doc_id: str) -> str:
+        return os.path.join(self.texts_dir, f"{doc_id}.txt")
+
+    def start(self, doc_id: str, file_path: str, content_hash: str, text: str, provider: str) -> None:
+        """Record a job before it runs."""
+        os.makedirs(self.texts_dir, exist_ok=True)
+        with open(self._text_path(doc_id), 'w', encoding='utf-8') as f:
+            f.write(text)
+        with self._lock:
+            self.jobs[doc_id] = {
+                "file_path": file_path,
+                "hash": content_hash,
+                "provider": provider,
+                "status": STATUS_PENDING,
+                "queued_at": datetime.datetime.now().isoformat()
+            }
+            self._save()
+
+    def read_text(self, doc_id: str) -> Optional[str]:
+        """Text of a pending job (None if it was lost)."""
+        try:
+            with open(self._text_path(doc_id), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def complete(self, doc_id: str, summary: str) -> None:
+        """Record the summary of a job (its text is no longer needed)."""
+        with self._lock:
+            job = self.jobs.get(doc_id)
+            if job is None:
+                return
+            job.update(status=STATUS_DONE, summary=summary)
+            self._save()
+        self._remove_text(doc_id)
+
+    def _remove_text(self, doc_id: str) -> None:
+        try:
+            os.remove(self._text_path(doc_id))
+        except OSError:
+            pass
+
+    def forget_completed(self, doc_ids: List[str]) -> None:
+        """Drop the completed jobs of fully indexed documents (failed ones stay pending for a retry)."""
+        with self._lock:
+            for doc_id in doc_ids:
+                if self.jobs.get(doc_id, {}).get("status") == STATUS_DONE:
+                    del self.jobs[doc_id]
+            self._save()
+
+    def pending(self) -> Dict[str, Dict]:
+        """Jobs that never completed (doc_id -> job)."""
+        with self._lock:
+            return {doc_id: dict(job) for doc_id, job in self.jobs.items() if job["status"] == STATUS_PENDING}
+
+    def acquire(self, exclusive: bool = False) -> bool:
+        """
+        Register a summary pool running on this journal.
+
+        Args:
+            exclusive: Refuse if another pool is running (resumes must not run jobs twice)
+
+        Returns:
+            False if refused
+        """
+        with self._lock:
+            if exclusive and self._active_pools:
+                return False
+            self._active_pools += 1
+            return True
+
+    def release(self) -> None:
+        """Unregister a pool registered with acquire()."""
+        with self._lock:
+            self._active_pools = max(0, self._active_pools - 1)
+
+    def in_use(self) -> bool:
+        """True while an import or a resume generates summaries with this journal."""
+        with self._lock:
+            return self._active_pools > 0
+
+    def delete(self) -> None:
+        """Remove the journal and its texts."""
+        with self._lock:
+            self.jobs = {}
+            self._save()
+        shutil.rmtree(self.texts_dir, ignore_errors=True)
+
+
+class SummaryPool:
+    """
+    Bounded pool generating summaries concurrently.
+    Results are handed to on_summary one at a time (safe for JSON read-modify-write callbacks).
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str, str, str, str], str],
+        journal: SummaryJournal,
+        on_summary: Optional[Callable[[str, str, str], None]] = None,
+        max_workers: int = DEFAULT_SUMMARY_WORKERS,
+        exclusive: bool = False
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            generate: Called with (file_path, text, provider, api_key), returns the summary
+                      (raises on failure: the job then stays pending in the journal)
+            journal: Journal of the knowledge base
+            on_summary: Called with (file_path, doc_id, summary) as each summary completes
+            max_workers: Maximum concurrent summary calls
+            exclusive: Only run if no other pool uses the journal; check `active` (False: nothing is queued)
+        """
+        self.generate = generate
+        self.journal = journal
+        self.on_summary = on_summary
+        self.summaries: Dict[str, str] = {}
+        self.active = journal.acquire(exclusive)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="summary")
+        self._futures: List[Future] = []
+        self._callback_lock = threading.Lock()
+
+    def submit(
+        self,
+        file_path: str,
+        doc_id: str,
+        content_hash: str,
+        text: str,
+        provider: str,
+        api_key: str
+    ) -> None:
+        """Queue the summary of a document (served from the journal if its content was already summarized)."""
+        cached = self.journal.lookup(doc_id, content_hash)
+        if cached is not None:
+            logger.info(f"Summary of {file_path} reused from the journal")
+            self._deliver(file_path, doc_id, cached)
+            return
+        self.journal.start(doc_id, file_path, content_hash, text, provider)
+        self._futures.append(self._executor.submit(self._run, file_path, doc_id, text, provider, api_key))
+
+    def resume(self, api_key_for: Callable[[str], Optional[str]]) -> int:
+        """
+        Queue the jobs left pending by a previous run.
+
+        Args:
+            api_key_for: Returns the API key of a provider (None skips its jobs)
+
+        Returns:
+            Number of jobs queued
+        """
+        if not self.active:
+            return 0
+        count = 0
+        for doc_id, job in self.journal.pending().items():
+            api_key = api_key_for(job["provider"])
+            text = self.journal.read_text(doc_id)
+            if not api_key or text is None:
+                continue
+            self._futures.append(self._executor.submit(
+                self._run, job["file_path"], doc_id, text, job["provider"], api_key
+            ))
+            count += 1
+        return count
+
+    def _run(self, file_path: str, doc_id: str, text: str, provider: str, api_key: str) -> None:
+        try:
+            summary = self.generate(file_path, text, provider, api_key)
+        except Exception as e:
+            logger.warning(f"Summary of {file_path} failed, kept pending for a retry: {e}")
+            self._deliver(file_path, doc_id, SUMMARY_UNAVAILABLE)
+            return
+        self.journal.complete(doc_id, summary)
+        self._deliver(file_path, doc_id, summary)
+
+    def _deliver(self, file_path: str, doc_id: str, summary: str) -> None:
+        with self._callback_lock:
+            self.summaries[file_path] = summary
+            if self.on_summary is not None:
+                try:
+                    self.on_summary(file_path, doc_id, summary)
+                except Exception as e:
+                    logger.error(f"Could not save the summary of {file_path}: {e}")
+
+    def pending_count(self) -> int:
+        """Jobs still running or queued."""
+        return sum(1 for future in self._futures if not future.done())
+
+    def wait(self, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, str]:
+        """
+        Wait for every queued summary and stop the pool.
+
+        Args:
+            progress: Called with (completed, total) as jobs finish
+
+        Returns:
+            Dict file_path -> summary
+        """
+        total = len(self._futures)
+        for done, future in enumerate(list(self._futures), 1):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Summary job failed: {e}")
+            if progress:
+                progress(done, total)
+        self._executor.shutdown(wait=True)
+        if self.active:
+            self.active = False
+            self.journal.release()
+        return dict(self.summaries)
+
+
+def _default_root() -> str:
+    return os.path.join(get_writable_path("vector_databases"), MANIFESTS_DIR)
+
+
+# Journals shared by every import and resume of the process: a journal rewrites its whole file,
+# so two instances on the same KB would overwrite each other's jobs
+_journals: Dict[str, SummaryJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_summary_journal(kb_id: str, root: Optional[str] = None) -> SummaryJournal:
+    """
+    Journal of a knowledge base, shared across threads.
+
+    Args:
+        kb_id: Knowledge base identifier
+        root: Directory holding the journals (default: next to the ingestion manifests)
+    """
+    root = root or _default_root()
+    key = os.path.join(root, kb_id)
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = _journals[key] = SummaryJournal(kb_id, root)
+        return journal
+
+
+def delete_summary_journal(kb_id: str) -> None:
+    """Remove the summary journal of a deleted knowledge base."""
+    try:
+        journal = get_summary_journal(kb_id)
+        journal.delete()
+        with _journals_lock:
+            _journals.pop(os.path.join(journal.root, kb_id), None)
+    except Exception as e:
+        logger.warning(f"Could not delete summary journal of KB {kb_id}: {e}")
@@ -0,0 +1,40 @@
+"""
+Pluggable vector storage backends for knowledge bases.
+
+- chroma: ChromaDB collections (default)
+- numpy: memory-mapped brute force, exact float32 or quantized int8/float16 + re-rank
+- hnsw: local HNSW graph index (hnswlib)
+"""
+
+from core.services.vector_backends.base import VectorBackend
+
+BACKEND_CHROMA = "chroma"
+BACKEND_NUMPY = "numpy"
+BACKEND_HNSW = "hnsw"
+BACKENDS = (BACKEND_CHROMA, BACKEND_NUMPY, BACKEND_HNSW)
+
+# Local backends are detected from their files, checked before falling back to Chroma
+LOCAL_BACKENDS = (BACKEND_NUMPY, BACKEND_HNSW)
+
+
+def create_backend(name: str, root: str) -> VectorBackend:
+    """
+    Instantiate a backend (imports are lazy so unused backends cost nothing).
+
+    Args:
+        name: 'chroma', 'numpy' or 'hnsw'
+        root: Base directory for vector databases
+
+    Returns:
+        Backend instance
+    """
+    if name == BACKEND_CHROMA:
+        from core.services.vector_backends.chroma_backend import ChromaBackend
+        return ChromaBackend(root)
+    if name == BACKEND_NUMPY:
+        from core.services.vector_backends.numpy_backend import NumpyBackend
+        return NumpyBackend(root)
+    if name == BACKEND_HNSW:
+        from core.services.vector_backends.hnsw_backend import HnswBackend
+        return HnswBackend(root)
+    raise ValueError(f"Unknown vector backend: {name}")
@@ -0,0 +1,163 @@
+"""
+Vector backend interface for RAG Knowledge Base.
+Every backend stores the chunks (text, metadata, embedding) of several knowledge bases.
+"""
+
+from typing import Dict, Iterable, List
+import json
+import sqlite3
+import threading
+
+import numpy as np
+
+
+class VectorBackend:
+    """Interface implemented by vector storage backends."""
+
+    # Backend identifier, as selected per knowledge base
+    name = ""
+
+    def __init__(self, root: str):
+        """
+        Initialize the backend.
+
+        Args:
+            root: Base directory for vector databases
+        """
+        self.root = root
+
+    def create_knowledge_base(self, kb_id: str, name: str, description: str, **options) -> None:
+        """Create an empty knowledge base."""
+        raise NotImplementedError
+
+    def add_documents(self, kb_id: str, documents: List[Dict], embeddings: np.ndarray) -> None:
+        """Add or replace documents ('id', 'text', 'metadata') with their (n, dim) float32 embeddings."""
+        raise NotImplementedError
+
+    def delete_file_documents(self, kb_id: str, file_path: str) -> None:
+        """Delete every chunk whose metadata 'file_path' matches."""
+        raise NotImplementedError
+
+    def search(self, kb_id: str, query_embedding: np.ndarray, top_k: int = 5) -> List[Dict]:
+        """Return the top_k chunks as dicts with 'id', 'text', 'metadata' and 'distance' (squared L2)."""
+        raise NotImplementedError
+
+    def delete_knowledge_base(self, kb_id: str) -> None:
+        """Delete a knowledge base and its files."""
+        raise NotImplementedError
+
+    def get_stats(self, kb_id: str) -> Dict:
+        """Return a dict with 'chunk_count' and 'document_count'."""
+        raise NotImplementedError
+
+    def knowledge_base_exists(self, kb_id: str) -> bool:
+        """Whether this backend holds the knowledge base."""
+        raise NotImplementedError
+
+    def get_storage_mode(self, kb_id: str) -> str:
+        """Vector encoding of the knowledge base ('float32' unless quantized)."""
+        return "float32"
+
+    def persist(self, kb_id: str) -> None:
+        """Flush buffered index state to disk (no-op for write-through backends)."""
+
+    def close(self) -> None:
+        """Release open files and connections."""
+
+
+class ChunkTable:
+    """
+    SQLite table of the chunks of one knowledge base, keyed by row number.
+    Local backends keep vectors in their own files, where row i is the i-th vector.
+    """
+
+    def __init__(self, db_path: str):
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, file_path TEXT, text TEXT, metadata TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_file ON chunks(file_path)")
+        self._conn.commit()
+
+    def _select_rows(self, column: str, values: List[str]) -> List[int]:
+        rows = []
+        # Stay below SQLite's default host parameter limit
+        for start in range(0, len(values), 500):
+            batch = values[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows.extend(r for (r,) in self._conn.execute(
+                f"SELECT row FROM chunks WHERE {column} IN ({placeholders})", batch
+            ))
+        return rows
+
+    def rows_for_ids(self, ids: List[str]) -> List[int]:
+        with self._lock:
+            return self._select_rows("id", ids)
+
+    def rows_for_file(self, file_path: str) -> List[int]:
+        with self._lock:
+            return self._select_rows("file_path", [file_path])
+
+    def insert(self, first_row: int, documents: List[Dict]) -> None:
+        """Insert documents at rows first_row, first_row + 1, ..."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (row, id, file_path, text, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (first_row + i, doc["id"], doc["metadata"].get("file_path"), doc["text"], json.dumps(doc["metadata"]))
+                    for i, doc in enumerate(documents)
+                ]
+            )
+            self._conn.commit()
+
+    def delete_rows(self, rows: Iterable[int]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunks WHERE row = ?", [(int(r),) for r in rows])
+            self._conn.commit()
+
+    def delete_from(self, row: int) -> None:
+        """Drop rows >= row (vectors lost in a torn write)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks WHERE row >= ?", (row,))
+            self._conn.commit()
+
+    def live_rows(self) -> np.ndarray:
+        with self._lock:
+            return np.array([r for (r,) in self._conn.execute("SELECT row FROM chunks")], dtype=np.int64)
+
+    def renumber(self, old_rows: np.ndarray) -> None:
+        """Give old_rows[i] the row number i (old_rows sorted ascending, so numbers never collide)."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE chunks SET row = ? WHERE row = ?",
+                [(new_row, int(old_row)) for new_row, old_row in enumerate(old_rows)]
+            )
+            self._conn.commit()
+
+    def fetch(self, rows: List[int]) -> Dict[int, Dict]:
+        """Return {row: {'id', 'text', 'metadata'}} for the live rows among rows."""
+        if not rows:
+            return {}
+        with self._lock:
+            placeholders = ",".join("?" * len(rows))
+            cursor = self._conn.execute(
+                f"SELECT row, id, text, metadata FROM chunks WHERE row IN ({placeholders})", [int(r) for r in rows]
+            )
+            return {
+                row: {"id": doc_id, "text": text, "metadata": json.loads(metadata)}
+                for row, doc_id, text, metadata in cursor.fetchall()
+            }
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def count_files(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(DISTINCT file_path) FROM chunks").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,200 @@
+"""
+ChromaDB vector backend for RAG Knowledge Base.
+Default backend; the chromadb client is only created on first use.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List
+import logging
+import os
+import threading
+
+import numpy as np
+
+from core.services.vector_backends.base import VectorBackend
+
+logger = logging.getLogger(__name__)
+
+# Collection handles kept open (least recently used ones are dropped first)
+MAX_OPEN_COLLECTIONS = 32
+
+
+class ChromaBackend(VectorBackend):
+    """One ChromaDB collection per knowledge base (kb_<id>) in a persistent client."""
+
+    name = "chroma"
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        self._client = None
+        self._lock = threading.Lock()
+        self._collections: "OrderedDict[str, Any]" = OrderedDict()
+        self._collections_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """Persistent ChromaDB client, created on first access."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    # Lazy import chromadb only when needed
+                    import chromadb
+                    from chromadb.config import Settings
+
+                    # Use PersistentClient to ensure data is saved to disk
+                    self._client = chromadb.PersistentClient(
+                        path=self.root,
+                        settings=Settings(anonymized_telemetry=False)
+                    )
+                    logger.info(f"ChromaDB client opened on {self.root}")
+        return self._client
+
+    def _collection(self, kb_id: str):
+        """Open collection handle of a KB, fetched from the client only on a cache miss."""
+        with self._collections_lock:
+            collection = self._collections.get(kb_id)
+            if collection is not None:
+                self._collections.move_to_end(kb_id)
+                return collection
+
+        collection = self.client.get_collection(name=f"kb_{kb_id}")
+        self._remember(kb_id, collection)
+        return collection
+
+    def _remember(self, kb_id: str, collection) -> None:
+        with self._collections_lock:
+            self._collections[kb_id] = collection
+            self._collections.move_to_end(kb_id)
+            while len(self._collections) > MAX_OPEN_COLLECTIONS:
+                self._collections.popitem(last=False)
+
+    def invalidate(self, kb_id: str) -> None:
+        """Forget the cached collection handle of a KB."""
+        with self._collections_lock:
+            self._collections.pop(kb_id, None)
+
+    def create_knowledge_base(self, kb_id: str, name: str, description: str, **options) -> None:
+        # Create collection with metadata
+        collection = self.client.create_collection(
+            name=f"kb_{kb_id}",
+            metadata={
+                "name": name,
+                "description": description,
+                "kb_id": kb_id
+            }
+        )
+        self._remember(kb_id, collection)
+
+    def add_documents(self, kb_id: str, documents: List[Dict], embeddings: np.ndarray) -> None:
+        collection = self._collection(kb_id)
+
+        # Upsert into collection (Chroma accepts the ndarray directly)
+        collection.upsert(
+            ids=[doc["id"] for doc in documents],
+            embeddings=embeddings,
+            documents=[doc["text"] for doc in documents],
+            metadatas=[doc["metadata"] for doc in documents]
+        )
+
+    def delete_file_documents(self, kb_id: str, file_path: str) -> None:
+        collection = self._collection(kb_id)
+        collection.delete(where={"file_path": file_path})
+
+    def search(self, kb_id: str, query_embedding: np.ndarray, top_k: int = 5) -> List[Dict]:
+        collection = self._collection(kb_id)
+
+        # Query the collection
+        results = collection.query(
+            query_embeddings=query_embedding.reshape(1, -1),
+            n_results=top_k,
+            include=["documents", "metadatas", "distances"]
+        )
+
+        # Format results
+        formatted_results = []
+        if results and results['ids'] and len(results['ids']) > 0:
+            for i in range(len(results['ids'][0])):
+                formatted_results.append({
+                    "id": results['ids'][0][i],
+                    "text": results['documents'][0][i],
+                    "metadata": results['metadatas'][0][i],
+                    "distance": results['distances'][0][i]
+                })
+        return formatted_results
+
+    def delete_knowledge_base(self, kb_id: str) -> None:
+        self.invalidate(kb_id)
+        self.client.delete_collection(name=f"kb_{kb_id}")
+
+    def get_stats(self, kb_id: str) -> Dict:
+        collection = self._collection(kb_id)
+        count = collection.count()
+        return {
+            "chunk_count": count,
+            "document_count": count  # Will be updated by ingestion service
+        }
+
+    def knowledge_base_exists(self, kb_id: str) -> bool:
+        try:
+            self._collection(kb_id)
+            return True
+        except Exception:
+            return False
+
+    def cleanup_orphan_files(self) -> Dict[str, Any]:
+        """
+        Identify and remove orphan directories in vector_databases.
+        Orphans are directories that do not correspond to any active collection segment.
+
+        Returns:
+            Dict with 'deleted' (list of folder names) and 'failed' (list of folder names)
+        """
+        import shutil
+        import sqlite3
+        import gc
+
+        results = {
+            "deleted": [],
+            "failed": []
+        }
+
+        db_path = os.path.join(self.root, "chroma.sqlite3")
+        if not os.path.exists(db_path):
+            return results
+
+        try:
+            # Force GC to help release locks if possible
+            gc.collect()
+
+            # Connect to Chroma's SQLite DB to find active segments
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+
+            # Get all segment IDs (these correspond to folder names)
+            cursor.execute("SELECT id FROM segments")
+            active_segments = {row[0] for row in cursor.fetchall()}
+            conn.close()
+
+            # List all directories to delete
+            for item in os.listdir(self.root):
+                item_path = os.path.join(self.root, item)
+
+                # Check if it's a directory and looks like a UUID (length 36)
+                if os.path.isdir(item_path) and len(item) == 36:
+                    if item not in active_segments:
+                        try:
+                            shutil.rmtree(item_path)
+                            logger.info(f"Deleted orphan directory: {item}")
+                            results["deleted"].append(item)
+                        except Exception as e:
+                            logger.warning(f"Failed to delete orphan directory {item}: {e}")
+                            results["failed"].append(item)
+
+        except Exception as e:
+            logger.error(f"Error during orphan cleanup: {e}")
+
+        return results
+
+    def close(self) -> None:
+        with self._collections_lock:
+            self._collections.clear()
@@ -0,0 +1,380 @@
+"""
+HNSW graph vector backend for RAG Knowledge Base.
+Approximate nearest-neighbour search with hnswlib (installed with chromadb as chroma-hnswlib),
+without the ChromaDB client. Suited to very large knowledge bases.
+"""
+
+from typing import Dict, List
+import json
+import logging
+import os
+import shutil
+import threading
+
+import numpy as np
+
+from core.services.vector_backends.base import VectorBackend, ChunkTable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_M = 16
+DEFAULT_EF_CONSTRUCTION = 200
+DEFAULT_EF_SEARCH = 64
+
+# Initial index capacity, doubled when full
+INITIAL_CAPACITY = 1024
+
+# Rebuild the graph once this fraction of its elements has been deleted
+REBUILD_DELETED_RATIO = 0.25
+
+
+class HnswVectorStore:
+    """
+    HNSW index of one knowledge base.
+
+    Layout of the store directory:
+    - meta.json: dimension and graph parameters
+    - vectors.f32: append-only float32 vectors (row = HNSW label), used to replay
+      additions missing from the last saved index and to rebuild the graph
+    - index.bin: saved hnswlib graph (written by persist())
+    - chunks.sqlite3: id, text and metadata of each live row
+    """
+
+    def __init__(self, path: str):
+        """
+        Open an existing store.
+
+        Args:
+            path: Store directory
+        """
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("Le backend HNSW nécessite hnswlib (installé avec chromadb)") from e
+        self._hnswlib = hnswlib
+
+        self.path = path
+        with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.dimension = self.meta["dimension"]
+
+        self._lock = threading.RLock()
+        self.chunks = ChunkTable(os.path.join(path, "chunks.sqlite3"))
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def create(
+        cls,
+        path: str,
+        dimension: int,
+        M: int = DEFAULT_M,
+        ef_construction: int = DEFAULT_EF_CONSTRUCTION,
+        ef_search: int = DEFAULT_EF_SEARCH
+    ) -> "HnswVectorStore":
+        """
+        Create an empty store.
+
+        Args:
+            path: Store directory
+            dimension: Embedding dimension
+            M: Graph degree
+            ef_construction: Candidate list size while building
+            ef_search: Candidate list size while searching
+
+        Returns:
+            The opened store
+        """
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump({"dimension": dimension, "M": M, "ef_construction": ef_construction, "ef_search": ef_search}, f)
+        return cls(path)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _new_index(self, capacity: int):
+        index = self._hnswlib.Index(space="l2", dim=self.dimension)
+        index.init_index(
+            max_elements=max(capacity, INITIAL_CAPACITY),
+            ef_construction=self.meta["ef_construction"],
+            M=self.meta["M"]
+        )
+        return index
+
+    def _load(self) -> None:
+        """Load the saved graph and replay what happened after it was saved."""
+        vectors_path = self._file("vectors.f32")
+        self._rows = os.path.getsize(vectors_path) // (self.dimension * 4) if os.path.exists(vectors_path) else 0
+        # Drop a torn trailing write, so the next append starts at label self._rows
+        self._truncate_vectors(self._rows)
+        self.chunks.delete_from(self._rows)
+
+        self._alive = np.zeros(self._rows, dtype=bool)
+        live_rows = self.chunks.live_rows()
+        if len(live_rows):
+            self._alive[live_rows] = True
+
+        index_path = self._file("index.bin")
+        self._index = None
+        if os.path.exists(index_path):
+            try:
+                self._index = self._hnswlib.Index(space="l2", dim=self.dimension)
+                self._index.load_index(index_path, max_elements=max(self._rows, INITIAL_CAPACITY))
+            except Exception as e:
+                logger.warning(f"HNSW index {index_path} unreadable, rebuilding: {e}")
+                self._index = None
+        if self._index is None or self._index.get_current_count() > self._rows:
+            self._index = self._new_index(self._rows)
+        self._deleted_labels = set()
+
+        # Vectors appended after the last save
+        indexed = self._index.get_current_count()
+        if indexed < self._rows:
+            vectors = self._read_vectors(np.arange(indexed, self._rows))
+            self._index.add_items(vectors, np.arange(indexed, self._rows))
+            self._dirty = True
+
+        # Rows deleted after the last save
+        for label in np.flatnonzero(~self._alive):
+            self._mark_deleted(int(label))
+
+    def _truncate_vectors(self, rows: int) -> None:
+        vectors_path = self._file("vectors.f32")
+        if os.path.exists(vectors_path) and os.path.getsize(vectors_path) > rows * self.dimension * 4:
+            os.truncate(vectors_path, rows * self.dimension * 4)
+
+    def _read_vectors(self, rows: np.ndarray) -> np.ndarray:
+        if self._rows == 0 or len(rows) == 0:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(self._rows, self.dimension))
+        try:
+            return np.array(vectors[rows])
+        finally:
+            del vectors
+
+    def _mark_deleted(self, label: int) -> None:
+        if label in self._deleted_labels:
+            return
+        try:
+            self._index.mark_deleted(label)
+        except RuntimeError:
+            # Already deleted in the saved graph
+            pass
+        self._deleted_labels.add(label)
+        self._dirty = True
+
+    # --- Write ---
+
+    def upsert(self, documents: List[Dict], embeddings: np.ndarray) -> None:
+        """
+        Add or replace documents.
+
+        Args:
+            documents: List of document dicts with 'id', 'text', and 'metadata'
+            embeddings: (n, dim) float32 matrix aligned with documents
+        """
+        if not documents:
+            return
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(documents), self.dimension)
+
+        with self._lock:
+            self._delete_rows(self.chunks.rows_for_ids([doc["id"] for doc in documents]))
+
+            start = self._rows
+            try:
+                with open(self._file("vectors.f32"), "ab") as f:
+                    f.write(vectors.tobytes())
+                self.chunks.insert(start, documents)
+            except Exception:
+                # Undo a partial append so the rows stay aligned with the labels
+                self._truncate_vectors(start)
+                self.chunks.delete_from(start)
+                raise
+            self._rows = start + len(documents)
+            self._alive = np.concatenate([self._alive, np.ones(len(documents), dtype=bool)])
+
+            capacity = self._index.get_max_elements()
+            if self._rows > capacity:
+                self._index.resize_index(max(self._rows, capacity * 2))
+            self._index.add_items(vectors, np.arange(start, self._rows))
+            self._dirty = True
+
+    def delete_by_file(self, file_path: str) -> int:
+        """Delete every chunk of a source file; returns the number of deleted chunks."""
+        with self._lock:
+            rows = self.chunks.rows_for_file(file_path)
+            self._delete_rows(rows)
+            if self._rows and len(self._deleted_labels) / self._rows >= REBUILD_DELETED_RATIO:
+                self.rebuild()
+            return len(rows)
+
+    def _delete_rows(self, rows: List[int]) -> None:
+        if not rows:
+            return
+        self.chunks.delete_rows(rows)
+        for row in rows:
+            self._alive[row] = False
+            self._mark_deleted(int(row))
+
+    def rebuild(self) -> None:
+        """Rewrite the vectors without deleted rows and rebuild the graph."""
+        with self._lock:
+            keep = np.flatnonzero(self._alive)
+            vectors = self._read_vectors(keep)
+            tmp_path = self._file("vectors.f32.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(vectors.tobytes())
+            os.replace(tmp_path, self._file("vectors.f32"))
+            self.chunks.renumber(keep)
+
+            self._rows = len(keep)
+            self._alive = np.ones(self._rows, dtype=bool)
+            self._deleted_labels = set()
+            self._index = self._new_index(self._rows)
+            if self._rows:
+                self._index.add_items(vectors, np.arange(self._rows))
+            self._dirty = True
+            logger.info(f"Rebuilt HNSW index {self.path}: {len(keep)} rows")
+            self.persist()
+
+    def persist(self) -> None:
+        """Save the graph if it changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self._file("index.bin.tmp")
+            self._index.save_index(tmp_path)
+            os.replace(tmp_path, self._file("index.bin"))
+            self._dirty = False
+
+    # --- Read ---
+
+    def search(self, query: np.ndarray, top_k: int = 5) -> List[Dict]:
+        """
+        Approximate search in the graph.
+
+        Args:
+            query: (dim,) float32 query vector
+            top_k: Number of results to return
+
+        Returns:
+            List of dicts with 'id', 'text', 'metadata', and 'distance'
+        """
+        query = np.ascontiguousarray(query, dtype=np.float32).reshape(1, -1)
+        with self._lock:
+            alive_count = int(self._alive.sum())
+            k = min(top_k, alive_count)
+            if k <= 0:
+                return []
+            self._index.set_ef(max(self.meta["ef_search"], k))
+            try:
+                labels, distances = self._index.knn_query(query, k=k)
+                labels, distances = labels[0], distances[0]
+            except RuntimeError:
+                # Too few reachable live elements (heavy deletions): exact scan instead
+                rows = np.flatnonzero(self._alive)
+                diff = self._read_vectors(rows) - query
+                all_distances = np.einsum("ij,ij->i", diff, diff)
+                order = np.argsort(all_distances)[:k]
+                labels, distances = rows[order], all_distances[order]
+            records = self.chunks.fetch([int(label) for label in labels])
+
+        return [
+            dict(records[int(label)], distance=float(distance))
+            for label, distance in zip(labels, distances)
+            if int(label) in records
+        ]
+
+    def count(self) -> int:
+        """Number of stored chunks."""
+        with self._lock:
+            return int(self._alive.sum())
+
+    # --- Lifecycle ---
+
+    def close(self) -> None:
+        """Save the graph and release the SQLite connection."""
+        with self._lock:
+            self.persist()
+            self.chunks.close()
+
+    def drop(self) -> None:
+        """Delete the store files without saving."""
+        with self._lock:
+            self._dirty = False
+            self.chunks.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class HnswBackend(VectorBackend):
+    """HNSW graph index per knowledge base, saved on persist() and on close."""
+
+    name = "hnsw"
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        self.base_dir = os.path.join(root, self.name)
+        self._stores: Dict[str, HnswVectorStore] = {}
+        self._lock = threading.Lock()
+
+    def _store_path(self, kb_id: str) -> str:
+        return os.path.join(self.base_dir, f"kb_{kb_id}")
+
+    def _store(self, kb_id: str) -> HnswVectorStore:
+        with self._lock:
+            store = self._stores.get(kb_id)
+            if store is None:
+                if not self.knowledge_base_exists(kb_id):
+                    raise ValueError(f"Collection kb_{kb_id} does not exist.")
+                store = HnswVectorStore(self._store_path(kb_id))
+                self._stores[kb_id] = store
+            return store
+
+    def create_knowledge_base(self, kb_id: str, name: str, description: str, **options) -> None:
+        from core.services.embedding_service import EMBEDDING_DIMENSION
+        store = HnswVectorStore.create(
+            self._store_path(kb_id),
+            options.get("dimension", EMBEDDING_DIMENSION),
+            M=options.get("M", DEFAULT_M),
+            ef_construction=options.get("ef_construction", DEFAULT_EF_CONSTRUCTION),
+            ef_search=options.get("ef_search", DEFAULT_EF_SEARCH)
+        )
+        with self._lock:
+            self._stores[kb_id] = store
+
+    def add_documents(self, kb_id: str, documents: List[Dict], embeddings: np.ndarray) -> None:
+        self._store(kb_id).upsert(documents, embeddings)
+
+    def delete_file_documents(self, kb_id: str, file_path: str) -> None:
+        self._store(kb_id).delete_by_file(file_path)
+
+    def search(self, kb_id: str, query_embedding: np.ndarray, top_k: int = 5) -> List[Dict]:
+        return self._store(kb_id).search(query_embedding, top_k)
+
+    def delete_knowledge_base(self, kb_id: str) -> None:
+        with self._lock:
+            store = self._stores.pop(kb_id, None)
+        if store is not None:
+            store.drop()
+        else:
+            shutil.rmtree(self._store_path(kb_id), ignore_errors=True)
+
+    def get_stats(self, kb_id: str) -> Dict:
+        store = self._store(kb_id)
+        return {"chunk_count": store.count(), "document_count": store.chunks.count_files()}
+
+    def knowledge_base_exists(self, kb_id: str) -> bool:
+        return os.path.exists(os.path.join(self._store_path(kb_id), "meta.json"))
+
+    def persist(self, kb_id: str) -> None:
+        with self._lock:
+            store = self._stores.get(kb_id)
+        if store is not None:
+            store.persist()
+
+    def close(self) -> None:
+        with self._lock:
+            for store in self._stores.values():
+                store.close()
+            self._stores.clear()
@@ -0,0 +1,388 @@
+"""
+NumPy memory-mapped vector backend for RAG Knowledge Base.
+Exact brute-force search over float32 vectors, or scalar-quantized int8 / float16 codes
+with a float32 re-rank of the best candidates.
+"""
+
+from typing import Dict, List, Optional
+import json
+import logging
+import os
+import shutil
+import threading
+
+import numpy as np
+
+from core.services.vector_backends.base import VectorBackend, ChunkTable
+
+logger = logging.getLogger(__name__)
+
+STORAGE_FLOAT32 = "float32"
+STORAGE_INT8 = "int8"
+STORAGE_FLOAT16 = "float16"
+STORAGE_MODES = (STORAGE_FLOAT32, STORAGE_INT8, STORAGE_FLOAT16)
+QUANTIZED_MODES = (STORAGE_INT8, STORAGE_FLOAT16)
+
+# Candidates re-ranked with float32 vectors = top_k * RERANK_FACTOR (quantized modes)
+RERANK_FACTOR = 4
+
+# Rows scored at once when scanning the codes (bounds temporary memory)
+SCAN_BLOCK_ROWS = 65536
+
+# Compact the files once this fraction of rows has been deleted
+COMPACT_DELETED_RATIO = 0.25
+
+
+def quantize(vectors: np.ndarray, mode: str):
+    """
+    Encode float32 vectors for storage.
+
+    Args:
+        vectors: (n, dim) float32 matrix
+        mode: 'float32', 'int8' (symmetric per-vector scale) or 'float16'
+
+    Returns:
+        Tuple (codes, scales) where vectors ~= codes * scales[:, None]
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if mode == STORAGE_FLOAT32:
+        return vectors, np.ones(len(vectors), dtype=np.float32)
+    if mode == STORAGE_FLOAT16:
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    if mode != STORAGE_INT8:
+        raise ValueError(f"Unknown storage mode: {mode}")
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class MemmapVectorStore:
+    """
+    Vector storage of one knowledge base in memory-mapped files.
+
+    Layout of the store directory:
+    - meta.json: storage mode and dimension
+    - codes.bin: float32, int8 or float16 codes, scanned for every query
+    - scales.f32 / norms.f32: per-row dequantization scale and squared norm
+    - vectors.f32: float32 originals read only for re-ranking (quantized modes)
+    - chunks.sqlite3: id, text and metadata of each live row
+
+    Distances are squared L2, like ChromaDB's default space.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open an existing store.
+
+        Args:
+            path: Store directory
+        """
+        self.path = path
+        with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.mode = meta["mode"]
+        self.dimension = meta["dimension"]
+        self.code_dtype = {STORAGE_FLOAT32: np.float32, STORAGE_INT8: np.int8, STORAGE_FLOAT16: np.float16}[self.mode]
+        self.quantized = self.mode in QUANTIZED_MODES
+
+        self._lock = threading.RLock()
+        self.chunks = ChunkTable(os.path.join(path, "chunks.sqlite3"))
+        self._load()
+
+    @classmethod
+    def create(cls, path: str, mode: str, dimension: int) -> "MemmapVectorStore":
+        """
+        Create an empty store.
+
+        Args:
+            path: Store directory
+            mode: 'float32', 'int8' or 'float16'
+            dimension: Embedding dimension
+
+        Returns:
+            The opened store
+        """
+        if mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode: {mode}")
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump({"mode": mode, "dimension": dimension}, f)
+        return cls(path)
+
+    # --- Files ---
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _row_files(self):
+        files = [("codes.bin", self.dimension * np.dtype(self.code_dtype).itemsize), ("scales.f32", 4), ("norms.f32", 4)]
+        if self.quantized:
+            files.append(("vectors.f32", self.dimension * 4))
+        return files
+
+    def _load(self) -> None:
+        """Map the row files and rebuild the live-row mask from SQLite."""
+        rows = None
+        # Drop a torn trailing write, or rows missing from some of the files
+        for name, row_bytes in self._row_files():
+            file_path = self._file(name)
+            file_rows = os.path.getsize(file_path) // row_bytes if os.path.exists(file_path) else 0
+            rows = file_rows if rows is None else min(rows, file_rows)
+        self._truncate_row_files(rows)
+        self._rows = rows
+        self.chunks.delete_from(rows)
+
+        self._codes = self._map("codes.bin", self.code_dtype, (rows, self.dimension))
+        self._scales = np.array(self._map("scales.f32", np.float32, (rows,)) if rows else np.zeros(0, np.float32))
+        self._norms = np.array(self._map("norms.f32", np.float32, (rows,)) if rows else np.zeros(0, np.float32))
+        self._vectors = self._map("vectors.f32", np.float32, (rows, self.dimension)) if self.quantized else None
+
+        self._alive = np.zeros(rows, dtype=bool)
+        live_rows = self.chunks.live_rows()
+        if len(live_rows):
+            self._alive[live_rows] = True
+
+    def _truncate_row_files(self, rows: int) -> None:
+        # Every file must end on row `rows`, so the next append writes the same row in all of them
+        for name, row_bytes in self._row_files():
+            file_path = self._file(name)
+            if os.path.exists(file_path) and os.path.getsize(file_path) > rows * row_bytes:
+                os.truncate(file_path, rows * row_bytes)
+
+    def _map(self, name: str, dtype, shape) -> Optional[np.memmap]:
+        if shape[0] == 0:
+            return None
+        return np.memmap(self._file(name), dtype=dtype, mode="r", shape=shape)
+
+    def _release_maps(self) -> None:
+        # Mappings must be closed before files grow or are replaced (Windows)
+        self._codes = None
+        self._vectors = None
+
+    def _remap(self) -> None:
+        self._codes = self._map("codes.bin", self.code_dtype, (self._rows, self.dimension))
+        if self.quantized:
+            self._vectors = self._map("vectors.f32", np.float32, (self._rows, self.dimension))
+
+    # --- Write ---
+
+    def upsert(self, documents: List[Dict], embeddings: np.ndarray) -> None:
+        """
+        Add or replace documents.
+
+        Args:
+            documents: List of document dicts with 'id', 'text', and 'metadata'
+            embeddings: (n, dim) float32 matrix aligned with documents
+        """
+        if not documents:
+            return
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(documents), self.dimension)
+        codes, scales = quantize(vectors, self.mode)
+        norms = np.einsum("ij,ij->i", vectors, vectors).astype(np.float32)
+
+        arrays = {"codes.bin": codes, "scales.f32": scales, "norms.f32": norms}
+        if self.quantized:
+            arrays["vectors.f32"] = vectors
+
+        with self._lock:
+            self._delete_rows(self.chunks.rows_for_ids([doc["id"] for doc in documents]))
+
+            start = self._rows
+            self._release_maps()
+            try:
+                for name, array in arrays.items():
+                    with open(self._file(name), "ab") as f:
+                        f.write(np.ascontiguousarray(array).tobytes())
+                self.chunks.insert(start, documents)
+            except Exception:
+                # Undo the partial appends so the files stay aligned on self._rows
+                self._truncate_row_files(start)
+                self.chunks.delete_from(start)
+                self._remap()
+                raise
+
+            self._rows = start + len(documents)
+            self._scales = np.concatenate([self._scales, scales])
+            self._norms = np.concatenate([self._norms, norms])
+            self._alive = np.concatenate([self._alive, np.ones(len(documents), dtype=bool)])
+            self._remap()
+
+    def delete_by_file(self, file_path: str) -> int:
+        """Delete every chunk of a source file; returns the number of deleted chunks."""
+        with self._lock:
+            rows = self.chunks.rows_for_file(file_path)
+            self._delete_rows(rows)
+            self._maybe_compact()
+            return len(rows)
+
+    def _delete_rows(self, rows: List[int]) -> None:
+        if not rows:
+            return
+        self.chunks.delete_rows(rows)
+        self._alive[np.array(rows, dtype=np.int64)] = False
+
+    def _maybe_compact(self) -> None:
+        dead = self._rows - int(self._alive.sum())
+        if self._rows and dead / self._rows >= COMPACT_DELETED_RATIO:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the row files without deleted rows."""
+        with self._lock:
+            keep = np.flatnonzero(self._alive)
+            empty = np.zeros((0, self.dimension), dtype=self.code_dtype)
+            arrays = {
+                "codes.bin": np.array(self._codes[keep]) if len(keep) else empty,
+                "scales.f32": self._scales[keep],
+                "norms.f32": self._norms[keep]
+            }
+            if self.quantized:
+                arrays["vectors.f32"] = np.array(self._vectors[keep]) if len(keep) else empty.astype(np.float32)
+            self._release_maps()
+            for name, array in arrays.items():
+                tmp_path = self._file(name + ".tmp")
+                with open(tmp_path, "wb") as f:
+                    f.write(np.ascontiguousarray(array).tobytes())
+                os.replace(tmp_path, self._file(name))
+
+            self.chunks.renumber(keep)
+            logger.info(f"Compacted vector store {self.path}: {self._rows} -> {len(keep)} rows")
+            self._load()
+
+    # --- Read ---
+
+    def search(self, query: np.ndarray, top_k: int = 5, rerank_factor: int = RERANK_FACTOR) -> List[Dict]:
+        """
+        Brute-force search over the codes; quantized candidates are re-ranked with float32 vectors.
+
+        Args:
+            query: (dim,) float32 query vector
+            top_k: Number of results to return
+            rerank_factor: Candidates kept for re-ranking = top_k * rerank_factor
+
+        Returns:
+            List of dicts with 'id', 'text', 'metadata', and 'distance'
+        """
+        query = np.ascontiguousarray(query, dtype=np.float32).reshape(-1)
+        with self._lock:
+            alive_count = int(self._alive.sum())
+            if alive_count == 0 or top_k <= 0:
+                return []
+
+            # Squared L2 = ||x||^2 - 2 * scale * (codes . q) + ||q||^2
+            scores = np.empty(self._rows, dtype=np.float32)
+            for start in range(0, self._rows, SCAN_BLOCK_ROWS):
+                block = np.asarray(self._codes[start:start + SCAN_BLOCK_ROWS], dtype=np.float32)
+                scores[start:start + len(block)] = block @ query
+            scores *= -2.0 * self._scales
+            scores += self._norms + float(query @ query)
+            scores[~self._alive] = np.inf
+
+            if self.quantized:
+                n_candidates = min(alive_count, max(top_k, top_k * rerank_factor))
+                candidates = np.argpartition(scores, n_candidates - 1)[:n_candidates]
+                candidates.sort()  # Sequential reads of the float32 file
+                exact = np.asarray(self._vectors[candidates], dtype=np.float32) - query
+                distances = np.einsum("ij,ij->i", exact, exact)
+            else:
+                n_candidates = min(alive_count, top_k)
+                candidates = np.argpartition(scores, n_candidates - 1)[:n_candidates]
+                distances = np.maximum(scores[candidates], 0.0)
+
+            order = np.argsort(distances)[:top_k]
+            best_rows = [int(candidates[i]) for i in order]
+            best_distances = [float(distances[i]) for i in order]
+            records = self.chunks.fetch(best_rows)
+
+        return [
+            dict(records[row], distance=distance)
+            for row, distance in zip(best_rows, best_distances)
+            if row in records
+        ]
+
+    def count(self) -> int:
+        """Number of stored chunks."""
+        with self._lock:
+            return int(self._alive.sum())
+
+    # --- Lifecycle ---
+
+    def close(self) -> None:
+        """Release the SQLite connection and memory maps."""
+        with self._lock:
+            self._release_maps()
+            self.chunks.close()
+
+    def drop(self) -> None:
+        """Close the store and delete its files."""
+        self.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class NumpyBackend(VectorBackend):
+    """Exact (or quantized + re-ranked) brute-force search over memory-mapped vectors."""
+
+    name = "numpy"
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        self.base_dir = os.path.join(root, self.name)
+        self._stores: Dict[str, MemmapVectorStore] = {}
+        self._lock = threading.Lock()
+
+    def _store_path(self, kb_id: str) -> str:
+        return os.path.join(self.base_dir, f"kb_{kb_id}")
+
+    def _store(self, kb_id: str) -> MemmapVectorStore:
+        with self._lock:
+            store = self._stores.get(kb_id)
+            if store is None:
+                if not self.knowledge_base_exists(kb_id):
+                    raise ValueError(f"Collection kb_{kb_id} does not exist.")
+                store = MemmapVectorStore(self._store_path(kb_id))
+                self._stores[kb_id] = store
+            return store
+
+    def create_knowledge_base(self, kb_id: str, name: str, description: str, **options) -> None:
+        from core.services.embedding_service import EMBEDDING_DIMENSION
+        store = MemmapVectorStore.create(
+            self._store_path(kb_id),
+            options.get("storage", STORAGE_FLOAT32),
+            options.get("dimension", EMBEDDING_DIMENSION)
+        )
+        with self._lock:
+            self._stores[kb_id] = store
+
+    def add_documents(self, kb_id: str, documents: List[Dict], embeddings: np.ndarray) -> None:
+        self._store(kb_id).upsert(documents, embeddings)
+
+    def delete_file_documents(self, kb_id: str, file_path: str) -> None:
+        self._store(kb_id).delete_by_file(file_path)
+
+    def search(self, kb_id: str, query_embedding: np.ndarray, top_k: int = 5) -> List[Dict]:
+        return self._store(kb_id).search(query_embedding, top_k)
+
+    def delete_knowledge_base(self, kb_id: str) -> None:
+        with self._lock:
+            store = self._stores.pop(kb_id, None)
+        if store is not None:
+            store.drop()
+        else:
+            shutil.rmtree(self._store_path(kb_id), ignore_errors=True)
+
+    def get_stats(self, kb_id: str) -> Dict:
+        store = self._store(kb_id)
+        return {"chunk_count": store.count(), "document_count": store.chunks.count_files()}
+
+    def knowledge_base_exists(self, kb_id: str) -> bool:
+        return os.path.exists(os.path.join(self._store_path(kb_id), "meta.json"))
+
+    def get_storage_mode(self, kb_id: str) -> str:
+        return self._store(kb_id).mode
+
+    def close(self) -> None:
+        with self._lock:
+            for store in self._stores.values():
+                store.close()
+            self._stores.clear()
@@ -1,151 +1,429 @@
 """
 Vector Store Service for RAG Knowledge Base.
-Manages ChromaDB collections for document storage and retrieval.
+Routes each knowledge base to its vector backend (ChromaDB, NumPy memmap or HNSW)
+for document storage and retrieval.
 """
 
-from typing import List, Dict, Optional, Any
-import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Sequence, Union
 import os
 import logging
+import threading
+
+import numpy as np
+
 from utils.resource_handler import get_writable_path
+from core.services.vector_backends import (
+    VectorBackend, create_backend, BACKEND_CHROMA, BACKEND_NUMPY, LOCAL_BACKENDS
+)
+from core.services.response_cache import invalidate_knowledge_base
+from core.services.lexical_index import LexicalIndex, LEXICAL_INDEX_FILE
 
 logger = logging.getLogger(__name__)
 
+STORAGE_FLOAT32 = "float32"
+QUANTIZED_MODES = ("int8", "float16")
+
+# Result fusion for searches spanning several knowledge bases
+FUSION_RRF = "rrf"
+FUSION_DISTANCE = "distance"
+RRF_K = 60
+MAX_SEARCH_THREADS = 8
+
+# Hybrid search: candidates taken from each ranking (vector, BM25) per requested result
+HYBRID_CANDIDATE_FACTOR = 4
+
+# Embeddings can be passed as a float32 ndarray (preferred, zero-copy) or as legacy lists
+Embeddings = Union[np.ndarray, List[List[float]]]
+Embedding = Union[np.ndarray, Sequence[float]]
+
+
+def as_embedding_matrix(embeddings: Embeddings) -> np.ndarray:
+    """Return embeddings as a C-contiguous float32 (n, dim) matrix, without copying when possible."""
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    return matrix
+
+
+def _text_key(text: str) -> str:
+    """Normalized chunk text used to recognize the same passage indexed in several KBs."""
+    return " ".join(text.split()).lower()
+
+
+def fuse_results(
+    result_lists: List[List[Dict]],
+    top_k: int = 5,
+    method: str = FUSION_RRF,
+    rrf_k: int = RRF_K
+) -> List[Dict]:
+    """
+    Merge ranked result lists into one ranking, de-duplicating identical chunk texts.
+
+    Args:
+        result_lists: Ranked results of each source (dicts with 'text' and 'distance')
+        top_k: Number of results to return
+        method: 'rrf' (reciprocal rank fusion: sum of 1 / (rrf_k + rank)) or
+            'distance' (distances min-max normalized per list, score = 1 - normalized distance)
+        rrf_k: RRF damping constant
+
+    Returns:
+        Best results, each with an added 'score' (higher is better, ties broken by distance);
+        a passage found several times keeps its best entry and accumulates the scores
+    """
+    if method not in (FUSION_RRF, FUSION_DISTANCE):
+        raise ValueError(f"Unknown fusion method: {method}")
+
+    fused: Dict[str, Dict] = {}
+    for results in result_lists:
+        if not results:
+            continue
+        if method == FUSION_DISTANCE:
+            distances = [r.get("distance", 0.0) for r in results]
+            low, spread = min(distances), max(distances) - min(distances)
+        for rank, result in enumerate(results, 1):
+            if method == FUSION_RRF:
+                score = 1.0 / (rrf_k + rank)
+            else:
+                score = 1.0 - (result.get("distance", 0.0) - low) / spread if spread > 0 else 1.0
+
+            key = _text_key(result["text"])
+            entry = fused.get(key)
+            if entry is None:
+                fused[key] = dict(result, score=score)
+            else:
+                total = entry["score"] + score
+                if result.get("distance", 0.0) < entry.get("distance", 0.0):
+                    entry.clear()
+                    entry.update(result)
+                entry["score"] = total
+
+    # Equal scores (e.g. the first hit of each list under RRF) are ordered by raw distance
+    return sorted(fused.values(), key=lambda r: (-r["score"], r.get("distance", 0.0)))[:top_k]
+
+
+def fuse_hybrid(
+    vector_results: List[Dict],
+    lexical_results: List[Dict],
+    top_k: int = 5,
+    rrf_k: int = RRF_K
+) -> List[Dict]:
+    """
+    Fuse the vector and BM25 rankings of one knowledge base with reciprocal rank fusion.
+    Lexical-only hits get the worst candidate distance, as they ranked below every vector candidate.
+
+    Args:
+        vector_results: Vector search results (with 'distance')
+        lexical_results: LexicalIndex results (with 'bm25')
+        top_k: Number of results to return
+        rrf_k: RRF damping constant
+
+    Returns:
+        Best results with 'id', 'text', 'metadata', 'distance' and 'score'
+    """
+    worst = max((r.get("distance", 0.0) for r in vector_results), default=1.0)
+    lexical = [
+        {key: value for key, value in r.items() if key != "bm25"} for r in lexical_results
+    ]
+    for result in lexical:
+        result["distance"] = worst
+    return fuse_results([vector_results, lexical], top_k=top_k, method=FUSION_RRF, rrf_k=rrf_k)
+
 
 class VectorStoreService:
-    """Service for managing vector databases using ChromaDB."""
-    
+    """
+    Service for managing vector databases, one backend per knowledge base.
+    Shared by the whole process: every VectorStoreService() on the same root returns
+    the same thread-safe instance, so clients and collection handles are opened once.
+    """
+
+    _instances: Dict[str, "VectorStoreService"] = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls):
+        """One shared instance per vector database root."""
+        root = get_writable_path("vector_databases")
+        with cls._instances_lock:
+            instance = cls._instances.get(root)
+            if instance is None:
+                instance = super(VectorStoreService, cls).__new__(cls)
+                instance._initialized = False
+                instance.vector_db_root = root
+                cls._instances[root] = instance
+            return instance
+
     def __init__(self):
-        """Initialize the vector store service."""
-        # Lazy import chromadb only when needed
-        import chromadb
-        from chromadb.config import Settings
-        
-        # Base directory for all vector databases
-        self.vector_db_root = get_writable_path("vector_databases")
+        """Initialize the vector store service (only once per shared instance)."""
+        if self._initialized:
+            return
         os.makedirs(self.vector_db_root, exist_ok=True)
-        
-        # ChromaDB client (persistent)
-        # Use PersistentClient to ensure data is saved to disk
-        self.client = chromadb.PersistentClient(
-            path=self.vector_db_root,
-            settings=Settings(anonymized_telemetry=False)
-        )
-        
+
+        # Backends are instantiated on first use (chromadb is only imported if a KB needs it)
+        self._backends: Dict[str, VectorBackend] = {}
+        self._kb_backends: Dict[str, VectorBackend] = {}
+        self._lexical: Optional[LexicalIndex] = None
+        self._lock = threading.RLock()
+        self._initialized = True
+
         logger.info(f"VectorStoreService initialized with root: {self.vector_db_root}")
-    
-    def create_knowledge_base(self, kb_id: str, name: str, description: str) -> None:
+
+    # --- Backend resolution ---
+
+    def _get_backend(self, name: str) -> VectorBackend:
+        with self._lock:
+            backend = self._backends.get(name)
+            if backend is None:
+                backend = create_backend(name, self.vector_db_root)
+                self._backends[name] = backend
+            return backend
+
+    def _backend_for(self, kb_id: str) -> VectorBackend:
+        """Find the backend holding a KB (local backends are recognized from their files)."""
+        with self._lock:
+            backend = self._kb_backends.get(kb_id)
+            if backend is not None:
+                return backend
+            for name in LOCAL_BACKENDS:
+                candidate = self._get_backend(name)
+                if candidate.knowledge_base_exists(kb_id):
+                    backend = candidate
+                    break
+            else:
+                backend = self._get_backend(BACKEND_CHROMA)
+            self._kb_backends[kb_id] = backend
+            return backend
+
+    @property
+    def client(self):
+        """ChromaDB client (kept for callers using collections directly)."""
+        return self._get_backend(BACKEND_CHROMA).client
+
+    def _lexical_index(self) -> LexicalIndex:
+        with self._lock:
+            if self._lexical is None:
+                self._lexical = LexicalIndex(os.path.join(self.vector_db_root, LEXICAL_INDEX_FILE))
+            return self._lexical
+
+    def get_backend_name(self, kb_id: str) -> str:
+        """
+        Get the vector backend of a knowledge base.
+
+        Returns:
+            'chroma', 'numpy' or 'hnsw'
+        """
+        return self._backend_for(kb_id).name
+
+    def get_storage_mode(self, kb_id: str) -> str:
+        """
+        Get the vector encoding of a knowledge base.
+
+        Returns:
+            'float32', 'int8' or 'float16'
+        """
+        return self._backend_for(kb_id).get_storage_mode(kb_id)
+
+    # --- Knowledge bases ---
+
+    def create_knowledge_base(
+        self,
+        kb_id: str,
+        name: str,
+        description: str,
+        storage: str = STORAGE_FLOAT32,
+        backend: Optional[str] = None
+    ) -> None:
         """
         Create a new knowledge base collection.
-        
+
         Args:
             kb_id: Unique identifier for the knowledge base
             name: Human-readable name
             description: Description of the knowledge base
+            storage: 'float32', or 'int8' / 'float16' quantized storage (NumPy backend)
+            backend: 'chroma', 'numpy' or 'hnsw' (default: chroma, numpy for quantized storage)
         """
+        if backend is None:
+            backend = BACKEND_NUMPY if storage in QUANTIZED_MODES else BACKEND_CHROMA
         try:
-            # Create collection with metadata
-            collection = self.client.create_collection(
-                name=f"kb_{kb_id}",
-                metadata={
-                    "name": name,
-                    "description": description,
-                    "kb_id": kb_id
-                }
-            )
-            logger.info(f"Created knowledge base collection: {name} (ID: {kb_id})")
+            target = self._get_backend(backend)
+            target.create_knowledge_base(kb_id, name, description, storage=storage)
+            with self._lock:
+                self._kb_backends[kb_id] = target
+            logger.info(f"Created knowledge base collection: {name} (ID: {kb_id}, backend: {backend}, storage: {storage})")
         except Exception as e:
             logger.error(f"Error creating knowledge base: {e}")
             raise
-    
+
     def add_documents(
         self,
         kb_id: str,
         documents: List[Dict],
-        embeddings: List[List[float]]
+        embeddings: Embeddings
     ) -> None:
         """
         Add documents to a knowledge base.
-        
+        Documents are upserted: re-adding an existing id replaces it.
+
         Args:
             kb_id: Knowledge base identifier
             documents: List of document dicts with 'id', 'text', and 'metadata'
-            embeddings: List of embedding vectors corresponding to documents
+            embeddings: (n, dim) float32 ndarray, or list of embedding vectors
+                corresponding to documents
         """
         try:
-            collection = self.client.get_collection(name=f"kb_{kb_id}")
-            
-            # Prepare data for ChromaDB
-            ids = [doc["id"] for doc in documents]
-            texts = [doc["text"] for doc in documents]
-            metadatas = [doc["metadata"] for doc in documents]
-            
-            # Add to collection
-            collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas
-            )
-            
+            self._backend_for(kb_id).add_documents(kb_id, documents, as_embedding_matrix(embeddings))
             logger.info(f"Added {len(documents)} documents to KB {kb_id}")
         except Exception as e:
             logger.error(f"Error adding documents to KB {kb_id}: {e}")
             raise
-    
+        try:
+            self._lexical_index().add_documents(kb_id, documents)
+        except Exception as e:
+            # Search falls back to vector ranking for chunks missing from the lexical index
+            logger.warning(f"Error indexing documents of KB {kb_id} for lexical search: {e}")
+
+    def delete_file_documents(self, kb_id: str, file_path: str) -> None:
+        """
+        Delete every chunk of a source file from a knowledge base.
+
+        Args:
+            kb_id: Knowledge base identifier
+            file_path: Source file path as stored in the chunk metadata
+        """
+        try:
+            self._backend_for(kb_id).delete_file_documents(kb_id, file_path)
+            self._lexical_index().delete_file_documents(kb_id, file_path)
+            logger.info(f"Deleted chunks of {file_path} from KB {kb_id}")
+        except Exception as e:
+            logger.error(f"Error deleting chunks of {file_path} from KB {kb_id}: {e}")
+            raise
+        invalidate_knowledge_base(kb_id)
+
     def search(
         self,
         kb_id: str,
-        query_embedding: List[float],
-        top_k: int = 5
+        query_embedding: Embedding,
+        top_k: int = 5,
+        query_text: Optional[str] = None
     ) -> List[Dict]:
         """
         Search for similar documents in a knowledge base.
-        
+
         Args:
             kb_id: Knowledge base identifier
-            query_embedding: Query embedding vector
+            query_embedding: Query embedding vector (ndarray or list of floats)
             top_k: Number of results to return
-            
+            query_text: Query text; when given, BM25 and vector rankings are fused (hybrid search)
+
         Returns:
-            List of dicts with 'id', 'text', 'metadata', and 'distance'
+            List of dicts with 'id', 'text', 'metadata', and 'distance' (plus 'score' in hybrid search)
         """
         try:
-            collection = self.client.get_collection(name=f"kb_{kb_id}")
-            
-            # Query the collection
-            results = collection.query(
-                query_embeddings=[query_embedding],
-                n_results=top_k,
-                include=["documents", "metadatas", "distances"]
-            )
-            
-            # Format results
-            formatted_results = []
-            if results and results['ids'] and len(results['ids']) > 0:
-                for i in range(len(results['ids'][0])):
-                    formatted_results.append({
-                        "id": results['ids'][0][i],
-                        "text": results['documents'][0][i],
-                        "metadata": results['metadatas'][0][i],
-                        "distance": results['distances'][0][i]
-                    })
-            
+            formatted_results = self._search_kb(kb_id, as_embedding_matrix(query_embedding)[0], top_k, query_text)
             logger.info(f"Found {len(formatted_results)} results for query in KB {kb_id}")
             return formatted_results
         except Exception as e:
             logger.error(f"Error searching KB {kb_id}: {e}")
             raise
-    
+
+    def search_many(
+        self,
+        kb_ids: List[str],
+        query_embedding: Embedding,
+        top_k: int = 5,
+        fusion: str = FUSION_RRF,
+        query_text: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Search several knowledge bases concurrently and fuse their results.
+        A KB that fails to answer is logged and skipped.
+
+        Args:
+            kb_ids: Knowledge base identifiers
+            query_embedding: Query embedding vector (ndarray or list of floats)
+            top_k: Number of results to return
+            fusion: 'rrf' (reciprocal rank) or 'distance' (normalized distances)
+            query_text: Query text for hybrid (BM25 + vector) search within each KB
+
+        Returns:
+            List of dicts with 'id', 'text', 'metadata', 'distance', 'score' and 'kb_id'
+        """
+        kb_ids = list(dict.fromkeys(kb_ids))
+        if not kb_ids:
+            return []
+        query = as_embedding_matrix(query_embedding)[0]
+
+        def search_one(kb_id: str) -> List[Dict]:
+            try:
+                results = self._search_kb(kb_id, query, top_k, query_text)
+            except Exception as e:
+                logger.error(f"Error searching KB {kb_id}: {e}")
+                return []
+            return [dict(result, kb_id=kb_id) for result in results]
+
+        if len(kb_ids) == 1:
+            result_lists = [search_one(kb_ids[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(kb_ids), MAX_SEARCH_THREADS)) as executor:
+                result_lists = list(executor.map(search_one, kb_ids))
+
+        fused = fuse_results(result_lists, top_k=top_k, method=fusion)
+        logger.info(f"Found {len(fused)} results for query in {len(kb_ids)} KBs")
+        return fused
+
+    def _search_kb(self, kb_id: str, query: np.ndarray, top_k: int, query_text: Optional[str]) -> List[Dict]:
+        """Vector search of one KB, fused with its BM25 ranking when query_text is given."""
+        backend = self._backend_for(kb_id)
+        if not query_text:
+            return backend.search(kb_id, query, top_k)
+
+        depth = top_k * HYBRID_CANDIDATE_FACTOR
+        vector_results = backend.search(kb_id, query, depth)
+        try:
+            lexical_results = self._lexical_index().search(kb_id, query_text, depth)
+        except Exception as e:
+            logger.warning(f"Lexical search failed for KB {kb_id}: {e}")
+            lexical_results = []
+        if not lexical_results:
+            # KB indexed before lexical search existed, or no query term in the index
+            return vector_results[:top_k]
+        return fuse_hybrid(vector_results, lexical_results, top_k)
+
+    def persist(self, kb_id: str) -> None:
+        """
+        Flush buffered index state of a knowledge base to disk (end of an ingestion).
+
+        Args:
+            kb_id: Knowledge base identifier
+        """
+        try:
+            self._backend_for(kb_id).persist(kb_id)
+        except Exception as e:
+            logger.error(f"Error persisting KB {kb_id}: {e}")
+            raise
+        # Answers cached for this KB may not reflect the new content
+        invalidate_knowledge_base(kb_id)
+
     def delete_knowledge_base(self, kb_id: str) -> None:
         """
         Delete a knowledge base collection.
-        
+
         Args:
             kb_id: Knowledge base identifier
         """
+        # Forget indexed file fingerprints so a re-created KB starts from scratch
+        from core.services.ingestion_manifest import delete_manifest
+        from core.services.summary_jobs import delete_summary_journal
+        delete_manifest(kb_id)
+        delete_summary_journal(kb_id)
+        invalidate_knowledge_base(kb_id)
+
+        backend = self._backend_for(kb_id)
+        with self._lock:
+            self._kb_backends.pop(kb_id, None)
+        self._lexical_index().delete_knowledge_base(kb_id)
         try:
-            self.client.delete_collection(name=f"kb_{kb_id}")
+            backend.delete_knowledge_base(kb_id)
             logger.info(f"Deleted knowledge base: {kb_id}")
         except Exception as e:
             if "does not exist" in str(e):
@@ -158,90 +436,59 @@ class VectorStoreService:
         """
         Identify and remove orphan directories in vector_databases.
         Orphans are directories that do not correspond to any active collection segment.
-        
+
         Returns:
             Dict with 'deleted' (list of folder names) and 'failed' (list of folder names)
         """
-        import shutil
-        import sqlite3
-        import gc
-        
-        results = {
-            "deleted": [],
-            "failed": []
-        }
-        
-        db_path = os.path.join(self.vector_db_root, "chroma.sqlite3")
-        if not os.path.exists(db_path):
-            return results
-            
-        try:
-            # Force GC to help release locks if possible
-            gc.collect()
-            
-            # Connect to Chroma's SQLite DB to find active segments
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Get all segment IDs (these correspond to folder names)
-            cursor.execute("SELECT id FROM segments")
-            active_segments = {row[0] for row in cursor.fetchall()}
-            conn.close()
-            
-            # List all directories to delete
-            for item in os.listdir(self.vector_db_root):
-                item_path = os.path.join(self.vector_db_root, item)
-                
-                # Check if it's a directory and looks like a UUID (length 36)
-                if os.path.isdir(item_path) and len(item) == 36:
-                    if item not in active_segments:
-                        try:
-                            shutil.rmtree(item_path)
-                            logger.info(f"Deleted orphan directory: {item}")
-                            results["deleted"].append(item)
-                        except Exception as e:
-                            logger.warning(f"Failed to delete orphan directory {item}: {e}")
-                            results["failed"].append(item)
-                            
-        except Exception as e:
-            logger.error(f"Error during orphan cleanup: {e}")
-            
-        return results
-    
+        if not os.path.exists(os.path.join(self.vector_db_root, "chroma.sqlite3")):
+            return {"deleted": [], "failed": []}
+        return self._get_backend(BACKEND_CHROMA).cleanup_orphan_files()
+
     def get_stats(self, kb_id: str) -> Dict:
         """
         Get statistics for a knowledge base.
-        
+
         Args:
             kb_id: Knowledge base identifier
-            
+
         Returns:
             Dict with 'document_count' and 'chunk_count'
         """
         try:
-            collection = self.client.get_collection(name=f"kb_{kb_id}")
-            count = collection.count()
-            
-            return {
-                "chunk_count": count,
-                "document_count": count  # Will be updated by ingestion service
-            }
+            return self._backend_for(kb_id).get_stats(kb_id)
         except Exception as e:
             logger.error(f"Error getting stats for KB {kb_id}: {e}")
             return {"chunk_count": 0, "document_count": 0}
-    
+
     def knowledge_base_exists(self, kb_id: str) -> bool:
         """
         Check if a knowledge base exists.
-        
+
         Args:
             kb_id: Knowledge base identifier
-            
+
         Returns:
             True if exists, False otherwise
         """
         try:
-            self.client.get_collection(name=f"kb_{kb_id}")
-            return True
-        except:
+            return self._backend_for(kb_id).knowledge_base_exists(kb_id)
+        except Exception:
             return False
+
+    def close(self) -> None:
+        """
+        Save local indexes, release open files and retire the shared instance
+        (the next VectorStoreService() opens a fresh one).
+        """
+        with self._instances_lock:
+            if VectorStoreService._instances.get(self.vector_db_root) is self:
+                del VectorStoreService._instances[self.vector_db_root]
+        with self._lock:
+            backends = list(self._backends.values())
+            self._backends.clear()
+            self._kb_backends.clear()
+            lexical, self._lexical = self._lexical, None
+        for backend in backends:
+            backend.close()
+        if lexical is not None:
+            lexical.close()
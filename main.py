@@ -49,6 +49,10 @@ manager.register('profiles_create', lambda: __import__('modules.profiles.create'
 manager.register('profiles_detail', lambda: __import__('modules.profiles.detail', fromlist=['ProfileDetailFrame']).ProfileDetailFrame)
 manager.register('knowledge_base_manager', lambda: __import__('modules.settings.knowledge_base_manager', fromlist=['KnowledgeBaseManagerFrame']).KnowledgeBaseManagerFrame)
 
+# Délai avant le pré-chargement du modèle d'embeddings, et inactivité avant son déchargement (0 = jamais)
+EMBEDDING_PRELOAD_DELAY_MS = 1500
+DEFAULT_EMBEDDING_IDLE_UNLOAD_SECONDS = 1800
+
 # Configuration du thème
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
@@ -82,6 +86,7 @@ class App(ctk.CTk):
             pass
 
         self.data_manager = DataManager()
+        self._configure_llm_client_pool()
 
         # Layout principal (1x1) - Navigation plein écran
         self.grid_rowconfigure(0, weight=1)
@@ -102,9 +107,38 @@ class App(ctk.CTk):
         self.current_frame: Optional[ctk.CTkFrame] = None
         self.show_home()
 
+        # Pré-chargement du modèle d'embeddings une fois la fenêtre affichée
+        self.after(EMBEDDING_PRELOAD_DELAY_MS, self._start_embedding_preload)
+
         # Gestion de la fermeture
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    def _configure_llm_client_pool(self) -> None:
+        """Applies the LLM client pool limits (settings: llm_client_pool_size, llm_client_idle_seconds)."""
+        settings = self.data_manager.get_settings()
+        try:
+            from core.services.llm_client_pool import client_pool, DEFAULT_MAX_CLIENTS, DEFAULT_IDLE_TIMEOUT
+            client_pool.configure(
+                max_clients=int(settings.get("llm_client_pool_size", DEFAULT_MAX_CLIENTS)),
+                idle_timeout=float(settings.get("llm_client_idle_seconds", DEFAULT_IDLE_TIMEOUT))
+            )
+        except Exception as e:
+            print(f"Erreur configuration du pool de clients LLM: {e}")
+
+    def _start_embedding_preload(self) -> None:
+        """Loads the RAG embedding model in a background thread (settings: embedding_preload, embedding_idle_unload_seconds)."""
+        settings = self.data_manager.get_settings()
+        # By default, pre-load only when knowledge bases exist
+        if not settings.get("embedding_preload", bool(self.data_manager.get_all_knowledge_bases())):
+            return
+        try:
+            from core.services.embedding_service import EmbeddingService
+            EmbeddingService.preload_in_background(
+                settings.get("embedding_idle_unload_seconds", DEFAULT_EMBEDDING_IDLE_UNLOAD_SECONDS)
+            )
+        except Exception as e:
+            print(f"Erreur pré-chargement embeddings: {e}")
+
     def on_closing(self) -> None:
         self.destroy()
         self.quit()
@@ -242,5 +276,9 @@ class App(ctk.CTk):
             print(f"Error opening URL: {e}")
 
 if __name__ == "__main__":
+    # Required for the document extraction process pool in frozen (PyInstaller) builds
+    import multiprocessing
+    multiprocessing.freeze_support()
+
     app = App()
     app.mainloop()
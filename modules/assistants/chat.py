@@ -9,6 +9,8 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 
 from modules.assistants.chat_service import ChatService
+from utils.stream_writer import CoalescedTextWriter
+from utils.history_sidebar import ConversationSidebar
 
 class ChatFrame(ctk.CTkFrame):
     def __init__(self, master, app, assistant_data):
@@ -133,6 +135,12 @@ class ChatFrame(ctk.CTkFrame):
         # Liste scrollable des conversations
         self.history_list = ctk.CTkScrollableFrame(self.sidebar_history, fg_color="transparent")
         self.history_list.pack(fill="both", expand=True, padx=5, pady=5)
+        self.history_sidebar = ConversationSidebar(
+            self.history_list,
+            on_select=self.open_conversation,
+            on_rename=self.rename_conversation_ui,
+            on_delete=self.delete_conversation_ui
+        )
         
         # --- Zone de Chat Principale ---
         self.main_chat_panel = ctk.CTkFrame(self.body_container, fg_color="transparent")
@@ -203,66 +211,17 @@ class ChatFrame(ctk.CTkFrame):
         
     def refresh_history_list(self):
         """Mise à jour de la liste des conversations dans la sidebar."""
-        # Nettoyer la liste
-        for widget in self.history_list.winfo_children():
-            widget.destroy()
-            
-        conversations = self.app.data_manager.get_assistant_conversations("assistants", self.assistant_id)
-        
-        # Trier par date (la plus récente en haut)
-        try:
-            conversations.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
-        except:
-            pass
-
-        for conv in conversations:
-            f = ctk.CTkFrame(self.history_list, fg_color="transparent")
-            f.pack(fill="x", pady=2)
-            
-            is_active = (self.current_conversation_id == conv["id"])
-            bg_color = ("gray80", "gray30") if is_active else "transparent"
-            text_weight = "bold" if is_active else "normal"
+        # Index seul : les messages ne sont chargés qu'à l'ouverture d'une conversation
+        summaries = self.app.data_manager.get_assistant_conversation_summaries("assistants", self.assistant_id)
+        self.history_sidebar.update(summaries, self.current_conversation_id)
 
-            # Bouton de sélection
-            btn = ctk.CTkButton(
-                f,
-                text=conv.get("title", "Sans titre"),
-                anchor="w",
-                fg_color=bg_color,
-                text_color=("black", "white"),
-                hover_color=("gray75", "gray35"),
-                font=("Arial", 12, text_weight),
-                height=32,
-                corner_radius=8,
-                command=lambda c=conv: self.load_conversation(c)
-            )
-            btn.pack(side="left", fill="x", expand=True, padx=(0, 5))
-
-            # Bouton Renommer
-            rename_btn = ctk.CTkButton(
-                f,
-                text="✎",
-                width=28,
-                height=28,
-                fg_color="transparent",
-                text_color="gray",
-                hover_color=("gray90", "gray40"),
-                command=lambda cid=conv["id"]: self.rename_conversation_ui(cid)
-            )
-            rename_btn.pack(side="right")
-            
-            # Bouton Supprimer
-            del_btn = ctk.CTkButton(
-                f,
-                text="X",
-                width=28,
-                height=28,
-                fg_color="transparent",
-                text_color="#F44336",
-                hover_color=("mistyrose", "darkred"),
-                command=lambda cid=conv["id"]: self.delete_conversation_ui(cid)
-            )
-            del_btn.pack(side="right")
+    def open_conversation(self, conversation_id):
+        """Charge les messages d'une conversation de la sidebar."""
+        conversation = self.app.data_manager.get_assistant_conversation("assistants", self.assistant_id, conversation_id)
+        if conversation is None:
+            self.refresh_history_list()
+            return
+        self.load_conversation(conversation)
 
     def load_conversation(self, conversation):
         """Charge une session existante."""
@@ -462,10 +421,25 @@ class ChatFrame(ctk.CTkFrame):
             # Callback for RAG or other system messages during generation
             def sys_callback(msg):
                 self.after(0, lambda: self.add_system_message(msg))
+            
+            # The answer is rendered while it is generated, one widget update per 50 ms
+            writer, stream_done, outcome = self._create_stream_writer()
+            streamed = []
+            
+            def on_delta(delta):
+                if not streamed:
+                    self.after(0, lambda: self._start_stream_writer(writer))
+                streamed.append(delta)
+                writer.write(delta)
                 
             response = self.chat_service.generate_response(
-                user_message, system_prompt, system_msg_callback=sys_callback
+                user_message, system_prompt, system_msg_callback=sys_callback, on_delta=on_delta
             )
+            if streamed:
+                # Wait for the last chunk to be rendered so later messages appear after it
+                outcome["success"] = response['success']
+                writer.close()
+                stream_done.wait(timeout=5)
             
             if not response['success']:
                 self.after(0, lambda: self.add_error_message(response['error']))
@@ -478,7 +452,8 @@ class ChatFrame(ctk.CTkFrame):
                 
                 def process_generator():
                     generator = self.chat_service.process_response_action(
-                        response_text, api_key, system_prompt, user_message, system_msg_callback=sys_callback
+                        response_text, api_key, system_prompt, user_message,
+                        system_msg_callback=sys_callback, streamed=bool(streamed)
                     )
                     
                     final_content = None
@@ -487,6 +462,9 @@ class ChatFrame(ctk.CTkFrame):
                             if item:
                                 if item['type'] == 'text':
                                     final_content = item['content']
+                                    # Already rendered while streaming (plain answer without action)
+                                    if streamed and final_content == response_text:
+                                        continue
                                     # If it's a chunk of text, we can display it? 
                                     # My service implementation yields 'text' for final result, or intro.
                                     # If intro, display as assistant message.
@@ -507,6 +485,40 @@ class ChatFrame(ctk.CTkFrame):
         finally:
             self.after(0, self._finalize_llm_call)
 
+    def _create_stream_writer(self):
+        """
+        Writer rendering a streamed assistant answer in the chat area (safe to create from a worker thread).
+        Returns (writer, event set once the complete answer is rendered and saved, outcome dict).
+        outcome["success"] must be set before closing the writer: an answer interrupted by an
+        error stays on screen but is not added to the history.
+        """
+        stream_done = threading.Event()
+        outcome = {"success": False}
+        
+        def on_done(text):
+            if text:
+                self.chat_area.configure(state="normal")
+                self.chat_area.insert("end", "\n\n", "assistant")
+                self.chat_area.configure(state="disabled")
+                if outcome["success"]:
+                    self.history.append({"role": "Assistant", "content": text, "timestamp": str(datetime.datetime.now())})
+                    self._save_current_state()
+            stream_done.set()
+        
+        writer = CoalescedTextWriter(
+            self.chat_area,
+            tag="assistant",
+            prefix=f"{self.assistant.get('name')} : ",
+            on_done=on_done
+        )
+        return writer, stream_done, outcome
+
+    def _start_stream_writer(self, writer):
+        if not self.winfo_exists() or not hasattr(self, 'chat_area') or not self.chat_area.winfo_exists():
+            return
+        self.chat_area.tag_config("assistant", foreground="#4CAF50")
+        writer.start()
+
     def _finalize_llm_call(self):
         if not self.winfo_exists(): return
         self.hide_loading()
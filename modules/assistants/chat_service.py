@@ -1,4 +1,8 @@
 from core.services.llm_service import LLMService as LLMConnectionTester
+from core.services.llm_client_pool import (
+    get_openai_client, get_anthropic_client, get_groq_client, get_mistral_client, get_huggingface_client
+)
+from core.services.provider_router import get_provider_router, provider_chain, is_failover_error
 from utils.scraper_factory import ScraperFactory
 from utils.results_manager import ResultsManager
 import os
@@ -91,17 +95,20 @@ class ChatService:
         
         log_callback("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
 
-    def generate_response(self, user_message, system_prompt, system_msg_callback=None):
+    def generate_response(self, user_message, system_prompt, system_msg_callback=None, on_delta=None):
         """
         Generates a response from the LLM.
+        If on_delta is given, the answer is streamed to it (called from this thread) as it is generated.
+        The assistant's provider is tried first, then its 'fallback_providers' on rate limits, quota,
+        server errors and timeouts (with the 'provider_hedging' setting, a slow provider is hedged).
         Result is a dict: {'success': bool, 'text': str, 'error': str}
         """
         try:
             settings = self.data_manager.get_settings()
             provider = self.assistant.get('provider', 'OpenAI GPT-4o mini')
-            api_key = settings.get('api_keys', {}).get(provider)
+            chain = provider_chain(settings, provider, self.assistant.get('fallback_providers'))
             
-            if not api_key:
+            if not chain:
                 available_keys = list(settings.get('api_keys', {}).keys())
                 error_msg = (
                     f"⚠️ **Clé API invalide**\n"
@@ -113,60 +120,49 @@ class ChatService:
                 )
                 return {'success': False, 'error': error_msg}
 
+            # Response cache (scoped to this assistant, invalidated when it or its KBs change)
+            cache_kwargs = self._cache_kwargs(settings)
+
             # RAG Support
-            kb_id = self.assistant.get('knowledge_base_id')
-            if kb_id and kb_id != "None":
-                if system_msg_callback: system_msg_callback(f"🧠 Utilisation de la base de connaissances (RAG)...")
-                
-                messages_for_llm = [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ]
-                
-                success, response_text = LLMConnectionTester.generate_response_with_rag(
-                    provider_name=provider,
-                    api_key=api_key,
-                    messages=messages_for_llm,
-                    kb_id=kb_id,
-                    base_url=settings.get('endpoints', {}).get(provider),
-                    model=settings.get("models", {}).get(provider)
+            kb_ids = self.assistant.get('knowledge_base_ids') or [self.assistant.get('knowledge_base_id')]
+            kb_ids = [kb_id for kb_id in kb_ids if kb_id and kb_id != "None"]
+            if kb_ids and system_msg_callback:
+                system_msg_callback(f"🧠 Utilisation de la base de connaissances (RAG)...")
+
+            # A streamed answer can only fail over before its first delta is displayed
+            streamed = [False]
+            def on_chunk(delta):
+                streamed[0] = True
+                on_delta(delta)
+
+            def attempt(name):
+                text = self._generate_with_provider(
+                    name, settings, user_message, system_prompt, kb_ids, cache_kwargs,
+                    on_chunk if on_delta is not None else None
                 )
-                
-                if not success:
-                    raise Exception(f"RAG Error: {response_text}")
-                
-                return {'success': True, 'text': response_text, 'api_key': api_key}
+                return True, text
+
+            def on_failover(name, error):
+                if system_msg_callback:
+                    system_msg_callback(f"⚠️ {name} indisponible, bascule vers le fournisseur suivant...")
+
+            success, response_text, used_provider = get_provider_router().call(
+                chain,
+                attempt,
+                hedge=on_delta is None and bool(settings.get("provider_hedging", False)),
+                order_by_latency=settings.get("provider_order_by_latency", True),
+                should_fail_over=lambda name, error: not streamed[0] and is_failover_error(error),
+                on_failover=on_failover
+            )
+            if not success:
+                raise Exception(response_text)
             
-            else:
-                # Standard Generation
-                response_text = ""
-                # IMPORTANT : Vérifier "Hugging Face" AVANT "Mistral"
-                if "OpenAI" in provider:
-                    response_text = self._call_openai(api_key, system_prompt, user_message)
-                elif "Gemini" in provider:
-                    response_text = self._call_gemini(api_key, system_prompt, user_message)
-                elif "Claude" in provider:
-                    response_text = self._call_claude(api_key, system_prompt, user_message)
-                elif "Llama" in provider or "Groq" in provider:
-                    response_text = self._call_groq(api_key, system_prompt, user_message)
-                elif "Hugging Face" in provider:
-                    response_text = self._call_huggingface(api_key, system_prompt, user_message)
-                elif "Mistral" in provider:
-                    response_text = self._call_mistral(api_key, system_prompt, user_message)
-                elif "DeepSeek-VL" in provider:
-                    response_text = self._call_deepseek_vl(api_key, system_prompt, user_message)
-                elif "DeepSeek" in provider:
-                     response_text = self._call_openai_compatible(api_key, "https://api.deepseek.com", system_prompt, user_message)
-                elif "IAKA" in provider:
-                    endpoint = settings.get('endpoints', {}).get(provider)
-                    model_name = settings.get("models", {}).get(provider, "mistral-small")
-                    if not endpoint:
-                        raise Exception(f"Endpoint URL non configuré pour {provider}.")
-                    response_text = self._call_iaka(api_key, endpoint, system_prompt, user_message, model_name)
-                else:
-                    response_text = f"Provider {provider} non supporté pour le moment."
-                
-                return {'success': True, 'text': response_text, 'api_key': api_key}
+            return {
+                'success': True,
+                'text': response_text,
+                'api_key': settings.get('api_keys', {}).get(used_provider),
+                'provider': used_provider
+            }
 
         except Exception as e:
             error_msg = str(e)
@@ -189,10 +185,136 @@ class ChatService:
             else:
                 return {'success': False, 'error': f"❌ Erreur technique : {error_msg}"}
 
-    def process_response_action(self, response_text, api_key, system_prompt, original_user_message, system_msg_callback=None):
+    def _generate_with_provider(self, provider, settings, user_message, system_prompt, kb_ids, cache_kwargs, on_delta=None):
+        """Generates the answer with one provider; raises on failure."""
+        api_key = settings.get('api_keys', {}).get(provider)
+        messages_for_llm = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+
+        if kb_ids:
+            if on_delta is not None:
+                success, response_text = LLMConnectionTester.generate_response_streamed(
+                    provider,
+                    api_key,
+                    messages_for_llm,
+                    on_delta,
+                    kb_id=kb_ids,
+                    base_url=settings.get('endpoints', {}).get(provider),
+                    model=settings.get("models", {}).get(provider),
+                    context_budget=settings.get("context_budget_tokens"),
+                    **cache_kwargs
+                )
+            else:
+                success, response_text = LLMConnectionTester.generate_response_with_rag(
+                    provider_name=provider,
+                    api_key=api_key,
+                    messages=messages_for_llm,
+                    kb_id=kb_ids,
+                    base_url=settings.get('endpoints', {}).get(provider),
+                    model=settings.get("models", {}).get(provider),
+                    context_budget=settings.get("context_budget_tokens"),
+                    **cache_kwargs
+                )
+            
+            if not success:
+                raise Exception(f"RAG Error: {response_text}")
+            return response_text
+
+        # Streamed Generation (same models as the _call_* helpers below)
+        stream_kwargs = self._stream_kwargs(provider, settings) if on_delta is not None else None
+        if stream_kwargs is not None:
+            success, response_text = LLMConnectionTester.generate_response_streamed(
+                provider, api_key, messages_for_llm, on_delta, **stream_kwargs, **cache_kwargs
+            )
+            if not success:
+                raise Exception(response_text)
+            return response_text
+
+        # Standard Generation (cache entries are shared with the streamed path: same model arguments)
+        cache_options = self._stream_kwargs(provider, settings) if cache_kwargs else None
+        if cache_options is not None:
+            _, response_text = LLMConnectionTester.cached_generation(
+                provider, messages_for_llm,
+                lambda: (True, self._call_provider(provider, settings, api_key, system_prompt, user_message)),
+                **cache_kwargs, **cache_options
+            )
+            return response_text
+        return self._call_provider(provider, settings, api_key, system_prompt, user_message)
+
+    def _call_provider(self, provider, settings, api_key, system_prompt, user_message):
+        """Standard (non-streamed) generation through the provider SDK; returns the answer text."""
+        # IMPORTANT : Vérifier "Hugging Face" AVANT "Mistral"
+        if "OpenAI" in provider:
+            return self._call_openai(api_key, system_prompt, user_message)
+        elif "Gemini" in provider:
+            return self._call_gemini(api_key, system_prompt, user_message)
+        elif "Claude" in provider:
+            return self._call_claude(api_key, system_prompt, user_message)
+        elif "Llama" in provider or "Groq" in provider:
+            return self._call_groq(api_key, system_prompt, user_message)
+        elif "Hugging Face" in provider:
+            return self._call_huggingface(api_key, system_prompt, user_message)
+        elif "Mistral" in provider:
+            return self._call_mistral(api_key, system_prompt, user_message)
+        elif "DeepSeek-VL" in provider:
+            return self._call_deepseek_vl(api_key, system_prompt, user_message)
+        elif "DeepSeek" in provider:
+             return self._call_openai_compatible(api_key, "https://api.deepseek.com", system_prompt, user_message)
+        elif "IAKA" in provider:
+            endpoint = settings.get('endpoints', {}).get(provider)
+            model_name = settings.get("models", {}).get(provider, "mistral-small")
+            if not endpoint:
+                raise Exception(f"Endpoint URL non configuré pour {provider}.")
+            return self._call_iaka(api_key, endpoint, system_prompt, user_message, model_name)
+        else:
+            # Raised like the other failures, so it is never cached as an answer
+            raise Exception(f"Provider {provider} non supporté pour le moment.")
+
+    def _cache_kwargs(self, settings):
+        """LLMService response cache arguments for this assistant (empty when disabled in the settings)."""
+        if not settings.get("response_cache_enabled", True):
+            return {}
+        return {
+            "cache_scope": f"assistant:{self.assistant_id}",
+            "semantic_cache": bool(settings.get("response_cache_semantic", False))
+        }
+
+    def _stream_kwargs(self, provider, settings):
+        """
+        LLMService streaming arguments matching the model choices of the _call_* helpers.
+        Returns None when the provider has no streaming path.
+        """
+        chat_args = {"max_tokens": 4000, "temperature": 0.7}
+        if "OpenAI" in provider:
+            return dict(chat_args, model="gpt-3.5-turbo")
+        elif "Gemini" in provider:
+            return {}
+        elif "Claude" in provider:
+            return {"model": "claude-opus-4-20250514", "max_tokens": 4000}
+        elif "Llama" in provider or "Groq" in provider:
+            return dict(chat_args, model="llama-3.1-8b-instant")
+        elif "Hugging Face" in provider:
+            return dict(chat_args, model="Qwen/Qwen2.5-72B-Instruct")
+        elif "Mistral" in provider:
+            return {"model": "mistral-small-latest", "max_tokens": 4000}
+        elif "DeepSeek-VL" in provider:
+            return dict(chat_args, model="deepseek-vl", base_url="https://api.deepseek.com")
+        elif "DeepSeek" in provider:
+            return dict(chat_args)
+        elif "IAKA" in provider:
+            endpoint = settings.get('endpoints', {}).get(provider)
+            if not endpoint:
+                raise Exception(f"Endpoint URL non configuré pour {provider}.")
+            return dict(chat_args, base_url=endpoint, model=settings.get("models", {}).get(provider, "mistral-small"))
+        return None
+
+    def process_response_action(self, response_text, api_key, system_prompt, original_user_message, system_msg_callback=None, streamed=False):
         """
         Checks if response contains an action (Search) and executes it if needed.
         Returns generator yielding status updates (str) and finally the result (dict).
+        With streamed=True the response text is already displayed: the intro text is not yielded again.
         """
         if not system_msg_callback:
             system_msg_callback = lambda x: None
@@ -203,7 +325,7 @@ class ChatService:
             query = parts[1].strip()
             
             # Yield intro text if any
-            yield {'type': 'text', 'content': intro_text} if intro_text else None
+            yield {'type': 'text', 'content': intro_text} if intro_text and not streamed else None
             
             system_msg_callback(f"🔎 Recherche en cours sur {self.assistant.get('target_url')} : '{query}'...")
             yield {'type': 'system', 'content': f"🔎 Recherche en cours sur {self.assistant.get('target_url')} : '{query}'..."}
@@ -316,8 +438,7 @@ class ChatService:
     # --- Provider Implementation Methods (Copied & Adapted) ---
 
     def _call_openai(self, api_key, system_prompt, user_message):
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
+        client = get_openai_client(api_key)
         response = client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}],
@@ -326,8 +447,7 @@ class ChatService:
         return response.choices[0].message.content
 
     def _call_openai_compatible(self, api_key, base_url, system_prompt, user_message):
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key, base_url=base_url)
+        client = get_openai_client(api_key, base_url)
         model_to_use = "gpt-3.5-turbo"
         try:
             models = client.models.list()
@@ -341,11 +461,10 @@ class ChatService:
         return response.choices[0].message.content
 
     def _call_iaka(self, api_key, base_url, system_prompt, user_message, model_name="mistral-small"):
-        from openai import OpenAI
         code_model = model_name if model_name else "mistral-small"
         clean_base_url = base_url.rstrip('/')
         full_url = clean_base_url if "/v1" in clean_base_url else f"{clean_base_url}/{code_model}/v1"
-        client = OpenAI(api_key=api_key, base_url=full_url)
+        client = get_openai_client(api_key, full_url)
         response = client.chat.completions.create(
             model=code_model,
             messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}],
@@ -364,8 +483,7 @@ class ChatService:
         return model.generate_content(f"{system_prompt}\n\nUtilisateur : {user_message}").text
 
     def _call_claude(self, api_key, system_prompt, user_message):
-        from anthropic import Anthropic
-        client = Anthropic(api_key=api_key)
+        client = get_anthropic_client(api_key)
         response = client.messages.create(
             model="claude-opus-4-20250514", max_tokens=4000, system=system_prompt,
             messages=[{"role": "user", "content": user_message}]
@@ -373,8 +491,7 @@ class ChatService:
         return response.content[0].text
 
     def _call_groq(self, api_key, system_prompt, user_message):
-        from groq import Groq
-        client = Groq(api_key=api_key)
+        client = get_groq_client(api_key)
         response = client.chat.completions.create(
             model="llama-3.1-8b-instant",
             messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}],
@@ -383,8 +500,7 @@ class ChatService:
         return response.choices[0].message.content
 
     def _call_mistral(self, api_key, system_prompt, user_message):
-        from mistralai import Mistral
-        client = Mistral(api_key=api_key)
+        client = get_mistral_client(api_key)
         response = client.chat.complete(
             model="mistral-small-latest",
             messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}],
@@ -393,8 +509,7 @@ class ChatService:
         return response.choices[0].message.content
 
     def _call_deepseek_vl(self, api_key, system_prompt, user_message):
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key, base_url="https://api.deepseek.com")
+        client = get_openai_client(api_key, "https://api.deepseek.com")
         response = client.chat.completions.create(
             model="deepseek-vl",
             messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}],
@@ -403,9 +518,8 @@ class ChatService:
         return response.choices[0].message.content
 
     def _call_huggingface(self, api_key, system_prompt, user_message):
-        from huggingface_hub import InferenceClient
         import time
-        client = InferenceClient(token=api_key.strip() if api_key else "")
+        client = get_huggingface_client(api_key.strip() if api_key else "")
         messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}]
         for attempt in range(3):
             try:
@@ -167,6 +167,30 @@ class CreateAssistantFrame(ctk.CTkFrame):
         self.provider_dropdown.grid(row=current_row, column=0, pady=(0, 20), sticky="w")
         current_row += 1
 
+        # Fallback providers (tried in this order when the provider is rate-limited or unavailable)
+        ctk.CTkLabel(
+            self.scrollable_frame,
+            text="🛟 Providers de secours",
+            font=("Arial", 14, "bold")
+        ).grid(row=current_row, column=0, pady=(0, 5), sticky="w")
+        current_row += 1
+        
+        self.fallback_vars = {}
+        fallback_frame = ctk.CTkFrame(self.scrollable_frame, fg_color="transparent")
+        fallback_frame.grid(row=current_row, column=0, pady=(0, 20), sticky="w")
+        for name in provider_list:
+            if name not in OFFICIAL_PROVIDERS:
+                continue
+            var = ctk.BooleanVar(value=False)
+            ctk.CTkCheckBox(
+                fallback_frame,
+                text=name,
+                variable=var,
+                font=("Arial", 12)
+            ).pack(anchor="w", pady=2)
+            self.fallback_vars[name] = var
+        current_row += 1
+
         # Knowledge Base selection
         ctk.CTkLabel(
             self.scrollable_frame,
@@ -175,23 +199,25 @@ class CreateAssistantFrame(ctk.CTkFrame):
         ).grid(row=current_row, column=0, pady=(0, 5), sticky="w")
         current_row += 1
         
-        # Récupérer les KBs disponibles
+        # Récupérer les KBs disponibles (plusieurs KBs peuvent être interrogées ensemble)
         kbs = self.app.data_manager.get_all_knowledge_bases()
-        kb_names = ["Aucune"] + [kb["name"] for kb in kbs]
         self.kb_map = {kb["name"]: kb["id"] for kb in kbs}
-        
-        # Trouver la KB actuelle si en mode édition? (Pour l'instant create only, mais on va assumer default)
-        default_kb = "Aucune"
-        # TODO: Si on ajoute le mode édition plus tard, il faudra charger la valeur ici
-        
-        self.kb_var = ctk.StringVar(value=default_kb)
-        self.kb_dropdown = ctk.CTkOptionMenu(
-            self.scrollable_frame,
-            values=kb_names,
-            variable=self.kb_var,
-            width=400
-        )
-        self.kb_dropdown.grid(row=current_row, column=0, pady=(0, 20), sticky="w")
+        self.kb_vars = {}
+        
+        # TODO: Si on ajoute le mode édition plus tard, il faudra cocher les KBs de l'assistant ici
+        kb_frame = ctk.CTkFrame(self.scrollable_frame, fg_color="transparent")
+        kb_frame.grid(row=current_row, column=0, pady=(0, 20), sticky="w")
+        if not kbs:
+            ctk.CTkLabel(kb_frame, text="Aucune base de connaissances", font=("Arial", 12)).pack(anchor="w")
+        for kb in kbs:
+            var = ctk.BooleanVar(value=False)
+            ctk.CTkCheckBox(
+                kb_frame,
+                text=kb["name"],
+                variable=var,
+                font=("Arial", 12)
+            ).pack(anchor="w", pady=2)
+            self.kb_vars[kb["id"]] = var
         current_row += 1
 
         # Scraping Solution selection
@@ -466,9 +492,10 @@ class CreateAssistantFrame(ctk.CTkFrame):
         provider = self.provider_var.get()
         scraping_solution = self.scraping_solution_var.get()
         
-        # Knowledge Base ID logic
-        kb_name = self.kb_var.get()
-        knowledge_base_id = self.kb_map.get(kb_name) if kb_name != "Aucune" else None
+        # Knowledge Base IDs logic (knowledge_base_id keeps the first one for older readers)
+        knowledge_base_ids = [kb_id for kb_id, var in self.kb_vars.items() if var.get()]
+        knowledge_base_id = knowledge_base_ids[0] if knowledge_base_ids else None
+        fallback_providers = [name for name, var in self.fallback_vars.items() if var.get() and name != provider]
 
         # Validation
         if not name:
@@ -505,7 +532,9 @@ class CreateAssistantFrame(ctk.CTkFrame):
             scraping_solution=scraping_solution,
             profile_id=profile_id,
             use_profile=use_profile,
-            knowledge_base_id=knowledge_base_id
+            knowledge_base_id=knowledge_base_id,
+            knowledge_base_ids=knowledge_base_ids,
+            fallback_providers=fallback_providers
         )
 
         # Mettre à jour le provider actif
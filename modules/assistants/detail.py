@@ -255,12 +255,33 @@ class AssistantDetailFrame(ctk.CTkFrame):
         )
         self.provider_dropdown.grid(row=19, column=0, pady=(0, 20), sticky="w")
 
+        # Fallback providers (tried in this order when the provider is rate-limited or unavailable)
+        ctk.CTkLabel(
+            self.scrollable_frame,
+            text="🛟 Providers de secours",
+            font=("Arial", 14, "bold")
+        ).grid(row=20, column=0, pady=(0, 5), sticky="w")
+        
+        fallback_providers = self.assistant.get("fallback_providers") or []
+        self.fallback_vars = {}
+        fallback_frame = ctk.CTkFrame(self.scrollable_frame, fg_color="transparent")
+        fallback_frame.grid(row=21, column=0, pady=(0, 20), sticky="w")
+        for name in provider_list:
+            var = ctk.BooleanVar(value=name in fallback_providers)
+            ctk.CTkCheckBox(
+                fallback_frame,
+                text=name,
+                variable=var,
+                font=("Arial", 12)
+            ).pack(anchor="w", pady=2)
+            self.fallback_vars[name] = var
+
         # Scraping Solution selection
         ctk.CTkLabel(
             self.scrollable_frame,
             text="🔧 Solution de Scraping",
             font=("Arial", 14, "bold")
-        ).grid(row=20, column=0, pady=(0, 5), sticky="w")
+        ).grid(row=22, column=0, pady=(0, 5), sticky="w")
         
         # Récupérer la solution par défaut depuis les settings
         default_solution = settings.get("scraping_solution", "scrapegraphai")
@@ -268,7 +289,7 @@ class AssistantDetailFrame(ctk.CTkFrame):
         
         self.scraping_solution_var = ctk.StringVar(value=current_solution)
         scraping_frame = ctk.CTkFrame(self.scrollable_frame, fg_color="transparent")
-        scraping_frame.grid(row=21, column=0, pady=(0, 20), sticky="w")
+        scraping_frame.grid(row=23, column=0, pady=(0, 20), sticky="w")
         
         radio_scrapegraph = ctk.CTkRadioButton(
             scraping_frame,
@@ -329,6 +350,8 @@ class AssistantDetailFrame(ctk.CTkFrame):
         url_instructions = self.text_url_instructions.get("1.0", "end-1c").strip()
         provider = self.provider_var.get()
         scraping_solution = self.scraping_solution_var.get()
+        # Checked in the order of the list; the main provider is never its own fallback
+        fallback_providers = [name for name, var in self.fallback_vars.items() if var.get() and name != provider]
         
         # Validation
         if not name:
@@ -364,6 +387,7 @@ class AssistantDetailFrame(ctk.CTkFrame):
             url_instructions=url_instructions,
             provider=provider,
             scraping_solution=scraping_solution,
+            fallback_providers=fallback_providers,
             profile_id=profile_id,
             use_profile=use_profile
         )
@@ -9,7 +9,7 @@ import traceback
 import matplotlib
 matplotlib.use("Agg")
 
-from core.services.llm_service import LLMService
+from core.services import async_llm_service
 
 class DataAnalysisService:
     def __init__(self, data_manager):
@@ -179,7 +179,7 @@ class DataAnalysisService:
 
         # Call LLM Service
         if kb_id and kb_id != "None":
-             success, response = LLMService.generate_response_with_rag(
+             success, response = async_llm_service.generate_response_with_rag(
                 provider_name=provider,
                 api_key=api_key,
                 messages=messages,
@@ -188,7 +188,7 @@ class DataAnalysisService:
                 model=settings.get("models", {}).get(provider)
             )
         else:
-            success, response = LLMService.generate_response(
+            success, response = async_llm_service.generate_response(
                 provider_name=provider,
                 api_key=api_key,
                 messages=messages,
@@ -262,7 +262,7 @@ Instructions:
         messages = [{"role": "user", "content": prompt}]
         
         if kb_id and kb_id != "None":
-            success, response = LLMService.generate_response_with_rag(
+            success, response = async_llm_service.generate_response_with_rag(
                 provider_name=provider,
                 api_key=api_key,
                 messages=messages,
@@ -271,7 +271,7 @@ Instructions:
                 model=settings.get("models", {}).get(provider)
             )
         else:
-            success, response = LLMService.generate_response(
+            success, response = async_llm_service.generate_response(
                 provider_name=provider,
                 api_key=api_key,
                 messages=messages,
@@ -1,7 +1,9 @@
 import os
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Union, Optional, Callable
 from pypdf import PdfReader
 from core.services.llm_service import LLMService
+from core.services.context_packer import ContextPacker, MIN_PARTIAL_TOKENS
+from core.services.provider_router import get_provider_router, is_failover_error
 
 class DocumentAnalysisService:
     """Service for analyzing documents."""
@@ -33,48 +35,32 @@ class DocumentAnalysisService:
         except Exception as e:
             return False, f"Erreur de lecture: {str(e)}"
 
-    def chat_with_document(self, document_context: str, user_question: str, history: List[Dict[str, str]], provider: str, kb_id: str = None) -> Tuple[bool, str]:
+    def chat_with_document(self, document_context: str, user_question: str, history: List[Dict[str, str]], provider: str, kb_id: Union[str, List[str], None] = None, on_delta: Optional[Callable[[str], None]] = None) -> Tuple[bool, str]:
         """
         Send context + history + question to LLM.
         Basic RAG-lite (Context Stuffing).
-        If kb_id is provided, uses RAG with Vector Store as well.
+        If kb_id is provided (one id or a list of ids), uses RAG with Vector Store as well.
+        If on_delta is provided, the answer is streamed to it while it is generated.
+        The module's fallback providers are tried when the provider is rate-limited or unavailable.
         """
         settings = self.data_manager.get_settings()
-        api_keys = settings.get("api_keys", {})
-        
-        # Mapping friendly names to HF Model IDs
-        hf_mapping = {
-            "Qwen 2.5 72B (Hugging Face)": "Qwen/Qwen2.5-72B-Instruct"
-        }
-        
-        target_model = None
-        kwargs = {}
-        
-        # Check if provider is one of our custom HF mappings
-        if provider in hf_mapping:
-            # Use the generic HF key
-            api_key = api_keys.get("Hugging Face (Mistral/Mixtral)")
-            target_model = hf_mapping[provider]
-            # Override provider name for LLMService routing
-            actual_provider = "Hugging Face" 
-            kwargs['model'] = target_model
-        else:
-            # Fallback for standard providers (legacy support or if expanded later)
-            api_key = api_keys.get(provider)
-            actual_provider = provider
-
-        # Handle IAKA/ScrapeGraph special cases or endpoint lookup
-        if "IAKA" in actual_provider:
-            endpoints = settings.get("endpoints", {})
-            kwargs['base_url'] = endpoints.get(provider)
-            # Find model name if stored
-            models = settings.get("models", {})
-            if models.get(provider):
-                kwargs['model'] = models.get(provider)
+        actual_provider, api_key, kwargs = self._provider_call_args(provider, settings)
 
         if not api_key:
             return False, f"Clé API non trouvée pour {provider}."
 
+        # Providers tried next on rate limits, quota, server errors and timeouts
+        chain = [provider] + [
+            name for name in self.data_manager.get_module_fallback_providers("doc_analyst")
+            if name != provider and self._provider_call_args(name, settings)[1]
+        ]
+        shared_kwargs = {}
+
+        # Response cache: the key covers the documents and module profile held in the system prompt
+        if settings.get("response_cache_enabled", True):
+            shared_kwargs['cache_scope'] = "module:doc_analyst"
+            shared_kwargs['semantic_cache'] = bool(settings.get("response_cache_semantic", False))
+
         # Construct Prompt using Module Profile
         module_config = self.data_manager.get_effective_module_config("doc_analyst")
         
@@ -98,6 +84,13 @@ class DocumentAnalysisService:
         if module_config.get("response_format"):
             format_part = f"\nFormat de réponse : {module_config['response_format']}"
 
+        # Keep the document sections most relevant to the question within the model's context budget
+        packer = ContextPacker(actual_provider, kwargs.get('model'), settings.get("context_budget_tokens"))
+        conversation_tokens = sum(packer.count(msg.get("content") or "") for msg in history) + packer.count(user_question)
+        document_context = packer.pack_document_context(
+            document_context, user_question, max(MIN_PARTIAL_TOKENS, packer.budget_tokens - conversation_tokens)
+        )
+
         system_prompt = f"""{system_intro}{context_part}{objective_part}{limits_part}{format_part}
 
 Voici le contenu des documents que tu dois analyser :
@@ -114,36 +107,67 @@ Réponds aux questions de l'utilisateur en te basant UNIQUEMENT sur ces document
 
         # Call LLM Service
         # Call LLM Service
-        if kb_id and kb_id != "None":
-            # Fetche KB Global Summary if available
-            global_context = ""
+        kb_ids = [kb_id] if isinstance(kb_id, str) else list(kb_id or [])
+        kb_ids = [k for k in kb_ids if k and k != "None"]
+        if kb_ids:
+            # Fetche KB Global Summary if available (one entry per document: the RAG packer ranks and trims them)
+            global_context = []
             try:
-                kb = self.data_manager.get_knowledge_base_by_id(kb_id)
-                if kb and "documents" in kb:
-                    summaries = []
-                    for doc in kb["documents"]:
-                        name = doc.get("name", "Document inconnu")
-                        summary = doc.get("summary", "Pas de résumé disponible")
-                        summaries.append(f"Document : {name}\nRésumé : {summary}")
-                    
-                    if summaries:
-                        global_context = "\n\n".join(summaries)
+                for current_kb_id in kb_ids:
+                    kb = self.data_manager.get_knowledge_base_by_id(current_kb_id)
+                    if kb and "documents" in kb:
+                        for doc in kb["documents"]:
+                            name = doc.get("name", "Document inconnu")
+                            summary = doc.get("summary", "Pas de résumé disponible")
+                            global_context.append(f"Document : {name}\nRésumé : {summary}")
             except Exception as e:
                 print(f"Error fetching KB summaries: {e}")
+            if settings.get("context_budget_tokens"):
+                shared_kwargs['context_budget'] = settings.get("context_budget_tokens")
 
-            # Use RAG with KB
-            # The RAG service will append KB context to the system prompt (which already holds document context)
-            success, response = LLMService.generate_response_with_rag(
-                actual_provider, 
-                api_key, 
-                messages, 
-                kb_id, 
-                global_context=global_context,
-                **kwargs
-            )
-        else:
+        # A streamed answer can only fail over before its first delta is displayed
+        streamed = [False]
+        def on_chunk(delta):
+            streamed[0] = True
+            on_delta(delta)
+
+        def attempt(name):
+            actual_provider, api_key, kwargs = self._provider_call_args(name, settings)
+            kwargs.update(shared_kwargs)
+            if kb_ids:
+                # Use RAG with KB
+                # The RAG service will append KB context to the system prompt (which already holds document context)
+                if on_delta is not None:
+                    return LLMService.generate_response_streamed(
+                        actual_provider,
+                        api_key,
+                        messages,
+                        on_chunk,
+                        kb_id=kb_ids,
+                        global_context=global_context,
+                        **kwargs
+                    )
+                return LLMService.generate_response_with_rag(
+                    actual_provider, 
+                    api_key, 
+                    messages, 
+                    kb_ids, 
+                    global_context=global_context,
+                    **kwargs
+                )
+            elif on_delta is not None:
+                # Streamed Call
+                return LLMService.generate_response_streamed(actual_provider, api_key, messages, on_chunk, **kwargs)
             # Standard Call
-            success, response = LLMService.generate_response(actual_provider, api_key, messages, **kwargs)
+            return LLMService.generate_response(actual_provider, api_key, messages, **kwargs)
+
+        success, response, _ = get_provider_router().call(
+            chain,
+            attempt,
+            hedge=on_delta is None and bool(settings.get("provider_hedging", False)),
+            order_by_latency=settings.get("provider_order_by_latency", True),
+            should_fail_over=lambda name, error: not streamed[0] and is_failover_error(error)
+        )
 
         # Better Error Handling for Context Issues
         if not success:
@@ -160,8 +184,49 @@ Réponds aux questions de l'utilisateur en te basant UNIQUEMENT sur ces document
         
         return success, response
 
+    def _provider_call_args(self, provider: str, settings: Dict[str, Any]) -> Tuple[str, Optional[str], Dict[str, Any]]:
+        """LLMService provider name, API key and model arguments for a provider of the selection list."""
+        api_keys = settings.get("api_keys", {})
+        
+        # Mapping friendly names to HF Model IDs
+        hf_mapping = {
+            "Qwen 2.5 72B (Hugging Face)": "Qwen/Qwen2.5-72B-Instruct"
+        }
+        
+        kwargs = {}
+        
+        # Check if provider is one of our custom HF mappings
+        if provider in hf_mapping:
+            # Use the generic HF key
+            api_key = api_keys.get("Hugging Face (Mistral/Mixtral)")
+            # Override provider name for LLMService routing
+            actual_provider = "Hugging Face" 
+            kwargs['model'] = hf_mapping[provider]
+        else:
+            # Fallback for standard providers (legacy support or if expanded later)
+            api_key = api_keys.get(provider)
+            actual_provider = provider
+
+        # Handle IAKA/ScrapeGraph special cases or endpoint lookup
+        if "IAKA" in actual_provider:
+            endpoints = settings.get("endpoints", {})
+            kwargs['base_url'] = endpoints.get(provider)
+            # Find model name if stored
+            models = settings.get("models", {})
+            if models.get(provider):
+                kwargs['model'] = models.get(provider)
+
+        return actual_provider, api_key, kwargs
+
     def get_all_conversations(self):
         return self.data_manager.get_doc_conversations()
+
+    def get_conversation_summaries(self):
+        """Conversations without their messages (for the history sidebar)."""
+        return self.data_manager.get_doc_conversation_summaries()
+
+    def get_conversation(self, conversation_id):
+        return self.data_manager.get_doc_conversation(conversation_id)
     
     def delete_conversation(self, conversation_id):
         self.data_manager.delete_doc_conversation(conversation_id)
@@ -7,6 +7,8 @@ try:
 except ImportError:
     Document = None
 from .service import DocumentAnalysisService
+from utils.stream_writer import CoalescedTextWriter
+from utils.history_sidebar import ConversationSidebar
 
 class DocAnalystFrame(ctk.CTkFrame):
     def __init__(self, master, app):
@@ -26,6 +28,28 @@ class DocAnalystFrame(ctk.CTkFrame):
         self.build_ui()
         # Load history initially
         self.after(100, self.refresh_history_list)
+        
+        # Provider list follows API keys saved from the settings page
+        self._configured_providers = self._providers_with_key(self.app.data_manager.get_settings())
+        self._unsubscribe_settings = self.app.data_manager.subscribe_settings(self._on_settings_changed)
+        self.bind("<Destroy>", lambda event: self._unsubscribe_settings(), add="+")
+
+    @staticmethod
+    def _providers_with_key(settings):
+        return sorted(p for p, key in settings.get("api_keys", {}).items() if key and key.strip())
+
+    def _on_settings_changed(self, settings, version):
+        """Settings subscriber (any thread)."""
+        configured = self._providers_with_key(settings)
+        if configured != self._configured_providers:
+            self._configured_providers = configured
+            self.after(0, self._refresh_provider_list)
+
+    def _refresh_provider_list(self):
+        selected = self.var_provider.get()
+        self.update_provider_list()
+        if selected in self.available_providers:
+            self.var_provider.set(selected)
 
     def build_ui(self):
         # 1. Header
@@ -72,6 +96,18 @@ class DocAnalystFrame(ctk.CTkFrame):
         
         self.scroll_history = ctk.CTkScrollableFrame(sidebar_panel, fg_color="transparent")
         self.scroll_history.pack(fill="both", expand=True, padx=5, pady=5)
+        self.history_sidebar = ConversationSidebar(
+            self.scroll_history,
+            on_select=self.open_conversation,
+            on_rename=self.rename_conversation_ui,
+            on_delete=self.delete_conversation_ui,
+            active_color=("gray85", "gray25"),
+            hover_color=("gray80", "gray30"),
+            height=30,
+            corner_radius=None,
+            action_width=30,
+            delete_color="red"
+        )
 
 
         # --- Middle: Chat Area ---
@@ -154,16 +190,12 @@ class DocAnalystFrame(ctk.CTkFrame):
         self.combo_profile.pack(pady=5, padx=20, fill="x")
         self.update_profile_list()
 
-        # Knowledge Base Selection (RAG)
-        ctk.CTkLabel(controls_panel, text="Base de Connaissances", font=("Arial", 12)).pack(pady=(10, 0))
+        # Knowledge Base Selection (RAG, plusieurs KBs peuvent être interrogées ensemble)
+        ctk.CTkLabel(controls_panel, text="Bases de Connaissances", font=("Arial", 12)).pack(pady=(10, 0))
         
-        self.var_kb = ctk.StringVar(value="Aucune")
-        self.combo_kb = ctk.CTkOptionMenu(
-            controls_panel,
-            variable=self.var_kb,
-            values=["Aucune"]
-        )
-        self.combo_kb.pack(pady=5, padx=20, fill="x")
+        self.kb_vars = {}
+        self.kb_frame = ctk.CTkFrame(controls_panel, fg_color="transparent")
+        self.kb_frame.pack(pady=5, padx=20, fill="x")
         self.update_kb_list()
 
         # Export Button at Bottom
@@ -241,12 +273,24 @@ class DocAnalystFrame(ctk.CTkFrame):
                 self.app.data_manager.set_module_profile("doc_analyst", profile["id"])
             
     def update_kb_list(self):
-        """Met à jour la liste des bases de connaissances."""
+        """Met à jour la liste des bases de connaissances (les KBs cochées le restent)."""
         kbs = self.app.data_manager.get_all_knowledge_bases()
-        kb_names = ["Aucune"] + [kb["name"] for kb in kbs]
-        self.kb_map = {kb["name"]: kb["id"] for kb in kbs}
-        self.combo_kb.configure(values=kb_names)
-        self.var_kb.set("Aucune")
+        selected = {kb_id for kb_id, var in self.kb_vars.items() if var.get()}
+        for widget in self.kb_frame.winfo_children():
+            widget.destroy()
+        self.kb_vars = {}
+        
+        if not kbs:
+            ctk.CTkLabel(self.kb_frame, text="Aucune base de connaissances", font=("Arial", 12)).pack(anchor="w")
+        for kb in kbs:
+            var = ctk.BooleanVar(value=kb["id"] in selected)
+            ctk.CTkCheckBox(
+                self.kb_frame,
+                text=kb["name"],
+                variable=var,
+                font=("Arial", 12)
+            ).pack(anchor="w", pady=2)
+            self.kb_vars[kb["id"]] = var
             
             
     # --- Conversation Management ---
@@ -267,63 +311,16 @@ class DocAnalystFrame(ctk.CTkFrame):
         self.append_chat("System", "Nouvelle conversation démarrée.")
 
     def refresh_history_list(self):
-        # Clear sidebar
-        for widget in self.scroll_history.winfo_children():
-            widget.destroy()
-            
-        conversations = self.service.get_all_conversations()
-        # Sort by updated_at desc usually
-        try:
-            conversations.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
-        except:
-            pass # Handle legacy or malformed dates gracefully
+        # Index only: documents and messages are loaded when a conversation is opened
+        summaries = self.service.get_conversation_summaries()
+        self.history_sidebar.update(summaries, self.current_conversation_id)
 
-        for conv in conversations:
-            f = ctk.CTkFrame(self.scroll_history, fg_color="transparent")
-            f.pack(fill="x", pady=2)
-            
-            # Determine highlighting
-            is_active = (self.current_conversation_id == conv["id"])
-            bg_color = ("gray85", "gray25") if is_active else "transparent"
-            text_weight = "bold" if is_active else "normal"
-
-            # Title Button
-            btn = ctk.CTkButton(
-                f,
-                text=conv.get("title", "Sans titre"),
-                anchor="w",
-                fg_color=bg_color,
-                text_color=("black", "white"),
-                hover_color=("gray80", "gray30"),
-                font=("Arial", 12, text_weight),
-                height=30,
-                command=lambda c=conv: self.load_conversation(c)
-            )
-            btn.pack(side="left", fill="x", expand=True)
-
-            # Rename Button
-            rename_btn = ctk.CTkButton(
-                f,
-                text="✎",
-                width=30,
-                fg_color="transparent",
-                text_color="gray",
-                hover_color=("gray90", "gray40"),
-                command=lambda cid=conv["id"]: self.rename_conversation_ui(cid)
-            )
-            rename_btn.pack(side="right", padx=(2, 0))
-            
-            # Delete Button
-            del_btn = ctk.CTkButton(
-                f,
-                text="X",
-                width=30,
-                fg_color="transparent",
-                text_color="red",
-                hover_color=("mistyrose", "darkred"),
-                command=lambda cid=conv["id"]: self.delete_conversation_ui(cid)
-            )
-            del_btn.pack(side="right")
+    def open_conversation(self, conversation_id):
+        conversation = self.service.get_conversation(conversation_id)
+        if conversation is None:
+            self.refresh_history_list()
+            return
+        self.load_conversation(conversation)
 
     def rename_conversation_ui(self, conversation_id):
         dialog = ctk.CTkInputDialog(text="Nouveau nom de conversation :", title="Renommer")
@@ -357,6 +354,7 @@ class DocAnalystFrame(ctk.CTkFrame):
             
         self.chat_display.see("end")
         self.chat_display.configure(state="disabled")
+        self.refresh_history_list()
 
     def delete_conversation_ui(self, conversation_id):
         if messagebox.askyesno("Confirmer", "Supprimer cette conversation ?"):
@@ -478,14 +476,13 @@ class DocAnalystFrame(ctk.CTkFrame):
         # self._save_current_state() # wait for response to save complete pair?
 
         # Threaded call
-        kb_name = self.var_kb.get()
-        kb_id = self.kb_map.get(kb_name) if hasattr(self, 'kb_map') and kb_name != "Aucune" else None
+        kb_ids = [kb_id for kb_id, var in self.kb_vars.items() if var.get()] or None
         
-        thread = threading.Thread(target=self._chat_thread, args=(msg, provider, kb_id))
+        thread = threading.Thread(target=self._chat_thread, args=(msg, provider, kb_ids))
         thread.daemon = True
         thread.start()
 
-    def _chat_thread(self, msg, provider, kb_id=None):
+    def _chat_thread(self, msg, provider, kb_ids=None):
         # Combine all documents
         full_context = ""
         for doc in self.documents:
@@ -493,21 +490,48 @@ class DocAnalystFrame(ctk.CTkFrame):
             full_context += doc['content'] + "\n"
             full_context += f"--- FIN DOCUMENT: {doc['name']} ---\n\n"
 
+        # The answer is rendered while it is generated, one widget update per 50 ms;
+        # once streamed, the response is handled after the writer's last flush
+        result = {}
+        writer = CoalescedTextWriter(
+            self.chat_display,
+            prefix="\n[Assistant]: ",
+            on_done=lambda text: self._on_response(result["success"], result["response"], msg, streamed=True)
+        )
+        streamed = []
+
+        def on_delta(delta):
+            if not streamed:
+                self.after(0, writer.start)
+            streamed.append(delta)
+            writer.write(delta)
+
         success, response = self.service.chat_with_document(
             full_context,
             msg,
             self.chat_history,
             provider,
-            kb_id=kb_id
+            kb_id=kb_ids,
+            on_delta=on_delta
         )
-        self.after(0, lambda: self._on_response(success, response, msg))
+        result.update(success=success, response=response)
+        if streamed:
+            writer.close()
+        else:
+            self.after(0, lambda: self._on_response(success, response, msg))
 
-    def _on_response(self, success, response, user_msg):
+    def _on_response(self, success, response, user_msg, streamed=False):
         self.progress_bar.stop()
         self.progress_bar.grid_forget() # Hide loading
         self.btn_send.configure(state="normal")
         if success:
-            self.append_chat("Assistant", response)
+            if streamed:
+                # Already rendered by the stream writer
+                self.chat_display.configure(state="normal")
+                self.chat_display.insert("end", "\n")
+                self.chat_display.configure(state="disabled")
+            else:
+                self.append_chat("Assistant", response)
             # Add to history
             self.chat_history.append({"role": "user", "content": user_msg})
             self.chat_history.append({"role": "assistant", "content": response})
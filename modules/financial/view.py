@@ -306,7 +306,7 @@ class FinancialAnalysisFrame(ctk.CTkFrame):
         # Home page uses self.app.show_chat which uses ChatFrame which uses LLMService.
         # I'll instantiate LLMService here or reuse logic.
         
-        from core.services.llm_service import LLMService
+        from core.services import async_llm_service
 
         # Get Settings
         settings = self.app.data_manager.get_settings()
@@ -322,7 +322,7 @@ class FinancialAnalysisFrame(ctk.CTkFrame):
         messages = [{"role": "user", "content": context}]
 
         # Call Service (Static method)
-        success, response_text = LLMService.generate_response(provider, api_key, messages)
+        success, response_text = async_llm_service.generate_response(provider, api_key, messages)
         
         if not success:
              response_text = f"Erreur IA: {response_text}"
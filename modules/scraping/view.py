@@ -300,7 +300,7 @@ class ScrapingFrame(ctk.CTkFrame):
 
     def _run_analysis_thread(self):
         try:
-            from core.services.llm_service import LLMService
+            from core.services import async_llm_service
             
             settings = self.app.data_manager.get_settings()
             # Use Chat Provider for analysis
@@ -344,7 +344,7 @@ class ScrapingFrame(ctk.CTkFrame):
             
             messages = [{"role": "user", "content": prompt}]
             
-            success, response = LLMService.generate_response(provider, api_key, messages)
+            success, response = async_llm_service.generate_response(provider, api_key, messages)
             
             if success:
                 self.after(0, lambda: self.append_chat("Assistant", response))
@@ -376,7 +376,7 @@ class ScrapingFrame(ctk.CTkFrame):
     def _run_interactive_chat_thread(self, user_msg):
          # Similar to analysis but with user query
          try:
-            from core.services.llm_service import LLMService
+            from core.services import async_llm_service
             
             settings = self.app.data_manager.get_settings()
             provider = settings.get("chat_provider", "OpenAI GPT-4o mini")
@@ -405,7 +405,7 @@ class ScrapingFrame(ctk.CTkFrame):
                 {"role": "user", "content": user_msg}
             ]
             
-            success, response = LLMService.generate_response(provider, api_key, messages)
+            success, response = async_llm_service.generate_response(provider, api_key, messages)
             
             if success:
                 self.after(0, lambda: self.append_chat("Assistant", response))
@@ -254,6 +254,7 @@ class ChatConnectorFrame(ctk.CTkFrame):
             self.combo_model.set(saved_model)
         else:
             self.combo_model.set("Cliquez sur Rafraîchir ->")
+        self.load_cached_models()
 
         btn_refresh = ctk.CTkButton(
             model_frame, 
@@ -336,43 +337,66 @@ class ChatConnectorFrame(ctk.CTkFrame):
             self.btn_show_hide.configure(text="👁️")
 
     def fetch_models_list(self):
-        """Call LLMService to get models."""
+        """Refresh the model list in the background (LLMService model cache)."""
         api_key = self.entry_key.get().strip()
         if not api_key:
             messagebox.showerror("Erreur", "Veuillez entrer une clé API d'abord.")
             return
 
         self.add_log(f"Récupération des modèles pour {self.selected_provider}...", "info")
-        
+        self._request_models(api_key, force_refresh=True)
+
+    def load_cached_models(self):
+        """Fill the model list from the cache right away; a stale or missing list is refreshed in the background."""
+        api_key = self.entry_key.get().strip()
+        if not api_key:
+            return
+        models = self._request_models(api_key)
+        if models:
+            self._show_models(models, select_first=False)
+
+    def _request_models(self, api_key, force_refresh=False):
+        provider = self.selected_provider
         kwargs = {}
         if self.entry_endpoint:
             kwargs['base_url'] = self.entry_endpoint.get().strip()
-            
-        models = LLMService.fetch_models(self.selected_provider, api_key, **kwargs)
-        
+
+        def on_update(models):
+            # Called from the refresh thread: back to the Tk loop
+            self.after(0, lambda: self._on_models_fetched(provider, models, force_refresh))
+
+        return LLMService.fetch_models_cached(provider, api_key, on_update=on_update, force_refresh=force_refresh, **kwargs)
+
+    def _on_models_fetched(self, provider, models, announce):
+        if provider != self.selected_provider or not self.combo_model.winfo_exists():
+            return
         if models and not models[0].startswith("Erreur"):
-            # Annotate Free Models
-            display_models = []
-            for m in models:
-                is_free = False
-                
-                # Logic to identify free models
-                if self.selected_provider in ["Groq", "Hugging Face", "IAKA (Interne)"]:
-                    is_free = True
-                elif "Gemini" in self.selected_provider and "flash" in m.lower():
-                    is_free = True # Gemini Flash is free tier
-                
-                if is_free:
-                    display_models.append(f"{m} (GRATUIT)")
-                else:
-                    display_models.append(m)
-            
-            self.combo_model.configure(values=display_models)
-            self.combo_model.set(display_models[0])
+            self._show_models(models, select_first=announce)
             self.add_log(f"{len(models)} modèles trouvés.", "success")
         else:
-            self.add_log(f"Erreur récupération: {models[0]}", "error")
+            self.add_log(f"Erreur récupération: {models[0] if models else 'liste vide'}", "error")
             # If error, maybe allow manual entry or keep previous
+
+    def _show_models(self, models, select_first=True):
+        # Annotate Free Models
+        display_models = []
+        for m in models:
+            is_free = False
+            
+            # Logic to identify free models
+            if self.selected_provider in ["Groq", "Hugging Face", "IAKA (Interne)"]:
+                is_free = True
+            elif "Gemini" in self.selected_provider and "flash" in m.lower():
+                is_free = True # Gemini Flash is free tier
+            
+            if is_free:
+                display_models.append(f"{m} (GRATUIT)")
+            else:
+                display_models.append(m)
+        
+        self.combo_model.configure(values=display_models)
+        if select_first or not self.models.get(self.selected_provider):
+            self.combo_model.set(display_models[0])
             
     def save_config(self):
         api_key = self.entry_key.get().strip()
@@ -11,6 +11,20 @@ from typing import Optional
 
 from core.services.vector_store_service import VectorStoreService
 from core.services.document_ingestion_service import DocumentIngestionService
+from core.services.embedding_service import EmbeddingService
+from core.services.summary_jobs import get_summary_journal, DEFAULT_SUMMARY_WORKERS
+
+# Interval between checks of the embedding model pre-load
+MODEL_POLL_INTERVAL_MS = 150
+
+# Vector storage choices offered when creating a knowledge base (label -> (backend, storage mode))
+STORAGE_OPTIONS = {
+    "ChromaDB standard (float32)": ("chroma", "float32"),
+    "Index local exact NumPy (float32)": ("numpy", "float32"),
+    "Compact int8 (mémoire ÷4, re-classement float32)": ("numpy", "int8"),
+    "Compact float16 (mémoire ÷2)": ("numpy", "float16"),
+    "Graphe HNSW local (très grandes bases)": ("hnsw", "float32")
+}
 
 
 class KnowledgeBaseManagerFrame(ctk.CTkFrame):
@@ -40,9 +54,10 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
         self.content_frame.grid(row=1, column=0, sticky="nsew", padx=40, pady=20)
         self.content_frame.grid_columnconfigure(0, weight=1)
         
-        # Start initialization process
+        # Start initialization process (the embedding model loads in a background thread)
         self.show_loading_view()
-        self.after(100, self._initialize_services)
+        self._model_future = EmbeddingService.preload_in_background()
+        self.after(100, self._wait_for_model)
         
     def show_loading_view(self):
         """Show loading indicator during initialization."""
@@ -67,12 +82,27 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
         self.loading_bar.configure(mode="indeterminate")
         self.loading_bar.start()
 
+    def _wait_for_model(self):
+        """Poll the embedding model pre-load without blocking the Tk loop."""
+        if not self.winfo_exists():
+            return
+        if not self._model_future.done():
+            self.after(MODEL_POLL_INTERVAL_MS, self._wait_for_model)
+            return
+        self._initialize_services()
+
     def _initialize_services(self):
         """Initialize heavy services in background-like manner."""
         try:
             # Force UI update to show loader
             self.update_idletasks()
             
+            # Surface a failed model pre-load (a retry starts a new one)
+            if self._model_future.exception() is not None:
+                error = self._model_future.exception()
+                self._model_future = EmbeddingService.preload_in_background()
+                raise error
+
             # Initialize services (Triggering heavy lazy imports)
             if self.vector_store is None:
                 self.vector_store = VectorStoreService()
@@ -93,7 +123,7 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
             btn_retry = ctk.CTkButton(
                 self.content_frame, 
                 text="Réessayer", 
-                command=self._initialize_services
+                command=self._wait_for_model
             )
             btn_retry.grid(row=2, column=0, pady=20)
     
@@ -253,6 +283,10 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
         
         # Stats
         stats_text = f"{kb.get('document_count', 0)} documents • {kb.get('chunk_count', 0)} chunks"
+        if kb.get("vector_backend", "chroma") != "chroma":
+            stats_text += f" • index {kb['vector_backend']}"
+        if kb.get("storage", "float32") != "float32":
+            stats_text += f" • stockage {kb['storage']}"
         stats_label = ctk.CTkLabel(
             card,
             text=stats_text,
@@ -344,9 +378,24 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
         )
         self.desc_entry.grid(row=1, column=1, sticky="ew", padx=20, pady=10)
         
+        # Vector storage
+        ctk.CTkLabel(
+            form_frame,
+            text="Stockage:",
+            font=("Arial", 14)
+        ).grid(row=2, column=0, sticky="w", padx=20, pady=10)
+        
+        self.var_storage = ctk.StringVar(value=list(STORAGE_OPTIONS.keys())[0])
+        ctk.CTkOptionMenu(
+            form_frame,
+            variable=self.var_storage,
+            values=list(STORAGE_OPTIONS.keys()),
+            width=400
+        ).grid(row=2, column=1, sticky="w", padx=20, pady=10)
+        
         # Buttons
         btn_frame = ctk.CTkFrame(form_frame, fg_color="transparent")
-        btn_frame.grid(row=2, column=0, columnspan=2, pady=20)
+        btn_frame.grid(row=3, column=0, columnspan=2, pady=20)
         
         btn_cancel = ctk.CTkButton(
             btn_frame,
@@ -375,12 +424,14 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
             messagebox.showerror("Erreur", "Le nom est obligatoire")
             return
         
+        backend, storage = STORAGE_OPTIONS.get(self.var_storage.get(), ("chroma", "float32"))
+        
         try:
             # Create in DataManager
-            kb = self.data_manager.save_knowledge_base(name, description)
+            kb = self.data_manager.save_knowledge_base(name, description, storage=storage, vector_backend=backend)
             
             # Create in VectorStore
-            self.vector_store.create_knowledge_base(kb["id"], name, description)
+            self.vector_store.create_knowledge_base(kb["id"], name, description, storage=storage, backend=backend)
             
             messagebox.showinfo("Succès", f"Base de connaissances '{name}' créée !")
             self.show_index_view(kb["id"])
@@ -535,6 +586,7 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
         self.stats_frame.grid(row=6, column=0, sticky="ew", pady=10)
         
         self.update_stats_display(kb)
+        self._resume_summaries(kb_id)
 
     def update_provider_list(self):
         # reuse logic from other views or just get keys
@@ -652,34 +704,36 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
             self.progress_label.configure(text=message)
             self.progress_bar.set(progress)
         
+        kb_id = self.current_kb_id
+        
+        # Save metadata of each (re)indexed file as soon as its summary is ready,
+        # replacing the previous entry of modified files
+        def on_summary(file_path: str, doc_id: str, summary: str):
+            self._save_document_summary(kb_id, file_path, doc_id, summary)
+        
         try:
-            import datetime
-            import uuid
-            
+            settings = self.data_manager.get_settings()
             result = self.ingestion_service.ingest_folder(
                 self.current_kb_id,
                 folder_path,
                 progress_callback,
                 provider=provider,
-                api_key=api_key
+                api_key=api_key,
+                workers=settings.get("ingestion_workers"),
+                on_summary=on_summary,
+                summary_workers=settings.get("summary_workers", DEFAULT_SUMMARY_WORKERS)
             )
             
-            # Save metadata for each file
-            if result.get("summaries"):
-                for fpath, summary in result["summaries"].items():
-                    fname = os.path.basename(fpath)
-                    doc_meta = {
-                        "id": str(uuid.uuid4()),
-                        "name": fname,
-                        "summary": summary,
-                        "added_at": datetime.datetime.now().isoformat()
-                    }
-                    self.data_manager.add_document_to_kb(self.current_kb_id, doc_meta)
+            # Deleted files, and files whose summary was saved before their chunks failed
+            self.data_manager.remove_documents_from_kb(
+                self.current_kb_id,
+                result.get("removed_document_ids", []) + result.get("failed_document_ids", [])
+            )
             
             # Update stats
             kb = self.data_manager.get_knowledge_base_by_id(self.current_kb_id)
             current_doc_count = kb.get("document_count", 0) if kb else 0
-            new_doc_count = current_doc_count + result["files_processed"]
+            new_doc_count = max(0, current_doc_count + result.get("files_new", 0) - result.get("files_removed", 0))
             
             stats = self.vector_store.get_stats(self.current_kb_id)
             self.data_manager.update_knowledge_base(
@@ -693,9 +747,16 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
             self.update_stats_display(kb)
             
             if result["success"]:
+                cache_info = ""
+                cache_stats = result.get("embedding_cache")
+                if cache_stats and (cache_stats["hits"] + cache_stats["misses"]) > 0:
+                    cache_info = f"\n{cache_stats['hits']} embeddings réutilisés depuis le cache ({cache_stats['hit_rate']:.0%})"
                 messagebox.showinfo(
                     "Succès",
-                    f"Indexation terminée !\n{result['files_processed']} fichiers traités\n{result['chunks_created']} chunks créés"
+                    f"Indexation terminée !\n{result['files_processed']} fichiers traités "
+                    f"({result.get('files_new', 0)} nouveaux, {result.get('files_updated', 0)} modifiés)\n"
+                    f"{result.get('files_skipped', 0)} fichiers inchangés ignorés, {result.get('files_removed', 0)} supprimés\n"
+                    f"{result['chunks_created']} chunks créés{cache_info}"
                 )
             else:
                 messagebox.showwarning(
@@ -716,6 +777,47 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
                 f"Une erreur est survenue lors de l'indexation du dossier:\n{str(e)}\n\nConsultez la console pour plus de détails."
             ))
     
+    def _save_document_summary(self, kb_id: str, file_path: str, doc_id: str, summary: str):
+        """Save the metadata entry of an indexed file (called from ingestion threads)."""
+        import datetime
+        
+        doc_meta = {
+            "id": doc_id,
+            "name": os.path.basename(file_path),
+            "summary": summary,
+            "added_at": datetime.datetime.now().isoformat()
+        }
+        self.data_manager.add_document_to_kb(kb_id, doc_meta)
+    
+    def _resume_summaries(self, kb_id: str):
+        """Generate in the background the summaries an interrupted import left pending."""
+        journal = get_summary_journal(kb_id)
+        # Nothing to do, or an import / earlier resume is already generating this KB's summaries
+        if not journal.pending() or journal.in_use():
+            return
+        
+        def run():
+            settings = self.data_manager.get_settings()
+            api_keys = settings.get("api_keys", {})
+            
+            def on_summary(file_path: str, doc_id: str, summary: str):
+                # Only documents that made it into the knowledge base get their summary updated
+                kb = self.data_manager.get_knowledge_base_by_id(kb_id)
+                if kb and any(d.get("id") == doc_id for d in kb.get("documents", [])):
+                    self._save_document_summary(kb_id, file_path, doc_id, summary)
+            
+            try:
+                self.ingestion_service.resume_summaries(
+                    kb_id,
+                    api_keys.get,
+                    on_summary=on_summary,
+                    summary_workers=settings.get("summary_workers", DEFAULT_SUMMARY_WORKERS)
+                )
+            except Exception as e:
+                print(f"Error resuming summaries: {e}")
+        
+        threading.Thread(target=run, name="summary-resume", daemon=True).start()
+    
     def _ingest_file_thread(self, file_path: str, provider: str, api_key: str):
         """Ingest file in background thread."""
         def progress_callback(message: str, progress: float):
@@ -734,11 +836,16 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
                 api_key=api_key
             )
             
+            # A re-indexed file replaces its existing entry, an unchanged one keeps it
+            kb = self.data_manager.get_knowledge_base_by_id(self.current_kb_id)
+            known_ids = {d.get("id") for d in kb.get("documents", [])} if kb else set()
+            is_new_document = result["success"] and not result.get("skipped") and result.get("document_id") not in known_ids
+            
             # Save metadata
-            if result.get("success"):
+            if result.get("success") and not result.get("skipped"):
                 fname = os.path.basename(file_path)
                 doc_meta = {
-                    "id": str(uuid.uuid4()),
+                    "id": result.get("document_id", str(uuid.uuid4())),
                     "name": fname,
                     "summary": result.get("summary", ""),
                     "added_at": datetime.datetime.now().isoformat()
@@ -746,9 +853,8 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
                 self.data_manager.add_document_to_kb(self.current_kb_id, doc_meta)
             
             # Update stats
-            kb = self.data_manager.get_knowledge_base_by_id(self.current_kb_id)
             current_doc_count = kb.get("document_count", 0) if kb else 0
-            new_doc_count = current_doc_count + 1 if result["success"] else current_doc_count
+            new_doc_count = current_doc_count + 1 if is_new_document else current_doc_count
             
             stats = self.vector_store.get_stats(self.current_kb_id)
             self.data_manager.update_knowledge_base(
@@ -764,7 +870,11 @@ class KnowledgeBaseManagerFrame(ctk.CTkFrame):
             # My previous code was unsafe! Fixing it now.
             self.after(0, lambda: self.update_stats_display(kb))
             
-            if result["success"]:
+            if result.get("skipped"):
+                self.after(0, lambda: messagebox.showinfo("Succès", "Fichier inchangé depuis sa dernière indexation, rien à faire."))
+                self.progress_label.configure(text="Fichier inchangé")
+                self.progress_bar.set(1.0)
+            elif result["success"]:
                 self.after(0, lambda: messagebox.showinfo("Succès", f"Fichier indexé avec succès !\nSummary: {result.get('summary', 'N/A')[:50]}..."))
                 self.progress_label.configure(text="Indexation terminée")
                 self.progress_bar.set(1.0)
@@ -114,6 +114,13 @@ class AdminFrame(ctk.CTkFrame):
         # Separator
         separator_kb = ctk.CTkFrame(self.content_frame, height=2, fg_color=("gray80", "gray30"))
         separator_kb.grid(row=13, column=0, sticky="ew", pady=30)
+        
+        # Module Fallback Providers Section
+        self.create_fallback_section()
+        
+        # Separator
+        separator_fallback = ctk.CTkFrame(self.content_frame, height=2, fg_color=("gray80", "gray30"))
+        separator_fallback.grid(row=15, column=0, sticky="ew", pady=30)
  
         self.create_system_info_section()
 
@@ -447,10 +454,79 @@ class AdminFrame(ctk.CTkFrame):
         btn_manage.grid(row=0, column=2, rowspan=3, padx=20, pady=20)
 
 
+    def create_fallback_section(self):
+        """Section pour les providers de secours des modules."""
+        fallback_frame = ctk.CTkFrame(self.content_frame, fg_color=("gray95", "gray20"), corner_radius=12)
+        fallback_frame.grid(row=14, column=0, sticky="ew", pady=10)
+        fallback_frame.grid_columnconfigure(1, weight=1)
+        
+        # Icon and title
+        icon_label = ctk.CTkLabel(fallback_frame, text="🛟", font=("Arial", 32))
+        icon_label.grid(row=0, column=0, rowspan=3, padx=20, pady=20)
+        
+        title_label = ctk.CTkLabel(
+            fallback_frame,
+            text="Providers de secours - Analyse de Documents",
+            font=("Arial", 16, "bold")
+        )
+        title_label.grid(row=0, column=1, sticky="w", pady=(20, 5))
+        
+        desc_label = ctk.CTkLabel(
+            fallback_frame,
+            text="Essayés dans cet ordre quand le provider du module est limité ou indisponible.\nLes providers des assistants se configurent sur chaque assistant.",
+            font=("Arial", 12),
+            text_color=("gray30", "gray70"),
+            justify="left"
+        )
+        desc_label.grid(row=1, column=1, sticky="w", pady=(0, 10))
+        
+        # Liste officielle des providers (seuls ceux avec une clé API sont proposés)
+        OFFICIAL_PROVIDERS = [
+            "OpenAI",
+            "Google Gemini",
+            "Anthropic Claude",
+            "Groq",
+            "Mistral AI",
+            "Hugging Face",
+            "DeepSeek",
+            "IAKA (Interne)"
+        ]
+        configured = [p for p in OFFICIAL_PROVIDERS if self.api_keys.get(p) and self.api_keys[p].strip()]
+        current_chain = self.app.data_manager.get_module_fallback_providers("doc_analyst")
+        
+        self.doc_fallback_vars = {}
+        checks_frame = ctk.CTkFrame(fallback_frame, fg_color="transparent")
+        checks_frame.grid(row=2, column=1, sticky="w", pady=(0, 15))
+        if not configured:
+            ctk.CTkLabel(checks_frame, text="Aucun provider configuré", font=("Arial", 12)).pack(anchor="w")
+        for name in configured:
+            var = ctk.BooleanVar(value=name in current_chain)
+            ctk.CTkCheckBox(
+                checks_frame,
+                text=name,
+                variable=var,
+                font=("Arial", 12)
+            ).pack(anchor="w", pady=2)
+            self.doc_fallback_vars[name] = var
+        
+        btn_save = ctk.CTkButton(
+            fallback_frame,
+            text="💾 Enregistrer",
+            width=100,
+            command=self.save_fallback_providers
+        )
+        btn_save.grid(row=0, column=2, rowspan=3, padx=20, pady=20)
+
+    def save_fallback_providers(self):
+        providers = [name for name, var in self.doc_fallback_vars.items() if var.get()]
+        self.app.data_manager.set_module_fallback_providers("doc_analyst", providers)
+        self.settings = self.app.data_manager.get_settings()
+        messagebox.showinfo("Succès", "Providers de secours enregistrés !")
+
     def create_system_info_section(self):
         """Section d'informations système."""
         info_frame = ctk.CTkFrame(self.content_frame, fg_color=("gray95", "gray20"), corner_radius=12)
-        info_frame.grid(row=14, column=0, sticky="ew", pady=10)
+        info_frame.grid(row=16, column=0, sticky="ew", pady=10)
 
         title_label = ctk.CTkLabel(
             info_frame,
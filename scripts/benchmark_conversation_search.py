@@ -0,0 +1,133 @@
+"""
+Benchmark the conversation search index (SQLite FTS5): indexing throughput and query latency
+(rare, frequent and multi-word queries, with and without module/assistant/date filters).
+
+Usage:
+    python scripts/benchmark_conversation_search.py [messages]
+
+    messages: number of indexed messages (default: 1000000)
+"""
+import sys
+import os
+import datetime
+import itertools
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.managers.conversation_search import ConversationSearchIndex
+
+MESSAGES_PER_CONVERSATION = 100
+VOCABULARY_SIZE = 20000
+N_QUERIES = 20
+N_RANDOM_QUERIES = 300
+MODULES = ["assistants", "scraping", "financial", "data_viz", "doc_analyst"]
+
+
+def make_vocabulary(rng):
+    syllables = ["ba", "ce", "di", "fo", "gu", "la", "me", "ni", "po", "ru", "sa", "te", "vi", "zo", "an", "ou"]
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def build(index, n_messages, rng, vocabulary):
+    # Zipf-like word frequencies, as in natural text
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    start_date = datetime.datetime(2024, 1, 1)
+    n_conversations = max(1, n_messages // MESSAGES_PER_CONVERSATION)
+    for c in range(n_conversations):
+        module = MODULES[c % len(MODULES)]
+        date = start_date + datetime.timedelta(minutes=c * 60)
+        messages = [
+            {
+                "role": "Utilisateur" if i % 2 == 0 else "Assistant",
+                "content": " ".join(rng.choices(vocabulary, cum_weights=weights, k=rng.randint(10, 60))),
+                "timestamp": str(date + datetime.timedelta(seconds=i))
+            }
+            for i in range(MESSAGES_PER_CONVERSATION)
+        ]
+        index.index_conversation(module, None if module == "doc_analyst" else f"assistant-{c % 40}", {
+            "id": f"conv-{c}", "title": f"Conversation {c}", "updated_at": str(date), "messages": messages
+        })
+    return start_date, start_date + datetime.timedelta(minutes=n_conversations * 60)
+
+
+def timed(run):
+    latencies = []
+    for _ in range(N_QUERIES):
+        start = time.perf_counter()
+        results = run()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), max(latencies), len(results)
+
+
+def main():
+    n_messages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    root = tempfile.mkdtemp()
+    index = ConversationSearchIndex(os.path.join(root, "conversation_search.db"))
+    try:
+        start = time.perf_counter()
+        first_date, last_date = build(index, n_messages, rng, vocabulary)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        index.optimize()
+        optimize_time = time.perf_counter() - start
+        size_mb = os.path.getsize(index.store.path) / 1e6
+
+        print("=" * 78)
+        print(f"{index.count()} messages indexed in {build_time:.1f}s "
+              f"(optimize {optimize_time:.1f}s, {size_mb:.0f} MB)")
+        print("=" * 78)
+
+        middle = first_date + (last_date - first_date) / 2
+        # vocabulary[20] is just under COMMON_WORD_SHARE: the most expensive word still ranked
+        frequent, mid, common, rare = vocabulary[0], vocabulary[20], vocabulary[50], vocabulary[-1]
+        queries = [
+            ("rare word", dict(query=rare)),
+            ("common word", dict(query=common)),
+            ("mid-frequency word", dict(query=mid)),
+            ("most frequent word", dict(query=frequent)),
+            ("three words", dict(query=f"{frequent} {mid} {common}")),
+            ("mid + module", dict(query=mid, module="assistants")),
+            ("mid + assistant", dict(query=mid, assistant_id="assistant-7")),
+            ("mid + one week", dict(query=mid, since=middle, until=middle + datetime.timedelta(days=6))),
+            ("mid + older half", dict(query=mid, until=middle)),
+            ("two words + assistant", dict(query=f"{mid} {common}", assistant_id="assistant-7", since=middle)),
+            ("rare + assistant", dict(query=rare, module="assistants", assistant_id="assistant-5")),
+        ]
+        print(f"{'Query':<26}{'median (ms)':>14}{'max (ms)':>12}{'results':>10}")
+        for label, kwargs in queries:
+            median_ms, max_ms, count = timed(lambda: index.search(**kwargs))
+            print(f"{label:<26}{median_ms:>14.2f}{max_ms:>12.2f}{count:>10}")
+
+        # Random mix: 1-4 words among the most frequent ones, random filters
+        latencies = []
+        for _ in range(N_RANDOM_QUERIES):
+            kwargs = dict(query=" ".join(rng.choice(vocabulary[:300]) for _ in range(rng.randint(1, 4))))
+            if rng.random() < 0.5:
+                kwargs["module"] = rng.choice(MODULES)
+            if rng.random() < 0.3:
+                kwargs["assistant_id"] = f"assistant-{rng.randrange(40)}"
+            if rng.random() < 0.3:
+                kwargs["since"] = first_date + (last_date - first_date) * rng.random()
+            start = time.perf_counter()
+            index.search(**kwargs)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        print(f"\n{N_RANDOM_QUERIES} random queries: median {statistics.median(latencies):.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)]:.2f} ms, max {latencies[-1]:.2f} ms")
+    finally:
+        index.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
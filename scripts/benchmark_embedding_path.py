@@ -0,0 +1,48 @@
+"""
+Benchmark the memory cost of the list-based vs ndarray-based embedding path.
+Simulates the vectors produced for a large folder without loading the model.
+
+Usage:
+    python scripts/benchmark_embedding_path.py [nombre_de_chunks]
+"""
+import sys
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.vector_store_service import as_embedding_matrix
+
+DIMENSION = 384
+
+
+def measure(label, build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<30} peak={peak / 1024 / 1024:8.1f} MB  time={elapsed * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    n_chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    raw = np.random.rand(n_chunks, DIMENSION).astype(np.float32)
+
+    print("=" * 60)
+    print(f"Embedding path benchmark ({n_chunks} chunks x {DIMENSION} dims)")
+    print("=" * 60)
+
+    # Legacy path: embed_texts() -> list of lists -> Chroma
+    measure("Legacy (tolist)", lambda: as_embedding_matrix([emb.tolist() for emb in raw]))
+    # New path: embed_texts_array() -> ndarray -> Chroma
+    measure("NumPy (zero-copy)", lambda: as_embedding_matrix(raw))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark retrieval quality (recall@k, MRR) and latency of vector-only vs hybrid (BM25 + vector) search
+on a labelled query set.
+
+Without arguments, a synthetic French product catalogue is indexed in a temporary NumPy KB; its queries
+mix exact lookups (codes, makers, prices) and descriptive questions.
+With --kb, an existing knowledge base is queried with a JSONL file of labelled queries:
+    {"query": "Prix du XK-4821 ?", "relevant": ["XK-4821"]}
+where 'relevant' lists text fragments of the expected chunks (a hit contains one of them).
+
+Usage:
+    python scripts/benchmark_hybrid_retrieval.py [nombre_produits] [k]
+    python scripts/benchmark_hybrid_retrieval.py --kb <kb_id> --queries requetes.jsonl [k]
+"""
+import sys
+import os
+import json
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.embedding_service import EmbeddingService
+from core.services.lexical_index import LexicalIndex
+from core.services.vector_backends import create_backend
+from core.services.vector_store_service import fuse_hybrid, HYBRID_CANDIDATE_FACTOR
+
+FAMILIES = [
+    ("capteur de température", "mesure la température ambiante des entrepôts"),
+    ("pompe doseuse", "injecte des produits chimiques à débit constant"),
+    ("vanne motorisée", "régule le débit des circuits d'eau chaude"),
+    ("compresseur d'air", "alimente les outils pneumatiques de l'atelier"),
+    ("onduleur solaire", "convertit le courant des panneaux photovoltaïques"),
+    ("détecteur de fumée", "déclenche une alarme en cas d'incendie"),
+    ("badge d'accès", "ouvre les portes sécurisées des bureaux"),
+    ("caméra thermique", "repère les points chauds des armoires électriques"),
+]
+MAKERS = ["Dubreuil", "Technoval", "Hydrex", "Sofralec", "Mécanord", "Lumisol", "Aquaterm", "Protecfeu"]
+
+
+def make_catalogue(n_products, rng):
+    """Synthetic chunks and labelled queries: (documents, [(query, relevant fragments, kind)])."""
+    documents = []
+    queries = []
+    for i in range(n_products):
+        family, purpose = FAMILIES[i % len(FAMILIES)]
+        code = f"{chr(65 + rng.randrange(26))}{chr(65 + rng.randrange(26))}-{1000 + i}"
+        maker = MAKERS[rng.randrange(len(MAKERS))]
+        price = f"{rng.randrange(20, 5000)},{rng.randrange(10, 99)}"
+        text = (
+            f"Fiche produit {code} : {family} fabriqué par {maker}. "
+            f"Cet équipement {purpose}. Prix catalogue : {price} € HT, garantie {1 + i % 5} ans."
+        )
+        documents.append({"id": f"p{i}", "text": text, "metadata": {"file_path": f"catalogue_{i // 50}.txt"}})
+        if i % 4 == 0:
+            queries.append((f"Quel est le prix du {code} ?", [code], "code"))
+        elif i % 4 == 1:
+            queries.append((f"Quel produit coûte {price} € ?", [price], "chiffre"))
+        elif i % 4 == 2:
+            queries.append((f"Garantie de la référence {code}", [code], "code"))
+        else:
+            queries.append((f"Quel équipement {purpose} ?", [purpose], "description"))
+    return documents, queries
+
+
+def score(results, relevant, k):
+    """(hit in top k, reciprocal rank of the first relevant result)."""
+    for rank, result in enumerate(results[:k], 1):
+        if any(fragment in result["text"] for fragment in relevant):
+            return 1, 1.0 / rank
+    return 0, 0.0
+
+
+def report(label, rows, k):
+    hits = [r[0] for r in rows]
+    rr = [r[1] for r in rows]
+    latencies = sorted(r[2] for r in rows)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label:<26}{statistics.mean(hits):>12.3f}{statistics.mean(rr):>8.3f}"
+          f"{statistics.median(latencies):>11.2f}{p95:>11.2f}")
+
+
+def run(search_vector, search_hybrid, queries, k):
+    embedding_service = EmbeddingService()
+    per_mode = {"vector": [], "hybrid": []}
+    kinds = {}
+    for query, relevant, kind in queries:
+        embedding = embedding_service.embed_text_array(query)
+        for mode, search in (("vector", search_vector), ("hybrid", search_hybrid)):
+            start = time.perf_counter()
+            results = search(query, embedding)
+            elapsed = (time.perf_counter() - start) * 1000
+            row = score(results, relevant, k) + (elapsed,)
+            per_mode[mode].append(row)
+            kinds.setdefault((kind, mode), []).append(row)
+
+    print(f"{'Mode':<26}{f'recall@{k}':>12}{'MRR':>8}{'p50 (ms)':>11}{'p95 (ms)':>11}")
+    for mode in ("vector", "hybrid"):
+        report(mode, per_mode[mode], k)
+    for (kind, mode), rows in sorted(kinds.items()):
+        report(f"  {kind} / {mode}", rows, k)
+
+
+def main():
+    args = sys.argv[1:]
+    if "--kb" in args:
+        from core.services.vector_store_service import VectorStoreService
+
+        kb_id = args[args.index("--kb") + 1]
+        queries_path = args[args.index("--queries") + 1]
+        rest = [a for a in args if a not in ("--kb", kb_id, "--queries", queries_path)]
+        k = int(rest[0]) if rest else 5
+        with open(queries_path, encoding="utf-8") as f:
+            queries = [(q["query"], q["relevant"], q.get("kind", "requête")) for q in map(json.loads, f) if q]
+
+        store = VectorStoreService()
+        print("=" * 68)
+        print(f"Hybrid retrieval on KB {kb_id} ({len(queries)} queries)")
+        print("=" * 68)
+        run(
+            lambda text, emb: store.search(kb_id, emb, top_k=k),
+            lambda text, emb: store.search(kb_id, emb, top_k=k, query_text=text),
+            queries, k
+        )
+        return
+
+    n_products = int(args[0]) if args else 2000
+    k = int(args[1]) if len(args) > 1 else 5
+    documents, queries = make_catalogue(n_products, random.Random(0))
+
+    root = tempfile.mkdtemp()
+    try:
+        backend = create_backend("numpy", root)
+        lexical = LexicalIndex(os.path.join(root, "lexical.sqlite3"))
+        backend.create_knowledge_base("bench", "bench", "")
+        embeddings = EmbeddingService().embed_texts_array([doc["text"] for doc in documents])
+        backend.add_documents("bench", documents, embeddings)
+        backend.persist("bench")
+        start = time.perf_counter()
+        lexical.add_documents("bench", documents)
+        index_time = time.perf_counter() - start
+
+        def search_vector(text, embedding):
+            return backend.search("bench", embedding, k)
+
+        def search_hybrid(text, embedding):
+            depth = k * HYBRID_CANDIDATE_FACTOR
+            return fuse_hybrid(backend.search("bench", embedding, depth), lexical.search("bench", text, depth), k)
+
+        print("=" * 68)
+        print(f"Hybrid retrieval ({n_products} chunks, {len(queries)} queries, BM25 index built in {index_time:.2f}s)")
+        print("=" * 68)
+        run(search_vector, search_hybrid, queries, k)
+        lexical.close()
+        backend.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
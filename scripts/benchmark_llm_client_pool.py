@@ -0,0 +1,103 @@
+"""
+Benchmark per-call latency of LLMService with fresh SDK clients vs pooled clients,
+against a local OpenAI-compatible stand-in server.
+Each new connection to the stand-in waits handshake_ms (default 30) to emulate a TCP + TLS handshake.
+
+Usage:
+    python scripts/benchmark_llm_client_pool.py [nombre_appels] [handshake_ms]
+"""
+import sys
+import os
+import json
+import socket
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.llm_client_pool import client_pool, DEFAULT_MAX_CLIENTS
+from core.services.llm_service import LLMService
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Minimal /v1/chat/completions endpoint with keep-alive."""
+
+    protocol_version = "HTTP/1.1"
+    handshake_seconds = 0.03
+    connections = 0
+
+    def setup(self):
+        # Called once per TCP connection
+        StandInHandler.connections += 1
+        time.sleep(self.handshake_seconds)
+        # Headers and body are written separately: avoid Nagle / delayed-ACK stalls like real servers
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().setup()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        body = json.dumps({
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "bench"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "ok"},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def measure(base_url, n_calls):
+    messages = [{"role": "user", "content": "Bonjour"}]
+    latencies = []
+    for _ in range(n_calls):
+        start = time.perf_counter()
+        success, content = LLMService.generate_openai_compatible("sk-bench", messages, base_url=base_url, model="bench")
+        latencies.append((time.perf_counter() - start) * 1000)
+        if not success:
+            raise RuntimeError(content)
+    return latencies
+
+
+def main():
+    n_calls = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    StandInHandler.handshake_seconds = (float(sys.argv[2]) if len(sys.argv) > 2 else 30) / 1000
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    print("=" * 64)
+    print(f"LLM client pool ({n_calls} calls, emulated handshake {StandInHandler.handshake_seconds * 1000:.0f} ms)")
+    print("=" * 64)
+    print(f"{'Mode':<22}{'p50 (ms)':>10}{'mean (ms)':>12}{'connexions':>14}")
+
+    try:
+        for label, max_clients in (("fresh client (avant)", 0), ("pooled (après)", DEFAULT_MAX_CLIENTS)):
+            client_pool.clear()
+            client_pool.configure(max_clients=max_clients)
+            StandInHandler.connections = 0
+            latencies = measure(base_url, n_calls)
+            print(f"{label:<22}{statistics.median(latencies):>10.2f}{statistics.mean(latencies):>12.2f}"
+                  f"{StandInHandler.connections:>14}")
+    finally:
+        client_pool.clear()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
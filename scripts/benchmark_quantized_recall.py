@@ -0,0 +1,90 @@
+"""
+Benchmark recall@k of the quantized (int8 / float16) vector storage against the
+exact float32 baseline, with and without float32 re-ranking.
+Uses clustered synthetic vectors (like sentence embeddings) unless a .npy file is given.
+
+Usage:
+    python scripts/benchmark_quantized_recall.py [nombre_de_vecteurs] [k] [vecteurs.npy]
+"""
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.vector_backends.numpy_backend import MemmapVectorStore, STORAGE_INT8, STORAGE_FLOAT16
+
+DIMENSION = 384
+N_QUERIES = 200
+
+
+def make_vectors(n_vectors, rng):
+    """Unit vectors grouped around random topics."""
+    centers = rng.standard_normal((max(1, n_vectors // 200), DIMENSION)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n_vectors)]
+    vectors += 0.6 * rng.standard_normal((n_vectors, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors, queries, k):
+    distances = (
+        (vectors * vectors).sum(axis=1)[None, :]
+        - 2.0 * queries @ vectors.T
+        + (queries * queries).sum(axis=1)[:, None]
+    )
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def main():
+    n_vectors = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rng = np.random.default_rng(42)
+
+    if len(sys.argv) > 3:
+        vectors = np.load(sys.argv[3]).astype(np.float32)
+        n_vectors = len(vectors)
+    else:
+        vectors = make_vectors(n_vectors, rng)
+    queries = vectors[rng.integers(0, n_vectors, N_QUERIES)]
+    queries = queries + 0.1 * rng.standard_normal(queries.shape).astype(np.float32)
+    truth = exact_top_k(vectors, queries, k)
+
+    print("=" * 72)
+    print(f"Quantized storage recall@{k} ({n_vectors} vectors x {vectors.shape[1]} dims, {N_QUERIES} queries)")
+    print("=" * 72)
+    print(f"{'Mode':<28}{'recall@k':>10}{'ms/query':>12}{'RAM codes':>14}")
+    print(f"{'float32 (baseline)':<28}{1.0:>10.3f}{'-':>12}{vectors.nbytes / 1024 / 1024:>11.1f} MB")
+
+    root = tempfile.mkdtemp()
+    try:
+        for mode in (STORAGE_INT8, STORAGE_FLOAT16):
+            store = MemmapVectorStore.create(os.path.join(root, mode), mode, vectors.shape[1])
+            for start in range(0, n_vectors, 5000):
+                batch = vectors[start:start + 5000]
+                documents = [
+                    {"id": str(start + i), "text": "", "metadata": {"file_path": "bench"}}
+                    for i in range(len(batch))
+                ]
+                store.upsert(documents, batch)
+
+            code_bytes = n_vectors * vectors.shape[1] * np.dtype(store.code_dtype).itemsize
+            for rerank_factor in (1, 4):
+                hits = 0
+                start_time = time.perf_counter()
+                for query, expected in zip(queries, truth):
+                    found = {int(r["id"]) for r in store.search(query, k, rerank_factor=rerank_factor)}
+                    hits += len(found & set(expected.tolist()))
+                elapsed = (time.perf_counter() - start_time) * 1000 / N_QUERIES
+                label = f"{mode} (re-rank x{rerank_factor})" if rerank_factor > 1 else f"{mode} (sans re-rank)"
+                print(f"{label:<28}{hits / (k * N_QUERIES):>10.3f}{elapsed:>12.2f}{code_bytes / 1024 / 1024:>11.1f} MB")
+            store.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark the repository storage backends (JSON files vs SQLite in WAL mode):
+latency of get_by_id, update and add_document_to_kb as the number of records grows.
+
+Usage:
+    python scripts/benchmark_storage_backends.py [tailles] [backends]
+
+    tailles: comma-separated record counts (default: 10,1000,10000,100000)
+    backends: comma-separated list among json,sqlite (default: both)
+"""
+import sys
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.managers.record_store import SQLiteStore, open_collection
+from core.managers.knowledge_base_repository import KnowledgeBaseRepository
+
+N_OPERATIONS = 50
+# Timed operations are capped per size so the JSON backend stays bearable at 100k records
+MAX_SECONDS_PER_OPERATION = 20
+
+
+def make_assistant(i):
+    return {
+        "id": str(uuid.uuid4()), "name": f"Assistant {i}", "status": "stopped",
+        "description": "Assistant de test " * 5, "role": "Analyste", "provider": "Groq",
+        "profile_id": f"profile-{i % 50}", "knowledge_base_ids": []
+    }
+
+
+def timed(operation, ids, rng):
+    """Median latency (ms) of operation(id) over random ids."""
+    latencies = []
+    deadline = time.perf_counter() + MAX_SECONDS_PER_OPERATION
+    for _ in range(N_OPERATIONS):
+        start = time.perf_counter()
+        operation(rng.choice(ids))
+        latencies.append((time.perf_counter() - start) * 1000)
+        if time.perf_counter() > deadline:
+            break
+    return statistics.median(latencies)
+
+
+def run_backend(name, size, rng):
+    root = tempfile.mkdtemp()
+    store = SQLiteStore(os.path.join(root, "app_data.db")) if name == "sqlite" else None
+    try:
+        records = [make_assistant(i) for i in range(size)]
+        assistants = open_collection("assistants", os.path.join(root, "assistants.json"), store)
+        start = time.perf_counter()
+        assistants.replace_all(records)
+        load_time = time.perf_counter() - start
+        ids = [record["id"] for record in records]
+
+        get_ms = timed(assistants.get, ids, rng)
+        update_ms = timed(lambda record_id: assistants.update(record_id, lambda a: a.update(status="running")), ids, rng)
+
+        # One knowledge base holding `size` document entries
+        kbs = KnowledgeBaseRepository(os.path.join(root, "knowledge_bases.json"), store)
+        kb = kbs.create("bench", "")
+        kbs.update(kb["id"], documents=[
+            {"id": str(i), "name": f"doc_{i}.pdf", "summary": "Résumé " * 20} for i in range(size)
+        ])
+        add_doc_ms = timed(
+            lambda doc_id: kbs.add_document(kb["id"], {"id": doc_id, "name": "x.pdf", "summary": "nouveau"}),
+            [str(i) for i in range(size)], rng
+        )
+        return load_time, get_ms, update_ms, add_doc_ms
+    finally:
+        if store is not None:
+            store.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10, 1000, 10000, 100000]
+    backends = sys.argv[2].split(",") if len(sys.argv) > 2 else ["json", "sqlite"]
+    rng = random.Random(42)
+
+    print("=" * 78)
+    print(f"Storage backends (median of up to {N_OPERATIONS} operations)")
+    print("=" * 78)
+    print(f"{'Records':>10}  {'Backend':<8}{'load (s)':>12}{'get (ms)':>12}{'update (ms)':>14}{'add doc (ms)':>14}")
+
+    for size in sizes:
+        for name in backends:
+            load_time, get_ms, update_ms, add_doc_ms = run_backend(name, size, rng)
+            print(f"{size:>10}  {name:<8}{load_time:>12.2f}{get_ms:>12.3f}{update_ms:>14.3f}{add_doc_ms:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark build time, query latency and recall@k of the vector backends
+(ChromaDB, NumPy memmap brute force, local HNSW graph) on synthetic clustered vectors.
+
+Usage:
+    python scripts/benchmark_vector_backends.py [tailles] [backends] [k]
+
+    tailles: comma-separated chunk counts (default: 10000,100000 — add 1000000 for the large run)
+    backends: comma-separated list among chroma,numpy,hnsw (default: all)
+"""
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.vector_backends import create_backend, BACKENDS
+
+DIMENSION = 384
+N_QUERIES = 100
+BATCH_SIZE = 5000
+
+
+def make_vectors(n_vectors, rng):
+    """Unit vectors grouped around random topics."""
+    centers = rng.standard_normal((max(1, n_vectors // 200), DIMENSION)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n_vectors)]
+    vectors += 0.6 * rng.standard_normal((n_vectors, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors, queries, k):
+    truth = []
+    for query in queries:
+        distances = (vectors * vectors).sum(axis=1) - 2.0 * vectors @ query
+        truth.append(set(np.argpartition(distances, k)[:k].tolist()))
+    return truth
+
+
+def run_backend(name, vectors, queries, truth, k):
+    root = tempfile.mkdtemp()
+    backend = create_backend(name, root)
+    try:
+        backend.create_knowledge_base("bench", "bench", "", dimension=DIMENSION)
+
+        start = time.perf_counter()
+        for offset in range(0, len(vectors), BATCH_SIZE):
+            batch = vectors[offset:offset + BATCH_SIZE]
+            documents = [
+                {"id": str(offset + i), "text": "", "metadata": {"file_path": f"file_{(offset + i) // 100}"}}
+                for i in range(len(batch))
+            ]
+            backend.add_documents("bench", documents, batch)
+        backend.persist("bench")
+        build_time = time.perf_counter() - start
+
+        # First query opens files and warms caches
+        backend.search("bench", queries[0], k)
+        hits = 0
+        latencies = []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            results = backend.search("bench", query, k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len({int(r["id"]) for r in results} & expected)
+        return build_time, np.median(latencies), np.percentile(latencies, 95), hits / (k * len(queries))
+    finally:
+        backend.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10000, 100000]
+    backends = sys.argv[2].split(",") if len(sys.argv) > 2 else list(BACKENDS)
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    rng = np.random.default_rng(42)
+
+    print("=" * 78)
+    print(f"Vector backends ({DIMENSION} dims, {N_QUERIES} queries, top-{k})")
+    print("=" * 78)
+    print(f"{'Chunks':>10}  {'Backend':<8}{'build (s)':>12}{'p50 (ms)':>12}{'p95 (ms)':>12}{'recall@k':>12}")
+
+    for size in sizes:
+        vectors = make_vectors(size, rng)
+        queries = vectors[rng.integers(0, size, N_QUERIES)]
+        queries = queries + 0.1 * rng.standard_normal(queries.shape).astype(np.float32)
+        truth = exact_top_k(vectors, queries, k)
+        for name in backends:
+            try:
+                build_time, p50, p95, recall = run_backend(name, vectors, queries, truth, k)
+            except ImportError as e:
+                print(f"{size:>10}  {name:<8}  indisponible: {e}")
+                continue
+            print(f"{size:>10}  {name:<8}{build_time:>12.2f}{p50:>12.2f}{p95:>12.2f}{recall:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
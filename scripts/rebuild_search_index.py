@@ -0,0 +1,37 @@
+"""
+Rebuild the conversation search index (conversation_search.db) from the conversation histories
+of every module and assistant. Needed once for histories saved before the index existed, or if
+the index was deleted or got out of sync.
+
+Usage:
+    python scripts/rebuild_search_index.py [recherche]
+
+    recherche: optional query run on the rebuilt index
+"""
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_manager import DataManager
+
+
+def main():
+    data_manager = DataManager()
+    if data_manager.search_index is None:
+        print("Conversation search is unavailable (SQLite built without FTS5).")
+        return
+
+    start = time.perf_counter()
+    count = data_manager.rebuild_search_index()
+    print(f"{count} conversations indexed ({data_manager.search_index.count()} messages) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    if len(sys.argv) > 1:
+        for result in data_manager.search_conversations(" ".join(sys.argv[1:])):
+            print(f"- [{result['module']}] {result['title']} ({result['date']}): {result['snippet']}")
+
+
+if __name__ == "__main__":
+    main()
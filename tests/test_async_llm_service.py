@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services import async_llm_service
+from core.services.async_llm_service import AsyncLLMService, TokenBucket, is_retryable_error
+from core.services.llm_service import LLMService
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_reservations_beyond_capacity_wait_for_refill(self):
+        now = [0.0]
+        bucket = TokenBucket(60, clock=lambda: now[0])  # 1 token per second
+
+        self.assertEqual(bucket.reserve(50), 0.0)
+        self.assertAlmostEqual(bucket.reserve(20), 10.0)
+        # The debt is queued: the next caller waits behind it
+        self.assertAlmostEqual(bucket.reserve(5), 15.0)
+        now[0] = 30.0
+        self.assertEqual(bucket.reserve(10), 0.0)
+
+
+class TestAsyncLLMService(unittest.TestCase):
+    def test_retryable_errors(self):
+        self.assertTrue(is_retryable_error("Erreur Groq: Error code: 429 - Rate limit reached"))
+        self.assertTrue(is_retryable_error("Erreur Anthropic: 529 overloaded_error"))
+        self.assertFalse(is_retryable_error("Erreur OpenAI: Error code: 401 - invalid api key"))
+        self.assertTrue(is_retryable_error("Erreur Mistral: Status 503 - upstream connect error"))
+        self.assertTrue(is_retryable_error("Erreur Compatible OpenAI: HTTP/1.1 502 Bad Gateway"))
+        # Numbers that are not status codes
+        self.assertFalse(is_retryable_error("Erreur OpenAI: Error code: 400 - max_tokens must be <= 500"))
+        self.assertFalse(is_retryable_error("Erreur Compatible OpenAI: Connection refused on port 8500"))
+        self.assertFalse(is_retryable_error("Erreur Groq: model qwen-503 does not exist"))
+
+    def test_retries_with_backoff_then_succeeds(self):
+        results = iter([(False, "Error code: 429"), (False, "Error code: 503"), (True, "ok")])
+        service = AsyncLLMService(base_delay=0.001)
+        with patch.object(LLMService, "generate_response", side_effect=lambda *a, **k: next(results)) as generate:
+            self.assertEqual(asyncio.run(service.generate_response("Groq", "key", [])), (True, "ok"))
+        self.assertEqual(generate.call_count, 3)
+        self.assertEqual(service.get_stats()["Groq"]["retries"], 2)
+
+        service = AsyncLLMService(base_delay=0.001)
+        with patch.object(LLMService, "generate_response", return_value=(False, "Error code: 401")) as generate:
+            self.assertEqual(asyncio.run(service.generate_response("Groq", "key", [])), (False, "Error code: 401"))
+        self.assertEqual(generate.call_count, 1)
+
+    def test_concurrency_is_bounded_per_provider(self):
+        in_flight = []
+        peak = [0]
+        lock = threading.Lock()
+
+        def slow_call(*args, **kwargs):
+            with lock:
+                in_flight.append(1)
+                peak[0] = max(peak[0], len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.pop()
+            return True, "ok"
+
+        service = AsyncLLMService(limits={"Groq": {"concurrency": 2, "rpm": 1000, "tpm": 10 ** 6}})
+
+        async def burst():
+            return await asyncio.gather(*(service.generate_response("Groq", "key", []) for _ in range(6)))
+
+        with patch.object(LLMService, "generate_response", side_effect=slow_call):
+            self.assertEqual(len(asyncio.run(burst())), 6)
+        self.assertEqual(peak[0], 2)
+
+    def test_sync_facade(self):
+        with patch.object(LLMService, "generate_response_with_rag", return_value=(True, "rag")) as generate:
+            result = async_llm_service.generate_response_with_rag("Mistral", "key", [], "kb1", top_k=3)
+        self.assertEqual(result, (True, "rag"))
+        self.assertEqual(generate.call_args[0][3:5], ("kb1", 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
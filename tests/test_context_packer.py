@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.context_packer import (
+    ContextPacker, chunk_items, summary_items, context_window, count_tokens, default_budget
+)
+
+
+def filler(word, count):
+    return " ".join(f"{word}{i}" for i in range(count))
+
+
+class TestContextPacker(unittest.TestCase):
+    def test_budget_by_model(self):
+        self.assertEqual(context_window("OpenAI GPT-4o mini", "gpt-4o-mini"), 128000)
+        self.assertEqual(context_window("Groq", "llama-3.1-8b-instant"), 131072)
+        self.assertEqual(context_window("Inconnu"), 8192)
+        self.assertEqual(default_budget("Inconnu"), 4192)
+        self.assertGreater(count_tokens("a" * 330, "Claude"), count_tokens("a" * 330, "Gemini"))
+
+    def test_relevant_items_fill_the_budget(self):
+        packer = ContextPacker("Groq", budget_tokens=400)
+        items = summary_items([
+            "Document : budget.pdf\nRésumé : " + filler("ligne", 150),
+            "Document : pompe.pdf\nRésumé : la pompe PX-9 tombe en panne " + filler("mot", 100),
+        ]) + chunk_items([
+            {"text": "La pompe PX-9 a un débit de 40 L/h. " + filler("texte", 40), "metadata": {"file_path": "pompe.pdf"}},
+            {"text": "Sans rapport " + filler("autre", 200), "metadata": {"file_path": "autre.pdf"}},
+        ])
+
+        kept = packer.pack("Quel est le débit de la pompe PX-9 ?", items)
+
+        self.assertEqual(kept[0]["kind"], "chunk")
+        self.assertIn("PX-9", kept[0]["text"])
+        self.assertLessEqual(sum(item["tokens"] for item in kept), 400)
+        self.assertTrue(any(item["truncated"] and item["text"].endswith("[...]") for item in kept))
+        actions = [decision["action"] for decision in packer.last_decisions]
+        self.assertIn("dropped", actions)
+
+    def test_duplicates_and_chunk_overlap_are_removed(self):
+        shared = "Le contrat est signé le 3 mars 2024 par les deux parties concernées."
+        results = [
+            {"text": "Préambule du contrat. " + shared, "metadata": {"file_path": "contrat.pdf"}},
+            {"text": shared + " Clause de résiliation à trente jours.", "metadata": {"file_path": "contrat.pdf"}},
+            {"text": "Préambule du contrat.  " + shared, "metadata": {"file_path": "copie.pdf"}},
+        ]
+        kept = ContextPacker(budget_tokens=1000).pack("contrat signé", chunk_items(results))
+
+        self.assertEqual(len(kept), 2)
+        self.assertEqual(kept[1]["text"], "Clause de résiliation à trente jours.")
+
+    def test_document_context_keeps_relevant_sections_in_order(self):
+        packer = ContextPacker("Mistral", budget_tokens=400)
+        small = "--- DEBUT DOCUMENT: a.txt ---\nCourt texte.\n--- FIN DOCUMENT: a.txt ---\n\n"
+        self.assertEqual(packer.pack_document_context(small, "question"), small)
+
+        paragraphs = [filler(f"p{i}x", 120) for i in range(6)]
+        paragraphs[4] = "La garantie couvre 5 ans de pièces. " + filler("g", 110)
+        context = "--- DEBUT DOCUMENT: contrat.txt ---\n" + "\n\n".join(paragraphs) + "\n--- FIN DOCUMENT: contrat.txt ---\n\n"
+
+        packed = packer.pack_document_context(context, "Durée de la garantie ?")
+
+        self.assertTrue(packed.startswith("--- DEBUT DOCUMENT: contrat.txt ---"))
+        self.assertTrue(packed.endswith("--- FIN DOCUMENT: contrat.txt ---"))
+        self.assertIn("La garantie couvre 5 ans", packed)
+        self.assertIn("[...]", packed)
+        self.assertLess(packer.count(packed), 450)
+
+
+if __name__ == '__main__':
+    unittest.main()
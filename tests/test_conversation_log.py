@@ -0,0 +1,122 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import sys
+import tempfile
+import shutil
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.managers.conversation_log import ConversationLog
+
+
+class TestConversationLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.directory = os.path.join(self.tmp_dir, "history_a1")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def log_size(self):
+        return os.path.getsize(os.path.join(self.directory, "c1.jsonl"))
+
+    def test_saving_a_message_appends_only_that_message(self):
+        log = ConversationLog(self.directory)
+        documents = [{"name": "rapport.pdf", "content": "x" * 100000}]
+        messages = [{"role": "user", "content": "Bonjour"}]
+        log.save({"id": "c1", "title": "Nouvelle conversation", "messages": messages, "documents": documents})
+        size = self.log_size()
+
+        messages.append({"role": "assistant", "content": "Salut"})
+        log.save({"id": "c1", "title": "Bonjour...", "messages": messages, "documents": documents})
+        self.assertLess(self.log_size() - size, 300)
+
+        reopened = ConversationLog(self.directory)
+        conversation = reopened.get("c1")
+        self.assertEqual(conversation["title"], "Bonjour...")
+        self.assertEqual(conversation["messages"], messages)
+        self.assertEqual(conversation["documents"], documents)
+
+        # Editing an earlier message rewrites the message list
+        messages[0] = {"role": "user", "content": "Bonsoir"}
+        reopened.save({"id": "c1", "title": "Bonjour...", "messages": messages, "documents": documents})
+        reopened.update_fields("c1", title="Renommée")
+        conversation = ConversationLog(self.directory).get("c1")
+        self.assertEqual(conversation["messages"][0]["content"], "Bonsoir")
+        self.assertEqual(conversation["title"], "Renommée")
+
+    def test_save_after_a_torn_line_is_kept(self):
+        log = ConversationLog(self.directory)
+        messages = [{"role": "user", "content": "Bonjour"}]
+        log.save({"id": "c1", "title": "Bonjour", "messages": messages})
+        # Interrupted write of the next save
+        with open(os.path.join(self.directory, "c1.jsonl"), "a", encoding="utf-8") as f:
+            f.write('{"op": "append", "messages": [{"role": "assis')
+
+        reopened = ConversationLog(self.directory)
+        conversation = reopened.get("c1")
+        self.assertEqual(conversation["messages"], messages)
+        conversation["messages"].append({"role": "assistant", "content": "Salut"})
+        reopened.save(conversation)
+        reopened.update_fields("c1", title="Renommée")
+
+        conversation = ConversationLog(self.directory).get("c1")
+        self.assertEqual([m["content"] for m in conversation["messages"]], ["Bonjour", "Salut"])
+        self.assertEqual(conversation["title"], "Renommée")
+
+    def test_log_is_compacted(self):
+        log = ConversationLog(self.directory, compact_min_lines=8)
+        messages = []
+        for i in range(40):
+            messages.append({"role": "user", "content": f"message {i}"})
+            log.save({"id": "c1", "updated_at": str(i), "messages": messages})
+            with open(os.path.join(self.directory, "c1.jsonl"), encoding="utf-8") as f:
+                self.assertLessEqual(len(f.readlines()), max(8, len(messages)) + 2)
+
+        conversation = ConversationLog(self.directory).get("c1")
+        self.assertEqual(conversation["updated_at"], "39")
+        self.assertEqual(len(conversation["messages"]), 40)
+
+    def test_legacy_history_is_imported_in_order(self):
+        legacy_path = f"{self.directory}.json"
+        with open(legacy_path, "w", encoding="utf-8") as f:
+            json.dump([
+                {"id": "b", "title": "Première", "messages": [{"role": "user", "content": "1"}]},
+                {"id": "a", "title": "Seconde", "messages": []}
+            ], f)
+
+        log = ConversationLog(self.directory, legacy_path)
+        self.assertEqual([c["title"] for c in log.list()], ["Première", "Seconde"])
+        log.delete("b")
+        log.replace_all([{"id": "z", "title": "Nouvelle", "messages": []}])
+        self.assertEqual([c["id"] for c in ConversationLog(self.directory, legacy_path).list()], ["z"])
+
+    def test_index_lists_conversations_without_their_messages(self):
+        log = ConversationLog(self.directory)
+        log.save({"id": "c1", "title": "Un", "updated_at": "1", "messages": [{"role": "user", "content": "a"}]})
+        log.save({"id": "c2", "title": "Deux", "updated_at": "2", "messages": []})
+        log.update_fields("c2", title="Deux bis")
+
+        reopened = ConversationLog(self.directory)
+        with patch.object(ConversationLog, "_replay", side_effect=AssertionError("log read")):
+            summaries = reopened.summaries()
+        self.assertEqual(summaries, [
+            {"id": "c1", "title": "Un", "updated_at": "1", "message_count": 1},
+            {"id": "c2", "title": "Deux bis", "updated_at": "2", "message_count": 0}
+        ])
+
+        # A log written without updating the index (crash between the two writes) is re-read
+        with open(os.path.join(self.directory, "c1.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"op": "append", "messages": [{"role": "assistant", "content": "b"}]}) + "\n")
+        reopened = ConversationLog(self.directory)
+        self.assertEqual(reopened.summaries()[0]["message_count"], 2)
+
+        reopened.delete("c1")
+        self.assertEqual([s["id"] for s in ConversationLog(self.directory).summaries()], ["c2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import patch
+import datetime
+import os
+import sys
+import tempfile
+import shutil
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.managers import conversation_search
+from core.managers.conversation_search import ConversationSearchIndex
+from core.managers.conversation_log import ConversationLog
+
+
+def message(role, content, timestamp):
+    return {"role": role, "content": content, "timestamp": timestamp}
+
+
+class TestConversationSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.index = ConversationSearchIndex(os.path.join(self.tmp_dir, "conversation_search.db"))
+        self.index.index_conversation("assistants", "a1", {
+            "id": "c1", "title": "Facturation", "updated_at": "2026-01-10T09:00:00",
+            "messages": [
+                message("Utilisateur", "Peux-tu résumer la facture de janvier ?", "2026-01-10 09:00:00"),
+                message("Assistant", "La facture de janvier s'élève à 1200 euros.", "2026-01-10 09:00:05"),
+            ]
+        })
+        self.index.index_conversation("assistants", "a2", {
+            "id": "c2", "title": "Rapport", "updated_at": "2026-03-02T10:00:00",
+            "messages": [message("Utilisateur", "Rédige un rapport sur la facture de mars", "2026-03-02 10:00:00")]
+        })
+        self.index.index_conversation("doc_analyst", None, {
+            "id": "d1", "title": "Contrat", "updated_at": "2026-02-15T08:00:00",
+            "messages": [{"role": "user", "content": "Quelle est la durée du contrat ? Et la facture ?"}]
+        })
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_ranked_search_with_snippets(self):
+        results = self.index.search("facture janvier")
+        self.assertEqual({(r["conversation_id"], r["position"]) for r in results}, {("c1", 0), ("c1", 1)})
+        self.assertGreater(results[0]["score"], results[1]["score"])
+        self.assertEqual(results[0]["title"], "Facturation")
+        self.assertEqual(results[0]["assistant_id"], "a1")
+        self.assertIn("[facture]", results[0]["snippet"])
+        self.assertIn("[janvier]", results[0]["snippet"])
+        # Accents and case are ignored, FTS5 syntax is not interpreted
+        self.assertEqual(len(self.index.search('RESUMER "facture" OR')), 0)
+        self.assertEqual(len(self.index.search('RESUMER facture')), 1)
+        self.assertEqual(self.index.search("***"), [])
+
+    def test_filters(self):
+        self.assertEqual({r["conversation_id"] for r in self.index.search("facture", module="doc_analyst")}, {"d1"})
+        self.assertEqual({r["conversation_id"] for r in self.index.search("facture", assistant_id="a2")}, {"c2"})
+        # Messages without timestamp are dated by their conversation
+        results = self.index.search("facture", since=datetime.date(2026, 2, 1), until="2026-02-28")
+        self.assertEqual([r["conversation_id"] for r in results], ["d1"])
+        self.assertEqual(results[0]["date"], "2026-02-15 08:00:00")
+        self.assertEqual(len(self.index.search("facture", until=datetime.datetime(2026, 1, 10, 8))), 2)
+        self.assertEqual(self.index.search("facture", since="2027-01-01"), [])
+
+    def test_only_recent_matches_are_ranked_and_common_words_are_dropped(self):
+        with patch.object(conversation_search, "MAX_RANKED_MATCHES", 1):
+            self.assertEqual([r["conversation_id"] for r in self.index.search("facture")], ["d1"])
+        with patch.object(conversation_search, "SHARE_SAMPLE", 2):
+            # "la" is in every message: alone it still matches, most recently indexed first
+            results = self.index.search("la")
+            self.assertEqual([(r["conversation_id"], r["position"]) for r in results], [("d1", 0), ("c2", 0), ("c1", 1), ("c1", 0)])
+            self.assertEqual([r["conversation_id"] for r in self.index.search("la contrat")], ["d1"])
+
+
+class TestConversationLogIndexing(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.index = ConversationSearchIndex(os.path.join(self.tmp_dir, "conversation_search.db"))
+        self.log = ConversationLog(
+            os.path.join(self.tmp_dir, "history_a1"),
+            on_change=lambda conversation_id, change: self.index.apply_change("assistants", "a1", conversation_id, change)
+        )
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_saves_update_the_index(self):
+        messages = [message("Utilisateur", "Bonjour", "2026-01-10 09:00:00")]
+        conversation = {"id": "c1", "title": "Nouvelle conversation", "updated_at": "2026-01-10T09:00:00", "messages": messages}
+        self.log.save(conversation)
+        messages.append(message("Assistant", "Voici la météo de Lyon", "2026-01-10 09:00:05"))
+        with patch.object(self.index, "_delete_messages", wraps=self.index._delete_messages) as delete:
+            self.log.save(conversation)
+            # Appending only indexes the new message
+            self.assertEqual(delete.call_args[0][2], 1)
+        self.assertEqual(self.index.search("meteo")[0]["position"], 1)
+
+        # Editing an earlier message re-indexes the conversation
+        messages[0] = message("Utilisateur", "Salut", "2026-01-10 09:00:00")
+        self.log.save(conversation)
+        self.assertEqual(self.index.search("bonjour"), [])
+        self.assertEqual(len(self.index.search("salut")), 1)
+        self.assertEqual(self.index.count(), 2)
+
+        self.log.update_fields("c1", title="Météo")
+        self.assertEqual(self.index.search("lyon")[0]["title"], "Météo")
+
+        self.log.delete("c1")
+        self.assertEqual(self.index.search("lyon"), [])
+        self.assertEqual(self.index.count(), 0)
+
+    def test_listener_errors_do_not_break_saves(self):
+        def fail(conversation_id, change):
+            raise RuntimeError("index indisponible")
+        log = ConversationLog(os.path.join(self.tmp_dir, "history_a2"), on_change=fail)
+        log.save({"id": "c1", "title": "Test", "messages": [{"role": "user", "content": "Bonjour"}]})
+        self.assertEqual(log.get("c1")["messages"][0]["content"], "Bonjour")
+
+
+if __name__ == '__main__':
+    unittest.main()
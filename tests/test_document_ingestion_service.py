@@ -0,0 +1,202 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+import shutil
+
+import numpy as np
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.document_ingestion_service import DocumentIngestionService
+from core.services.ingestion_manifest import document_id
+
+
+class TestDocumentIngestionService(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        for i in range(5):
+            with open(os.path.join(self.tmp_dir, f"doc_{i}.txt"), "w", encoding="utf-8") as f:
+                f.write(f"Document {i}. " + "Texte de test pour l'indexation. " * 40)
+        with open(os.path.join(self.tmp_dir, "image.png"), "wb") as f:
+            f.write(b"not a document")
+
+        self.manifest_dir = tempfile.mkdtemp()
+        self.manifest_patcher = patch(
+            'core.services.ingestion_manifest.get_writable_path',
+            side_effect=lambda name: os.path.join(self.manifest_dir, name)
+        )
+        self.manifest_patcher.start()
+
+        self.embedding_patcher = patch('core.services.document_ingestion_service.EmbeddingService')
+        self.vector_patcher = patch('core.services.document_ingestion_service.VectorStoreService')
+        mock_embedding_cls = self.embedding_patcher.start()
+        mock_vector_cls = self.vector_patcher.start()
+
+        self.embedding_service = mock_embedding_cls.return_value
+        self.embedding_service.embed_texts_array.side_effect = lambda texts: np.zeros((len(texts), 384), dtype=np.float32)
+        self.embedding_service.get_cache_stats.return_value = {}
+        self.vector_store = mock_vector_cls.return_value
+
+        self.service = DocumentIngestionService()
+
+    def tearDown(self):
+        self.manifest_patcher.stop()
+        self.embedding_patcher.stop()
+        self.vector_patcher.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        shutil.rmtree(self.manifest_dir, ignore_errors=True)
+
+    def _stored_documents(self):
+        documents = []
+        for call in self.vector_store.add_documents.call_args_list:
+            documents.extend(call[0][1])
+        return documents
+
+    def test_ingest_folder_sequential(self):
+        result = self.service.ingest_folder("kb1", self.tmp_dir, workers=1)
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["files_processed"], 5)
+        self.assertEqual(len(self._stored_documents()), result["chunks_created"])
+        self.assertEqual(len(result["summaries"]), 5)
+
+    def test_ingest_folder_process_pool_batches_across_files(self):
+        progress = []
+        result = self.service.ingest_folder(
+            "kb1", self.tmp_dir, progress_callback=lambda m, p: progress.append((m, p)),
+            workers=2, batch_size=7
+        )
+
+        self.assertTrue(result["success"])
+        documents = self._stored_documents()
+        self.assertEqual(len(documents), result["chunks_created"])
+        self.assertEqual({d["metadata"]["source_file"] for d in documents}, {f"doc_{i}.txt" for i in range(5)})
+        # Every batch except the last one is full
+        batch_sizes = [len(c[0][1]) for c in self.vector_store.add_documents.call_args_list]
+        self.assertTrue(all(size == 7 for size in batch_sizes[:-1]))
+        self.assertTrue(any(m.startswith("[Extraction") for m, _ in progress))
+        self.assertEqual(progress[-1][1], 1.0)
+
+    def test_extraction_errors_are_reported(self):
+        with open(os.path.join(self.tmp_dir, "broken.pdf"), "wb") as f:
+            f.write(b"not a pdf")
+
+        result = self.service.ingest_folder("kb1", self.tmp_dir, workers=2)
+
+        self.assertFalse(result["success"])
+        self.assertTrue(any("broken.pdf" in e for e in result["errors"]))
+        self.assertNotIn(os.path.join(self.tmp_dir, "broken.pdf"), result["summaries"])
+
+    def test_reimport_skips_unchanged_files(self):
+        first = self.service.ingest_folder("kb1", self.tmp_dir, workers=1)
+        first_ids = [d["id"] for d in self._stored_documents()]
+        self.assertEqual(first["files_new"], 5)
+
+        self.vector_store.reset_mock()
+        second = self.service.ingest_folder("kb1", self.tmp_dir, workers=1)
+
+        self.assertTrue(second["success"])
+        self.assertEqual(second["files_processed"], 0)
+        self.assertEqual(second["files_skipped"], 5)
+        self.vector_store.add_documents.assert_not_called()
+        self.vector_store.delete_file_documents.assert_not_called()
+
+        # Without a manifest, files are re-added under the same (deterministic) ids
+        os.remove(os.path.join(self.manifest_dir, "vector_databases", "manifests", "kb_kb1.json"))
+        self.service.ingest_folder("kb1", self.tmp_dir, workers=1)
+        self.assertEqual(sorted(d["id"] for d in self._stored_documents()), sorted(first_ids))
+
+    def test_modified_and_removed_files_are_reindexed(self):
+        self.service.ingest_folder("kb1", self.tmp_dir, workers=1)
+        self.vector_store.reset_mock()
+
+        modified = os.path.join(self.tmp_dir, "doc_0.txt")
+        with open(modified, "a", encoding="utf-8") as f:
+            f.write("Nouveau paragraphe.")
+        removed = os.path.join(self.tmp_dir, "doc_1.txt")
+        os.remove(removed)
+
+        result = self.service.ingest_folder("kb1", self.tmp_dir, workers=1)
+
+        self.assertEqual(result["files_updated"], 1)
+        self.assertEqual(result["files_removed"], 1)
+        self.assertEqual(result["files_skipped"], 3)
+        deleted_paths = {c[0][1] for c in self.vector_store.delete_file_documents.call_args_list}
+        self.assertEqual(deleted_paths, {modified, removed})
+        self.assertEqual({d["metadata"]["file_path"] for d in self._stored_documents()}, {modified})
+
+    def test_reported_files_whose_chunks_fail_are_listed(self):
+        failing = os.path.join(self.tmp_dir, "doc_2.txt")
+
+        def add_documents(kb_id, documents, embeddings):
+            if any(d["metadata"]["file_path"] == failing for d in documents):
+                raise IOError("disk full")
+        self.vector_store.add_documents.side_effect = add_documents
+
+        reported = []
+        result = self.service.ingest_folder(
+            "kb1", self.tmp_dir, workers=1, batch_size=4, on_summary=lambda p, d, s: reported.append(d)
+        )
+
+        self.assertFalse(result["success"])
+        self.assertNotIn(failing, result["document_ids"])
+        self.assertIn(document_id("kb1", failing), result["failed_document_ids"])
+        # Every reported entry is either indexed or to be removed
+        self.assertEqual(
+            set(reported), set(result["document_ids"].values()) | set(result["failed_document_ids"])
+        )
+
+    def test_chunks_record_page_numbers(self):
+        # Short pages are merged into chunks spanning several pages
+        pages = [(i, " ".join(f"p{i}w{j}" for j in range(25))) for i in range(1, 12)]
+        chunks = list(self.service._iter_chunks(iter(pages)))
+
+        self.assertGreater(len(chunks), 1)
+        for chunk, first_page, last_page in chunks:
+            chunk_pages = {int(word[1:word.index("w")]) for word in chunk.split()}
+            self.assertEqual((min(chunk_pages), max(chunk_pages)), (first_page, last_page))
+        self.assertTrue(any(first != last for _, first, last in chunks))
+
+    def test_streamed_txt_chunks_cover_whole_file(self):
+        full_text = " ".join(f"mot{i}" for i in range(3000))
+        path = os.path.join(self.tmp_dir, "long.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(full_text)
+
+        with patch('core.services.document_ingestion_service.TXT_BLOCK_CHARS', 1000):
+            chunks = [c for c, _, _ in self.service._iter_chunks(self.service._iter_pages(path))]
+
+        # Chunks come in order and leave no hole in the text
+        covered = 0
+        for chunk in chunks:
+            offset = full_text.find(chunk, max(0, covered - 100))
+            self.assertGreaterEqual(offset, 0)
+            self.assertLessEqual(offset, covered + 1)
+            covered = max(covered, offset + len(chunk))
+        self.assertEqual(covered, len(full_text))
+
+    def test_pages_report_fraction_read(self):
+        path = os.path.join(self.tmp_dir, "long.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("é" * 100000)
+
+        fractions = []
+        with patch('core.services.document_ingestion_service.TXT_BLOCK_CHARS', 10000):
+            blocks = list(self.service._iter_pages(path, fractions.append))
+
+        self.assertEqual(len(fractions), len(blocks))
+        self.assertEqual(fractions, sorted(fractions))
+        self.assertLess(fractions[0], 0.5)
+        self.assertEqual(fractions[-1], 1.0)
+
+        progress = []
+        self.service.ingest_file("kb1", path, progress_callback=lambda m, p: progress.append(p))
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import MagicMock
+import os
+import sys
+
+import numpy as np
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.embedding_service import EmbeddingBatcher
+
+
+class TestEmbeddingBatcher(unittest.TestCase):
+    def setUp(self):
+        self.service = MagicMock()
+        # Each embedding encodes the text length so results can be checked against items
+        self.service.embed_texts_array.side_effect = lambda texts: np.array(
+            [[len(t)] * 4 for t in texts], dtype=np.float32
+        )
+        self.batches = []
+
+    def _on_batch(self, items, embeddings):
+        self.batches.append((items, embeddings))
+
+    def test_batches_span_sources_within_token_budget(self):
+        batcher = EmbeddingBatcher(self.service, self._on_batch, token_budget=1024, min_tokens=1, adaptive=False)
+        # 3 files of 400-character chunks (100 tokens each)
+        for file_index, count in enumerate([1, 15, 4]):
+            for i in range(count):
+                batcher.add("x" * 400, ("file_%d" % file_index, i))
+        batcher.flush()
+
+        sizes = [len(items) for items, _ in self.batches]
+        self.assertEqual(sizes, [10, 10])
+        # Results are returned with their originating items
+        first_items = self.batches[0][0]
+        self.assertEqual(first_items[0], ("file_0", 0))
+        self.assertEqual(first_items[1], ("file_1", 0))
+        self.assertTrue(all(emb[0] == 400 for _, embs in self.batches for emb in embs))
+
+    def test_max_items_caps_batches(self):
+        batcher = EmbeddingBatcher(self.service, self._on_batch, max_items=3, adaptive=False)
+        batcher.add_many(["a", "b", "c", "d"])
+        batcher.flush()
+        self.assertEqual([items for items, _ in self.batches], [["a", "b", "c"], ["d"]])
+
+    def test_budget_stays_within_bounds(self):
+        batcher = EmbeddingBatcher(self.service, self._on_batch, token_budget=100, min_tokens=50, max_tokens=200)
+        for _ in range(200):
+            batcher.add("y" * 40)
+        batcher.flush()
+        self.assertGreaterEqual(batcher.token_budget, 50)
+        self.assertLessEqual(batcher.token_budget, 200)
+        self.assertEqual(batcher.get_stats()["texts"], 200)
+
+    def test_errors_are_routed_to_callback(self):
+        self.service.embed_texts_array.side_effect = RuntimeError("boom")
+        failures = []
+        batcher = EmbeddingBatcher(self.service, self._on_batch, on_error=lambda items, e: failures.append(items))
+        batcher.add("texte", "item")
+        batcher.flush()
+        self.assertEqual(failures, [["item"]])
+        self.assertEqual(self.batches, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
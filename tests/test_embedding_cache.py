@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import MagicMock
+import os
+import sys
+import tempfile
+import shutil
+
+import numpy as np
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.embedding_cache import EmbeddingCache
+from core.services.embedding_service import EmbeddingService
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = EmbeddingCache("test-model", 4, cache_dir=self.tmp_dir, memory_size=2)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_miss_then_hit(self):
+        self.assertIsNone(self.cache.get("bonjour"))
+        self.cache.put("bonjour", np.array([1, 2, 3, 4], dtype=np.float32))
+
+        vector = self.cache.get("bonjour")
+        self.assertEqual(vector.tolist(), [1.0, 2.0, 3.0, 4.0])
+
+        stats = self.cache.get_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 1)
+
+    def test_key_normalizes_whitespace(self):
+        self.assertEqual(self.cache.make_key("a  b\n"), self.cache.make_key("a b"))
+        other = EmbeddingCache("other-model", 4, cache_dir=self.tmp_dir)
+        self.assertNotEqual(self.cache.make_key("a b"), other.make_key("a b"))
+        other.close()
+
+    def test_disk_tier_survives_reopen(self):
+        texts = ["un", "deux", "trois"]
+        self.cache.put_many(texts, np.arange(12, dtype=np.float32).reshape(3, 4))
+        self.cache.close()
+
+        reopened = EmbeddingCache("test-model", 4, cache_dir=self.tmp_dir)
+        results = reopened.get_many(["trois", "quatre", "un"])
+        self.assertEqual(results[0].tolist(), [8.0, 9.0, 10.0, 11.0])
+        self.assertIsNone(results[1])
+        self.assertEqual(results[2].tolist(), [0.0, 1.0, 2.0, 3.0])
+        self.assertEqual(reopened.get_stats()["disk_hits"], 2)
+        reopened.close()
+        self.cache = EmbeddingCache("test-model", 4, cache_dir=self.tmp_dir)
+
+    def test_torn_write_is_truncated_before_appending(self):
+        self.cache.put_many(["un", "deux"], np.arange(8, dtype=np.float32).reshape(2, 4))
+        self.cache.close()
+        # Crash in the middle of the next row
+        with open(os.path.join(self.tmp_dir, "test-model", "vectors.f32"), "ab") as f:
+            f.write(np.ones(2, dtype=np.float32).tobytes())
+
+        self.cache = EmbeddingCache("test-model", 4, cache_dir=self.tmp_dir)
+        self.cache.put_many(["trois", "quatre"], np.arange(8, 16, dtype=np.float32).reshape(2, 4))
+        self.cache.close()
+
+        self.cache = EmbeddingCache("test-model", 4, cache_dir=self.tmp_dir)
+        results = self.cache.get_many(["un", "deux", "trois", "quatre"])
+        self.assertEqual([r.tolist() for r in results], np.arange(16, dtype=np.float32).reshape(4, 4).tolist())
+
+    def test_memory_tier_is_bounded(self):
+        self.cache.put_many(["a", "b", "c"], np.ones((3, 4), dtype=np.float32))
+        self.assertEqual(self.cache.get_stats()["memory_entries"], 2)
+        self.assertEqual(self.cache.get_stats()["disk_entries"], 3)
+
+
+class TestEmbeddingServiceCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        EmbeddingService._instance = None
+        EmbeddingService._model = MagicMock()
+        EmbeddingService._cache = EmbeddingCache("test-model", 384, cache_dir=self.tmp_dir)
+        EmbeddingService._model.encode.side_effect = lambda texts, **kw: np.ones((len(texts), 384), dtype=np.float32)
+        self.service = EmbeddingService()
+
+    def tearDown(self):
+        EmbeddingService._cache.close()
+        EmbeddingService._instance = None
+        EmbeddingService._model = None
+        EmbeddingService._cache = None
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_only_misses_are_encoded(self):
+        self.service.embed_texts(["a", "b"])
+        self.service.embed_texts(["a", "b", "c", "c"])
+
+        second_call_texts = EmbeddingService._model.encode.call_args_list[1][0][0]
+        self.assertEqual(second_call_texts, ["c"])
+        stats = self.service.get_cache_stats()
+        self.assertEqual(stats["hits"], 2)
+
+    def test_embed_texts_array_is_contiguous_float32(self):
+        self.service.embed_texts(["a"])
+        matrix = self.service.embed_texts_array(["a", "b", "a"])
+
+        self.assertEqual(matrix.shape, (3, 384))
+        self.assertEqual(matrix.dtype, np.float32)
+        self.assertTrue(matrix.flags["C_CONTIGUOUS"])
+        self.assertEqual(self.service.embed_texts_array([]).shape, (0, 384))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import types
+import tempfile
+import shutil
+import threading
+import time
+
+import numpy as np
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.embedding_service import EmbeddingService, MODEL_NAME
+
+
+class FakeSentenceTransformer:
+    """Stands in for sentence_transformers.SentenceTransformer; records where it loaded from."""
+    loaded_from = []
+    release = threading.Event()
+
+    def __init__(self, name_or_path):
+        FakeSentenceTransformer.release.wait(5)
+        FakeSentenceTransformer.loaded_from.append(name_or_path)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "modules.json"), "w") as f:
+            f.write("[]")
+
+    def encode(self, texts, **kwargs):
+        return np.ones((len(texts), 384) if isinstance(texts, list) else 384, dtype=np.float32)
+
+
+class TestEmbeddingModelLifecycle(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        FakeSentenceTransformer.loaded_from = []
+        FakeSentenceTransformer.release.set()
+        module = types.ModuleType("sentence_transformers")
+        module.SentenceTransformer = FakeSentenceTransformer
+        self.patchers = [
+            patch.dict(sys.modules, {"sentence_transformers": module}),
+            patch('core.services.embedding_service.get_writable_path',
+                  side_effect=lambda name: os.path.join(self.tmp_dir, name)),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self._reset()
+
+    def tearDown(self):
+        EmbeddingService.configure_idle_unload(0)
+        self._reset()
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _reset(self):
+        EmbeddingService._instance = None
+        EmbeddingService._model = None
+        EmbeddingService._preload_future = None
+
+    def test_background_preload_reports_readiness(self):
+        FakeSentenceTransformer.release.clear()
+        future = EmbeddingService.preload_in_background()
+
+        self.assertFalse(future.done())
+        self.assertFalse(EmbeddingService.wait_until_ready(timeout=0.05))
+        self.assertIs(EmbeddingService.preload_in_background(), future)
+
+        FakeSentenceTransformer.release.set()
+        self.assertTrue(future.result(timeout=5))
+        self.assertTrue(EmbeddingService.is_ready())
+        self.assertEqual(FakeSentenceTransformer.loaded_from, [MODEL_NAME])
+
+    def test_local_copy_is_used_after_first_load(self):
+        EmbeddingService.preload_in_background().result(timeout=5)
+        EmbeddingService.unload_model()
+        self.assertFalse(EmbeddingService.is_ready())
+
+        EmbeddingService.preload_in_background().result(timeout=5)
+        self.assertEqual(
+            FakeSentenceTransformer.loaded_from,
+            [MODEL_NAME, os.path.join(self.tmp_dir, "models", MODEL_NAME)]
+        )
+
+    def test_idle_model_is_unloaded_and_reloaded_on_use(self):
+        EmbeddingService.preload_in_background(idle_unload_seconds=0.1).result(timeout=5)
+        deadline = time.monotonic() + 5
+        while EmbeddingService.is_ready() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertFalse(EmbeddingService.is_ready())
+
+        EmbeddingService._cache = None
+        with patch.object(EmbeddingService, '_init_cache'):
+            vectors = EmbeddingService().embed_texts_array(["a", "b"])
+        self.assertEqual(vectors.shape, (2, 384))
+        self.assertTrue(EmbeddingService.is_ready())
+
+
+if __name__ == '__main__':
+    unittest.main()
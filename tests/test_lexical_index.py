@@ -0,0 +1,92 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+import shutil
+
+import numpy as np
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.lexical_index import LexicalIndex, tokenize
+from core.services.vector_store_service import VectorStoreService
+
+DOCUMENTS = [
+    {"id": "c1", "text": "Le capteur XK-4821 mesure la température.", "metadata": {"file_path": "a.txt"}},
+    {"id": "c2", "text": "Le capteur XK-4822 mesure l'humidité.", "metadata": {"file_path": "a.txt"}},
+    {"id": "c3", "text": "Rapport financier : chiffre d'affaires de 12,5 M€ en 2023.", "metadata": {"file_path": "b.txt"}},
+    {"id": "c4", "text": "La température de l'entrepôt est surveillée.", "metadata": {"file_path": "b.txt"}},
+]
+
+
+class TestLexicalIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.index = LexicalIndex(os.path.join(self.tmp_dir, "lexical.sqlite3"))
+        self.index.add_documents("kb1", DOCUMENTS)
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_tokenize_keeps_codes_and_folds_accents(self):
+        self.assertEqual(tokenize("Référence XK-4821, l'Énergie"), ["reference", "xk-4821", "xk", "4821", "energie"])
+        self.assertIn("12,5", tokenize("12,5 M€"))
+
+    def test_exact_code_ranks_first(self):
+        results = self.index.search("kb1", "Que mesure le XK-4821 ?", top_k=2)
+        self.assertEqual(results[0]["id"], "c1")
+        self.assertEqual(results[0]["metadata"], {"file_path": "a.txt"})
+        self.assertGreater(results[0]["bm25"], results[1]["bm25"])
+        self.assertEqual(self.index.search("kb1", "12,5")[0]["id"], "c3")
+        self.assertEqual(self.index.search("kb2", "XK-4821"), [])
+
+    def test_incremental_updates(self):
+        self.index.add_documents("kb1", [{"id": "c1", "text": "Pompe PX-9", "metadata": {"file_path": "a.txt"}}])
+        self.assertEqual(self.index.get_stats("kb1")["chunk_count"], 4)
+        self.assertEqual([r["id"] for r in self.index.search("kb1", "XK-4821")], ["c2"])
+        self.assertEqual(self.index.search("kb1", "PX-9")[0]["id"], "c1")
+
+        self.index.delete_file_documents("kb1", "a.txt")
+        self.assertEqual(self.index.get_stats("kb1")["chunk_count"], 2)
+        self.assertEqual(self.index.search("kb1", "capteur"), [])
+
+        self.index.delete_knowledge_base("kb1")
+        self.assertEqual(self.index.get_stats("kb1")["chunk_count"], 0)
+
+
+class TestHybridSearch(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path_patcher = patch(
+            'core.services.vector_store_service.get_writable_path',
+            side_effect=lambda name: os.path.join(self.tmp_dir, name)
+        )
+        self.path_patcher.start()
+
+    def tearDown(self):
+        self.path_patcher.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_lexical_match_is_fused_with_vector_ranking(self):
+        service = VectorStoreService()
+        service.create_knowledge_base("kb1", "Test", "", backend="numpy")
+        # The query embedding is closest to c4; only c2 mentions the figure 4822
+        vectors = np.eye(4, 384, dtype=np.float32)
+        service.add_documents("kb1", DOCUMENTS, vectors)
+        query = vectors[3]
+
+        self.assertEqual([r["id"] for r in service.search("kb1", query, top_k=1)], ["c4"])
+        hybrid = service.search("kb1", query, top_k=2, query_text="Référence 4822")
+        self.assertEqual([r["id"] for r in hybrid], ["c2", "c4"])
+
+        service.delete_file_documents("kb1", "a.txt")
+        hybrid = service.search("kb1", query, top_k=2, query_text="Référence 4822")
+        self.assertNotIn("c2", [r["id"] for r in hybrid])
+        service.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.llm_client_pool import LLMClientPool
+
+
+class TestLLMClientPool(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.clock_patcher = patch('core.services.llm_client_pool.time.monotonic', side_effect=lambda: self.now)
+        self.clock_patcher.start()
+
+    def tearDown(self):
+        self.clock_patcher.stop()
+
+    def test_clients_are_reused_per_provider_key_and_url(self):
+        pool = LLMClientPool()
+        factory = MagicMock(side_effect=lambda: object())
+
+        first = pool.get("openai", "sk-1", factory)
+        self.assertIs(pool.get("openai", "sk-1", factory), first)
+        self.assertIsNot(pool.get("openai", "sk-2", factory), first)
+        self.assertIsNot(pool.get("openai", "sk-1", factory, base_url="http://localhost:8000/v1"), first)
+        self.assertIsNot(pool.get("groq", "sk-1", factory), first)
+
+        self.assertEqual(factory.call_count, 4)
+        self.assertEqual(pool.get_stats(), {"size": 4, "hits": 1, "misses": 4, "evictions": 0})
+        # API keys are only kept as hashes in the index
+        self.assertFalse(any("sk-1" in part for key in pool._clients for part in key))
+
+    def test_least_recently_used_client_is_dropped(self):
+        pool = LLMClientPool(max_clients=2)
+        a = pool.get("openai", "a", object)
+        pool.get("openai", "b", object)
+        pool.get("openai", "a", object)
+        pool.get("openai", "c", object)
+
+        self.assertIs(pool.get("openai", "a", object), a)
+        self.assertEqual(pool.get_stats()["size"], 2)
+        self.assertEqual(pool.get_stats()["evictions"], 1)
+
+    def test_idle_clients_are_closed(self):
+        pool = LLMClientPool(idle_timeout=60)
+        client = pool.get("openai", "a", MagicMock)
+        self.now += 30
+        self.assertIs(pool.get("openai", "a", MagicMock), client)
+
+        self.now += 61
+        self.assertIsNot(pool.get("openai", "a", MagicMock), client)
+        client.close.assert_called_once()
+
+    def test_zero_max_clients_disables_pooling(self):
+        pool = LLMClientPool(max_clients=0)
+        self.assertIsNot(pool.get("openai", "a", object), pool.get("openai", "a", object))
+        self.assertEqual(pool.get_stats()["size"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+import os
+import sys
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.llm_service import LLMService
+from utils.stream_writer import CoalescedTextWriter
+
+
+def openai_chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class FakeTextWidget:
+    """Records inserts; after() callbacks run when pump() is called."""
+
+    def __init__(self):
+        self.content = ""
+        self.inserts = 0
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append(callback)
+
+    def pump(self):
+        callbacks, self.scheduled = self.scheduled, []
+        for callback in callbacks:
+            callback()
+
+    def insert(self, index, text, *tags):
+        self.content += text
+        self.inserts += 1
+
+    def configure(self, **kwargs):
+        pass
+
+    def see(self, index):
+        pass
+
+    def winfo_exists(self):
+        return True
+
+
+class TestStreamResponse(unittest.TestCase):
+    def setUp(self):
+        LLMService._stream_stats.clear()
+
+    def test_openai_compatible_deltas_and_ttft_stats(self):
+        client = MagicMock()
+        client.chat.completions.create.return_value = iter(
+            [openai_chunk(None), openai_chunk("Bon"), openai_chunk("jour"), openai_chunk("")]
+        )
+        with patch('core.services.llm_service.get_openai_client', return_value=client) as get_client:
+            deltas = list(LLMService.stream_response(
+                "IAKA (Interne)", "key", [{"role": "user", "content": "Salut"}],
+                base_url="http://iaka.local", model="mistral-small", temperature=0.2
+            ))
+
+        self.assertEqual(deltas, ["Bon", "jour"])
+        get_client.assert_called_once_with("key", "http://iaka.local/mistral-small/v1")
+        _, create_kwargs = client.chat.completions.create.call_args
+        self.assertTrue(create_kwargs["stream"])
+        self.assertEqual(create_kwargs["temperature"], 0.2)
+
+        stats = LLMService.get_stream_stats()["IAKA (Interne)"]
+        self.assertEqual(stats["streams"], 1)
+        self.assertGreaterEqual(stats["duration_avg_ms"], stats["ttft_avg_ms"])
+
+    def test_streamed_generation_returns_full_text_or_error(self):
+        def failing_stream(*args, **kwargs):
+            yield "Début"
+            raise RuntimeError("connexion perdue")
+
+        received = []
+        with patch.object(LLMService, '_stream_provider', side_effect=lambda *a, **k: iter(["a", "b"])):
+            self.assertEqual(
+                LLMService.generate_response_streamed("Groq", "key", [], received.append),
+                (True, "ab")
+            )
+        with patch.object(LLMService, '_stream_provider', side_effect=failing_stream):
+            success, message = LLMService.generate_response_streamed("Groq", "key", [], received.append)
+
+        self.assertFalse(success)
+        self.assertIn("connexion perdue", message)
+        self.assertEqual(received, ["a", "b", "Début"])
+
+
+class TestCoalescedTextWriter(unittest.TestCase):
+    def test_deltas_are_rendered_in_batches(self):
+        widget = FakeTextWidget()
+        done = []
+        writer = CoalescedTextWriter(widget, prefix="Assistant : ", on_done=done.append)
+        writer.start()
+
+        for token in ["Un ", "deux ", "trois"]:
+            writer.write(token)
+        widget.pump()
+        writer.write(" quatre")
+        writer.close()
+        widget.pump()
+
+        self.assertEqual(widget.content, "Assistant : Un deux trois quatre")
+        self.assertEqual(widget.inserts, 2)
+        self.assertEqual(done, ["Un deux trois quatre"])
+        self.assertEqual(widget.scheduled, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
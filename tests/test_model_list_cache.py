@@ -0,0 +1,116 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+import shutil
+import threading
+import time
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.model_list_cache import ModelListCache
+from core.services.llm_service import LLMService
+
+
+class TestModelListCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "models.json")
+        self.fetched = []
+        self.updated = threading.Event()
+        self.answer = ["model-a", "model-b"]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def fetch(self, provider_name, api_key, **kwargs):
+        self.fetched.append((provider_name, kwargs.get("base_url")))
+        return list(self.answer)
+
+    def wait_update(self, cache, *args, **kwargs):
+        self.updated.clear()
+        received = []
+        result = cache.get_models(*args, on_update=lambda models: (received.append(models), self.updated.set()), **kwargs)
+        return result, received
+
+    def test_served_from_disk_and_refreshed_when_stale(self):
+        cache = ModelListCache(self.path, ttl_seconds=3600, fetch=self.fetch)
+        result, received = self.wait_update(cache, "IAKA", "key", "https://iaka/v1/")
+        self.assertIsNone(result)
+        self.assertTrue(self.updated.wait(5))
+        self.assertEqual(received, [["model-a", "model-b"]])
+
+        # A new process reads the list from disk without fetching
+        reloaded = ModelListCache(self.path, ttl_seconds=3600, fetch=self.fetch)
+        self.assertEqual(reloaded.get_models("IAKA", "key", "https://iaka/v1"), ["model-a", "model-b"])
+        self.assertIsNone(reloaded.get("IAKA", "https://autre/v1"))
+        self.assertEqual(len(self.fetched), 1)
+
+        # Stale: the old list is served while the refresh runs
+        self.answer = ["model-c"]
+        stale = ModelListCache(self.path, ttl_seconds=0, fetch=self.fetch)
+        result, received = self.wait_update(stale, "IAKA", "key", "https://iaka/v1")
+        self.assertEqual(result, ["model-a", "model-b"])
+        self.assertTrue(self.updated.wait(5))
+        self.assertEqual(received, [["model-c"]])
+
+    def test_forced_refresh_joins_running_refresh_and_always_notifies(self):
+        release = threading.Event()
+
+        def slow_fetch(provider_name, api_key, **kwargs):
+            release.wait(5)
+            return self.fetch(provider_name, api_key, **kwargs)
+
+        cache = ModelListCache(self.path, ttl_seconds=0, fetch=slow_fetch)
+        cache.put("Groq", None, self.answer)
+        background = []
+        self.assertEqual(cache.get_models("Groq", "key", on_update=background.append), self.answer)
+        # Refresh clicked while the stale list is being refreshed: same list, still reported
+        result, received = self.wait_update(cache, "Groq", "key", force_refresh=True)
+        self.assertEqual(result, self.answer)
+        release.set()
+
+        self.assertTrue(self.updated.wait(5))
+        self.assertEqual(received, [["model-a", "model-b"]])
+        self.assertEqual(background, [])
+        self.assertEqual(len(self.fetched), 1)
+
+    def test_errors_are_not_cached(self):
+        self.answer = ["Erreur: 401"]
+        cache = ModelListCache(self.path, fetch=self.fetch)
+        self.assertEqual(cache.refresh("Groq", "key"), ["Erreur: 401"])
+        self.assertIsNone(cache.get("Groq"))
+
+    def test_iaka_discovery_urls_are_probed_concurrently(self):
+        def fetch_openai(api_key, base_url=None):
+            time.sleep(0.3)
+            if base_url.endswith("/v1"):
+                return ["mistral-small"]
+            raise Exception("404")
+
+        with patch.object(LLMService, "_fetch_openai_models", side_effect=fetch_openai):
+            start = time.monotonic()
+            models = LLMService.fetch_models("IAKA (Interne)", "key", base_url="https://iaka")
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(models, ["mistral-small"])
+        self.assertLess(elapsed, 0.55)
+
+    def test_iaka_discovery_prefers_urls_in_order(self):
+        def fetch_openai(api_key, base_url=None):
+            # The preferred URL answers last
+            if base_url.endswith("/v1"):
+                return ["v1-model"]
+            time.sleep(0.2)
+            return ["base-model"]
+
+        with patch.object(LLMService, "_fetch_openai_models", side_effect=fetch_openai):
+            models = LLMService.fetch_models("IAKA (Interne)", "key", base_url="https://iaka")
+
+        self.assertEqual(models, ["base-model"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.provider_router import (
+    LatencyTracker, ProviderRouter, is_failover_error, provider_chain
+)
+
+
+class TestProviderRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = ProviderRouter(LatencyTracker())
+
+    def test_chain_and_error_classification(self):
+        settings = {"api_keys": {"Groq": "k1", "Mistral": "k2", "OpenAI": ""}}
+        self.assertEqual(provider_chain(settings, "Groq", ["OpenAI", "Mistral", "Groq"]), ["Groq", "Mistral"])
+        self.assertTrue(is_failover_error("Erreur Groq: Error code: 429 - rate_limit_exceeded"))
+        self.assertTrue(is_failover_error("Erreur OpenAI: insufficient_quota"))
+        self.assertTrue(is_failover_error("Request timed out."))
+        self.assertFalse(is_failover_error("Erreur OpenAI: 401 invalid api key"))
+
+    def test_fails_over_on_rate_limit_only(self):
+        calls = []
+        failovers = []
+
+        def call(provider):
+            calls.append(provider)
+            if provider == "Groq":
+                return False, "Error code: 429 - rate limit"
+            return True, f"réponse {provider}"
+
+        result = self.router.call(["Groq", "Mistral"], call, on_failover=lambda p, e: failovers.append(p))
+        self.assertEqual(result, (True, "réponse Mistral", "Mistral"))
+        self.assertEqual(failovers, ["Groq"])
+
+        # Groq is cooling down: Mistral now goes first
+        self.assertEqual(self.router.order_chain(["Groq", "Mistral"]), ["Mistral", "Groq"])
+
+        calls.clear()
+        result = self.router.call(["OpenAI", "Mistral"], lambda p: calls.append(p) or (False, "401 invalid api key"))
+        self.assertEqual(result, (False, "401 invalid api key", "OpenAI"))
+        self.assertEqual(calls, ["OpenAI"])
+
+    def test_chain_is_ordered_by_tail_latency(self):
+        for _ in range(10):
+            self.router.tracker.record("Groq", 4.0)
+            self.router.tracker.record("Mistral", 1.0)
+        self.assertEqual(self.router.order_chain(["Groq", "Gemini", "Mistral"]), ["Mistral", "Groq", "Gemini"])
+        self.assertEqual(self.router.order_chain(["Groq", "Mistral"], by_latency=False), ["Groq", "Mistral"])
+
+    def test_slow_provider_is_hedged(self):
+        for _ in range(10):
+            self.router.tracker.record("Groq", 0.05)
+        release = threading.Event()
+
+        def call(provider):
+            if provider == "Groq":
+                release.wait(5)
+                return True, "lent"
+            return True, "rapide"
+
+        start = time.monotonic()
+        result = self.router.call(["Groq", "Mistral"], call, hedge=True, order_by_latency=False)
+        release.set()
+
+        self.assertEqual(result, (True, "rapide", "Mistral"))
+        self.assertLess(time.monotonic() - start, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import sys
+import tempfile
+import shutil
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.managers.record_store import SQLiteStore
+from core.managers.assistant_repository import AssistantRepository
+from core.managers.knowledge_base_repository import KnowledgeBaseRepository
+
+
+class TestRecordStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.assistants_path = os.path.join(self.tmp_dir, "assistants.json")
+        self.kb_path = os.path.join(self.tmp_dir, "knowledge_bases.json")
+        self.patcher = patch(
+            "core.managers.assistant_repository.get_writable_path",
+            side_effect=lambda name: os.path.join(self.tmp_dir, name)
+        )
+        self.patcher.start()
+        self.stores = []
+
+    def tearDown(self):
+        self.patcher.stop()
+        for store in self.stores:
+            store.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def open_store(self):
+        store = SQLiteStore(os.path.join(self.tmp_dir, "app_data.db"))
+        self.stores.append(store)
+        return store
+
+    def test_json_files_are_migrated_once(self):
+        with open(self.assistants_path, "w", encoding="utf-8") as f:
+            json.dump([{"id": "a1", "name": "Un"}, {"id": "a2", "name": "Deux", "profile_id": "p1"}], f)
+        with open(self.kb_path, "w", encoding="utf-8") as f:
+            json.dump([{"id": "kb1", "name": "KB", "documents": [{"id": "d1"}, {"id": "d2"}]}], f)
+
+        repo = AssistantRepository(self.open_store())
+        kbs = KnowledgeBaseRepository(self.kb_path, repo.collection.store)
+        self.assertEqual([a["name"] for a in repo.get_all()], ["Un", "Deux"])
+        self.assertEqual([a["id"] for a in repo.get_by_profile("p1")], ["a2"])
+        self.assertEqual([d["id"] for d in kbs.get_by_id("kb1")["documents"]], ["d1", "d2"])
+
+        # Later changes are not overwritten by a second import
+        repo.delete("a1")
+        reopened = AssistantRepository(self.open_store())
+        self.assertEqual([a["id"] for a in reopened.get_all()], ["a2"])
+
+    def test_backends_behave_alike(self):
+        for store in (None, self.open_store()):
+            repo = AssistantRepository(store)
+            repo.save([])
+            created = repo.create(name="Bot", provider="Groq")
+            repo.create(name="Autre")
+            repo.update(created["id"], provider="Mistral", role=None)
+            self.assertEqual(repo.get_by_id(created["id"])["provider"], "Mistral")
+            self.assertEqual(repo.get_all()[0]["id"], created["id"])
+            repo.delete(created["id"])
+            self.assertIsNone(repo.get_by_id(created["id"]))
+            self.assertEqual(len(repo.get_all()), 1)
+
+            kb_path = os.path.join(self.tmp_dir, f"kb_{store is None}.json")
+            kbs = KnowledgeBaseRepository(kb_path, store)
+            kb = kbs.create("KB", "", storage="float32")
+            kbs.add_document(kb["id"], {"id": "d1", "summary": "v1"})
+            kbs.add_document(kb["id"], {"id": "d2", "summary": ""})
+            kbs.add_document(kb["id"], {"id": "d1", "summary": "v2"})
+            kbs.update(kb["id"], chunk_count=12, document_count=None)
+            self.assertEqual(kbs.get_by_id(kb["id"])["documents"], [{"id": "d2", "summary": ""}, {"id": "d1", "summary": "v2"}])
+            kbs.remove_documents(kb["id"], ["d2"])
+            kb = kbs.get_all()[0]
+            self.assertEqual((kb["chunk_count"], kb["document_count"]), (12, 0))
+            self.assertEqual([d["id"] for d in kb["documents"]], ["d1"])
+            kbs.delete(kb["id"])
+            self.assertEqual(kbs.get_all(), [])
+
+    def test_profile_lookup_uses_the_secondary_index(self):
+        store = self.open_store()
+        AssistantRepository(store)
+        plan = store.query(
+            "EXPLAIN QUERY PLAN SELECT data FROM records "
+            "WHERE collection = ? AND json_extract(data, '$.profile_id') = ?", ("assistants", "p1")
+        )
+        self.assertIn("records_assistants_profile_id", " ".join(str(row) for row in plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
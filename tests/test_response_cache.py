@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.response_cache import ResponseCache
+from core.services.llm_service import LLMService
+
+
+def fake_embed(text):
+    # Questions mentioning "prix" share a direction; anything else is orthogonal
+    return np.array([1.0, 0.01 * len(text), 0.0]) if "prix" in text else np.array([0.0, 0.0, 1.0])
+
+
+def conversation(question, system="Tu es un assistant."):
+    return [{"role": "system", "content": system}, {"role": "user", "content": question}]
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(os.path.join(self.tmp.name, "cache.sqlite3"), embed=fake_embed)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_exact_hit_normalizes_messages_and_respects_options(self):
+        self.cache.put("Groq", "llama", conversation("Quel est le prix ?"), "42 €", options={"temperature": 0.7})
+
+        self.assertEqual(self.cache.get("Groq", "llama", conversation("  Quel est le prix ?\n"), {"temperature": 0.7}), "42 €")
+        self.assertIsNone(self.cache.get("Groq", "llama", conversation("Quel est le prix ?"), {"temperature": 0.2}))
+        self.assertIsNone(self.cache.get("Groq", "other", conversation("Quel est le prix ?"), {"temperature": 0.7}))
+
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["exact_hits"], stats["misses"]), (1, 2))
+        self.assertAlmostEqual(stats["hit_rate"], 1 / 3)
+
+    def test_semantic_hit_requires_same_context(self):
+        self.cache.put("Groq", "llama", conversation("Quel est le prix ?"), "42 €", semantic=True)
+
+        self.assertIsNone(self.cache.get("Groq", "llama", conversation("Donne-moi le prix"), semantic=False))
+        self.assertEqual(self.cache.get("Groq", "llama", conversation("Donne-moi le prix"), semantic=True), "42 €")
+        self.assertIsNone(self.cache.get("Groq", "llama", conversation("Bonjour"), semantic=True))
+        self.assertIsNone(
+            self.cache.get("Groq", "llama", conversation("Donne-moi le prix", system="Autre rôle"), semantic=True)
+        )
+        self.assertEqual(self.cache.get_stats()["semantic_hits"], 1)
+
+    def test_ttl_and_invalidation(self):
+        self.cache.put("Groq", "", conversation("A"), "a", scope="assistant:1", kb_ids=["kb1", "kb2"])
+        self.cache.put("Groq", "", conversation("B"), "b", scope="assistant:2", kb_ids=["kb10"])
+        self.cache.put("Groq", "", conversation("C"), "c", scope="assistant:3")
+
+        self.assertEqual(self.cache.invalidate_knowledge_base("kb1"), 1)
+        self.assertEqual(self.cache.invalidate_scope("assistant:3"), 1)
+        self.assertEqual(self.cache.get("Groq", "", conversation("B"), scope="assistant:2", kb_ids=["kb10"]), "b")
+
+        self.cache.ttl_seconds = 60
+        with patch("core.services.response_cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(self.cache.get("Groq", "", conversation("B"), scope="assistant:2", kb_ids=["kb10"]))
+            self.assertEqual(self.cache.purge_expired(), 1)
+        self.assertEqual(self.cache.get_stats()["entries"], 0)
+
+    def test_generate_response_uses_cache_only_with_scope(self):
+        with patch("core.services.response_cache.get_response_cache", return_value=self.cache), \
+                patch.object(LLMService, "generate_groq", return_value=(True, "réponse")) as generate:
+            for _ in range(2):
+                self.assertEqual(
+                    LLMService.generate_response("Groq", "key", conversation("Q"), cache_scope="assistant:1"),
+                    (True, "réponse")
+                )
+            LLMService.generate_response("Groq", "key", conversation("Q"))
+
+        self.assertEqual(generate.call_count, 2)
+        self.assertNotIn("cache_scope", generate.call_args[1])
+
+    def test_rag_answers_are_shared_between_streamed_and_standard_paths(self):
+        messages = conversation("Quel est le prix ?")
+        with patch("core.services.response_cache.get_response_cache", return_value=self.cache), \
+                patch.object(LLMService, "_build_rag_messages", return_value=messages), \
+                patch.object(LLMService, "stream_response", return_value=iter(["42", " €"])) as stream, \
+                patch.object(LLMService, "generate_response", return_value=(True, "autre")) as generate:
+            deltas = []
+            self.assertEqual(
+                LLMService.generate_response_streamed("Groq", "key", messages, deltas.append, kb_id="kb1",
+                                                      cache_scope="assistant:1"),
+                (True, "42 €")
+            )
+            self.assertEqual(
+                LLMService.generate_response_with_rag("Groq", "key", messages, ["kb1"], cache_scope="assistant:1"),
+                (True, "42 €")
+            )
+
+        self.assertEqual(stream.call_count, 1)
+        generate.assert_not_called()
+        self.assertEqual(self.cache.get_stats()["entries"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
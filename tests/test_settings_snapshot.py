@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import sys
+import tempfile
+import shutil
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.managers.settings_manager import SettingsManager
+
+
+class TestSettingsSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.patcher = patch(
+            "core.managers.settings_manager.get_writable_path",
+            side_effect=lambda name: os.path.join(self.tmp_dir, name)
+        )
+        self.patcher.start()
+        self.manager = SettingsManager()
+        self.manager.save_configuration("Groq", "Groq", {"Groq": "gsk-1", "Mistral": "ms-1"})
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_keys_are_decrypted_once_per_change(self):
+        manager = SettingsManager()
+        with patch.object(manager, "_decrypt", wraps=manager._decrypt) as decrypt:
+            for _ in range(20):
+                settings = manager.get_settings()
+                self.assertEqual(settings["api_keys"]["Groq"], "gsk-1")
+                # Callers get copies
+                settings["api_keys"]["Groq"] = "modifiée"
+            self.assertEqual(decrypt.call_count, 2)
+
+            manager.save_configuration("Groq", "Groq", {"Groq": "gsk-2"})
+            self.assertEqual(manager.get_settings()["api_keys"], {"Groq": "gsk-2", "Mistral": "ms-1"})
+            self.assertEqual(decrypt.call_count, 2)
+
+    def test_subscribers_are_notified_of_changes(self):
+        received = []
+        unsubscribe = self.manager.subscribe(lambda settings, version: received.append((settings["chat_provider"], version)))
+        version = self.manager.get_version()
+
+        self.manager.save_configuration("Mistral", "Groq", {})
+        self.assertEqual(received, [("Mistral", version + 1)])
+
+        # Same content: no notification
+        self.manager.save_configuration("Mistral", "Groq", {})
+        self.assertEqual(len(received), 1)
+
+        # Edited on disk by another process
+        with open(self.manager.settings_path, "r") as f:
+            data = json.load(f)
+        data["chat_provider"] = "OpenAI"
+        with open(self.manager.settings_path, "w") as f:
+            json.dump(data, f)
+        stat = os.stat(self.manager.settings_path)
+        os.utime(self.manager.settings_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.manager.get_settings()["chat_provider"], "OpenAI")
+        self.assertEqual(received[-1][0], "OpenAI")
+
+        unsubscribe()
+        self.manager.save_configuration("Groq", "Groq", {})
+        self.assertEqual(len(received), 2)
+
+    def test_keys_saved_by_other_screens_are_kept(self):
+        chains = {"doc_analyst": ["Mistral"]}
+        self.manager.save_configuration("Groq", "Groq", {}, module_fallback_providers=chains)
+        # Screens saving their own keys only
+        self.manager.save_configuration("Mistral", "Groq", {}, scraping_solution="playwright")
+
+        settings = SettingsManager().get_settings()
+        self.assertEqual(settings["module_fallback_providers"], chains)
+        self.assertEqual(settings["scraping_solution"], "playwright")
+        self.assertEqual(settings["chat_provider"], "Mistral")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+import threading
+import time
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.summary_jobs import SummaryJournal, SummaryPool, SUMMARY_UNAVAILABLE, get_summary_journal
+
+
+class TestSummaryJobs(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def journal(self):
+        return SummaryJournal("kb1", root=self.tmp_dir)
+
+    def generate(self, file_path, text, provider, api_key):
+        with self.lock:
+            self.calls.append(file_path)
+        time.sleep(0.2)
+        return f"résumé de {text}"
+
+    def test_summaries_run_concurrently_and_are_delivered_as_they_complete(self):
+        delivered = []
+        pool = SummaryPool(self.generate, self.journal(), lambda p, d, s: delivered.append((p, d, s)), max_workers=4)
+        start = time.monotonic()
+        for i in range(4):
+            pool.submit(f"f{i}.txt", f"doc{i}", f"h{i}", f"texte {i}", "Groq", "key")
+        summaries = pool.wait()
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(summaries["f2.txt"], "résumé de texte 2")
+        self.assertEqual(sorted(d for _, d, _ in delivered), ["doc0", "doc1", "doc2", "doc3"])
+
+    def test_unchanged_content_reuses_the_journaled_summary(self):
+        pool = SummaryPool(self.generate, self.journal(), max_workers=1)
+        pool.submit("a.txt", "docA", "h1", "texte", "Groq", "key")
+        pool.wait()
+
+        pool = SummaryPool(self.generate, self.journal(), max_workers=1)
+        pool.submit("a.txt", "docA", "h1", "texte", "Groq", "key")
+        pool.submit("b.txt", "docB", "h2", "autre", "Groq", "key")
+        pool.wait()
+        self.assertEqual(self.calls, ["a.txt", "b.txt"])
+
+        # Modified content is summarized again
+        pool = SummaryPool(self.generate, self.journal(), max_workers=1)
+        pool.submit("a.txt", "docA", "h3", "nouveau", "Groq", "key")
+        self.assertEqual(pool.wait()["a.txt"], "résumé de nouveau")
+
+        journal = self.journal()
+        journal.forget_completed(["docA", "docB"])
+        self.assertIsNone(journal.lookup("docA", "h3"))
+
+    def test_failed_job_stays_pending_and_is_resumed(self):
+        def failing(file_path, text, provider, api_key):
+            raise RuntimeError("Error code: 429")
+
+        pool = SummaryPool(failing, self.journal(), max_workers=2)
+        pool.submit("a.txt", "docA", "h1", "texte A", "Groq", "key")
+        self.assertEqual(pool.wait()["a.txt"], SUMMARY_UNAVAILABLE)
+
+        journal = self.journal()
+        self.assertEqual(list(journal.pending()), ["docA"])
+        self.assertEqual(journal.read_text("docA"), "texte A")
+
+        pool = SummaryPool(self.generate, journal, max_workers=2)
+        self.assertEqual(pool.resume({"Groq": "key"}.get), 1)
+        self.assertEqual(pool.wait(), {"a.txt": "résumé de texte A"})
+        self.assertEqual(self.journal().pending(), {})
+        self.assertIsNone(self.journal().read_text("docA"))
+
+    def test_resume_is_refused_while_the_journal_is_in_use(self):
+        journal = get_summary_journal("kb1", root=self.tmp_dir)
+        self.assertIs(get_summary_journal("kb1", root=self.tmp_dir), journal)
+
+        importing = SummaryPool(self.generate, journal, max_workers=1)
+        importing.submit("a.txt", "docA", "h1", "texte A", "Groq", "key")
+        resume = SummaryPool(self.generate, journal, max_workers=1, exclusive=True)
+        self.assertFalse(resume.active)
+        self.assertEqual(resume.resume({"Groq": "key"}.get), 0)
+        resume.wait()
+        self.assertTrue(journal.in_use())
+
+        importing.wait()
+        self.assertFalse(journal.in_use())
+        self.assertEqual(self.calls, ["a.txt"])
+
+
+if __name__ == '__main__':
+    unittest.main()
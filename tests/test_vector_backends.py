@@ -0,0 +1,289 @@
+import unittest
+from unittest.mock import patch
+import importlib.util
+import os
+import sys
+import tempfile
+import shutil
+import sqlite3
+
+import numpy as np
+
+# Ensure modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services.vector_backends.numpy_backend import MemmapVectorStore, quantize
+from core.services.vector_store_service import VectorStoreService, fuse_results
+
+HAS_HNSWLIB = importlib.util.find_spec("hnswlib") is not None
+HAS_CHROMADB = importlib.util.find_spec("chromadb") is not None
+
+
+def make_documents(count, files=4):
+    return [
+        {"id": f"chunk-{i}", "text": f"texte {i}", "metadata": {"file_path": f"doc_{i % files}.txt", "chunk_index": i}}
+        for i in range(count)
+    ]
+
+
+class TestMemmapVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.vectors = rng.standard_normal((400, 16)).astype(np.float32)
+        self.documents = make_documents(400)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_int8_quantization_error_is_small(self):
+        codes, scales = quantize(self.vectors, "int8")
+        self.assertEqual(codes.dtype, np.int8)
+        restored = codes.astype(np.float32) * scales[:, None]
+        self.assertLess(np.abs(restored - self.vectors).max(), scales.max())
+
+    def test_search_matches_exact_results(self):
+        for mode in ("float32", "int8", "float16"):
+            store = MemmapVectorStore.create(os.path.join(self.tmp_dir, mode), mode, 16)
+            store.upsert(self.documents, self.vectors)
+
+            query = self.vectors[7] + 0.01
+            results = store.search(query, top_k=5)
+            exact = ((self.vectors - query) ** 2).sum(axis=1)
+            expected = np.argsort(exact)[:5]
+
+            self.assertEqual([r["id"] for r in results], [f"chunk-{i}" for i in expected])
+            self.assertEqual(set(results[0]), {"id", "text", "metadata", "distance"})
+            self.assertAlmostEqual(results[0]["distance"], float(exact[expected[0]]), places=3)
+            self.assertEqual(results[0]["metadata"]["chunk_index"], 7)
+            store.close()
+
+    def test_upsert_replaces_and_delete_compacts(self):
+        path = os.path.join(self.tmp_dir, "kb")
+        store = MemmapVectorStore.create(path, "int8", 16)
+        store.upsert(self.documents, self.vectors)
+        store.upsert(self.documents[:10], self.vectors[:10])
+        self.assertEqual(store.count(), 400)
+
+        store.delete_by_file("doc_0.txt")
+        store.delete_by_file("doc_1.txt")
+        self.assertEqual(store.count(), 200)
+        # Half of the rows were deleted, the files were compacted
+        self.assertEqual(store._rows, 200)
+        store.close()
+
+        reopened = MemmapVectorStore(path)
+        self.assertEqual(reopened.count(), 200)
+        self.assertEqual(reopened.search(self.vectors[2], top_k=1)[0]["id"], "chunk-2")
+        self.assertTrue(all(r["metadata"]["file_path"] not in ("doc_0.txt", "doc_1.txt")
+                            for r in reopened.search(self.vectors[0], top_k=20)))
+        reopened.close()
+
+    def test_files_are_realigned_after_a_crash_between_appends(self):
+        path = os.path.join(self.tmp_dir, "kb")
+        store = MemmapVectorStore.create(path, "int8", 16)
+        store.upsert(self.documents[:100], self.vectors[:100])
+        store.close()
+        # Crash after the codes of the next batch were written, in the middle of its scales
+        with open(os.path.join(path, "codes.bin"), "ab") as f:
+            f.write(quantize(self.vectors[100:110], "int8")[0].tobytes())
+        with open(os.path.join(path, "scales.f32"), "ab") as f:
+            f.write(b"\x00\x00")
+
+        store = MemmapVectorStore(path)
+        self.assertEqual(store.count(), 100)
+        store.upsert(self.documents[200:300], self.vectors[200:300])
+        store.close()
+
+        reopened = MemmapVectorStore(path)
+        for i in (5, 250):
+            result = reopened.search(self.vectors[i], top_k=1)[0]
+            self.assertEqual(result["id"], f"chunk-{i}")
+            self.assertAlmostEqual(result["distance"], 0.0, places=3)
+        reopened.close()
+
+    def test_failed_upsert_leaves_the_files_aligned(self):
+        path = os.path.join(self.tmp_dir, "kb")
+        store = MemmapVectorStore.create(path, "int8", 16)
+        store.upsert(self.documents[:100], self.vectors[:100])
+        with patch.object(store.chunks, "insert", side_effect=sqlite3.OperationalError("disk I/O error")):
+            with self.assertRaises(sqlite3.OperationalError):
+                store.upsert(self.documents[100:200], self.vectors[100:200])
+        store.upsert(self.documents[200:300], self.vectors[200:300])
+
+        self.assertEqual(store.count(), 200)
+        result = store.search(self.vectors[250], top_k=1)[0]
+        self.assertEqual(result["id"], "chunk-250")
+        self.assertAlmostEqual(result["distance"], 0.0, places=3)
+        store.close()
+
+
+@unittest.skipUnless(HAS_HNSWLIB, "hnswlib not installed")
+class TestHnswVectorStore(unittest.TestCase):
+    def setUp(self):
+        from core.services.vector_backends.hnsw_backend import HnswVectorStore
+        self.store_cls = HnswVectorStore
+        self.tmp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(1)
+        self.vectors = rng.standard_normal((500, 16)).astype(np.float32)
+        self.documents = make_documents(500)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_search_and_replay_after_reopen(self):
+        path = os.path.join(self.tmp_dir, "kb")
+        store = self.store_cls.create(path, 16)
+        store.upsert(self.documents[:300], self.vectors[:300])
+        store.persist()
+        # Added and deleted after the last save: replayed from vectors.f32 and SQLite
+        store.upsert(self.documents[300:], self.vectors[300:])
+        store.delete_by_file("doc_3.txt")
+        store.chunks.close()
+
+        reopened = self.store_cls(path)
+        self.assertEqual(reopened.count(), 375)
+        self.assertEqual(reopened.search(self.vectors[450], top_k=1)[0]["id"], "chunk-450")
+        results = reopened.search(self.vectors[7] + 0.01, top_k=10)
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(r["metadata"]["file_path"] != "doc_3.txt" for r in results))
+        reopened.close()
+
+    def test_torn_vector_write_is_truncated_on_reopen(self):
+        path = os.path.join(self.tmp_dir, "kb")
+        store = self.store_cls.create(path, 16)
+        store.upsert(self.documents[:100], self.vectors[:100])
+        store.persist()
+        store.chunks.close()
+        with open(os.path.join(path, "vectors.f32"), "ab") as f:
+            f.write(self.vectors[100, :5].tobytes())
+
+        store = self.store_cls(path)
+        store.upsert(self.documents[200:300], self.vectors[200:300])
+        store.chunks.close()
+
+        # Replayed from vectors.f32: the new rows must be read back at their own labels
+        reopened = self.store_cls(path)
+        result = reopened.search(self.vectors[250], top_k=1)[0]
+        self.assertEqual(result["id"], "chunk-250")
+        self.assertAlmostEqual(result["distance"], 0.0, places=3)
+        reopened.close()
+
+
+class TestFuseResults(unittest.TestCase):
+    def test_rrf_dedups_identical_texts(self):
+        kb_a = [{"id": "a1", "text": "Même  passage", "distance": 0.2}, {"id": "a2", "text": "autre", "distance": 0.5}]
+        kb_b = [{"id": "b1", "text": "même passage", "distance": 0.1}, {"id": "b2", "text": "troisième", "distance": 0.3}]
+
+        fused = fuse_results([kb_a, kb_b], top_k=5)
+        self.assertEqual([r["id"] for r in fused], ["b1", "b2", "a2"])
+        self.assertAlmostEqual(fused[0]["score"], 2 / 61)
+
+    def test_distance_fusion_normalizes_each_list(self):
+        kb_a = [{"id": "a1", "text": "x", "distance": 10.0}, {"id": "a2", "text": "y", "distance": 20.0}]
+        kb_b = [{"id": "b1", "text": "z", "distance": 0.1}, {"id": "b2", "text": "w", "distance": 0.15}]
+
+        fused = fuse_results([kb_a, kb_b], top_k=3, method="distance")
+        self.assertEqual({r["id"] for r in fused[:2]}, {"a1", "b1"})
+        self.assertEqual(fused[0]["score"], 1.0)
+        self.assertEqual(len(fused), 3)
+
+
+class TestVectorStoreServiceBackends(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path_patcher = patch(
+            'core.services.vector_store_service.get_writable_path',
+            side_effect=lambda name: os.path.join(self.tmp_dir, name)
+        )
+        self.path_patcher.start()
+
+    def tearDown(self):
+        self.path_patcher.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_local_backend_is_selected_per_kb(self):
+        service = VectorStoreService()
+        service.create_knowledge_base("kb1", "Test", "", storage="int8")
+        vectors = np.eye(4, 384, dtype=np.float32)
+        service.add_documents("kb1", make_documents(4), vectors)
+
+        # A fresh service finds the KB from its files, without opening ChromaDB
+        service.close()
+        reopened = VectorStoreService()
+        self.assertEqual(reopened.get_backend_name("kb1"), "numpy")
+        self.assertEqual(reopened.get_storage_mode("kb1"), "int8")
+        self.assertEqual(reopened.search("kb1", vectors[2].tolist(), top_k=1)[0]["id"], "chunk-2")
+        self.assertEqual(reopened.get_stats("kb1")["chunk_count"], 4)
+        self.assertNotIn("chroma", reopened._backends)
+
+        reopened.delete_knowledge_base("kb1")
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, "vector_databases", "numpy", "kb_kb1")))
+        reopened.close()
+
+    def test_search_many_spans_backends(self):
+        service = VectorStoreService()
+        service.create_knowledge_base("kb_a", "A", "", backend="numpy")
+        service.create_knowledge_base("kb_b", "B", "", storage="int8")
+        vectors = np.eye(4, 384, dtype=np.float32)
+        service.add_documents("kb_a", make_documents(2), vectors[:2])
+        documents = [
+            {"id": f"b-{i}", "text": f"texte b {i}", "metadata": {"file_path": "b.txt"}} for i in range(2)
+        ]
+        service.add_documents("kb_b", documents, vectors[2:])
+
+        results = service.search_many(["kb_a", "kb_b", "missing"], vectors[3], top_k=2)
+        self.assertEqual(results[0]["id"], "b-1")
+        self.assertEqual(results[0]["kb_id"], "kb_b")
+        self.assertEqual(len(results), 2)
+        service.close()
+
+    def test_service_is_shared_per_root(self):
+        service = VectorStoreService()
+        self.assertIs(VectorStoreService(), service)
+        service.close()
+        self.assertIsNot(VectorStoreService(), service)
+        VectorStoreService().close()
+
+    def test_cleanup_removes_orphan_segment_directories(self):
+        service = VectorStoreService()
+        self.assertEqual(service.cleanup_orphan_files(), {"deleted": [], "failed": []})
+
+        root = service.vector_db_root
+        active, orphan = "11111111-1111-1111-1111-111111111111", "22222222-2222-2222-2222-222222222222"
+        conn = sqlite3.connect(os.path.join(root, "chroma.sqlite3"))
+        conn.execute("CREATE TABLE segments (id TEXT PRIMARY KEY)")
+        conn.execute("INSERT INTO segments VALUES (?)", (active,))
+        conn.commit()
+        conn.close()
+        for name in (active, orphan, "numpy"):
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+
+        results = service.cleanup_orphan_files()
+        self.assertEqual(results, {"deleted": [orphan], "failed": []})
+        self.assertEqual(sorted(os.listdir(root)), sorted(["chroma.sqlite3", active, "numpy"]))
+        service.close()
+
+    @unittest.skipUnless(HAS_CHROMADB, "chromadb not installed")
+    def test_chroma_collection_handles_are_cached(self):
+        service = VectorStoreService()
+        service.create_knowledge_base("kb2", "Test", "")
+        vectors = np.eye(4, 8, dtype=np.float32)
+        service.add_documents("kb2", make_documents(4), vectors)
+
+        client = service.client
+        with patch.object(client, "get_collection", wraps=client.get_collection) as get_collection:
+            for i in range(3):
+                self.assertEqual(service.search("kb2", vectors[i], top_k=1)[0]["id"], f"chunk-{i}")
+            get_collection.assert_not_called()
+
+        # The handle is invalidated with the collection: a re-created KB is empty
+        service.delete_knowledge_base("kb2")
+        self.assertFalse(service.knowledge_base_exists("kb2"))
+        service.create_knowledge_base("kb2", "Test", "")
+        self.assertEqual(service.get_stats("kb2")["chunk_count"], 0)
+        service.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
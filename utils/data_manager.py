@@ -1,12 +1,17 @@
-import json
 import os
-import uuid
-import datetime
+import sqlite3
+import threading
+from functools import partial
 from typing import List, Dict, Any, Optional
 from core.managers.settings_manager import SettingsManager
 from core.managers.assistant_repository import AssistantRepository
 from core.managers.profile_repository import ProfileRepository
+from core.managers.knowledge_base_repository import KnowledgeBaseRepository
+from core.managers.conversation_log import ConversationLog
+from core.managers.conversation_search import ConversationSearchIndex, SEARCH_INDEX_FILE
+from core.managers.record_store import SQLiteStore, STORE_FILE, BACKEND_SQLITE, DEFAULT_BACKEND
 from utils.resource_handler import get_writable_path
+from core.services import response_cache
 
 # Keep constants for backward compatibility if imported elsewhere
 DATA_FILE = "assistants.json"
@@ -24,11 +29,18 @@ class DataManager:
     def __init__(self):
         # Initialize sub-managers
         self.settings_manager = SettingsManager()
-        self.assistant_repo = AssistantRepository()
-        self.profile_repo = ProfileRepository()
         
-        # Paths still used directly until we move everything
+        # Assistants, profiles and knowledge bases live in SQLite unless the settings ask for JSON files
+        # (existing JSON files are imported on first start)
+        self.store = None
+        if self.get_settings().get("storage_backend", DEFAULT_BACKEND) == BACKEND_SQLITE:
+            self.store = SQLiteStore(get_writable_path(STORE_FILE))
+        self.assistant_repo = AssistantRepository(self.store)
+        self.profile_repo = ProfileRepository(self.store)
         self.knowledge_bases_path = get_writable_path(KNOWLEDGE_BASES_FILE)
+        self.kb_repo = KnowledgeBaseRepository(self.knowledge_bases_path, self.store)
+        
+        # Paths still used directly until we move everything
         self.conv_root = get_writable_path("conversations")
         self.doc_conv_dir = os.path.join(self.conv_root, "doc_analyst")
         self.assistants_conv_dir = os.path.join(self.conv_root, "assistants")
@@ -36,10 +48,19 @@ class DataManager:
         
         self.old_doc_conversations_path = get_writable_path(DOC_CONVERSATIONS_FILE)
         self.doc_conversations_path = os.path.join(self.doc_conv_dir, DOC_CONVERSATIONS_FILE)
+        self._conversation_logs: Dict[str, ConversationLog] = {}
+        self._conversation_logs_lock = threading.Lock()
+
+        # Full-text index of every conversation, fed by the conversation logs on each save
+        try:
+            self.search_index = ConversationSearchIndex(get_writable_path(SEARCH_INDEX_FILE))
+        except sqlite3.Error as e:
+            # e.g. SQLite built without FTS5: conversations still work, search does not
+            print(f"Conversation search disabled: {e}")
+            self.search_index = None
         
         self._ensure_dirs_exist()
         self._migrate_data()
-        self._ensure_files_exist()
 
     def _ensure_dirs_exist(self):
         os.makedirs(self.conv_root, exist_ok=True)
@@ -57,14 +78,6 @@ class DataManager:
             except Exception as e:
                 print(f"Error migrating doc conversations: {e}")
 
-    def _ensure_files_exist(self):
-        if not os.path.exists(self.doc_conversations_path):
-            with open(self.doc_conversations_path, 'w') as f:
-                json.dump([], f)
-        if not os.path.exists(self.knowledge_bases_path):
-            with open(self.knowledge_bases_path, 'w') as f:
-                json.dump([], f)
-
     # --- Delegation: Settings ---
     def get_settings(self):
         return self.settings_manager.get_settings()
@@ -72,6 +85,13 @@ class DataManager:
     def save_configuration(self, *args, **kwargs):
         return self.settings_manager.save_configuration(*args, **kwargs)
 
+    def get_settings_version(self) -> int:
+        return self.settings_manager.get_version()
+
+    def subscribe_settings(self, callback):
+        """Notify callback(settings, version) when the settings change; returns an unsubscribe function."""
+        return self.settings_manager.subscribe(callback)
+
     def save_settings(self, provider, api_key):
         """Deprecated but kept for compatibility."""
         current = self.get_settings()
@@ -85,16 +105,21 @@ class DataManager:
     def get_all_assistants(self):
         return self.assistant_repo.get_all()
 
-    def save_assistant(self, name, description, role="", context="", objective="", limits="", response_format="", target_url="", url_instructions="", provider="", scraping_solution="scrapegraphai", profile_id=None, use_profile=False, knowledge_base_id=None):
+    def save_assistant(self, name, description, role="", context="", objective="", limits="", response_format="", target_url="", url_instructions="", provider="", scraping_solution="scrapegraphai", profile_id=None, use_profile=False, knowledge_base_id=None, knowledge_base_ids=None, fallback_providers=None):
         return self.assistant_repo.create(
             name=name, description=description, role=role, context=context, objective=objective,
             limits=limits, response_format=response_format, target_url=target_url,
             url_instructions=url_instructions, provider=provider, scraping_solution=scraping_solution,
-            profile_id=profile_id, use_profile=use_profile, knowledge_base_id=knowledge_base_id
+            profile_id=profile_id, use_profile=use_profile, knowledge_base_id=knowledge_base_id,
+            knowledge_base_ids=knowledge_base_ids or ([knowledge_base_id] if knowledge_base_id else []),
+            fallback_providers=list(fallback_providers or [])
         )
 
     def update_assistant(self, assistant_id, **kwargs):
         self.assistant_repo.update(assistant_id, **kwargs)
+        # Cached answers were produced with the previous configuration
+        if set(kwargs) - {"status"}:
+            response_cache.invalidate_scope(f"assistant:{assistant_id}")
 
     def get_assistant_by_id(self, assistant_id):
         return self.assistant_repo.get_by_id(assistant_id)
@@ -104,6 +129,7 @@ class DataManager:
 
     def delete_assistant(self, assistant_id):
         self.assistant_repo.delete(assistant_id)
+        response_cache.invalidate_scope(f"assistant:{assistant_id}")
 
     # --- Delegation: Profiles ---
     def get_all_profiles(self) -> List[Dict[str, Any]]:
@@ -116,6 +142,10 @@ class DataManager:
 
     def update_profile(self, profile_id: str, **kwargs):
         self.profile_repo.update(profile_id, **kwargs)
+        # Assistants using this profile now get a different system prompt
+        for assistant in self.assistant_repo.get_by_profile(profile_id):
+            if assistant.get("use_profile"):
+                response_cache.invalidate_scope(f"assistant:{assistant['id']}")
 
     def delete_profile(self, profile_id: str):
         self.profile_repo.delete(profile_id)
@@ -160,7 +190,30 @@ class DataManager:
             scrapegraph_provider=settings.get("scrapegraph_provider", ""),
             api_keys=settings.get("api_keys", {}),
             endpoints=settings.get("endpoints", {}),
-            module_profiles=settings["module_profiles"]
+            module_profiles=settings["module_profiles"],
+            module_fallback_providers=settings.get("module_fallback_providers", {})
+        )
+
+    def get_module_fallback_providers(self, module_name: str) -> List[str]:
+        """Providers tried after the module's provider when it is rate-limited or unavailable."""
+        settings = self.get_settings()
+        return list(settings.get("module_fallback_providers", {}).get(module_name, []))
+
+    def set_module_fallback_providers(self, module_name: str, providers: List[str]) -> None:
+        settings = self.get_settings()
+        chains = settings.get("module_fallback_providers", {})
+        if providers:
+            chains[module_name] = list(providers)
+        else:
+            chains.pop(module_name, None)
+
+        self.save_configuration(
+            chat_provider=settings.get("chat_provider", ""),
+            scrapegraph_provider=settings.get("scrapegraph_provider", ""),
+            api_keys=settings.get("api_keys", {}),
+            endpoints=settings.get("endpoints", {}),
+            module_profiles=settings.get("module_profiles", {}),
+            module_fallback_providers=chains
         )
     
     def get_effective_module_config(self, module_name: str) -> Dict[str, str]:
@@ -176,39 +229,51 @@ class DataManager:
             "response_format": profile.get("response_format", "")
         }
 
-    # --- Doc Conversations (To be refactored similar to above but kept here for now) ---
+    # --- Conversations (append-only logs, see ConversationLog) ---
+    def _conversation_log(self, directory: str, legacy_json_path: str, module: str, assistant_id: Optional[str]) -> ConversationLog:
+        """Log of a conversation scope (kept open: it caches what each conversation already saved)."""
+        with self._conversation_logs_lock:
+            log = self._conversation_logs.get(directory)
+            if log is None:
+                on_change = None
+                if self.search_index is not None:
+                    on_change = partial(self.search_index.apply_change, module, assistant_id)
+                log = ConversationLog(directory, legacy_json_path, on_change=on_change)
+                self._conversation_logs[directory] = log
+            return log
+
+    # --- Doc Conversations ---
+    def _doc_conversation_log(self) -> ConversationLog:
+        return self._conversation_log(
+            os.path.join(self.doc_conv_dir, "conversations"), self.doc_conversations_path, "doc_analyst", None
+        )
+
     def get_doc_conversations(self):
         try:
-            with open(self.doc_conversations_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception: return []
+            return self._doc_conversation_log().list()
+        except Exception as e:
+            print(f"Error loading doc conversations: {e}")
+            return []
+
+    def get_doc_conversation_summaries(self) -> List[Dict[str, Any]]:
+        """Doc conversations without their messages: id, title, updated_at, message_count."""
+        try:
+            return self._doc_conversation_log().summaries()
+        except Exception as e:
+            print(f"Error loading doc conversation index: {e}")
+            return []
+
+    def get_doc_conversation(self, conversation_id) -> Optional[Dict[str, Any]]:
+        return self._doc_conversation_log().get(conversation_id)
 
     def save_doc_conversation(self, conversation):
-        conversations = self.get_doc_conversations()
-        found = False
-        for i, c in enumerate(conversations):
-            if c["id"] == conversation["id"]:
-                conversations[i] = conversation
-                found = True
-                break
-        if not found: conversations.append(conversation)
-        with open(self.doc_conversations_path, 'w', encoding='utf-8') as f:
-            json.dump(conversations, f, indent=4)
+        self._doc_conversation_log().save(conversation)
 
     def delete_doc_conversation(self, conversation_id):
-        conversations = self.get_doc_conversations()
-        conversations = [c for c in conversations if c["id"] != conversation_id]
-        with open(self.doc_conversations_path, 'w', encoding='utf-8') as f:
-            json.dump(conversations, f, indent=4)
+        self._doc_conversation_log().delete(conversation_id)
 
     def update_doc_conversation_title(self, conversation_id, new_title):
-        conversations = self.get_doc_conversations()
-        for c in conversations:
-            if c["id"] == conversation_id:
-                c["title"] = new_title
-                break
-        with open(self.doc_conversations_path, 'w', encoding='utf-8') as f:
-            json.dump(conversations, f, indent=4)
+        self._doc_conversation_log().update_fields(conversation_id, title=new_title)
 
     # --- Generic Assistant History Management ---
     def _get_history_path(self, module: str, assistant_id: str) -> str:
@@ -216,117 +281,143 @@ class DataManager:
         os.makedirs(module_dir, exist_ok=True)
         return os.path.join(module_dir, f"history_{assistant_id}.json")
 
+    def _assistant_conversation_log(self, module: str, assistant_id: str) -> ConversationLog:
+        legacy_path = self._get_history_path(module, assistant_id)
+        return self._conversation_log(os.path.splitext(legacy_path)[0], legacy_path, module, assistant_id)
+
     def get_assistant_conversations(self, module: str, assistant_id: str) -> List[Dict[str, Any]]:
-        path = self._get_history_path(module, assistant_id)
-        if os.path.exists(path):
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, list) and len(data) > 0 and "role" in data[0]:
-                        new_format = [{
-                            "id": str(uuid.uuid4()),
-                            "title": "Ancienne conversation",
-                            "updated_at": str(datetime.datetime.now()),
-                            "messages": data
-                        }]
-                        self.save_assistant_conversations(module, assistant_id, new_format)
-                        return new_format
-                    return data if isinstance(data, list) else []
-            except Exception as e:
-                print(f"Error loading conversations for {assistant_id}: {e}")
-                return []
-        return []
+        try:
+            return self._assistant_conversation_log(module, assistant_id).list()
+        except Exception as e:
+            print(f"Error loading conversations for {assistant_id}: {e}")
+            return []
+
+    def get_assistant_conversation_summaries(self, module: str, assistant_id: str) -> List[Dict[str, Any]]:
+        """Conversations of an assistant without their messages: id, title, updated_at, message_count."""
+        try:
+            return self._assistant_conversation_log(module, assistant_id).summaries()
+        except Exception as e:
+            print(f"Error loading conversation index for {assistant_id}: {e}")
+            return []
+
+    def get_assistant_conversation(self, module: str, assistant_id: str, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return self._assistant_conversation_log(module, assistant_id).get(conversation_id)
 
     def save_assistant_conversations(self, module: str, assistant_id: str, conversations: List[Dict[str, Any]]):
-        path = self._get_history_path(module, assistant_id)
         try:
-            with open(path, 'w', encoding='utf-8') as f:
-                json.dump(conversations, f, indent=4)
+            self._assistant_conversation_log(module, assistant_id).replace_all(conversations)
         except Exception as e:
             print(f"Error saving conversations for {assistant_id}: {e}")
 
     def save_assistant_conversation(self, module: str, assistant_id: str, conversation: Dict[str, Any]):
-        conversations = self.get_assistant_conversations(module, assistant_id)
-        found = False
-        for i, c in enumerate(conversations):
-            if c["id"] == conversation["id"]:
-                conversations[i] = conversation
-                found = True
-                break
-        if not found: conversations.append(conversation)
-        self.save_assistant_conversations(module, assistant_id, conversations)
+        try:
+            self._assistant_conversation_log(module, assistant_id).save(conversation)
+        except Exception as e:
+            print(f"Error saving conversation for {assistant_id}: {e}")
 
     def delete_assistant_conversation(self, module: str, assistant_id: str, conversation_id: str):
-        conversations = self.get_assistant_conversations(module, assistant_id)
-        conversations = [c for c in conversations if c["id"] != conversation_id]
-        self.save_assistant_conversations(module, assistant_id, conversations)
+        self._assistant_conversation_log(module, assistant_id).delete(conversation_id)
 
     def rename_assistant_conversation(self, module: str, assistant_id: str, conversation_id: str, new_title: str):
-        conversations = self.get_assistant_conversations(module, assistant_id)
-        for c in conversations:
-            if c["id"] == conversation_id:
-                c["title"] = new_title
-                break
-        self.save_assistant_conversations(module, assistant_id, conversations)
+        self._assistant_conversation_log(module, assistant_id).update_fields(conversation_id, title=new_title)
+
+    # --- Conversation search (see ConversationSearchIndex) ---
+    def search_conversations(self, query: str, module: Optional[str] = None, assistant_id: Optional[str] = None,
+                             since=None, until=None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Search the messages of every conversation, best matches first.
+
+        Args:
+            query: Words to find (very common words are ignored when the query has other words)
+            module: Only this module ('assistants', 'doc_analyst'...)
+            assistant_id: Only this assistant
+            since: First day (date, datetime or ISO string)
+            until: Last day, included
+            limit: Maximum number of results
+
+        Returns:
+            Matches with 'module', 'assistant_id', 'conversation_id', 'title', 'position', 'role',
+            'date', 'snippet' and 'score' (empty if search is unavailable)
+        """
+        if self.search_index is None:
+            return []
+        try:
+            return self.search_index.search(query, module, assistant_id, since, until, limit)
+        except Exception as e:
+            print(f"Error searching conversations: {e}")
+            return []
+
+    def _conversation_scopes(self) -> List[tuple]:
+        """(module, assistant_id, log) of every conversation scope on disk."""
+        scopes = [("doc_analyst", None, self._doc_conversation_log())]
+        for module in sorted(os.listdir(self.conv_root)):
+            module_dir = os.path.join(self.conv_root, module)
+            if module == "doc_analyst" or not os.path.isdir(module_dir):
+                continue
+            assistant_ids = set()
+            for name in os.listdir(module_dir):
+                base, ext = os.path.splitext(name)
+                # history_<id>/ (logs) or history_<id>.json (not migrated yet)
+                if base.startswith("history_") and (ext == ".json" or (not ext and os.path.isdir(os.path.join(module_dir, name)))):
+                    assistant_ids.add(base[len("history_"):])
+            scopes += [(module, assistant_id, self._assistant_conversation_log(module, assistant_id))
+                       for assistant_id in sorted(assistant_ids)]
+        return scopes
+
+    def rebuild_search_index(self) -> int:
+        """
+        Re-index every conversation from the logs (oldest first, as if they had been saved live).
+
+        Returns:
+            Number of indexed conversations
+        """
+        if self.search_index is None:
+            return 0
+        conversations = []
+        for module, assistant_id, log in self._conversation_scopes():
+            for summary in log.summaries():
+                updated_at = str(summary.get("updated_at") or "").replace("T", " ")
+                conversations.append((updated_at, module, assistant_id, log, summary["id"]))
+        conversations.sort(key=lambda item: item[0])
+
+        self.search_index.clear()
+        count = 0
+        for _, module, assistant_id, log, conversation_id in conversations:
+            conversation = log.get(conversation_id)
+            if conversation is not None:
+                self.search_index.index_conversation(module, assistant_id, conversation)
+                count += 1
+        self.search_index.optimize()
+        return count
         
-    # --- Knowledge Base Management (Partial moved logic could improve this too, but leaving for now) ---
+    # --- Delegation: Knowledge Bases ---
     def get_all_knowledge_bases(self) -> List[Dict[str, Any]]:
-        try:
-            with open(self.knowledge_bases_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception: return []
-
-    def save_knowledge_base(self, name: str, description: str) -> Dict[str, Any]:
-        knowledge_bases = self.get_all_knowledge_bases()
-        now = datetime.datetime.now().isoformat()
-        new_kb = {
-            "id": str(uuid.uuid4()), "name": name, "description": description,
-            "created_at": now, "updated_at": now, "document_count": 0, "chunk_count": 0
-        }
-        knowledge_bases.append(new_kb)
-        with open(self.knowledge_bases_path, 'w', encoding='utf-8') as f:
-            json.dump(knowledge_bases, f, indent=4)
-        return new_kb
+        return self.kb_repo.get_all()
+
+    def save_knowledge_base(
+        self, name: str, description: str, storage: str = "float32", vector_backend: str = "chroma"
+    ) -> Dict[str, Any]:
+        return self.kb_repo.create(name, description, storage=storage, vector_backend=vector_backend)
 
     def update_knowledge_base(self, kb_id: str, **kwargs) -> None:
-        knowledge_bases = self.get_all_knowledge_bases()
-        for kb in knowledge_bases:
-            if kb["id"] == kb_id:
-                for k, v in kwargs.items():
-                    if v is not None: kb[k] = v
-                kb["updated_at"] = datetime.datetime.now().isoformat()
-                break
-        with open(self.knowledge_bases_path, 'w', encoding='utf-8') as f:
-            json.dump(knowledge_bases, f, indent=4)
+        self.kb_repo.update(kb_id, **kwargs)
 
     def delete_knowledge_base(self, kb_id: str) -> None:
-        knowledge_bases = self.get_all_knowledge_bases()
-        knowledge_bases = [kb for kb in knowledge_bases if kb["id"] != kb_id]
-        with open(self.knowledge_bases_path, 'w', encoding='utf-8') as f:
-            json.dump(knowledge_bases, f, indent=4)
+        self.kb_repo.delete(kb_id)
 
     def get_knowledge_base_by_id(self, kb_id: str) -> Optional[Dict[str, Any]]:
-        knowledge_bases = self.get_all_knowledge_bases()
-        for kb in knowledge_bases:
-            if kb["id"] == kb_id: return kb
-        return None
+        return self.kb_repo.get_by_id(kb_id)
 
     def add_document_to_kb(self, kb_id: str, doc_metadata: Dict[str, Any]) -> None:
         """
         Add a document metadata entry to a knowledge base.
         doc_metadata should contain: id, name, summary, added_at
+        An existing entry with the same id is replaced (re-indexed file).
         """
-        knowledge_bases = self.get_all_knowledge_bases()
-        found = False
-        for kb in knowledge_bases:
-            if kb["id"] == kb_id:
-                if "documents" not in kb:
-                    kb["documents"] = []
-                kb["documents"].append(doc_metadata)
-                kb["updated_at"] = datetime.datetime.now().isoformat()
-                found = True
-                break
-        
-        if found:
-            with open(self.knowledge_bases_path, 'w', encoding='utf-8') as f:
-                json.dump(knowledge_bases, f, indent=4)
+        self.kb_repo.add_document(kb_id, doc_metadata)
+
+    def remove_documents_from_kb(self, kb_id: str, doc_ids: List[str]) -> None:
+        """Remove document metadata entries (e.g. files deleted from an indexed folder)."""
+        if not doc_ids:
+            return
+        self.kb_repo.remove_documents(kb_id, doc_ids)
@@ -0,0 +1,166 @@
+"""
+Incremental conversation list for chat sidebars.
+Rows are created once per conversation, then only updated (title, highlight) and re-ordered,
+instead of destroying and rebuilding every widget after each message. Only the most recent
+conversations get rows; older ones are shown a page at a time.
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+import customtkinter as ctk
+
+# Rows shown before the "Afficher plus" button
+DEFAULT_PAGE_SIZE = 50
+
+DEFAULT_STYLE = {
+    "active_color": ("gray80", "gray30"),
+    "hover_color": ("gray75", "gray35"),
+    "height": 32,
+    "corner_radius": 8,
+    "action_width": 28,
+    "delete_color": "#F44336",
+}
+
+
+class ConversationSidebar:
+    """Conversation rows (select, rename, delete) inside a scrollable frame."""
+
+    def __init__(
+        self,
+        parent,
+        on_select: Callable[[str], None],
+        on_rename: Callable[[str], None],
+        on_delete: Callable[[str], None],
+        page_size: int = DEFAULT_PAGE_SIZE,
+        **style
+    ):
+        """
+        Initialize the sidebar (UI thread only).
+
+        Args:
+            parent: Frame receiving the rows
+            on_select: Called with the id of the clicked conversation
+            on_rename: Called with the id of the conversation to rename
+            on_delete: Called with the id of the conversation to delete
+            page_size: Rows added per page
+            **style: Overrides of DEFAULT_STYLE
+        """
+        self.parent = parent
+        self.on_select = on_select
+        self.on_rename = on_rename
+        self.on_delete = on_delete
+        self.style = {**DEFAULT_STYLE, **style}
+        # conversation id -> {"frame", "button", "title", "active"}
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._order: List[str] = []
+        self.page_size = page_size
+        self._limit = page_size
+        self._last_update = ([], None)
+        self._more_button = None
+
+    def update(self, summaries: List[Dict[str, Any]], active_id: Optional[str]) -> None:
+        """
+        Show conversations, most recently updated first.
+
+        Args:
+            summaries: Conversation summaries ('id', 'title', 'updated_at')
+            active_id: Conversation to highlight
+        """
+        self._last_update = (summaries, active_id)
+        try:
+            summaries = sorted(summaries, key=lambda s: s.get("updated_at") or "", reverse=True)
+        except TypeError:
+            pass  # Legacy or malformed dates keep the stored order
+        has_more = len(summaries) > self._limit
+        summaries = summaries[:self._limit]
+
+        ids = [summary["id"] for summary in summaries]
+        for conversation_id in set(self._rows) - set(ids):
+            self._rows.pop(conversation_id)["frame"].destroy()
+
+        for summary in summaries:
+            conversation_id = summary["id"]
+            title = summary.get("title") or "Sans titre"
+            active = conversation_id == active_id
+            row = self._rows.get(conversation_id)
+            if row is None:
+                self._rows[conversation_id] = self._create_row(conversation_id, title, active)
+            elif row["title"] != title or row["active"] != active:
+                row["button"].configure(
+                    text=title,
+                    fg_color=self.style["active_color"] if active else "transparent",
+                    font=("Arial", 12, "bold" if active else "normal")
+                )
+                row.update(title=title, active=active)
+
+        if ids != self._order:
+            for conversation_id in self._order:
+                if conversation_id in self._rows:
+                    self._rows[conversation_id]["frame"].pack_forget()
+            for conversation_id in ids:
+                self._rows[conversation_id]["frame"].pack(fill="x", pady=2)
+            self._order = ids
+        self._update_more_button(has_more)
+
+    def _update_more_button(self, has_more: bool) -> None:
+        if self._more_button is None:
+            self._more_button = ctk.CTkButton(
+                self.parent,
+                text="Afficher plus",
+                fg_color="transparent",
+                text_color="gray",
+                hover_color=("gray90", "gray40"),
+                height=28,
+                command=self.show_more
+            )
+        # Re-packed so it stays below the rows
+        self._more_button.pack_forget()
+        if has_more:
+            self._more_button.pack(fill="x", pady=(5, 2))
+
+    def show_more(self) -> None:
+        """Add a page of older conversations."""
+        self._limit += self.page_size
+        self.update(*self._last_update)
+
+    def _create_row(self, conversation_id: str, title: str, active: bool) -> Dict[str, Any]:
+        style = self.style
+        frame = ctk.CTkFrame(self.parent, fg_color="transparent")
+
+        button = ctk.CTkButton(
+            frame,
+            text=title,
+            anchor="w",
+            fg_color=style["active_color"] if active else "transparent",
+            text_color=("black", "white"),
+            hover_color=style["hover_color"],
+            font=("Arial", 12, "bold" if active else "normal"),
+            height=style["height"],
+            corner_radius=style["corner_radius"],
+            command=lambda: self.on_select(conversation_id)
+        )
+        button.pack(side="left", fill="x", expand=True, padx=(0, 5))
+
+        ctk.CTkButton(
+            frame,
+            text="✎",
+            width=style["action_width"],
+            height=style["action_width"],
+            fg_color="transparent",
+            text_color="gray",
+            hover_color=("gray90", "gray40"),
+            command=lambda: self.on_rename(conversation_id)
+        ).pack(side="right")
+
+        ctk.CTkButton(
+            frame,
+            text="X",
+            width=style["action_width"],
+            height=style["action_width"],
+            fg_color="transparent",
+            text_color=style["delete_color"],
+            hover_color=("mistyrose", "darkred"),
+            command=lambda: self.on_delete(conversation_id)
+        ).pack(side="right")
+
+        return {"frame": frame, "button": button, "title": title, "active": active}
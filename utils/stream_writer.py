@@ -0,0 +1,92 @@
+"""
+Coalesced rendering of streamed text into Tk text widgets.
+Worker threads write deltas; the UI thread appends them in batches, at most once per interval.
+"""
+
+from typing import Callable, List, Optional
+import threading
+
+# One widget update per interval instead of one per token
+DEFAULT_FLUSH_INTERVAL_MS = 50
+
+
+class CoalescedTextWriter:
+    """Buffers text written from any thread and appends it to a text widget on the UI thread."""
+
+    def __init__(
+        self,
+        widget,
+        tag: Optional[str] = None,
+        prefix: str = "",
+        interval_ms: int = DEFAULT_FLUSH_INTERVAL_MS,
+        on_done: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Initialize the writer (call start() from the UI thread).
+
+        Args:
+            widget: Text widget (tk.Text or CTkTextbox) rendered in 'end' position
+            tag: Optional text tag applied to inserted text
+            prefix: Text inserted before the first chunk (e.g. the speaker name)
+            interval_ms: Minimum delay between two widget updates
+            on_done: Called on the UI thread with the complete text once closed and flushed
+        """
+        self.widget = widget
+        self.tag = tag
+        self.prefix = prefix
+        self.interval_ms = interval_ms
+        self.on_done = on_done
+        self._pending: List[str] = []
+        self._written: List[str] = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @property
+    def text(self) -> str:
+        """Streamed text rendered so far (without the prefix)."""
+        return "".join(self._written)
+
+    def start(self) -> None:
+        """Start the periodic flush (UI thread)."""
+        self.widget.after(self.interval_ms, self._tick)
+
+    def write(self, text: str) -> None:
+        """Queue text for rendering (any thread)."""
+        if text:
+            with self._lock:
+                self._pending.append(text)
+
+    def close(self) -> None:
+        """Mark the stream complete; the next flush renders the rest and calls on_done (any thread)."""
+        with self._lock:
+            self._closed = True
+
+    def _tick(self) -> None:
+        with self._lock:
+            chunk = "".join(self._pending)
+            self._pending = []
+            closed = self._closed
+
+        try:
+            if not self.widget.winfo_exists():
+                return
+        except Exception:
+            # Widget destroyed with its window
+            return
+
+        if chunk:
+            rendered = chunk if self._written else self.prefix + chunk
+            self._written.append(chunk)
+            self.widget.configure(state="normal")
+            if self.tag:
+                self.widget.insert("end", rendered, self.tag)
+            else:
+                self.widget.insert("end", rendered)
+            self.widget.configure(state="disabled")
+            self.widget.see("end")
+
+        if closed:
+            if self.on_done:
+                self.on_done(self.text)
+        else:
+            self.widget.after(self.interval_ms, self._tick)